@@ -6,6 +6,7 @@ import sys
 import time
 import re
 import traceback
+from contextlib import nullcontext
 from functools import partial
 
 import numpy as np
@@ -32,6 +33,7 @@ class CoreManager(Singleton):
         self.need_to_gc_collect = False
 
         self.is_basic_mode = False
+        self.is_headless = False
 
         # timer
         self.fps = 0.0
@@ -92,7 +94,10 @@ class CoreManager(Singleton):
     def gc_collect(self):
         self.need_to_gc_collect = True
 
-    def initialize(self, cmdQueue, uiCmdQueue, cmdPipe, project_filename=""):
+    def initialize(self, cmdQueue, uiCmdQueue, cmdPipe, project_filename="", headless_options=None):
+        """
+        :param headless_options: keyword arguments of GameBackend_headless.Headless, run without a window and a GL context if not None.
+        """
         # process start
         logger.info('Platform : %s' % platformModule.platform())
         logger.info("Process Start : %s" % GetClassName(self))
@@ -114,7 +119,6 @@ class CoreManager(Singleton):
         from PyEngine3D.ResourceManager import ResourceManager
         from PyEngine3D.Render import Renderer, Renderer_Basic, RenderTargetManager, FontManager, RenderOptionManager, EffectManager, DebugLineManager, RenderOption
         from .SceneManager import SceneManager
-        from .SoundManager import SoundManager
         from .ProjectManager import ProjectManager
 
         self.opengl_context = OpenGLContext
@@ -127,7 +131,10 @@ class CoreManager(Singleton):
         self.render_option = RenderOption
         self.debug_line_manager = DebugLineManager.instance()
         self.scene_manager = SceneManager.instance()
-        self.sound_manager = SoundManager.instance()
+        if headless_options is None:
+            # the headless mode has no audio device, the openal is not required.
+            from .SoundManager import SoundManager
+            self.sound_manager = SoundManager.instance()
         self.effect_manager = EffectManager.instance()
         self.project_manager = ProjectManager.instance()
 
@@ -156,36 +163,46 @@ class CoreManager(Singleton):
             self.game_backend = GameBackend_pyglet.PyGlet(self)
             self.last_game_backend = GameBackNames.PYGLET
 
-        for i in range(GameBackNames.COUNT):
-            if self.last_game_backend == GameBackNames.PYGAME:
-                try:
-                    run_pygame()
-                    break
-                except:
-                    logger.error(traceback.format_exc())
-                    logger.error("The pygame library does not exist and execution failed. Run again with the pyglet.")
-                    self.last_game_backend = GameBackNames.PYGLET
-            else:
-                try:
-                    run_pyglet()
-                    break
-                except:
-                    logger.error(traceback.format_exc())
-                    logger.error("The pyglet library does not exist and execution failed. Run again with the pygame.")
-                    self.last_game_backend = GameBackNames.PYGAME
+        if headless_options is not None:
+            # the headless mode uses the paths of the basic mode which don't need the GL resources, and skips the rendering.
+            from .GameBackend import GameBackend_headless
+            self.game_backend = GameBackend_headless.Headless(self, **headless_options)
+            self.is_headless = True
+            self.is_basic_mode = True
+            self.renderer = Renderer_Basic.instance()
         else:
-            logger.error('PyGame or PyGlet is required. Please run "pip install -r requirements.txt" and try again.')
-            # send a message to close ui
-            if self.uiCmdQueue:
-                self.uiCmdQueue.put(COMMAND.CLOSE_UI)
-            return False
+            for i in range(GameBackNames.COUNT):
+                if self.last_game_backend == GameBackNames.PYGAME:
+                    try:
+                        run_pygame()
+                        break
+                    except:
+                        logger.error(traceback.format_exc())
+                        logger.error("The pygame library does not exist and execution failed. Run again with the pyglet.")
+                        self.last_game_backend = GameBackNames.PYGLET
+                else:
+                    try:
+                        run_pyglet()
+                        break
+                    except:
+                        logger.error(traceback.format_exc())
+                        logger.error("The pyglet library does not exist and execution failed. Run again with the pygame.")
+                        self.last_game_backend = GameBackNames.PYGAME
+            else:
+                logger.error('PyGame or PyGlet is required. Please run "pip install -r requirements.txt" and try again.')
+                # send a message to close ui
+                if self.uiCmdQueue:
+                    self.uiCmdQueue.put(COMMAND.CLOSE_UI)
+                return False
 
         self.game_backend.create_window(width, height, full_screen)
-        self.opengl_context.initialize()
 
-        if not self.opengl_context.check_gl_version():
-            self.is_basic_mode = True
-            self.renderer = Renderer_Basic.instance()
+        if not self.is_headless:
+            self.opengl_context.initialize()
+
+            if not self.opengl_context.check_gl_version():
+                self.is_basic_mode = True
+                self.renderer = Renderer_Basic.instance()
 
         self.send_game_backend_list(self.game_backend_list)
         index = self.game_backend_list.index(self.last_game_backend) if self.last_game_backend in self.game_backend_list else 0
@@ -205,7 +222,8 @@ class CoreManager(Singleton):
         self.renderer.initialize(self)
         self.debug_line_manager.initialize(self)
         self.scene_manager.initialize(self)
-        self.sound_manager.initialize(self)
+        if self.sound_manager is not None:
+            self.sound_manager.initialize(self)
 
         # self.viewport_manager.build_ui_example()
 
@@ -250,6 +268,7 @@ class CoreManager(Singleton):
         # send a message to close ui
         if self.uiCmdQueue:
             self.uiCmdQueue.put(COMMAND.CLOSE_UI)
+            self.uiCmdQueue.close()
 
         # write config
         if self.valid:
@@ -258,11 +277,13 @@ class CoreManager(Singleton):
             self.config.save()  # save config
 
         # save project
-        self.sound_manager.clear()
+        if self.sound_manager is not None:
+            self.sound_manager.clear()
         self.project_manager.close_project()
         self.renderer.close()
         self.resource_manager.close()
-        self.sound_manager.close()
+        if self.sound_manager is not None:
+            self.sound_manager.close()
         self.game_backend.quit()
 
         logger.info("Process Stop : %s" % GetClassName(self))  # process stop
@@ -286,6 +307,12 @@ class CoreManager(Singleton):
         if self.uiCmdQueue:
             self.uiCmdQueue.put(*args)
 
+    def batch_send(self):
+        """
+        The messages which are sent in this context are sent to the ui as a batch.
+        """
+        return self.uiCmdQueue.batch() if self.uiCmdQueue else nullcontext()
+
     def request(self, *args):
         """
         :param args: command, value1, value2,...
@@ -309,9 +336,10 @@ class CoreManager(Singleton):
 
     def send_object_list(self):
         obj_names = self.scene_manager.get_object_names()
-        for obj_name in obj_names:
-            obj = self.scene_manager.get_object(obj_name)
-            self.send_object_info(obj)
+        with self.batch_send():
+            for obj_name in obj_names:
+                obj = self.scene_manager.get_object(obj_name)
+                self.send_object_info(obj)
 
     def notify_change_resolution(self, screen_info):
         self.send(COMMAND.TRANS_SCREEN_INFO, screen_info)
@@ -386,7 +414,7 @@ class CoreManager(Singleton):
         # Resource commands
         def cmd_load_resource(value):
             resource_name, resource_type_name = value
-            self.resource_manager.load_resource(resource_name, resource_type_name)
+            self.resource_manager.request_loading(resource_name, resource_type_name, force=True)
         self.commands[COMMAND.LOAD_RESOURCE.value] = cmd_load_resource
 
         def cmd_action_resource(value):
@@ -705,7 +733,7 @@ class CoreManager(Singleton):
             camera_transform.reset_transform()
 
     def update(self):
-        current_time = time.perf_counter()
+        current_time = self.game_backend.get_current_time()
         delta = current_time - self.current_time
 
         if self.vsync and delta < self.limit_delta or delta == 0.0:
@@ -750,14 +778,15 @@ class CoreManager(Singleton):
 
         self.scene_manager.update_scene(delta)
 
-        self.sound_manager.update(delta)
+        if self.sound_manager is not None:
+            self.sound_manager.update(delta)
 
         # Start Render Scene
         end_time = time.perf_counter()
         self.logic_time = (end_time - start_time) * 1000.0  # millisecond
         start_time = end_time
 
-        if not self.video_resized:
+        if not self.video_resized and not self.is_headless:
             # render_light_probe scene
             self.renderer.render_light_probe(self.scene_manager.main_light_probe)
 
@@ -814,16 +843,38 @@ class CoreManager(Singleton):
             self.font_manager.log("GPU : %.2f ms" % self.avg_gpu_time)
             self.font_manager.log("Render : %.2f ms" % self.avg_render_time)
             self.font_manager.log("Present : %.2f ms" % self.avg_present_time)
+            self.font_manager.log("GL Calls : %d, Skipped : %d" % self.opengl_context.state_cache.get_frame_call_counts())
 
             render_count = len(self.scene_manager.skeleton_solid_render_infos)
             render_count += len(self.scene_manager.skeleton_translucent_render_infos)
             render_count += len(self.scene_manager.static_solid_render_infos)
             render_count += len(self.scene_manager.static_translucent_render_infos)
             self.font_manager.log("Render Count : %d" % render_count)
+            self.font_manager.log("Actor Draw Calls : %d, Instance Batches : %d ( %d Render Infos )" %
+                                  (self.renderer.actor_draw_call_count, self.renderer.instance_batch_count,
+                                   self.renderer.batched_render_info_count))
+            if self.uiCmdQueue:
+                statistics = self.uiCmdQueue.statistics
+                self.font_manager.log("UI Commands : %d, Batches : %d, Shared Memory : %d KB" %
+                                      (statistics.put_count, statistics.batch_count, statistics.shared_memory_bytes // 1024))
+                statistics = self.cmdQueue.statistics
+                self.font_manager.log("Editor Commands : %d ( %.2f ms avg, %.2f ms max )" %
+                                      (statistics.get_count, statistics.get_average_latency() * 1000.0,
+                                       statistics.max_latency * 1000.0))
+            self.font_manager.log("Rebuilt Render Info : %d" % self.scene_manager.rebuilt_render_info_count)
             self.font_manager.log("Point Lights : %d" % self.scene_manager.point_light_count)
             self.font_manager.log("Effect Count : %d" % len(self.effect_manager.render_effects))
             self.font_manager.log("Particle Count : %d" % self.effect_manager.alive_particle_count)
 
+            loading_count = self.resource_manager.get_loading_count()
+            if 0 < loading_count:
+                self.font_manager.log("Loading Resources : %d" % loading_count)
+            for resource_type_name, metric in self.resource_manager.get_loading_metrics().items():
+                self.font_manager.log("Load %s : %d, avg %.2f ms, max %.2f ms" % (resource_type_name,
+                                                                                metric.count,
+                                                                                metric.get_average_latency() * 1000.0,
+                                                                                metric.max_latency * 1000.0))
+
             # selected object transform info
             selected_object = self.scene_manager.get_selected_object()
             if selected_object:
@@ -1,4 +1,5 @@
 import os
+import time
 
 import numpy as np
 
@@ -9,7 +10,8 @@ from PyEngine3D.Common import logger, log_level, COMMAND
 class GameBackNames:
     PYGLET = "pyglet"
     PYGAME = "pygame"
-    COUNT = 2
+    COUNT = 2  # the window backends
+    HEADLESS = "headless"
 
 
 class Event(AutoEnum):
@@ -269,6 +271,9 @@ class GameBackend:
         self.key_pressed = dict()
         self.key_released = dict()
 
+    def get_current_time(self):
+        return time.perf_counter()
+
     def get_input_mode(self):
         return self.input_mode
 
@@ -327,10 +332,13 @@ class GameBackend:
     def create_window(self, width, height, fullscreen):
         if self.set_window_info(width, height, fullscreen):
             self.do_change_resolution()
+            self.core_manager.opengl_context.invalidate_state_cache()
 
     def change_resolution(self, width, height, full_screen):
         if self.set_window_info(width, height, full_screen):
+            # the window backend can re-create the context.
             self.do_change_resolution()
+            self.core_manager.opengl_context.invalidate_state_cache()
             self.reset_screen()
 
     def reset_screen(self):
@@ -345,6 +353,7 @@ class GameBackend:
 
     def resize_scene_to_window(self):
         if self.set_window_info(self.goal_width, self.goal_height, self.full_screen):
+            self.core_manager.opengl_context.invalidate_state_cache()
             self.reset_screen()
 
     def create_sound_listner(self):
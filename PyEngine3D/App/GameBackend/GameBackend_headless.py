@@ -0,0 +1,180 @@
+import random
+import time
+
+import numpy as np
+
+from PyEngine3D.Common import logger
+from .GameBackend import GameBackend, Keyboard, Event
+
+
+class Headless(GameBackend):
+    """
+    The game backend without a window and a GL context, it runs the simulation of the scenes on the servers and the benchmarks.
+    The inputs are replayed from the input events of each frame, so the runs with the fixed delta are deterministic.
+    """
+    def __init__(self, core_manager, fixed_delta=None, max_frame_count=0, input_events=None, random_seed=None):
+        """
+        :param fixed_delta: delta time of a frame in seconds, the elapsed time is used if None.
+        :param max_frame_count: run until the close if 0.
+        :param input_events: [dict(frame=frame index, event=Event name, value=event value), ...]
+        """
+        GameBackend.__init__(self, core_manager)
+
+        logger.info('GameBackend : headless')
+
+        self.fixed_delta = fixed_delta
+        self.max_frame_count = max_frame_count
+        self.frame_index = 0
+        self.frame_times = []
+        self.input_events = {}  # { frame index : [(event type, event value), ...] }
+
+        if random_seed is not None:
+            random.seed(random_seed)
+            np.random.seed(random_seed)
+
+        # the key codes are defined by the window backends, so give an unique code to each key.
+        for key_code, symbol in enumerate(sorted(x for x in Keyboard.__dict__ if not x.startswith('__'))):
+            setattr(Keyboard, symbol, key_code)
+            self.key_pressed[key_code] = False
+
+        for input_event in (input_events or []):
+            self.push_input_event(**input_event)
+
+        self.valid = True
+
+    def push_input_event(self, frame, event, value=None):
+        """
+        :param event: Event or the name of Event
+        :param value: the name of Keyboard for KEYDOWN and KEYUP, (x, y) for MOUSE_MOVE, 1 ~ 5 for the mouse buttons.
+        """
+        event_type = Event[event] if isinstance(event, str) else event
+        if event_type in (Event.KEYDOWN, Event.KEYUP) and isinstance(value, str):
+            value = getattr(Keyboard, value)
+        self.input_events.setdefault(frame, []).append((event_type, value))
+
+    def get_current_time(self):
+        if self.fixed_delta is not None:
+            return (self.frame_index + 1) * self.fixed_delta
+        return time.perf_counter()
+
+    def set_window_title(self, title):
+        pass
+
+    def set_mouse_visible(self, visible):
+        pass
+
+    def do_change_resolution(self):
+        pass
+
+    def update_event(self):
+        self.mouse_pos_old[...] = self.mouse_pos
+
+        self.btn_l_down = False
+        self.btn_m_down = False
+        self.btn_r_down = False
+        self.btn_l_up = False
+        self.btn_m_up = False
+        self.btn_r_up = False
+        self.wheel_up = False
+        self.wheel_down = False
+        self.keyboard_up = False
+        self.keyboard_down = False
+        self.key_released.clear()
+
+        for event_type, event_value in self.input_events.get(self.frame_index, []):
+            if event_type == Event.QUIT:
+                self.core_manager.update_event(Event.QUIT)
+            elif event_type == Event.VIDEORESIZE:
+                self.goal_width, self.goal_height = event_value
+                self.core_manager.update_event(Event.VIDEORESIZE, (self.goal_width, self.goal_height, self.full_screen))
+            elif event_type == Event.TEXT:
+                self.text = event_value
+                self.core_manager.update_event(Event.TEXT, event_value)
+            elif event_type == Event.KEYDOWN:
+                self.keyboard_down = True
+                self.keyboard_pressed = True
+                self.key_pressed[event_value] = True
+                self.key_released[event_value] = False
+                self.core_manager.update_event(Event.KEYDOWN, event_value)
+            elif event_type == Event.KEYUP:
+                self.text = ''
+                self.keyboard_up = True
+                self.keyboard_pressed = False
+                self.key_pressed[event_value] = False
+                self.key_released[event_value] = True
+                self.core_manager.update_event(Event.KEYUP, event_value)
+            elif event_type == Event.MOUSE_MOVE:
+                self.mouse_pos[...] = event_value
+                self.core_manager.update_event(Event.MOUSE_MOVE)
+            elif event_type == Event.MOUSE_BUTTON_DOWN:
+                if event_value == 1:
+                    self.btn_l_down = True
+                    self.btn_l_pressed = True
+                elif event_value == 2:
+                    self.btn_m_down = True
+                    self.btn_m_pressed = True
+                elif event_value == 3:
+                    self.btn_r_down = True
+                    self.btn_r_pressed = True
+                elif event_value == 4:
+                    self.wheel_up = True
+                elif event_value == 5:
+                    self.wheel_down = True
+                self.core_manager.update_event(Event.MOUSE_BUTTON_DOWN)
+            elif event_type == Event.MOUSE_BUTTON_UP:
+                if event_value == 1:
+                    self.btn_l_up = True
+                    self.btn_l_pressed = False
+                elif event_value == 2:
+                    self.btn_m_up = True
+                    self.btn_m_pressed = False
+                elif event_value == 3:
+                    self.btn_r_up = True
+                    self.btn_r_pressed = False
+                self.core_manager.update_event(Event.MOUSE_BUTTON_UP)
+        self.mouse_delta[...] = self.mouse_pos - self.mouse_pos_old
+
+    def get_keyboard_pressed(self):
+        return self.key_pressed
+
+    def flip(self):
+        pass
+
+    def run(self):
+        self.running = True
+        while self.running:
+            start_time = time.perf_counter()
+            self.update_event()
+            self.core_manager.update()
+            self.frame_times.append(time.perf_counter() - start_time)
+
+            self.frame_index += 1
+            if 0 < self.max_frame_count <= self.frame_index:
+                self.running = False
+
+    def get_frame_time_report(self):
+        """
+        :return: dict of the frame times in milliseconds
+        """
+        frame_times = np.array(self.frame_times or [0.0, ], dtype=np.float64) * 1000.0
+        return dict(frame_count=len(self.frame_times),
+                    total=float(np.sum(frame_times)),
+                    average=float(np.mean(frame_times)),
+                    min=float(np.min(frame_times)),
+                    max=float(np.max(frame_times)),
+                    p95=float(np.percentile(frame_times, 95.0)))
+
+    def close(self):
+        self.running = False
+
+    def quit(self):
+        pass
+
+    def create_sound_listner(self):
+        return None
+
+    def create_music(self, filepath, volume=1.0, loop=False):
+        pass
+
+    def pause_sound(self, sound):
+        pass
@@ -8,9 +8,10 @@ import numpy as np
 
 from PyEngine3D.Common import logger
 from PyEngine3D.Common.Constants import *
-from PyEngine3D.Render import CollisionActor, StaticActor, SkeletonActor, AxisGizmo
+from PyEngine3D.Render import CollisionActor, StaticActor, SkeletonActor, AxisGizmo, update_skeleton_actors
 from PyEngine3D.Render import Camera, MainLight, PointLight, LightProbe
-from PyEngine3D.Render import gather_render_infos, always_pass, view_frustum_culling_geometry, shadow_culling
+from PyEngine3D.Render import CullingTable, gather_render_infos, sort_render_infos
+from PyEngine3D.Render import always_pass, view_frustum_culling_geometry, shadow_culling
 from PyEngine3D.Render import Atmosphere, Ocean, Terrain
 from PyEngine3D.Render import Effect
 from PyEngine3D.Render import Spline3D
@@ -72,6 +73,14 @@ class SceneManager(Singleton):
         self.skeleton_translucent_render_infos = []
         self.skeleton_shadow_render_infos = []
 
+        # batched culling
+        self.collision_culling_table = CullingTable(use_bvh=True)
+        self.static_culling_table = CullingTable(use_bvh=True)
+        self.skeleton_culling_table = CullingTable()
+        self.static_render_info_options = None
+        self.skeleton_render_info_options = None
+        self.rebuilt_render_info_count = 0
+
         self.axis_gizmo_render_infos = []
         self.spline_gizmo_render_infos = []
 
@@ -124,6 +133,12 @@ class SceneManager(Singleton):
         self.selected_object_render_info = []
         self.spline_gizmo_render_infos = []
 
+        self.collision_culling_table.set_dirty()
+        self.static_culling_table.set_dirty()
+        self.skeleton_culling_table.set_dirty()
+        self.static_render_info_options = None
+        self.skeleton_render_info_options = None
+
         self.renderer.set_debug_texture(None)
 
     def begin_open_scene(self):
@@ -264,6 +279,25 @@ class SceneManager(Singleton):
             return self.splines
         return None
 
+    def get_culling_table(self, object_type):
+        if CollisionActor == object_type:
+            return self.collision_culling_table
+        elif StaticActor == object_type:
+            return self.static_culling_table
+        elif SkeletonActor == object_type:
+            return self.skeleton_culling_table
+        return None
+
+    def set_culling_table_dirty(self, object_type):
+        culling_table = self.get_culling_table(object_type)
+        if culling_table is not None:
+            culling_table.set_dirty()
+
+    def set_render_infos_dirty(self):
+        self.collision_culling_table.set_render_infos_dirty()
+        self.static_culling_table.set_render_infos_dirty()
+        self.skeleton_culling_table.set_render_infos_dirty()
+
     def generate_object_id(self):
         object_id = self.objectIDEntry[self.objectIDCounter]
         self.objectIDCounter += 1
@@ -280,6 +314,7 @@ class SceneManager(Singleton):
             object_list = self.get_object_list(object_type)
             if object_list is not None:
                 object_list.append(obj)
+                self.set_culling_table_dirty(object_type)
             elif object_type is Effect:
                 self.effect_manager.add_effect(obj)
             if hasattr(obj, 'set_object_id'):
@@ -297,6 +332,7 @@ class SceneManager(Singleton):
             object_list = self.get_object_list(object_type)
             if object_list is not None:
                 object_list.remove(obj)
+                self.set_culling_table_dirty(object_type)
             elif object_type is Effect:
                 self.effect_manager.delete_effect(obj)
 
@@ -507,6 +543,9 @@ class SceneManager(Singleton):
         self.skeleton_actors = []
         self.splines = []
         self.objectMap = {}
+        self.collision_culling_table.set_dirty()
+        self.static_culling_table.set_dirty()
+        self.skeleton_culling_table.set_dirty()
 
     def clear_actors(self):
         for obj_name in list(self.objectMap.keys()):
@@ -709,7 +748,43 @@ class SceneManager(Singleton):
         object_id = math.floor(object_ids[y][x] + 0.5)
         return object_id
 
+    def get_mouse_ray(self):
+        """
+        :return: (origin, direction) of the ray from the main camera to the mouse position.
+        """
+        windows_size = self.core_manager.get_window_size()
+        mouse_pos = self.core_manager.get_mouse_pos()
+        mouse_x_ratio = mouse_pos[0] / windows_size[0]
+        mouse_y_ratio = mouse_pos[1] / windows_size[1]
+        mouse_world_pos = np.dot(Float4(mouse_x_ratio * 2.0 - 1.0, mouse_y_ratio * 2.0 - 1.0, 0.0, 1.0), self.main_camera.inv_view_origin_projection)
+        return self.main_camera.transform.get_pos().copy(), normalize(mouse_world_pos[0:3] / mouse_world_pos[3])
+
+    def get_ray_intersect_actor(self, origin, direction, max_distance=np.inf):
+        nearest_actor = None
+        nearest_distance = max_distance
+        culling_tables = []
+        if RenderOption.RENDER_COLLISION:
+            culling_tables.append((self.collision_culling_table, self.collision_actors))
+        if RenderOption.RENDER_STATIC_ACTOR:
+            culling_tables.append((self.static_culling_table, self.static_actors))
+        if RenderOption.RENDER_SKELETON_ACTOR:
+            culling_tables.append((self.skeleton_culling_table, self.skeleton_actors))
+
+        for culling_table, actor_list in culling_tables:
+            culling_table.update(actor_list)
+            actor, distance = culling_table.ray_intersect(origin, direction, nearest_distance)
+            if actor is not None and distance < nearest_distance:
+                nearest_actor = actor
+                nearest_distance = distance
+        return nearest_actor
+
     def intersect_select_object(self):
+        if not RenderOption.RENDER_OBJECT_ID:
+            # There is no object id render target, so pick the nearest bound box with the mouse ray.
+            actor = self.get_ray_intersect_actor(*self.get_mouse_ray())
+            self.set_selected_object(actor.name if actor is not None else "")
+            return
+
         object_id = self.update_select_object_id()
         if 0 < object_id:
             if object_id < AxisGizmo.ID_COUNT:
@@ -733,9 +808,14 @@ class SceneManager(Singleton):
             camera.update_projection(fov, aspect)
 
     def update_static_render_info(self):
+        if RenderOption.BATCHED_CULLING:
+            self.update_static_render_info_with_culling_table()
+            return
+
         self.static_solid_render_infos = []
         self.static_translucent_render_infos = []
         self.static_shadow_render_infos = []
+        self.static_render_info_options = None
 
         if RenderOption.RENDER_COLLISION:
             gather_render_infos(culling_func=view_frustum_culling_geometry,
@@ -760,13 +840,72 @@ class SceneManager(Singleton):
                                 solid_render_infos=self.static_shadow_render_infos,
                                 translucent_render_infos=None)
 
-        self.static_solid_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
-        self.static_translucent_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
+        sort_render_infos(self.static_solid_render_infos)
+        sort_render_infos(self.static_translucent_render_infos)
+        sort_render_infos(self.static_shadow_render_infos)
+
+        self.rebuilt_render_info_count += len(self.static_solid_render_infos)
+        self.rebuilt_render_info_count += len(self.static_translucent_render_infos)
+        self.rebuilt_render_info_count += len(self.static_shadow_render_infos)
+
+    def update_static_render_info_with_culling_table(self):
+        collision_culling_table = self.collision_culling_table
+        static_culling_table = self.static_culling_table
+
+        # render infos are kept across frames and re-filtered only when the culling result was changed.
+        render_info_options = (RenderOption.RENDER_COLLISION, RenderOption.RENDER_STATIC_ACTOR)
+        options_changed = render_info_options != self.static_render_info_options
+        self.static_render_info_options = render_info_options
+        view_changed = options_changed
+        shadow_changed = options_changed
+
+        if RenderOption.RENDER_COLLISION:
+            collision_culling_table.update(self.collision_actors)
+            view_changed = collision_culling_table.update_view_frustum_culling(self.main_camera) or view_changed
+            self.rebuilt_render_info_count += collision_culling_table.rebuilt_render_info_count
+
+        if RenderOption.RENDER_STATIC_ACTOR:
+            static_culling_table.update(self.static_actors)
+            view_changed = static_culling_table.update_view_frustum_culling(self.main_camera) or view_changed
+            shadow_changed = static_culling_table.update_shadow_culling(self.main_light) or shadow_changed
+            self.rebuilt_render_info_count += static_culling_table.rebuilt_render_info_count
+
+        if view_changed:
+            self.static_solid_render_infos = []
+            self.static_translucent_render_infos = []
+
+            if RenderOption.RENDER_COLLISION:
+                collision_culling_table.gather_render_infos(row_indices=collision_culling_table.view_row_indices,
+                                                            solid_render_infos=self.static_solid_render_infos,
+                                                            translucent_render_infos=self.static_translucent_render_infos)
+
+            if RenderOption.RENDER_STATIC_ACTOR:
+                static_culling_table.gather_render_infos(row_indices=static_culling_table.view_row_indices,
+                                                         solid_render_infos=self.static_solid_render_infos,
+                                                         translucent_render_infos=self.static_translucent_render_infos)
+
+            sort_render_infos(self.static_solid_render_infos)
+            sort_render_infos(self.static_translucent_render_infos)
+
+        if shadow_changed:
+            self.static_shadow_render_infos = []
+
+            if RenderOption.RENDER_STATIC_ACTOR:
+                static_culling_table.gather_render_infos(row_indices=static_culling_table.shadow_row_indices,
+                                                         solid_render_infos=self.static_shadow_render_infos,
+                                                         translucent_render_infos=None)
+
+            sort_render_infos(self.static_shadow_render_infos)
 
     def update_skeleton_render_info(self):
+        if RenderOption.BATCHED_CULLING:
+            self.update_skeleton_render_info_with_culling_table()
+            return
+
         self.skeleton_solid_render_infos = []
         self.skeleton_translucent_render_infos = []
         self.skeleton_shadow_render_infos = []
+        self.skeleton_render_info_options = None
 
         if RenderOption.RENDER_SKELETON_ACTOR:
             gather_render_infos(culling_func=view_frustum_culling_geometry,
@@ -783,8 +922,46 @@ class SceneManager(Singleton):
                                 solid_render_infos=self.skeleton_shadow_render_infos,
                                 translucent_render_infos=None)
 
-            self.skeleton_solid_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
-            self.skeleton_translucent_render_infos.sort(key=lambda x: (id(x.geometry), id(x.material)))
+            sort_render_infos(self.skeleton_solid_render_infos)
+            sort_render_infos(self.skeleton_translucent_render_infos)
+
+            self.rebuilt_render_info_count += len(self.skeleton_solid_render_infos)
+            self.rebuilt_render_info_count += len(self.skeleton_translucent_render_infos)
+            self.rebuilt_render_info_count += len(self.skeleton_shadow_render_infos)
+
+    def update_skeleton_render_info_with_culling_table(self):
+        skeleton_culling_table = self.skeleton_culling_table
+
+        render_info_options = RenderOption.RENDER_SKELETON_ACTOR
+        options_changed = render_info_options != self.skeleton_render_info_options
+        self.skeleton_render_info_options = render_info_options
+        view_changed = options_changed
+        shadow_changed = options_changed
+
+        if RenderOption.RENDER_SKELETON_ACTOR:
+            skeleton_culling_table.update(self.skeleton_actors)
+            view_changed = skeleton_culling_table.update_view_frustum_culling(self.main_camera) or view_changed
+            shadow_changed = skeleton_culling_table.update_shadow_culling(self.main_light) or shadow_changed
+            self.rebuilt_render_info_count += skeleton_culling_table.rebuilt_render_info_count
+
+        if view_changed:
+            self.skeleton_solid_render_infos = []
+            self.skeleton_translucent_render_infos = []
+
+            if RenderOption.RENDER_SKELETON_ACTOR:
+                skeleton_culling_table.gather_render_infos(row_indices=skeleton_culling_table.view_row_indices,
+                                                           solid_render_infos=self.skeleton_solid_render_infos,
+                                                           translucent_render_infos=self.skeleton_translucent_render_infos)
+                sort_render_infos(self.skeleton_solid_render_infos)
+                sort_render_infos(self.skeleton_translucent_render_infos)
+
+        if shadow_changed:
+            self.skeleton_shadow_render_infos = []
+
+            if RenderOption.RENDER_SKELETON_ACTOR:
+                skeleton_culling_table.gather_render_infos(row_indices=skeleton_culling_table.shadow_row_indices,
+                                                           solid_render_infos=self.skeleton_shadow_render_infos,
+                                                           translucent_render_infos=None)
 
     def update_light_render_infos(self):
         self.point_light_count = 0
@@ -831,8 +1008,7 @@ class SceneManager(Singleton):
         for static_actor in self.static_actors:
             static_actor.update(dt)
 
-        for skeleton_actor in self.skeleton_actors:
-            skeleton_actor.update(dt)
+        update_skeleton_actors(self.skeleton_actors, dt)
 
         for spline in self.splines:
             spline.update(dt)
@@ -847,6 +1023,7 @@ class SceneManager(Singleton):
             self.effect_manager.update(dt)
 
         # culling
+        self.rebuilt_render_info_count = 0
         self.update_static_render_info()
         self.update_skeleton_render_info()
         self.update_light_render_infos()
@@ -1,27 +1,26 @@
 import os
-import re
-import traceback
-from multiprocessing import Queue, Pipe
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from multiprocessing import Queue, Pipe, shared_memory
+
+import numpy as np
 
 # logger
 from PyEngine3D.Utilities import AutoEnum, MINOR_INFO
 from PyEngine3D.Common import logger
 
 # UTIL : call stack function for log
-reTraceStack = re.compile("File \"(.+?)\", line (\d+?), .+")  # [0] filename, [1] line number
-
-
 def getTraceCallStack():
-    for line in traceback.format_stack()[::-1]:
-        m = re.match(reTraceStack, line.strip())
-        if m:
-            filename = m.groups()[0]
-            # ignore case
-            if filename == __file__:
-                continue
-            filename = os.path.split(filename)[1]
-            lineNumber = m.groups()[1]
-            return "[%s:%s]" % (filename, lineNumber)
+    # walk up the frames instead of formatting the whole stack.
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        # ignore case
+        if filename != __file__:
+            return "[%s:%d]" % (os.path.split(filename)[1], frame.f_lineno)
+        frame = frame.f_back
     return ""
 
 
@@ -37,6 +36,7 @@ class COMMAND(AutoEnum):
     RELOAD = ()
     REQUEST_PIPE = ()
     PIPE_DONE = ()
+    BATCH = ()
 
     SORT_UI_ITEMS = ()
 
@@ -119,6 +119,8 @@ class COMMAND(AutoEnum):
     TRANS_GAME_BACKEND_LIST = ()
     CHANGE_GAME_BACKEND = ()
 
+    TRANS_IMPORT_PROGRESS = ()
+
     COUNT = ()
 
 
@@ -126,6 +128,21 @@ def get_command_name(cmd: COMMAND) -> str:
     return str(cmd)
 
 
+def log_commands(transport_name, actions, simple_log=True):
+    """
+    The message and the call stack are formatted only when the MINOR_INFO level is enabled.
+    :param actions: [(action name, command, value), ...], e.g. [('Send', COMMAND.UI_RUN, None), ('Recv', COMMAND.UI_RUN_OK, None)]
+    """
+    if not logger.isEnabledFor(MINOR_INFO):
+        return
+
+    if simple_log:
+        messages = ["%s %s" % (action, get_command_name(cmd)) for action, cmd, value in actions]
+    else:
+        messages = ["%s %s, %s" % (action, get_command_name(cmd), str(value)) for action, cmd, value in actions]
+    logger.log(MINOR_INFO, "%s : %s in %s" % (transport_name, " and ".join(messages), getTraceCallStack()))
+
+
 def CustomPipe():
     """get CustomPipe Instances"""
     pipe1, pipe2 = Pipe()
@@ -142,23 +159,14 @@ class PipeClass:
         self.simpleLog = True
 
     def send(self, sendCmd, sendValue=None):
-        if self.simpleLog:
-            logger.log(MINOR_INFO, "Pipe : Send %s in %s" % (get_command_name(sendCmd), getTraceCallStack()))
-        else:
-            logger.log(MINOR_INFO,
-                       "Pipe : Send %s, %s in %s" % (get_command_name(sendCmd), str(sendValue), getTraceCallStack()))
+        log_commands("Pipe", [("Send", sendCmd, sendValue)], self.simpleLog)
         # must send queue date to tuple type
         self.pipe.send((sendCmd, sendValue))
 
     def recv(self):
         """must be a tuple type"""
         cmdAndValue = self.pipe.recv()
-        if self.simpleLog:
-            logger.log(MINOR_INFO, "Pipe : Recv %s in %s" % (get_command_name(cmdAndValue[0]), getTraceCallStack()))
-        else:
-            logger.log(MINOR_INFO,
-                       "Pipe : Recv %s, %s in %s" % (
-                           get_command_name(cmdAndValue[0]), str(cmdAndValue[1]), getTraceCallStack()))
+        log_commands("Pipe", [("Recv", cmdAndValue[0], cmdAndValue[1])], self.simpleLog)
         return cmdAndValue
 
     def SendAndRecv(self, sendCmd, sendValue, checkRecvCmd, checkReceiveValue):
@@ -167,21 +175,11 @@ class PipeClass:
 
         # wait recv message - must be a tuple type
         recv, value = self.pipe.recv()
-        if self.simpleLog:
-            logger.log(MINOR_INFO, "Pipe : Send %s and Recv %s in %s" % (
-                get_command_name(sendCmd), get_command_name(recv), getTraceCallStack()))
-        else:
-            logger.log(MINOR_INFO, "Pipe : Send %s, %s and Recv %s, %s in %s" % (
-                get_command_name(sendCmd), str(sendValue), get_command_name(recv), str(value), getTraceCallStack()))
+        log_commands("Pipe", [("Send", sendCmd, sendValue), ("Recv", recv, value)], self.simpleLog)
 
         # check receive correct command and value
         if recv != checkRecvCmd or (checkReceiveValue is not None and checkReceiveValue != value):
-            if self.simpleLog:
-                logger.log(MINOR_INFO, "Pipe : RecvFailed %s and Send %s in %s" % (get_command_name(recv),
-                                                                                   COMMAND.FAIL, getTraceCallStack()))
-            else:
-                logger.log(MINOR_INFO, "Pipe : RecvFailed %s, %s and Send %s, %s in %s" % (
-                    get_command_name(recv), str(value), COMMAND.FAIL, "None", getTraceCallStack()))
+            log_commands("Pipe", [("RecvFailed", recv, value), ("Send", COMMAND.FAIL, None)], self.simpleLog)
             logger.error("ERROR : Received %s not %s" % (recv, checkRecvCmd))
             raise BaseException("Pipe receive error.")
         return value
@@ -193,53 +191,182 @@ class PipeClass:
         if recv == checkRecvCmd and (checkReceiveValue is None or checkReceiveValue == value):
             # receive succesfull - send message, must be a tuple type
             self.pipe.send((sendCmd, sendValue))
-            if self.simpleLog:
-                logger.log(MINOR_INFO, "Pipe : Recv %s and Send %s in %s" % (
-                    get_command_name(recv), get_command_name(sendCmd), getTraceCallStack()))
-            else:
-                logger.log(MINOR_INFO, "Pipe : Recv %s, %s and Send %s, %s in %s" % (
-                    get_command_name(recv), str(value), get_command_name(sendCmd), str(sendValue), getTraceCallStack()))
+            log_commands("Pipe", [("Recv", recv, value), ("Send", sendCmd, sendValue)], self.simpleLog)
 
             # return received value
             return value
         else:
             self.pipe.send((COMMAND.FAIL, None))
-            if self.simpleLog:
-                logger.log(MINOR_INFO,
-                           "Pipe : RecvFailed %s and Send %s in %s" % (
-                               get_command_name(recv), COMMAND.FAIL, getTraceCallStack()))
-            else:
-                logger.log(MINOR_INFO, "Pipe : RecvFailed %s, %s and Send %s, %s in %s" % (
-                    get_command_name(recv), str(value), COMMAND.FAIL, "None", getTraceCallStack()))
+            log_commands("Pipe", [("RecvFailed", recv, value), ("Send", COMMAND.FAIL, None)], self.simpleLog)
             logger.error("ERROR : Received %s not %s" % (recv, checkRecvCmd))
             raise BaseException("Pipe receive error.")
 
 
+class CommandStatistics:
+    """
+    Throughput and latency of the commands, the latency is measured from put to get.
+    perf_counter is a system wide monotonic clock, so the time of the other process can be compared.
+    """
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.put_count = 0
+        self.get_count = 0
+        self.message_count = 0
+        self.batch_count = 0
+        self.shared_memory_count = 0
+        self.shared_memory_bytes = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def reset(self):
+        self.__init__()
+
+    def add_latency(self, latency, count=1):
+        self.total_latency += latency * count
+        self.max_latency = max(self.max_latency, latency)
+
+    def get_average_latency(self):
+        return self.total_latency / self.get_count if 0 < self.get_count else 0.0
+
+    def get_throughput(self):
+        """
+        :return: received commands per second
+        """
+        elapsed_time = time.perf_counter() - self.start_time
+        return self.get_count / elapsed_time if 0.0 < elapsed_time else 0.0
+
+
+class SharedMemoryData:
+    """
+    The large data is copied into a shared memory block and only the name of the block is pickled.
+    The receiver copies the data and unlinks the block.
+    """
+    def __init__(self, data):
+        self.is_bytes = isinstance(data, (bytes, bytearray))
+        array = np.frombuffer(data, dtype=np.uint8) if self.is_bytes else np.ascontiguousarray(data)
+        self.dtype = array.dtype.str
+        self.shape = array.shape
+        self.nbytes = array.nbytes
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self.name = self.shared_memory.name
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shared_memory.buf)[...] = array
+
+        if 'posix' == os.name:
+            # the receiver owns the block, so the resource tracker of the sender must not unlink it at exit.
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shared_memory._name, 'shared_memory')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['shared_memory'] = None
+        return state
+
+    def close(self, unlink=False):
+        if self.shared_memory is not None:
+            self.shared_memory.close()
+            if unlink:
+                try:
+                    self.shared_memory.unlink()
+                except FileNotFoundError:
+                    pass
+            self.shared_memory = None
+
+    def load(self):
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            data = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+        return data.tobytes() if self.is_bytes else data
+
+
 # CLASS : Custom Queue
 class CustomQueue:
-    def __init__(self):
+    """
+    The commands which are put in the batch are sent as a message, the receiver gets them one by one.
+    If shared_memory_threshold is set, the bytes and numpy array values which are larger than it are sent by the shared memory.
+    """
+    # the sender keeps the handles of the shared memories until the receiver attaches them.
+    max_shared_memory_count = 64
+
+    def __init__(self, shared_memory_threshold=None):
         self.queue = Queue()
         self.simpleLog = True
+        self.shared_memory_threshold = shared_memory_threshold
+        self.shared_memories = deque()
+        self.batch_depth = 0
+        self.batch_commands = []
+        self.received_commands = deque()  # commands of the received batch
+        self.statistics = CommandStatistics()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['shared_memories'] = deque()
+        return state
+
+    def close(self):
+        for shared_memory_data in self.shared_memories:
+            shared_memory_data.close(unlink=True)
+        self.shared_memories.clear()
 
     def empty(self):
-        return self.queue.empty()
+        return 0 == len(self.received_commands) and self.queue.empty()
 
-    def get(self):
+    def receive(self):
         # receive value must be tuple type
-        cmdAndValue = self.queue.get(self)
-        if self.simpleLog:
-            logger.log(MINOR_INFO, "Queue : get %s in %s" % (get_command_name(cmdAndValue[0]), getTraceCallStack()))
-        else:
-            logger.log(MINOR_INFO,
-                       "Queue : get %s, %s in %s" % (
-                           get_command_name(cmdAndValue[0]), str(cmdAndValue[1]), getTraceCallStack()))
+        cmd, value, put_time = self.queue.get()
+        commands = value if cmd == COMMAND.BATCH else [(cmd, value), ]
+        self.statistics.message_count += 1
+        self.statistics.add_latency(time.perf_counter() - put_time, len(commands))
+        self.received_commands.extend(commands)
+
+    def get(self):
+        if 0 == len(self.received_commands):
+            self.receive()
+
+        cmdAndValue = self.received_commands.popleft()
+        self.statistics.get_count += 1
+        if isinstance(cmdAndValue[1], SharedMemoryData):
+            cmdAndValue = (cmdAndValue[0], cmdAndValue[1].load())
+        log_commands("Queue", [("get", cmdAndValue[0], cmdAndValue[1])], self.simpleLog)
         return cmdAndValue
 
     def put(self, cmdIndex, value=None):
-        if self.simpleLog:
-            logger.log(MINOR_INFO, "Queue : put %s in %s" % (get_command_name(cmdIndex), getTraceCallStack()))
+        log_commands("Queue", [("put", cmdIndex, value)], self.simpleLog)
+        self.statistics.put_count += 1
+
+        if self.shared_memory_threshold is not None and isinstance(value, (bytes, bytearray, np.ndarray)):
+            nbytes = len(value) if isinstance(value, (bytes, bytearray)) else value.nbytes
+            if self.shared_memory_threshold <= nbytes:
+                value = SharedMemoryData(value)
+                self.shared_memories.append(value)
+                if self.max_shared_memory_count < len(self.shared_memories):
+                    self.shared_memories.popleft().close()
+                self.statistics.shared_memory_count += 1
+                self.statistics.shared_memory_bytes += nbytes
+
+        if 0 < self.batch_depth:
+            self.batch_commands.append((cmdIndex, value))
         else:
-            logger.log(MINOR_INFO,
-                       "Queue : put %s, %s in %s" % (get_command_name(cmdIndex), str(value), getTraceCallStack()))
-        # must send queue date to tuple type
-        self.queue.put((cmdIndex, value))
+            # must send queue date to tuple type
+            self.queue.put((cmdIndex, value, time.perf_counter()))
+
+    def flush(self):
+        if self.batch_commands:
+            batch_commands, self.batch_commands = self.batch_commands, []
+            self.queue.put((COMMAND.BATCH, batch_commands, time.perf_counter()))
+            self.statistics.batch_count += 1
+
+    @contextmanager
+    def batch(self):
+        """
+        The commands which are put in this context are sent as a message at the end of the outermost batch.
+        """
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if 0 == self.batch_depth:
+                self.flush()
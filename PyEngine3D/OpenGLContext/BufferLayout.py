@@ -0,0 +1,152 @@
+import numpy as np
+
+
+STD140 = 'std140'
+STD430 = 'std430'
+
+# { glsl type : (numpy type, shape) }
+glsl_types = {
+    'bool': (np.int32, ()),
+    'int': (np.int32, ()),
+    'uint': (np.uint32, ()),
+    'float': (np.float32, ()),
+    'ivec2': (np.int32, (2,)),
+    'ivec3': (np.int32, (3,)),
+    'ivec4': (np.int32, (4,)),
+    'uvec2': (np.uint32, (2,)),
+    'uvec3': (np.uint32, (3,)),
+    'uvec4': (np.uint32, (4,)),
+    'vec2': (np.float32, (2,)),
+    'vec3': (np.float32, (3,)),
+    'vec4': (np.float32, (4,)),
+    'mat2': (np.float32, (2, 2)),
+    'mat3': (np.float32, (3, 3)),
+    'mat4': (np.float32, (4, 4)),
+}
+
+scalar_types = (np.dtype(np.int32), np.dtype(np.uint32), np.dtype(np.float32))
+
+
+def round_up(size, alignment):
+    return (size + alignment - 1) // alignment * alignment
+
+
+def get_member_layout(base_dtype, shape, layout=STD140):
+    """
+    The shape (n,) of 2 ~ 4 is a vector, the last axis of the other shapes is the vector of the array or the column of the matrix.
+    :return: base alignment, size
+    """
+    if base_dtype.names is not None:
+        alignment = get_struct_alignment(base_dtype, layout)
+        return alignment, base_dtype.itemsize * int(np.prod(shape))
+
+    if base_dtype not in scalar_types:
+        raise ValueError("%s is not a 4 bytes scalar type." % base_dtype)
+
+    if () == shape:
+        return 4, 4
+
+    if 1 == len(shape) and shape[0] <= 4:
+        # vector
+        components = shape[0]
+        return (8 if 2 == components else 16), components * 4
+
+    # array or matrix
+    if 1 == len(shape):
+        components, count = 1, shape[0]
+    else:
+        components, count = shape[-1], int(np.prod(shape[:-1]))
+    if 4 < components:
+        raise ValueError("The shape %s has more than 4 components." % str(shape))
+    stride = {1: 4, 2: 8, 3: 16, 4: 16}[components]
+    if STD140 == layout:
+        stride = 16
+    if stride != components * 4:
+        raise ValueError("The array stride of the shape %s must be %d bytes in %s, use the vec4 elements." %
+                         (str(shape), stride, layout))
+    return stride, stride * count
+
+
+def get_struct_alignment(dtype, layout=STD140):
+    """
+    Validate the offsets of the members and the size of the struct.
+    :return: base alignment of the struct
+    """
+    max_alignment = 4
+    end_offset = 0
+    for name, (field_dtype, offset) in sorted(((name, dtype.fields[name][:2]) for name in dtype.names), key=lambda x: x[1][1]):
+        try:
+            alignment, size = get_member_layout(field_dtype.base, field_dtype.shape, layout)
+        except ValueError as e:
+            raise ValueError("%s : %s" % (name, e))
+
+        if 0 != offset % alignment:
+            raise ValueError("%s : The offset %d is not aligned to %d bytes." % (name, offset, alignment))
+
+        if offset < end_offset:
+            raise ValueError("%s : The offset %d overlaps the previous member which ends at %d." % (name, offset, end_offset))
+
+        end_offset = offset + size
+        max_alignment = max(max_alignment, alignment)
+
+    # the struct of std140 is aligned to vec4.
+    alignment = round_up(max_alignment, 16) if STD140 == layout else max_alignment
+    if 0 != dtype.itemsize % alignment:
+        raise ValueError("The size %d is not a multiple of %d bytes." % (dtype.itemsize, alignment))
+    return alignment
+
+
+def validate_buffer_dtype(dtype, layout=STD140):
+    """
+    :return: error message or None if the dtype follows the layout.
+    """
+    if dtype.names is None:
+        return "%s is not a structured dtype." % dtype
+
+    try:
+        get_struct_alignment(dtype, layout)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def CreateBufferDtype(members, layout=STD140):
+    """
+    Create the dtype of a uniform block or a shader storage block, the padding is inserted by the layout rules.
+    :param members: [(name, glsl type or struct dtype), (name, glsl type or struct dtype, array count), ...]
+    :return: numpy dtype
+    """
+    names = []
+    formats = []
+    offsets = []
+    offset = 0
+    max_alignment = 4
+    for member in members:
+        name, member_type = member[0], member[1]
+        array_count = member[2] if 2 < len(member) else 0
+
+        if isinstance(member_type, np.dtype):
+            base_dtype, shape = member_type, ()
+        else:
+            base_dtype, shape = np.dtype(glsl_types[member_type][0]), glsl_types[member_type][1]
+
+        if 0 < array_count:
+            if () == shape and base_dtype.names is None and (STD140 == layout or array_count <= 4):
+                # the scalar array of std140 is padded to 16 bytes and the short one is same as the vector.
+                raise ValueError("%s : The array of %s is not supported in %s, use the vector." % (name, member_type, layout))
+            shape = (array_count, ) + shape
+
+        try:
+            alignment, size = get_member_layout(base_dtype, shape, layout)
+        except ValueError as e:
+            raise ValueError("%s : %s" % (name, e))
+
+        offset = round_up(offset, alignment)
+        names.append(name)
+        formats.append((base_dtype, shape) if shape else base_dtype)
+        offsets.append(offset)
+        offset += size
+        max_alignment = max(max_alignment, alignment)
+
+    alignment = round_up(max_alignment, 16) if STD140 == layout else max_alignment
+    return np.dtype(dict(names=names, formats=formats, offsets=offsets, itemsize=round_up(offset, alignment)))
@@ -0,0 +1,180 @@
+from collections import OrderedDict
+
+import numpy as np
+from OpenGL import GL
+
+
+class RecordingGL:
+    """
+    GL stub which records the calls instead of calling the driver,
+    so GLStateCache can be measured without a GL context.
+    """
+    def __init__(self):
+        self.calls = []  # [(function name, args)]
+
+    def __getattr__(self, function_name):
+        if not function_name.startswith('gl'):
+            raise AttributeError(function_name)
+
+        def record(*args):
+            self.calls.append((function_name, args))
+        setattr(self, function_name, record)
+        return record
+
+    def clear(self):
+        self.calls = []
+
+    def get_call_counts(self):
+        call_counts = OrderedDict()
+        for function_name, args in self.calls:
+            call_counts[function_name] = call_counts.get(function_name, 0) + 1
+        return call_counts
+
+
+class GLStateCache:
+    """
+    Shadow copy of the GL states, the calls which do not change the state are skipped.
+    program, vertex array, active texture unit, texture bindings of the units, capabilities,
+    blend, depth, cull states and the uniform values of the programs are tracked.
+    All of these states must be changed through this cache, otherwise call invalidate.
+    """
+    def __init__(self, gl=GL):
+        self.gl = gl
+        self.program = 0
+        self.vertex_array = -1
+        self.active_texture_unit = None
+        self.texture_bindings = {}  # { (texture unit, target) : texture }
+        self.capabilities = {}  # { capability : enabled }
+        self.states = {}  # { function name : args }
+        self.uniforms = {}  # { program : { location : (args, value) } }
+        self.counters = {}  # { function name : [issued count, skipped count] }
+        self.frame_counters = {}  # counters of the last frame
+
+    def invalidate(self):
+        # the states are unknown, e.g. they are changed by an external library.
+        self.program = 0
+        self.vertex_array = -1
+        self.active_texture_unit = None
+        self.texture_bindings = {}
+        self.capabilities = {}
+        self.states = {}
+        self.uniforms = {}
+
+    def count(self, function_name, issued):
+        counter = self.counters.get(function_name)
+        if counter is None:
+            counter = self.counters[function_name] = [0, 0]
+        counter[0 if issued else 1] += 1
+
+    def end_frame(self):
+        self.frame_counters = self.counters
+        self.counters = {}
+
+    def get_frame_call_counts(self):
+        """
+        :return: issued call count, skipped call count of the last frame
+        """
+        issued_count = sum(counter[0] for counter in self.frame_counters.values())
+        skipped_count = sum(counter[1] for counter in self.frame_counters.values())
+        return issued_count, skipped_count
+
+    def use_program(self, program):
+        if program != self.program:
+            self.program = program
+            self.gl.glUseProgram(program)
+            self.count('glUseProgram', True)
+            return True
+        self.count('glUseProgram', False)
+        return False
+
+    def remove_program(self, program):
+        # the program is deleted, its name can be reused by a new program.
+        self.uniforms.pop(program, None)
+        if program == self.program:
+            self.program = 0
+
+    def bind_vertex_array(self, vertex_array):
+        if vertex_array != self.vertex_array:
+            self.vertex_array = vertex_array
+            self.gl.glBindVertexArray(vertex_array)
+            self.count('glBindVertexArray', True)
+            return True
+        self.count('glBindVertexArray', False)
+        return False
+
+    def remove_vertex_array(self, vertex_array):
+        if vertex_array == self.vertex_array:
+            self.vertex_array = -1
+
+    def active_texture(self, texture_unit):
+        if texture_unit != self.active_texture_unit:
+            self.active_texture_unit = texture_unit
+            self.gl.glActiveTexture(texture_unit)
+            self.count('glActiveTexture', True)
+        else:
+            self.count('glActiveTexture', False)
+
+    def bind_texture(self, target, texture):
+        key = (self.active_texture_unit, target)
+        if self.active_texture_unit is None or self.texture_bindings.get(key) != texture:
+            self.texture_bindings[key] = texture
+            self.gl.glBindTexture(target, texture)
+            self.count('glBindTexture', True)
+        else:
+            self.count('glBindTexture', False)
+
+    def remove_texture(self, texture):
+        # the texture is deleted, so it is unbound from all units.
+        for key in [key for key, bound_texture in self.texture_bindings.items() if bound_texture == texture]:
+            self.texture_bindings[key] = 0
+
+    def set_capability(self, capability, enable):
+        if self.capabilities.get(capability) != enable:
+            self.capabilities[capability] = enable
+            if enable:
+                self.gl.glEnable(capability)
+            else:
+                self.gl.glDisable(capability)
+            self.count('glEnable' if enable else 'glDisable', True)
+        else:
+            self.count('glEnable' if enable else 'glDisable', False)
+
+    def set_capability_index(self, capability, index, enable):
+        # the indexed state is not tracked, so the whole capability becomes unknown.
+        self.capabilities.pop(capability, None)
+        if enable:
+            self.gl.glEnablei(capability, index)
+        else:
+            self.gl.glDisablei(capability, index)
+        self.count('glEnablei' if enable else 'glDisablei', True)
+
+    def set_state(self, function_name, *args):
+        if self.states.get(function_name) != args:
+            self.states[function_name] = args
+            getattr(self.gl, function_name)(*args)
+            self.count(function_name, True)
+        else:
+            self.count(function_name, False)
+
+    def set_uniform(self, program, location, function_name, value, *args):
+        """
+        call function_name(location, *args, value) if the value of the uniform in the program is changed.
+        """
+        if isinstance(value, np.ndarray):
+            key = value.tobytes()
+        elif isinstance(value, (list, tuple)):
+            key = np.asarray(value).tobytes()
+        else:
+            key = value
+
+        program_uniforms = self.uniforms.get(program)
+        if program_uniforms is None:
+            program_uniforms = self.uniforms[program] = {}
+
+        last_uniform = program_uniforms.get(location)
+        if last_uniform is None or last_uniform[0] != args or last_uniform[1] != key:
+            program_uniforms[location] = (args, key)
+            getattr(self.gl, function_name)(location, *args, value)
+            self.count(function_name, True)
+        else:
+            self.count(function_name, False)
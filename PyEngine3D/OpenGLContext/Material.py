@@ -18,7 +18,7 @@ from .UniformBuffer import CreateUniformBuffer, UniformTextureBase
 
 
 class Material:
-    def __init__(self, material_name, material_datas={}):
+    def __init__(self, material_name, material_datas={}, shader_variant_cache=None):
         self.valid = False
         logger.info("Load %s material." % material_name)
 
@@ -39,13 +39,21 @@ class Material:
         self.name = material_name
         self.shader_name = material_datas.get('shader_name', '')
         self.program = -1
+        self.is_compiled_from_source = False  # the program binary has to be stored again.
+        self.variant_key = material_datas.get('variant_key')
+        self.shader_variant_cache = shader_variant_cache if self.variant_key else None
         self.uniform_buffers = dict()  # OrderedDict()  # Declaration order is important.
         self.Attributes = Attributes()
 
         if CoreManager.instance().is_basic_mode:
             self.valid = True
         else:
-            if binary_format is not None and binary_data is not None:
+            # the materials of the same variant share the linked program.
+            if self.shader_variant_cache is not None:
+                self.program = self.shader_variant_cache.acquire_program(self.variant_key)
+                self.valid = 0 < self.program
+
+            if not self.valid and binary_format is not None and binary_data is not None:
                 self.compile_from_binary(binary_format, binary_data)
                 self.valid = self.check_validate() and self.check_linked()
                 if not self.valid:
@@ -55,11 +63,14 @@ class Material:
 
             if not self.valid:
                 self.compile_from_source(shader_codes)
+                self.is_compiled_from_source = True
                 self.valid = self.check_validate() and self.check_linked()
                 if not self.valid:
                     logger.error("%s material has been failed to compile from source" % self.name)
 
             if self.valid:
+                if self.shader_variant_cache is not None:
+                    self.shader_variant_cache.add_program(self.variant_key, self.program)
                 self.create_uniform_buffers(uniforms, uniform_datas)
 
     def get_save_data(self):
@@ -97,7 +108,11 @@ class Material:
 
     def delete(self):
         OpenGLContext.use_program(0)
-        glDeleteProgram(self.program)
+        if self.shader_variant_cache is not None:
+            self.shader_variant_cache.release_program(self.variant_key, self.program)
+        else:
+            glDeleteProgram(self.program)
+            OpenGLContext.state_cache.remove_program(self.program)
         logger.info("Deleted %s material." % self.name)
 
     def use_program(self):
@@ -121,12 +136,20 @@ class Material:
         glProgramBinary(self.program, binary_format.value, binary_data, len(binary_data))
 
     def compile_from_source(self, shader_codes: dict):
-        shaders = []
+        # submit all shader stages before checking the compile status, so the driver can compile them in parallel.
+        compiled_shaders = []
         for shader_type in shader_codes:
             shader = self.compile(shader_type, shader_codes[shader_type])
             if shader is not None:
+                compiled_shaders.append((shader_type, shader))
+
+        shaders = []
+        for shader_type, shader in compiled_shaders:
+            if self.check_compile_status(shader_type, shader, shader_codes[shader_type]):
                 logger.info("Compile %s %s." % (self.name, shader_type))
                 shaders.append(shader)
+            else:
+                glDeleteShader(shader)
 
         self.program = glCreateProgram()
 
@@ -163,6 +186,7 @@ class Material:
         """
         :param shaderType: GL_VERTEX_SHADER, GL_FRAGMENT_SHADER
         :param shader_code: string
+        :return: shader whose compile status is not checked yet.
         """
         if shader_code == "" or shader_code is None:
             return None
@@ -172,6 +196,13 @@ class Material:
             shader = glCreateShader(shaderType)
             glShaderSource(shader, shader_code)
             glCompileShader(shader)
+            return shader
+        except BaseException:
+            logger.error(traceback.format_exc())
+        return None
+
+    def check_compile_status(self, shaderType, shader, shader_code):
+        try:
             compile_status = glGetShaderiv(shader, GL_COMPILE_STATUS)
             if compile_status != 1:
                 infoLogs = glGetShaderInfoLog(shader)
@@ -201,10 +232,10 @@ class Material:
             else:
                 # complete
                 logger.log(Logger.MINOR_INFO, "Complete %s %s compile." % (self.name, shaderType.name))
-                return shader
+                return True
         except BaseException:
             logger.error(traceback.format_exc())
-        return None
+        return False
 
     def check_validate(self):
         if self.program >= 0:
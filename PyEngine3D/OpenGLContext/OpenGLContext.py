@@ -6,9 +6,11 @@ import numpy as np
 from OpenGL.GL import *
 from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_2, GL_3_0
 from OpenGL.raw.GL import _types
+from OpenGL.GL.KHR.parallel_shader_compile import glInitParallelShaderCompileKHR, glMaxShaderCompilerThreadsKHR
 from OpenGL import images, arrays
 
 from PyEngine3D.Common import logger
+from .GLStateCache import GLStateCache
 
 
 # Function : IsExtensionSupported
@@ -17,8 +19,7 @@ reCheckGLExtention = re.compile("GL_(.+?)_(.+)")
 
 
 class OpenGLContext:
-    last_vertex_array = -1
-    last_program = 0
+    state_cache = GLStateCache()
     gl_major_version = 0
     gl_minor_version = 0
     require_gl_major_version = 4
@@ -26,6 +27,7 @@ class OpenGLContext:
     GL_MAX_COMPUTE_WORK_GROUP_COUNT = None
     GL_MAX_COMPUTE_WORK_GROUP_SIZE = None
     GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS = None
+    parallel_shader_compile = False
 
     @staticmethod
     def initialize():
@@ -96,7 +98,20 @@ class OpenGLContext:
         # OpenGLContext.GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS = callglGetIntegerv(GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS)
         # logger.info("%s : %s" % ( GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS.name, OpenGLContext.GL_MAX_COMPUTE_WORK_GROUP_INVOCATIONS ))
 
+        # the driver compiles the shaders in its threads, 0xFFFFFFFF is the implementation specific maximum.
+        try:
+            if glInitParallelShaderCompileKHR():
+                glMaxShaderCompilerThreadsKHR(0xFFFFFFFF)
+                OpenGLContext.parallel_shader_compile = True
+        except:
+            OpenGLContext.parallel_shader_compile = False
+        logger.info("GL_KHR_parallel_shader_compile : %s" % OpenGLContext.parallel_shader_compile)
+
         logger.info("=" * 30)
+
+        # the states of a new context are not the states of the cache.
+        OpenGLContext.invalidate_state_cache()
+
     @staticmethod
     def check_gl_version():
         if OpenGLContext.require_gl_major_version < OpenGLContext.gl_major_version:
@@ -134,30 +149,76 @@ class OpenGLContext:
             return GL_DEPTH_STENCIL_ATTACHMENT
         return GL_DEPTH_ATTACHMENT
 
+    @staticmethod
+    def invalidate_state_cache():
+        # must be called after the GL states are changed without OpenGLContext, e.g. context re-creation or display lists.
+        OpenGLContext.state_cache.invalidate()
+
     @staticmethod
     def get_last_program():
-        return OpenGLContext.last_program
+        return OpenGLContext.state_cache.program
 
     @staticmethod
     def use_program(program):
-        if program != OpenGLContext.last_program:
-            OpenGLContext.last_program = program
-            glUseProgram(program)
-            return True
-        return False
+        return OpenGLContext.state_cache.use_program(program)
 
     @staticmethod
     def bind_vertex_array(vertex_array):
-        if vertex_array != OpenGLContext.last_vertex_array:
-            OpenGLContext.last_vertex_array = vertex_array
-            glBindVertexArray(vertex_array)
-            return True
-        return False
+        return OpenGLContext.state_cache.bind_vertex_array(vertex_array)
+
+    @staticmethod
+    def active_texture(texture_unit):
+        OpenGLContext.state_cache.active_texture(texture_unit)
+
+    @staticmethod
+    def bind_texture(target, texture):
+        OpenGLContext.state_cache.bind_texture(target, texture)
+
+    @staticmethod
+    def set_uniform(program, location, function_name, value, *args):
+        OpenGLContext.state_cache.set_uniform(program, location, function_name, value, *args)
+
+    @staticmethod
+    def enable(capability):
+        OpenGLContext.state_cache.set_capability(capability, True)
+
+    @staticmethod
+    def disable(capability):
+        OpenGLContext.state_cache.set_capability(capability, False)
+
+    @staticmethod
+    def enablei(capability, index):
+        OpenGLContext.state_cache.set_capability_index(capability, index, True)
+
+    @staticmethod
+    def disablei(capability, index):
+        OpenGLContext.state_cache.set_capability_index(capability, index, False)
+
+    @staticmethod
+    def blend_equation(mode):
+        OpenGLContext.state_cache.set_state('glBlendEquation', mode)
+
+    @staticmethod
+    def blend_func(func_src, func_dst):
+        OpenGLContext.state_cache.set_state('glBlendFunc', func_src, func_dst)
+
+    @staticmethod
+    def depth_func(func):
+        OpenGLContext.state_cache.set_state('glDepthFunc', func)
+
+    @staticmethod
+    def depth_mask(flag):
+        OpenGLContext.state_cache.set_state('glDepthMask', bool(flag))
+
+    @staticmethod
+    def front_face(mode):
+        OpenGLContext.state_cache.set_state('glFrontFace', mode)
 
     @staticmethod
     def present():
         OpenGLContext.use_program(0)
-        OpenGLContext.last_vertex_array = -1
+        OpenGLContext.state_cache.vertex_array = -1
+        OpenGLContext.state_cache.end_frame()
         glFlush()
 
     @staticmethod
@@ -149,14 +149,91 @@ def parsing_material_components(shader_code_list):
     return re.findall(reFindUniform, "\n".join(material_components))
 
 
+def tokenize_shader_line(code):
+    """
+    :return: (code without line comment, macro type, macro expression, version code, include file name)
+    """
+    if "//" in code:
+        code = code.split("//")[0]
+
+    macro, expression, version_code, include_name = None, None, None, None
+
+    m = re.search(reMacroStart, code)
+    if m is not None:
+        macro, expression = m.groups()
+        expression = expression.strip()
+
+    m = re.search(reVersion, code)
+    if m is not None:
+        version_code = m.groups()[0].strip()
+
+    m = re.search(reInclude, code)
+    if m is not None:
+        include_name = m.groups()[0]
+    return code, macro, expression, version_code, include_name
+
+
+def tokenize_shader_code(shader_code):
+    # remove comment block
+    shader_code = re.sub(reComment, "", shader_code)
+    return [tokenize_shader_line(code) for code in shader_code.splitlines()]
+
+
+class ShaderIncludeCache:
+    """
+    Tokenized include files keyed by file path and modify time,
+    so an include file is read and parsed once for every shader stage and macro set.
+    """
+    def __init__(self):
+        self.include_files = {}  # { file path : (modify time, size, unique id, tokens) }
+        self.hit_count = 0
+        self.read_count = 0
+
+    def clear(self):
+        self.include_files = {}
+
+    def get_include_file(self, include_file):
+        """
+        :return: (unique id, tokens which are wrapped by the include guard) or None if the file can not be read.
+        """
+        try:
+            stat = os.stat(include_file)
+        except OSError:
+            return None
+
+        cached_data = self.include_files.get(include_file)
+        if cached_data is not None and cached_data[:2] == (stat.st_mtime, stat.st_size):
+            self.hit_count += 1
+            return cached_data[2:]
+
+        try:
+            with codecs.open(include_file, mode='r', encoding='utf-8') as f:
+                include_source = f.read()
+        except BaseException:
+            logger.error(traceback.format_exc())
+            return None
+
+        unique_id = "UUID_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, include_file)).replace("-", "_")
+        tokens = tokenize_shader_code(include_source)
+        tokens.insert(0, tokenize_shader_line("#ifndef %s" % unique_id))
+        tokens.insert(1, tokenize_shader_line("#define %s" % unique_id))
+        tokens.append(tokenize_shader_line("#endif /* %s */" % unique_id))
+
+        self.read_count += 1
+        self.include_files[include_file] = (stat.st_mtime, stat.st_size, unique_id, tokens)
+        return unique_id, tokens
+
+
 class Shader:
     default_macros = dict(MATERIAL_COMPONENTS=1)
+    include_cache = ShaderIncludeCache()
 
     def __init__(self, shader_name, shader_code):
         logger.info("Load " + GetClassName(self) + " : " + shader_name)
         self.name = shader_name
         self.shader_code = shader_code
         self.include_files = []
+        self.code_tokens = None
         self.attribute = Attributes()
 
     def get_save_data(self):
@@ -166,6 +243,11 @@ class Shader:
         self.attribute.set_attribute("name", self.name)
         return self.attribute
 
+    def get_code_tokens(self):
+        if self.code_tokens is None:
+            self.code_tokens = tokenize_shader_code(self.shader_code)
+        return self.code_tokens
+
     def generate_shader_codes(self, is_engine_resource, engine_shader_directory, project_shader_directory, shader_version, compile_option, external_macros={}):
         shader_codes = {}
         for shader_type_name in shader_types:
@@ -188,10 +270,6 @@ class Shader:
         if self.shader_code == "" or self.shader_code is None:
             return ""
 
-        # remove comment block
-        shader_code = re.sub(reComment, "", self.shader_code)
-        code_lines = shader_code.splitlines()
-
         # combine macro
         combined_macros = OrderedDict()
         # default macro
@@ -233,24 +311,21 @@ class Shader:
         # insert version as comment
         include_files = dict()  # { 'filename': uuid }
 
-        # do parsing
-        line_num = 0
+        # do parsing, the included tokens are pushed to the token iterators.
+        token_iterators = [iter(self.get_code_tokens()), ]
         macro_depth = 0
         macro_result = [True, ]
         macro_code_remove = True
-        while line_num < len(code_lines):
-            code = code_lines[line_num]
-            line_num += 1
+        while token_iterators:
+            token = next(token_iterators[-1], None)
+            if token is None:
+                token_iterators.pop()
+                continue
 
-            # remove comment
-            if "//" in code:
-                code = code.split("//")[0]
+            code, macro, expression, version_code, include_name = token
 
             # macro parsing
-            m = re.search(reMacroStart, code)
-            if m is not None:
-                macro, expression = m.groups()
-                expression = expression.strip()
+            if macro is not None:
                 if macro == 'define' or macro == 'undef':
                     define_expression = expression.split('(')[0].strip()
                     if ' ' in define_expression:
@@ -313,19 +388,16 @@ class Shader:
                 continue
 
             # is version code?
-            m = re.search(reVersion, code)
-            if m is not None:
-                version_code = m.groups()[0].strip()
+            if version_code is not None:
                 if final_code_lines[0] == "" or version_code > final_code_lines[0]:
                     final_code_lines[0] = version_code
                 continue
 
             # find include block
-            m = re.search(reInclude, code)
-            if m is not None:
+            if include_name is not None:
                 is_include_file_exists = False
-                include_file_in_engine = os.path.join(engine_shader_directory, m.groups()[0])
-                include_file_in_project = os.path.join(project_shader_directory, m.groups()[0])
+                include_file_in_engine = os.path.join(engine_shader_directory, include_name)
+                include_file_in_project = os.path.join(project_shader_directory, include_name)
                 if is_engine_resource:
                     if os.path.exists(include_file_in_engine):
                         include_file = include_file_in_engine
@@ -340,38 +412,22 @@ class Shader:
                         include_file = include_file_in_engine
 
                 # insert include code
-                valid = False
+                include_data = None
                 if is_include_file_exists or os.path.exists(include_file):
-                    try:
-                        f = codecs.open(include_file, mode='r', encoding='utf-8')
-                        include_source = f.read()
-                        # remove comment block
-                        include_source = re.sub(reComment, "", include_source)
-                        include_code_lines = include_source.splitlines()
-                        f.close()
-                        valid = True
-                    except BaseException:
-                        logger.error(traceback.format_exc())
-
-                    if valid:
-                        if include_file in include_files:
-                            unique_id = include_files[include_file]
-                        else:
-                            unique_id = "UUID_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, include_file)).replace("-", "_")
-                            include_files[include_file] = unique_id
-
-                            if include_file not in self.include_files:
-                                self.include_files.append(include_file)
-                        # insert included code
-                        final_code_lines.append("//------------ INCLUDE -------------//")
-                        final_code_lines.append("// " + code)  # include comment
-                        include_code_lines.insert(0, "#ifndef %s" % unique_id)
-                        include_code_lines.insert(1, "#define %s" % unique_id)
-                        include_code_lines.append("#endif /* %s */" % unique_id)
-                        code_lines = include_code_lines + code_lines[line_num:]
-                        line_num = 0
-
-                if not valid:
+                    include_data = self.include_cache.get_include_file(include_file)
+
+                if include_data is not None:
+                    unique_id, include_tokens = include_data
+                    if include_file not in include_files:
+                        include_files[include_file] = unique_id
+
+                        if include_file not in self.include_files:
+                            self.include_files.append(include_file)
+                    # insert included code
+                    final_code_lines.append("//------------ INCLUDE -------------//")
+                    final_code_lines.append("// " + code)  # include comment
+                    token_iterators.append(iter(include_tokens))
+                else:
                     logger.error("Shader parsing error.\n\t--> Cannot open %s file." % include_file)
                 continue
             # append code block
@@ -114,3 +114,8 @@ class DrawElementIndirectBuffer(ShaderBuffer):
 
 class ShaderStorageBuffer(ShaderBuffer):
     target = GL_SHADER_STORAGE_BUFFER
+
+
+class DynamicShaderStorageBuffer(ShaderStorageBuffer):
+    # the buffer is updated every frame.
+    usage = GL_DYNAMIC_DRAW
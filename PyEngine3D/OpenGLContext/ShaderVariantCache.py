@@ -0,0 +1,199 @@
+import hashlib
+import os
+import pickle
+import traceback
+from collections import OrderedDict
+
+from OpenGL.GL import GLenum, glDeleteProgram
+
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import check_directory_and_mkdir
+from .OpenGLContext import OpenGLContext
+
+
+class ShaderVariantCache:
+    """
+    Content addressed cache of the compiled shader variants.
+    The key is the hash of the preprocessed shader codes and the driver string,
+    so the materials which have the same preprocessed codes share a variant, whatever their macros or names are.
+    disk : the program binary and the reflection datas of a variant are stored in a file of the cache directory,
+           the least recently used variants are removed when the total size exceeds max_cache_size.
+    memory : the linked programs are shared by the reference count.
+    """
+    cache_version = 1
+    index_filename = 'shader_variants.index'
+    variant_file_ext = '.variant'
+
+    def __init__(self, cache_directory, max_cache_size=256 * 1024 * 1024):
+        self.cache_directory = cache_directory
+        self.max_cache_size = max_cache_size
+        self.variants = OrderedDict()  # { variant key : file size }, the most recently used is the last.
+        self.programs = {}  # { variant key : [program, reference count] }
+        self.cache_size = 0
+        self.changed = False
+        self.hit_count = 0
+        self.miss_count = 0
+        self.shared_program_count = 0
+        self.evict_count = 0
+
+    def initialize(self):
+        check_directory_and_mkdir(self.cache_directory)
+        self.load_index_file()
+
+    def close(self):
+        self.save_index_file()
+        self.log_stats()
+
+    def get_index_filepath(self):
+        return os.path.join(self.cache_directory, self.index_filename)
+
+    def get_variant_filepath(self, variant_key):
+        return os.path.join(self.cache_directory, variant_key + self.variant_file_ext)
+
+    def load_index_file(self):
+        self.variants = OrderedDict()
+        index_filepath = self.get_index_filepath()
+        if os.path.exists(index_filepath):
+            try:
+                with open(index_filepath, 'rb') as f:
+                    index_data = pickle.load(f)
+                if self.cache_version == index_data.get('cache_version'):
+                    self.variants = index_data.get('variants', OrderedDict())
+            except:
+                logger.error(traceback.format_exc())
+
+        # remove the variants whose files are deleted.
+        for variant_key in list(self.variants.keys()):
+            if not os.path.exists(self.get_variant_filepath(variant_key)):
+                self.variants.pop(variant_key)
+                self.changed = True
+        self.cache_size = sum(self.variants.values())
+
+    def save_index_file(self):
+        if not self.changed:
+            return
+        try:
+            check_directory_and_mkdir(self.cache_directory)
+            index_data = dict(cache_version=self.cache_version, variants=self.variants)
+            with open(self.get_index_filepath(), 'wb') as f:
+                pickle.dump(index_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.changed = False
+        except:
+            logger.error(traceback.format_exc())
+
+    @staticmethod
+    def get_driver_string():
+        return "%s;%s;%s;%s.%s" % (getattr(OpenGLContext, 'GL_RENDERER', ''),
+                                   getattr(OpenGLContext, 'GL_VENDOR', ''),
+                                   getattr(OpenGLContext, 'GL_SHADING_LANGUAGE_VERSION', ''),
+                                   OpenGLContext.gl_major_version,
+                                   OpenGLContext.gl_minor_version)
+
+    def get_variant_key(self, shader_codes):
+        """
+        :param shader_codes: { shader type : preprocessed shader code }
+        :return: hex digest of the preprocessed shader codes and the driver string.
+        """
+        sha1 = hashlib.sha1(self.get_driver_string().encode('utf-8'))
+        for shader_type in sorted(shader_codes.keys(), key=int):
+            sha1.update(str(int(shader_type)).encode('utf-8'))
+            sha1.update(shader_codes[shader_type].encode('utf-8'))
+        return sha1.hexdigest()
+
+    def touch(self, variant_key):
+        self.variants.move_to_end(variant_key)
+        self.changed = True
+
+    def load_variant(self, variant_key):
+        """
+        :return: dict(binary_format, binary_data, uniforms, material_components, macros) or None
+        """
+        if variant_key in self.variants:
+            try:
+                with open(self.get_variant_filepath(variant_key), 'rb') as f:
+                    variant_data = pickle.load(f)
+                variant_data['binary_format'] = GLenum(variant_data['binary_format'])
+                self.touch(variant_key)
+                self.hit_count += 1
+                logger.debug("Shader variant cache hit : %s ( hit %d, miss %d )" % (variant_key, self.hit_count, self.miss_count))
+                return variant_data
+            except:
+                logger.error(traceback.format_exc())
+                self.remove_variant(variant_key)
+        self.miss_count += 1
+        logger.debug("Shader variant cache miss : %s ( hit %d, miss %d )" % (variant_key, self.hit_count, self.miss_count))
+        return None
+
+    def save_variant(self, variant_key, binary_format, binary_data, uniforms, material_components, macros):
+        if binary_format is None or binary_data is None:
+            return False
+        variant_data = dict(
+            binary_format=binary_format.value,
+            binary_data=binary_data,
+            uniforms=uniforms,
+            material_components=material_components,
+            macros=macros
+        )
+        try:
+            check_directory_and_mkdir(self.cache_directory)
+            variant_filepath = self.get_variant_filepath(variant_key)
+            with open(variant_filepath, 'wb') as f:
+                pickle.dump(variant_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except:
+            logger.error(traceback.format_exc())
+            return False
+
+        self.cache_size += os.path.getsize(variant_filepath) - self.variants.get(variant_key, 0)
+        self.variants[variant_key] = os.path.getsize(variant_filepath)
+        self.touch(variant_key)
+        self.evict()
+        return True
+
+    def remove_variant(self, variant_key):
+        if variant_key in self.variants:
+            self.cache_size -= self.variants.pop(variant_key)
+            self.changed = True
+        variant_filepath = self.get_variant_filepath(variant_key)
+        if os.path.exists(variant_filepath):
+            os.remove(variant_filepath)
+
+    def evict(self):
+        # keep the last variant, even if it is larger than max_cache_size.
+        while self.max_cache_size < self.cache_size and 1 < len(self.variants):
+            variant_key = next(iter(self.variants))
+            self.remove_variant(variant_key)
+            self.evict_count += 1
+            logger.debug("Shader variant cache evict : %s" % variant_key)
+
+    def acquire_program(self, variant_key):
+        """
+        :return: the shared program of the variant, or -1 if it is not linked yet.
+        """
+        program = self.programs.get(variant_key)
+        if program is not None:
+            program[1] += 1
+            self.shared_program_count += 1
+            return program[0]
+        return -1
+
+    def add_program(self, variant_key, program):
+        if variant_key not in self.programs:
+            self.programs[variant_key] = [program, 1]
+
+    def release_program(self, variant_key, program):
+        """
+        The program is deleted when no material uses it.
+        """
+        shared_program = self.programs.get(variant_key)
+        if shared_program is not None and shared_program[0] == program:
+            shared_program[1] -= 1
+            if 0 < shared_program[1]:
+                return
+            self.programs.pop(variant_key)
+        glDeleteProgram(program)
+        OpenGLContext.state_cache.remove_program(program)
+
+    def log_stats(self):
+        logger.debug("Shader variant cache : hit %d, miss %d, shared programs %d, evicted %d, %d variants %.2fMB" %
+                     (self.hit_count, self.miss_count, self.shared_program_count, self.evict_count,
+                      len(self.variants), self.cache_size / 1024.0 / 1024.0))
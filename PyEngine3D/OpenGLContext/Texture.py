@@ -192,6 +192,7 @@ class Texture:
     def delete(self):
         logger.info("Delete %s : %s" % (GetClassName(self), self.name))
         glDeleteTextures([self.buffer, ])
+        OpenGLContext.state_cache.remove_texture(self.buffer)
         self.buffer = -1
 
     def get_texture_info(self):
@@ -235,21 +236,21 @@ class Texture:
         dtype = get_numpy_dtype(self.data_type)
 
         try:
-            glBindTexture(self.target, self.buffer)
+            OpenGLContext.bind_texture(self.target, self.buffer)
             data = OpenGLContext.glGetTexImage(self.target, level, self.texture_format, self.data_type)
             # convert to numpy array
             if type(data) is bytes:
                 data = np.fromstring(data, dtype=dtype)
             else:
                 data = np.array(data, dtype=dtype)
-            glBindTexture(self.target, 0)
+            OpenGLContext.bind_texture(self.target, 0)
             return data
         except:
             logger.error(traceback.format_exc())
             logger.error('%s failed to get image data.' % self.name)
             logger.info('Try to glReadPixels.')
 
-        glBindTexture(self.target, self.buffer)
+        OpenGLContext.bind_texture(self.target, self.buffer)
         fb = glGenFramebuffers(1)
         glBindFramebuffer(GL_FRAMEBUFFER, fb)
 
@@ -269,7 +270,7 @@ class Texture:
                 pixels = np.fromstring(pixels, dtype=dtype)
             data.append(pixels)
         data = np.array(data, dtype=dtype)
-        glBindTexture(self.target, 0)
+        OpenGLContext.bind_texture(self.target, 0)
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
         glDeleteFramebuffers(1, [fb, ])
         return data
@@ -280,7 +281,7 @@ class Texture:
 
     def generate_mipmap(self):
         if self.enable_mipmap:
-            glBindTexture(self.target, self.buffer)
+            OpenGLContext.bind_texture(self.target, self.buffer)
             glGenerateMipmap(self.target)
         else:
             logger.warn('%s disable to generate mipmap.' % self.name)
@@ -295,7 +296,7 @@ class Texture:
             logger.warn("%s texture is invalid." % self.name)
             return
 
-        glBindTexture(self.target, self.buffer)
+        OpenGLContext.bind_texture(self.target, self.buffer)
 
         if wrap is not None:
             self.texure_wrap(wrap)
@@ -337,11 +338,11 @@ class Texture:
             setattr(self, attribute_name, eval(attribute_value))
 
         if 'wrap' in attribute_name:
-            glBindTexture(self.target, self.buffer)
+            OpenGLContext.bind_texture(self.target, self.buffer)
             glTexParameteri(self.target, GL_TEXTURE_WRAP_S, self.wrap_s or self.wrap)
             glTexParameteri(self.target, GL_TEXTURE_WRAP_T, self.wrap_t or self.wrap)
             glTexParameteri(self.target, GL_TEXTURE_WRAP_R, self.wrap_r or self.wrap)
-            glBindTexture(self.target, 0)
+            OpenGLContext.bind_texture(self.target, 0)
 
         return self.attribute
 
@@ -355,7 +356,7 @@ class Texture2D(Texture):
         data = texture_data.get('data')
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage2D(GL_TEXTURE_2D,
@@ -393,7 +394,7 @@ class Texture2D(Texture):
         if self.clear_color is not None:
             glClearTexImage(self.buffer, 0, self.texture_format, self.data_type, self.clear_color)
 
-        glBindTexture(GL_TEXTURE_2D, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D, 0)
 
 
 class Texture2DArray(Texture):
@@ -405,7 +406,7 @@ class Texture2DArray(Texture):
         data = texture_data.get('data')
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D_ARRAY, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_ARRAY, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage3D(GL_TEXTURE_2D_ARRAY,
@@ -439,7 +440,7 @@ class Texture2DArray(Texture):
         glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, self.wrap_t or self.wrap)
         glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, self.min_filter)
         glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, self.mag_filter)
-        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_ARRAY, 0)
 
 
 class Texture3D(Texture):
@@ -451,7 +452,7 @@ class Texture3D(Texture):
         data = texture_data.get('data')
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_3D, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_3D, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage3D(GL_TEXTURE_3D,
@@ -486,7 +487,7 @@ class Texture3D(Texture):
         glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_WRAP_R, self.wrap_r or self.wrap)
         glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_MIN_FILTER, self.min_filter)
         glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_MAG_FILTER, self.mag_filter)
-        glBindTexture(GL_TEXTURE_3D, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_3D, 0)
 
 
 class Texture2DMultiSample(Texture):
@@ -499,7 +500,7 @@ class Texture2DMultiSample(Texture):
         self.multisample_count = multisample_count - (multisample_count % 4)
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D_MULTISAMPLE, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_MULTISAMPLE, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage2DMultisample(GL_TEXTURE_2D_MULTISAMPLE,
@@ -516,7 +517,7 @@ class Texture2DMultiSample(Texture):
                                     self.height,
                                     GL_TRUE)
 
-        glBindTexture(GL_TEXTURE_2D_MULTISAMPLE, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_2D_MULTISAMPLE, 0)
 
 
 class TextureCube(Texture):
@@ -549,7 +550,7 @@ class TextureCube(Texture):
         self.texture_negative_z = texture_data.get('texture_negative_z', CreateTexture(name=self.name + "_back", **face_texture_datas))
 
         self.buffer = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_CUBE_MAP, self.buffer)
+        OpenGLContext.bind_texture(GL_TEXTURE_CUBE_MAP, self.buffer)
 
         if self.use_glTexStorage:
             glTexStorage2D(GL_TEXTURE_CUBE_MAP, self.get_mipmap_count(), self.internal_format, self.width, self.height)
@@ -575,7 +576,7 @@ class TextureCube(Texture):
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, self.wrap_r or self.wrap)
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, self.min_filter)
         glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, self.mag_filter)
-        glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+        OpenGLContext.bind_texture(GL_TEXTURE_CUBE_MAP, 0)
 
     @staticmethod
     def createTexImage2D(target_face, texture):
@@ -4,10 +4,15 @@ import numpy as np
 from OpenGL.GL import *
 
 from PyEngine3D.Common import logger
+from .BufferLayout import STD140, validate_buffer_dtype
 
 
 class UniformBlock:
     def __init__(self, buffer_name, program, binding, data):
+        error = validate_buffer_dtype(data.dtype, STD140)
+        if error is not None:
+            raise BaseException("Uniform buffer %s does not follow the std140 layout. %s" % (buffer_name, error))
+
         self.name = buffer_name
         self.program = program
 
@@ -150,7 +150,7 @@ class VertexArrayBuffer:
         self.data_types = []
 
         self.vertex_array = glGenVertexArrays(1)
-        glBindVertexArray(self.vertex_array)
+        OpenGLContext.bind_vertex_array(self.vertex_array)
 
         # NOTE : Just one array buffer
         vertex_buffer_size = sum([data.nbytes for data in datas])
@@ -180,11 +180,12 @@ class VertexArrayBuffer:
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer_size, index_data, GL_STATIC_DRAW)
 
-        glBindVertexArray(0)
+        OpenGLContext.bind_vertex_array(0)
 
     def delete(self):
         logger.info("Delete %s geometry." % self.name)
         glDeleteVertexArrays(1, GLuint(self.vertex_array))
+        OpenGLContext.state_cache.remove_vertex_array(self.vertex_array)
         glDeleteBuffers(1, GLuint(self.vertex_buffer))
         glDeleteBuffers(1, GLuint(self.index_buffer))
 
@@ -1,9 +1,11 @@
 from .OpenGLContext import OpenGLContext, glGetTexImage
+from .GLStateCache import GLStateCache, RecordingGL
 from .FrameBuffer import FrameBuffer, FrameBufferManager
 from .RenderBuffer import RenderBuffer
 from .Shader import Shader, ShaderCompileOption, ShaderCompileMessage, default_compile_option
 from .Shader import parsing_macros, parsing_uniforms, parsing_material_components
 from .Texture import CreateTexture, Texture2D, Texture2DArray, Texture3D, Texture2DMultiSample, TextureCube
+from .BufferLayout import CreateBufferDtype, validate_buffer_dtype, STD140, STD430
 from .UniformBlock import UniformBlock
 from .UniformBuffer import CreateUniformBuffer, CreateUniformDataFromString, \
                             UniformArray, UniformInt, UniformFloat, \
@@ -14,4 +16,6 @@ from .UniformBuffer import CreateUniformBuffer, CreateUniformDataFromString, \
 from .VertexArrayBuffer import VertexArrayBuffer, CreateVertexArrayBuffer, InstanceBuffer
 from .ShaderBuffer import DispatchIndirectCommand, DrawElementsIndirectCommand
 from .ShaderBuffer import AtomicCounterBuffer, DispatchIndirectBuffer, DrawElementIndirectBuffer, ShaderStorageBuffer
-from .Material import Material
\ No newline at end of file
+from .ShaderBuffer import DynamicShaderStorageBuffer
+from .Material import Material
+from .ShaderVariantCache import ShaderVariantCache
\ No newline at end of file
@@ -1,4 +1,5 @@
 import math
+from collections import OrderedDict
 
 import numpy as np
 
@@ -20,6 +21,7 @@ class StaticActor:
         # transform
         self.bound_box = BoundBox()
         self.geometry_bound_boxes = []
+        self.bound_box_changed = True
         self.transform = TransformObject()
         self.transform.set_pos(object_data.get('pos', [0, 0, 0]))
         self.transform.set_rotation(object_data.get('rot', [0, 0, 0]))
@@ -77,6 +79,7 @@ class StaticActor:
         self.has_mesh = model is not None and model.mesh is not None
 
         self.geometry_bound_boxes.clear()
+        self.bound_box_changed = True
         if self.has_mesh:
             self.bound_box.clone(self.model.mesh.bound_box)
             for i, geometry in enumerate(self.model.mesh.geometries):
@@ -219,6 +222,7 @@ class StaticActor:
 
     def update_bound_box(self):
         if self.has_mesh:
+            self.bound_box_changed = True
             if 1 < self.instance_count:
                 def apply_instance_scale_offset(bound_box):
                     bound_box.bound_max[...] = bound_box.bound_min + (bound_box.bound_max - bound_box.bound_min) * self.bound_box_scale
@@ -265,6 +269,8 @@ class SkeletonActor(StaticActor):
         self.blend_animation_buffers = []
         self.animation_count = 0
         self.animation_mesh = None
+        self.animation_blend_ratio = 1.0
+        self.need_to_update_animation_buffer = False
 
         if self.has_mesh:
             for animation in self.model.mesh.animations:
@@ -305,11 +311,19 @@ class SkeletonActor(StaticActor):
         return self.animation_buffers[index]
 
     def update(self, dt):
+        self.update_animation_frame(dt)
+
+        if self.need_to_update_animation_buffer:
+            for i, animation in enumerate(self.animation_mesh.animations):
+                if animation is not None:
+                    self.set_animation_buffer(i, animation.get_animation_transforms(self.animation_frame))
+
+    def update_animation_frame(self, dt):
         StaticActor.update(self, dt)
 
         # update animation
         animation_end = self.is_animation_end
-        blend_ratio = 1.0
+        self.animation_blend_ratio = 1.0
         update_animation_frame = True
         for i, animation in enumerate(self.animation_mesh.animations):
             if animation is not None:
@@ -336,18 +350,40 @@ class SkeletonActor(StaticActor):
                     else:
                         self.animation_frame = 0.0
                     if self.animation_elapsed_time < self.animation_blend_time:
-                        blend_ratio = self.animation_elapsed_time / self.animation_blend_time
+                        self.animation_blend_ratio = self.animation_elapsed_time / self.animation_blend_time
                     self.animation_elapsed_time += dt
 
                 # update animation buffers
                 self.prev_animation_buffers[i][...] = self.animation_buffers[i]
 
-                if self.last_animation_frame != self.animation_frame:
-                    self.last_animation_frame = self.animation_frame
-                    animation_buffer = animation.get_animation_transforms(self.animation_frame)
-
-                    if blend_ratio < 1.0:
-                        self.animation_buffers[i][...] = self.blend_animation_buffers[i] * (1.0 - blend_ratio) + animation_buffer * blend_ratio
-                    else:
-                        self.animation_buffers[i][...] = animation_buffer
+        self.need_to_update_animation_buffer = self.last_animation_frame != self.animation_frame
+        self.last_animation_frame = self.animation_frame
         self.is_animation_end = animation_end
+
+    def set_animation_buffer(self, index, animation_buffer):
+        blend_ratio = self.animation_blend_ratio
+        if blend_ratio < 1.0:
+            self.animation_buffers[index][...] = self.blend_animation_buffers[index] * (1.0 - blend_ratio) + animation_buffer * blend_ratio
+        else:
+            self.animation_buffers[index][...] = animation_buffer
+
+
+def update_skeleton_actors(skeleton_actors, dt):
+    """
+    Same as SkeletonActor.update, but the animation transforms of all skeleton actors playing the same animation are evaluated at once.
+    """
+    animation_requests = OrderedDict()
+    for skeleton_actor in skeleton_actors:
+        skeleton_actor.update_animation_frame(dt)
+        if skeleton_actor.need_to_update_animation_buffer:
+            for i, animation in enumerate(skeleton_actor.animation_mesh.animations):
+                if animation is not None:
+                    if animation not in animation_requests:
+                        animation_requests[animation] = []
+                    animation_requests[animation].append((skeleton_actor, i))
+
+    for animation, requests in animation_requests.items():
+        frames = [skeleton_actor.animation_frame for skeleton_actor, i in requests]
+        animation_transforms = animation.get_animation_transforms_batch(frames)
+        for (skeleton_actor, i), animation_buffer in zip(requests, animation_transforms):
+            skeleton_actor.set_animation_buffer(i, animation_buffer)
@@ -28,6 +28,8 @@ class Animation:
 
         self.last_frame = 0.0
 
+        self.build_animation_arrays()
+
         # just update animation transforms
         self.animation_transforms = np.array([Matrix4() for i in range(len(self.nodes))], dtype=np.float32)
         self.get_animation_transforms(0.0)
@@ -51,29 +53,88 @@ class Animation:
             return float(frame) + ratio
         return 0.0
 
+    def build_animation_arrays(self):
+        """
+        Stack the keyframes of all nodes, so the animation transforms of every bone can be evaluated at once.
+        """
+        bone_count = len(self.nodes)
+        max_frame_count = max([1, ] + [node.frame_count for node in self.nodes])
+
+        self.node_frame_counts = np.array([max(1, node.frame_count) for node in self.nodes], dtype=np.int64)
+        self.animated_nodes = np.array([0 < node.frame_count for node in self.nodes], dtype=np.bool_)
+        self.rotations = np.zeros((max_frame_count, bone_count, 4), dtype=np.float32)
+        self.rotations[..., 0] = 1.0
+        self.locations = np.zeros((max_frame_count, bone_count, 3), dtype=np.float32)
+        self.scales = np.ones((max_frame_count, bone_count, 3), dtype=np.float32)
+        for i, node in enumerate(self.nodes):
+            if 0 < node.frame_count:
+                self.rotations[:node.frame_count, i] = node.rotations
+                self.locations[:node.frame_count, i] = node.locations
+                self.scales[:node.frame_count, i] = node.scales
+
+        # bones which need to multiply inv_bind_matrix
+        self.inv_bind_nodes = np.array([0 < node.frame_count and not node.precompute_inv_bind_matrix for node in self.nodes], dtype=np.bool_)
+        self.inv_bind_matrices = np.array([node.bone.inv_bind_matrix if inv_bind else MATRIX4_IDENTITY
+                                           for node, inv_bind in zip(self.nodes, self.inv_bind_nodes)], dtype=np.float32).reshape(bone_count, 4, 4)
+        self.inv_bind_matrices = self.inv_bind_matrices[self.inv_bind_nodes]
+
+        # (bone indices, parent indices) of each depth of the hierachy
+        self.hierachy_levels = []
+        if self.root_node is not None and not self.root_node.precompute_parent_matrix:
+            bones = [bone for bone in self.skeleton.hierachy if bone.index < bone_count]
+            parents = [-1 for bone in bones]
+            while bones:
+                self.hierachy_levels.append((np.array([bone.index for bone in bones], dtype=np.int64),
+                                             np.array(parents, dtype=np.int64)))
+                parents = [bone.index for bone in bones for child in bone.children if child.index < bone_count]
+                bones = [child for bone in bones for child in bone.children if child.index < bone_count]
+
+    def get_animation_transforms_batch(self, frames):
+        """
+        Evaluate the animation transforms of many frames at once. ex) all skeleton actors playing this animation.
+        :param frames: list of animation frame.
+        :return: (frame count, bone count, 4, 4) array. each item has same layout as animation_transforms.
+        """
+        frames = np.asarray(frames, dtype=np.float64).reshape(-1)
+        int_frames = np.trunc(frames)
+        rates = (frames - int_frames).astype(np.float32)[:, np.newaxis]
+        frame_indices = int_frames.astype(np.int64)[:, np.newaxis] % self.node_frame_counts
+        next_frame_indices = (frame_indices + 1) % self.node_frame_counts
+        bone_indices = np.arange(len(self.nodes))
+
+        rotations = slerp_arrays(self.rotations[frame_indices, bone_indices], self.rotations[next_frame_indices, bone_indices], rates)
+        locations = self.locations[frame_indices, bone_indices]
+        locations += (self.locations[next_frame_indices, bone_indices] - locations) * rates[..., np.newaxis]
+        scales = self.scales[frame_indices, bone_indices]
+        scales += (self.scales[next_frame_indices, bone_indices] - scales) * rates[..., np.newaxis]
+
+        transforms = quaternions_to_matrices(rotations)
+        transforms[..., 0:3, :] *= scales[..., np.newaxis]
+        transforms[..., 3, 0:3] = locations
+
+        if self.inv_bind_nodes.any():
+            transforms[:, self.inv_bind_nodes] = np.matmul(self.inv_bind_matrices, transforms[:, self.inv_bind_nodes])
+
+        transforms[:, ~self.animated_nodes] = MATRIX4_IDENTITY
+
+        if self.hierachy_levels:
+            # concatenate parent matrices depth by depth
+            animation_transforms = np.zeros_like(transforms)
+            animation_transforms[...] = MATRIX4_IDENTITY
+            for level, (bone_indices, parent_indices) in enumerate(self.hierachy_levels):
+                if 0 == level:
+                    animation_transforms[:, bone_indices] = transforms[:, bone_indices]
+                else:
+                    animation_transforms[:, bone_indices] = np.matmul(transforms[:, bone_indices], animation_transforms[:, parent_indices])
+            return animation_transforms
+        return transforms
+
     def get_animation_transforms(self, frame=0.0):
         if self.last_frame == frame:
             return self.animation_transforms
         else:
             self.last_frame = frame
-
-            if self.root_node.precompute_parent_matrix:
-                for i, node in enumerate(self.nodes):
-                    self.animation_transforms[i][...] = node.get_transform(frame)
-            else:
-                def animation(parent_bone, parent_matrix):
-                    for bone in parent_bone.children:
-                        node = self.nodes[bone.index]
-                        node.get_transform(frame)
-                        transform = self.animation_transforms[bone.index]
-                        transform[...] = np.dot(node.transform, parent_matrix)
-                        animation(bone, transform)
-
-                for bone in self.skeleton.hierachy:
-                    node = self.nodes[bone.index]
-                    transform = self.animation_transforms[bone.index]
-                    transform[...] = node.get_transform(frame)
-                    animation(bone, transform)
+            self.animation_transforms[...] = self.get_animation_transforms_batch([frame, ])[0]
             return self.animation_transforms
 
 
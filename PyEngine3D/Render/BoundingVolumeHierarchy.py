@@ -0,0 +1,207 @@
+import numpy as np
+
+
+def expand_ranges(starts, counts):
+    """
+    :return: concatenated np.arange(start, start + count) of every range.
+    """
+    total_count = np.sum(counts)
+    if total_count == 0:
+        return np.zeros(0, dtype=np.int32)
+    offsets = np.cumsum(counts) - counts
+    return np.arange(total_count, dtype=np.int32) - np.repeat(offsets - starts, counts).astype(np.int32)
+
+
+def ray_intersect_bound_boxes(origin, inv_direction, bound_min, bound_max, max_distance):
+    """
+    slab test
+    :return: distances to the bound boxes. np.inf if there is no intersection.
+    """
+    with np.errstate(invalid='ignore'):
+        t0 = (bound_min - origin) * inv_direction
+        t1 = (bound_max - origin) * inv_direction
+    t_near = np.nanmax(np.minimum(t0, t1), axis=1)
+    t_far = np.nanmin(np.maximum(t0, t1), axis=1)
+    t_near = np.maximum(t_near, 0.0)
+    hit = (t_near <= t_far) & (t_near <= max_distance)
+    return np.where(hit, t_near, np.inf)
+
+
+class BoundingVolumeHierarchy:
+    """
+    Binary tree of bound boxes stored in arrays.
+    Every node covers a contiguous range of self.order, so a whole subtree can be accepted or rejected at once.
+    """
+    def __init__(self, leaf_size=8):
+        self.leaf_size = leaf_size
+        self.order = np.zeros(0, dtype=np.int32)
+        self.node_min = np.zeros((0, 3), dtype=np.float32)
+        self.node_max = np.zeros((0, 3), dtype=np.float32)
+        self.node_radius = np.zeros(0, dtype=np.float32)  # radius of the sphere at the node center which contains the spheres of the rows
+        self.node_children = np.zeros((0, 2), dtype=np.int32)
+        self.node_starts = np.zeros(0, dtype=np.int32)
+        self.node_counts = np.zeros(0, dtype=np.int32)
+        self.leaf_nodes = np.zeros(0, dtype=np.int32)
+        self.internal_nodes_by_depth = []
+
+    def get_node_count(self):
+        return len(self.node_starts)
+
+    def build(self, bound_min, bound_max, bound_center=None, radius=None):
+        count = len(bound_min)
+        self.order = np.arange(count, dtype=np.int32)
+        centers = (bound_min + bound_max) * 0.5
+
+        node_children = []
+        node_starts = []
+        node_counts = []
+        node_depths = []
+
+        if 0 < count:
+            # (node index, start, count, depth)
+            stack = [(0, 0, count, 0)]
+            node_children.append([-1, -1])
+            node_starts.append(0)
+            node_counts.append(count)
+            node_depths.append(0)
+
+            while stack:
+                node, start, node_count, depth = stack.pop()
+                if node_count <= self.leaf_size:
+                    continue
+
+                # split at the median of the longest axis
+                rows = self.order[start:start + node_count]
+                node_centers = centers[rows]
+                axis = np.argmax(np.max(node_centers, axis=0) - np.min(node_centers, axis=0))
+                half_count = node_count // 2
+                partition = np.argpartition(node_centers[:, axis], half_count)
+                self.order[start:start + node_count] = rows[partition]
+
+                for child_start, child_count in ((start, half_count), (start + half_count, node_count - half_count)):
+                    child = len(node_starts)
+                    node_children.append([-1, -1])
+                    node_starts.append(child_start)
+                    node_counts.append(child_count)
+                    node_depths.append(depth + 1)
+                    stack.append((child, child_start, child_count, depth + 1))
+                node_children[node] = [len(node_starts) - 2, len(node_starts) - 1]
+
+        node_count = len(node_starts)
+        self.node_children = np.array(node_children, dtype=np.int32).reshape(node_count, 2)
+        self.node_starts = np.array(node_starts, dtype=np.int32)
+        self.node_counts = np.array(node_counts, dtype=np.int32)
+        self.node_min = np.zeros((node_count, 3), dtype=np.float32)
+        self.node_max = np.zeros((node_count, 3), dtype=np.float32)
+        self.node_radius = np.zeros(node_count, dtype=np.float32)
+
+        is_leaf = self.node_children[:, 0] < 0
+        self.leaf_nodes = np.flatnonzero(is_leaf)
+        self.leaf_nodes = self.leaf_nodes[np.argsort(self.node_starts[self.leaf_nodes])]
+
+        node_depths = np.array(node_depths, dtype=np.int32)
+        internal_nodes = np.flatnonzero(~is_leaf)
+        max_depth = np.max(node_depths) if 0 < node_count else 0
+        self.internal_nodes_by_depth = [internal_nodes[node_depths[internal_nodes] == depth] for depth in range(max_depth + 1)]
+
+        self.refit(bound_min, bound_max, bound_center, radius)
+
+    def refit(self, bound_min, bound_max, bound_center=None, radius=None):
+        """
+        Recompute the bounds of every node without changing the tree topology.
+        :param bound_center, radius: spheres of the rows for view_frustum_culling,
+            the center of the bound box and the length of its diagonal if None.
+        """
+        if len(self.leaf_nodes) < 1:
+            return
+
+        if bound_center is None:
+            bound_center = (bound_min + bound_max) * 0.5
+        if radius is None:
+            radius = np.sqrt(np.sum((bound_max - bound_min) ** 2, axis=1))
+
+        # leaves are tiling self.order, so they can be reduced at once.
+        leaf_starts = self.node_starts[self.leaf_nodes]
+        self.node_min[self.leaf_nodes] = np.minimum.reduceat(bound_min[self.order], leaf_starts, axis=0)
+        self.node_max[self.leaf_nodes] = np.maximum.reduceat(bound_max[self.order], leaf_starts, axis=0)
+
+        # the node sphere contains the spheres of the rows, max(|c_i - C| + r_i).
+        leaf_centers = np.repeat((self.node_min[self.leaf_nodes] + self.node_max[self.leaf_nodes]) * 0.5, self.node_counts[self.leaf_nodes], axis=0)
+        row_extents = np.sqrt(np.sum((bound_center[self.order] - leaf_centers) ** 2, axis=1)) + radius[self.order]
+        self.node_radius[self.leaf_nodes] = np.maximum.reduceat(row_extents, leaf_starts)
+
+        for nodes in reversed(self.internal_nodes_by_depth):
+            left = self.node_children[nodes, 0]
+            right = self.node_children[nodes, 1]
+            self.node_min[nodes] = np.minimum(self.node_min[left], self.node_min[right])
+            self.node_max[nodes] = np.maximum(self.node_max[left], self.node_max[right])
+
+            node_centers = (self.node_min[nodes] + self.node_max[nodes]) * 0.5
+            child_extents = [np.sqrt(np.sum(((self.node_min[child] + self.node_max[child]) * 0.5 - node_centers) ** 2, axis=1)) + self.node_radius[child]
+                             for child in (left, right)]
+            self.node_radius[nodes] = np.maximum(*child_extents)
+
+    def traverse(self, node_test_func):
+        """
+        :param node_test_func: node_test_func(nodes) returns (outside, inside) boolean arrays of nodes.
+        :return: (rows of the fully inside subtrees, rows of the intersected leaves)
+        """
+        inside_nodes = []
+        leaf_nodes = []
+        frontier = np.zeros(1 if 0 < self.get_node_count() else 0, dtype=np.int32)
+        while 0 < len(frontier):
+            outside, inside = node_test_func(frontier)
+            inside_nodes.append(frontier[inside & ~outside])
+            intersected = frontier[~inside & ~outside]
+            is_leaf = self.node_children[intersected, 0] < 0
+            leaf_nodes.append(intersected[is_leaf])
+            frontier = self.node_children[intersected[~is_leaf]].reshape(-1)
+
+        def get_rows(nodes):
+            nodes = np.concatenate(nodes) if nodes else np.zeros(0, dtype=np.int32)
+            return self.order[expand_ranges(self.node_starts[nodes], self.node_counts[nodes])]
+        return get_rows(inside_nodes), get_rows(leaf_nodes)
+
+    def view_frustum_culling(self, camera_pos, frustum_vectors):
+        """
+        Same sphere test as view_frustum_culling_geometry, the node sphere contains the spheres of its rows,
+        so the rejected or accepted nodes are same as the result of the rows.
+        """
+        def node_test_func(nodes):
+            node_min = self.node_min[nodes]
+            node_max = self.node_max[nodes]
+            radius = self.node_radius[nodes][:, np.newaxis]
+            distances = np.dot((node_min + node_max) * 0.5 - camera_pos, frustum_vectors.T)
+            return np.any(radius < distances, axis=1), np.all(distances < -radius, axis=1)
+        return self.traverse(node_test_func)
+
+    def shadow_culling(self, shadow_view_projection):
+        """
+        The node is transformed conservatively, so if it is rejected then all of its bound boxes are rejected by shadow_culling.
+        """
+        rotation = shadow_view_projection[:3, :3]
+        translation = shadow_view_projection[3, :3]
+
+        def node_test_func(nodes):
+            node_min = self.node_min[nodes]
+            node_max = self.node_max[nodes]
+            center = np.dot((node_min + node_max) * 0.5, rotation) + translation
+            extent = np.dot((node_max - node_min) * 0.5, np.abs(rotation))
+            minimum = center - extent
+            maximum = center + extent
+            outside = np.any(maximum < -1.0, axis=1) | np.any(1.0 < minimum, axis=1)
+            inside = np.all(-1.0 <= minimum, axis=1) & np.all(maximum <= 1.0, axis=1)
+            return outside, inside
+        return self.traverse(node_test_func)
+
+    def ray_intersect(self, origin, direction, max_distance=np.inf):
+        """
+        :return: rows of the leaves which are intersected with the ray.
+        """
+        with np.errstate(divide='ignore'):
+            inv_direction = 1.0 / np.asarray(direction, dtype=np.float32)
+
+        def node_test_func(nodes):
+            distances = ray_intersect_bound_boxes(origin, inv_direction, self.node_min[nodes], self.node_max[nodes], max_distance)
+            return distances == np.inf, np.zeros(len(nodes), dtype=np.bool_)
+        return self.traverse(node_test_func)[1]
@@ -1,38 +1,94 @@
 import os
 import traceback
+import weakref
 
 import numpy as np
 from OpenGL.GL import *
 
 from PyEngine3D.Common import logger
 from PyEngine3D.App import CoreManager
-from PyEngine3D.OpenGLContext import InstanceBuffer
+from PyEngine3D.OpenGLContext import OpenGLContext, InstanceBuffer
 from PyEngine3D.Utilities import *
 from . import Line, ScreenQuad
 
 
-class DebugLine:
-    def __init__(self, pos0, pos1, color=None, width=1.0):
-        self.pos0 = pos0.copy()
-        self.pos1 = pos1.copy()
-        self.color = color.copy() if color is not None else Float4(1.0, 1.0, 1.0, 1.0)
-        self.width = width
-        self.alive = True
-
-    def update(self, delta_time):
-        pass
+class DebugLineBuffer:
+    """
+    Struct of arrays of the debug lines, which is the layout of the debug line instance buffer.
+    The lines are written into the preallocated arrays and the capacity grows geometrically,
+    so the buffer is reused every frame without allocations.
+    """
+    default_color = Float4(1.0, 1.0, 1.0, 1.0)
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.capacity = 0
+        self.positions0 = None
+        self.positions1 = None
+        self.colors = None
+        self.widths = None
+        self.reserve(capacity)
+
+    def reserve(self, count):
+        if count <= self.capacity:
+            return
+
+        capacity = max(count, self.capacity * 2)
+        datas = []
+        for data in (self.positions0, self.positions1, self.colors, self.widths):
+            new_data = np.zeros((capacity, 4), dtype=np.float32)
+            if data is not None:
+                new_data[:self.count] = data[:self.count]
+            datas.append(new_data)
+        self.positions0, self.positions1, self.colors, self.widths = datas
+        self.capacity = capacity
+
+    def clear(self):
+        self.count = 0
+
+    def append(self, pos0, pos1, color=None, width=1.0):
+        if self.capacity <= self.count:
+            self.reserve(self.count + 1)
+        index = self.count
+        self.positions0[index][0:3] = pos0
+        self.positions1[index][0:3] = pos1
+        self.colors[index] = color if color is not None else self.default_color
+        self.widths[index][0] = width
+        self.count += 1
+
+    def append_lines(self, positions0, positions1, colors=None, widths=1.0):
+        """
+        :param positions0: [line count, 3]
+        :param positions1: [line count, 3]
+        :param colors: [4] or [line count, 4]
+        :param widths: float or [line count]
+        """
+        line_count = len(positions0)
+        if 0 == line_count:
+            return
+        self.reserve(self.count + line_count)
+        lines = slice(self.count, self.count + line_count)
+        self.positions0[lines, 0:3] = positions0
+        self.positions1[lines, 0:3] = positions1
+        self.colors[lines] = colors if colors is not None else self.default_color
+        self.widths[lines, 0] = widths
+        self.count += line_count
+
+    def get_instance_datas(self):
+        # only the lines in use are uploaded.
+        return [self.positions0[:self.count], self.positions1[:self.count], self.colors[:self.count], self.widths[:self.count]]
 
 
 class DebugLineManager(Singleton):
     def __init__(self):
         self.core_manager = None
         self.renderer = None
-        self.debug_lines_2d = []
-        self.debug_lines_3d = []
+        self.debug_lines_2d = DebugLineBuffer()
+        self.debug_lines_3d = DebugLineBuffer()
+        self.spline_line_buffers = weakref.WeakKeyDictionary()  # { spline data : (resampling version, DebugLineBuffer) }
         self.debug_line_material = None
         self.debug_line_vertex_buffer = None
         self.debug_line_instance_buffer = None
-        self.debug_line_instance_data = None
         self.debug_line_instance_element_data = [FLOAT4_ZERO, FLOAT4_ZERO, FLOAT4_ZERO, FLOAT4_ZERO]
 
     def initialize(self, core_manager):
@@ -44,24 +100,52 @@ class DebugLineManager(Singleton):
             self.debug_line_material = core_manager.resource_manager.get_material_instance("debug_line")
             self.debug_line_vertex_buffer = ScreenQuad.get_vertex_array_buffer()
             self.debug_line_instance_buffer = InstanceBuffer(name="debug_line_instance_buffer", location_offset=1, element_datas=self.debug_line_instance_element_data)
-            self.resize_debug_line_instance_data(10)
-
-    def resize_debug_line_instance_data(self, count):
-        if self.debug_line_instance_data is None or (len(self.debug_line_instance_data) / len(self.debug_line_instance_element_data)) < count:
-            element = [[0.0, 0.0, 0.0, 0.0]] * count
-            self.debug_line_instance_data = np.array([element, element, element, element], dtype=np.float32)
 
     def clear_debug_lines(self):
-        self.debug_lines_2d = []
-        self.debug_lines_3d = []
+        self.debug_lines_2d.clear()
+        self.debug_lines_3d.clear()
 
     def draw_debug_line_2d(self, pos0, pos1, color=None, width=1.0):
-        debug_line = DebugLine(Float3(*pos0, -1.0), Float3(*pos1, -1.0), color, width)
-        self.debug_lines_2d.append(debug_line)
+        self.debug_lines_2d.append((pos0[0], pos0[1], -1.0), (pos1[0], pos1[1], -1.0), color, width)
 
     def draw_debug_line_3d(self, pos0, pos1, color=None, width=1.0):
-        debug_line = DebugLine(pos0, pos1, color, width)
-        self.debug_lines_3d.append(debug_line)
+        self.debug_lines_3d.append(pos0, pos1, color, width)
+
+    def draw_debug_lines_2d(self, points_array, colors=None, widths=1.0):
+        """
+        :param points_array: [line count, 2(pos0, pos1), 2]
+        """
+        points_array = np.asarray(points_array, dtype=np.float32).reshape(-1, 2, 2)
+        positions = np.full((len(points_array), 2, 3), -1.0, dtype=np.float32)
+        positions[..., 0:2] = points_array
+        self.debug_lines_2d.append_lines(positions[:, 0], positions[:, 1], colors, widths)
+
+    def draw_debug_lines(self, points_array, colors=None, widths=1.0):
+        """
+        :param points_array: [line count, 2(pos0, pos1), 3]
+        :param colors: [4] or [line count, 4]
+        :param widths: float or [line count]
+        """
+        points_array = np.asarray(points_array, dtype=np.float32).reshape(-1, 2, 3)
+        self.debug_lines_3d.append_lines(points_array[:, 0], points_array[:, 1], colors, widths)
+
+    def draw_debug_line_strip(self, points, color=None, width=1.0):
+        """
+        :param points: [point count, 3], the lines connect the adjacent points.
+        """
+        points = np.asarray(points, dtype=np.float32)
+        if 1 < len(points):
+            self.debug_lines_3d.append_lines(points[:-1], points[1:], color, width)
+
+    def get_spline_line_buffer(self, spline_data):
+        # the line buffer is rebuilt only when the spline data is resampled.
+        resampling_version, line_buffer = self.spline_line_buffers.get(spline_data, (None, None))
+        if line_buffer is None or resampling_version != spline_data.resampling_version:
+            line_buffer = DebugLineBuffer(max(1, len(spline_data.resampling_positions) - 1))
+            positions = spline_data.resampling_positions
+            line_buffer.append_lines(positions[:-1], positions[1:])
+            self.spline_line_buffers[spline_data] = (spline_data.resampling_version, line_buffer)
+        return line_buffer
 
     def bind_render_spline_program(self):
         self.debug_line_material.use_program()
@@ -69,70 +153,50 @@ class DebugLineManager(Singleton):
         self.debug_line_material.bind_uniform_data("is_debug_line_2d", False)
 
     def render_spline(self, spline, custom_color=None, add_width=0.0):
-        spline_color = custom_color if custom_color is not None else spline.color
-        spline_width = spline.width + add_width
-        resampling_count = len(spline.spline_data.resampling_positions)
-        if 1 < resampling_count:
-            debug_lines = []
-            for i in range(resampling_count - 1):
-                debug_line = DebugLine(
-                    spline.spline_data.resampling_positions[i],
-                    spline.spline_data.resampling_positions[i + 1],
-                    color=spline_color,
-                    width=spline_width
-                )
-                debug_lines.append(debug_line)
-
-            if spline.depth_test:
-                glEnable(GL_DEPTH_TEST)
-            else:
-                glDisable(GL_DEPTH_TEST)
-            self.debug_line_material.bind_uniform_data("transform", spline.transform.matrix)
-            self.render_lines(debug_lines)
-
-    def render_lines(self, debug_lines):
-        line_count = len(debug_lines)
-        if 0 < line_count:
-            self.resize_debug_line_instance_data(line_count)
-
-            for i, debug_line in enumerate(debug_lines):
-                self.debug_line_instance_data[0][i][0:3] = debug_line.pos0
-                self.debug_line_instance_data[1][i][0:3] = debug_line.pos1
-                self.debug_line_instance_data[2][i][0:4] = debug_line.color
-                self.debug_line_instance_data[3][i][0] = debug_line.width
+        if spline.spline_data is None or len(spline.spline_data.resampling_positions) < 2:
+            return
 
+        line_buffer = self.get_spline_line_buffer(spline.spline_data)
+        line_buffer.colors[:line_buffer.count] = custom_color if custom_color is not None else spline.color
+        line_buffer.widths[:line_buffer.count, 0] = spline.width + add_width
+
+        if spline.depth_test:
+            OpenGLContext.enable(GL_DEPTH_TEST)
+        else:
+            OpenGLContext.disable(GL_DEPTH_TEST)
+        self.debug_line_material.bind_uniform_data("transform", spline.transform.matrix)
+        self.render_lines(line_buffer)
+
+    def render_lines(self, line_buffer):
+        if 0 < line_buffer.count:
             self.debug_line_vertex_buffer.draw_elements_instanced(
-                line_count,
+                line_buffer.count,
                 instance_buffer=self.debug_line_instance_buffer,
-                instance_datas=self.debug_line_instance_data
+                instance_datas=line_buffer.get_instance_datas()
             )
 
+    def render_lines_basic(self, line_buffer):
+        for i in range(line_buffer.count):
+            glLineWidth(line_buffer.widths[i][0])
+            glColor4f(*line_buffer.colors[i])
+            glBegin(GL_LINES)
+            glVertex3f(*line_buffer.positions0[i][0:3])
+            glVertex3f(*line_buffer.positions1[i][0:3])
+            glEnd()
+
     def render_debug_lines(self):
         if self.core_manager.is_basic_mode:
             glPushMatrix()
             glLoadIdentity()
-            for debug_line in self.debug_lines_2d:
-                glLineWidth(debug_line.width)
-                glColor4f(*debug_line.color)
-                glBegin(GL_LINES)
-                glVertex3f(*debug_line.pos0)
-                glVertex3f(*debug_line.pos1)
-                glEnd()
+            self.render_lines_basic(self.debug_lines_2d)
             glPopMatrix()
 
             glPushMatrix()
             self.renderer.perspective_view(look_at=True)
-
-            for debug_line in self.debug_lines_3d:
-                glLineWidth(debug_line.width)
-                glColor4f(*debug_line.color)
-                glBegin(GL_LINES)
-                glVertex3f(*debug_line.pos0)
-                glVertex3f(*debug_line.pos1)
-                glEnd()
+            self.render_lines_basic(self.debug_lines_3d)
             glPopMatrix()
         else:
-            glDisable(GL_DEPTH_TEST)
+            OpenGLContext.disable(GL_DEPTH_TEST)
             self.debug_line_material.use_program()
             self.debug_line_material.bind_material_instance()
             self.debug_line_material.bind_uniform_data("is_debug_line_2d", True)
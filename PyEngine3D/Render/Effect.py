@@ -11,7 +11,7 @@ from OpenGL.GLU import *
 from PyEngine3D.Common import logger
 from PyEngine3D.OpenGLContext import DispatchIndirectCommand, DispatchIndirectBuffer
 from PyEngine3D.OpenGLContext import DrawElementsIndirectCommand, DrawElementIndirectBuffer
-from PyEngine3D.OpenGLContext import ShaderStorageBuffer, InstanceBuffer, UniformBlock
+from PyEngine3D.OpenGLContext import OpenGLContext, ShaderStorageBuffer, InstanceBuffer, UniformBlock
 from PyEngine3D.Utilities import *
 from PyEngine3D.Common.Constants import *
 from PyEngine3D.Common import logger, log_level, COMMAND
@@ -128,17 +128,17 @@ class EffectManager(Singleton):
                 # set blend mode
                 if prev_blend_mode != particle_info.blend_mode:
                     if particle_info.blend_mode is BlendMode.BLEND:
-                        glBlendEquation(GL_FUNC_ADD)
-                        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+                        OpenGLContext.blend_equation(GL_FUNC_ADD)
+                        OpenGLContext.blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
                     elif particle_info.blend_mode is BlendMode.ADDITIVE:
-                        glBlendEquation(GL_FUNC_ADD)
-                        glBlendFunc(GL_ONE, GL_ONE)
+                        OpenGLContext.blend_equation(GL_FUNC_ADD)
+                        OpenGLContext.blend_func(GL_ONE, GL_ONE)
                     elif particle_info.blend_mode is BlendMode.MULTIPLY:
-                        glBlendEquation(GL_FUNC_ADD)
-                        glBlendFunc(GL_ZERO, GL_SRC_COLOR)
+                        OpenGLContext.blend_equation(GL_FUNC_ADD)
+                        OpenGLContext.blend_func(GL_ZERO, GL_SRC_COLOR)
                     elif particle_info.blend_mode is BlendMode.SUBTRACT:
-                        glBlendEquation(GL_FUNC_SUBTRACT)
-                        glBlendFunc(GL_ONE, GL_ONE)
+                        OpenGLContext.blend_equation(GL_FUNC_SUBTRACT)
+                        OpenGLContext.blend_func(GL_ONE, GL_ONE)
                     prev_blend_mode = particle_info.blend_mode
 
                 geometry = particle_info.mesh.get_geometry()
@@ -260,30 +260,7 @@ class EffectManager(Singleton):
                     material_instance.bind_material_instance()
                     material_instance.bind_uniform_data('texture_diffuse', particle_info.texture_diffuse)
 
-                    draw_count = 0
-                    for particle in emitter.particles:
-                        if particle.is_renderable():
-                            if AlignMode.BILLBOARD == particle_info.align_mode:
-                                particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, main_camera.inv_view_origin)
-                                particle_info.world_matrix_data[draw_count][3][...] = np.dot(particle.transform.matrix, particle.parent_matrix)[3]
-                            elif AlignMode.VELOCITY_ALIGN == particle_info.align_mode:
-                                world_velocity = np.dot(particle.velocity_position, particle.parent_matrix[0:3, 0:3])
-                                velocity_length = length(world_velocity)
-                                if 0.0 < velocity_length:
-                                    direction = normalize(particle.parent_matrix[3][0:3] - cameara_position)
-                                    world_velocity /= velocity_length
-                                    world_matrix = particle_info.world_matrix_data[draw_count]
-                                    world_matrix[0][0:3] = np.cross(world_velocity, direction)
-                                    world_matrix[1][0:3] = world_velocity * (1.0 + velocity_length * particle_info.velocity_stretch * 0.1)
-                                    world_matrix[2][0:3] = np.cross(world_matrix[0][0:3], world_velocity)
-                                    world_matrix[3][...] = np.dot(particle.transform.matrix, particle.parent_matrix)[3]
-                            else:
-                                particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, particle.parent_matrix)
-                            particle_info.uvs_data[draw_count][0:2] = particle.sequence_uv
-                            particle_info.uvs_data[draw_count][2:4] = particle.next_sequence_uv
-                            particle_info.sequence_opacity_data[draw_count][0] = particle.sequence_ratio
-                            particle_info.sequence_opacity_data[draw_count][1] = particle.final_opacity
-                            draw_count += 1
+                    draw_count = emitter.update_instance_data(main_camera.inv_view_origin, cameara_position)
 
                     if 0 < draw_count:
                         geometry.draw_elements_instanced(draw_count,
@@ -441,6 +418,26 @@ class Emitter:
         self.alive_particle_count = 0
         self.particles = []
 
+        # cpu particle data, alive particles are packed at the front of the arrays.
+        self.positions = None
+        self.rotations = None
+        self.scales = None
+        self.velocity_positions = None
+        self.velocity_rotations = None
+        self.velocity_scales = None
+        self.forces = None
+        self.parent_matrices = None
+        self.local_matrices = None
+        self.delays = None
+        self.life_times = None
+        self.elapsed_times = None
+        self.opacities = None
+        self.sequence_ratios = None
+        self.sequence_indices = None
+        self.next_sequence_indices = None
+        self.sequence_uvs = None
+        self.next_sequence_uvs = None
+
         # gpu data
         self.need_to_initialize_gpu_buffer = True
         self.index_range_buffer = None
@@ -492,6 +489,33 @@ class Emitter:
 
         self.particle_buffer.clear_buffer()
 
+    def create_cpu_particle_arrays(self, count):
+        self.positions = np.zeros((count, 3), dtype=np.float32)
+        self.rotations = np.zeros((count, 3), dtype=np.float32)
+        self.scales = np.ones((count, 3), dtype=np.float32)
+        self.velocity_positions = np.zeros((count, 3), dtype=np.float32)
+        self.velocity_rotations = np.zeros((count, 3), dtype=np.float32)
+        self.velocity_scales = np.zeros((count, 3), dtype=np.float32)
+        self.forces = np.zeros((count, 3), dtype=np.float32)
+        self.parent_matrices = np.zeros((count, 4, 4), dtype=np.float32)
+        self.local_matrices = np.zeros((count, 4, 4), dtype=np.float32)
+        self.local_matrices[...] = MATRIX4_IDENTITY
+        self.delays = np.zeros(count, dtype=np.float32)
+        self.life_times = np.zeros(count, dtype=np.float32)
+        self.elapsed_times = np.zeros(count, dtype=np.float32)
+        self.opacities = np.zeros(count, dtype=np.float32)
+        self.sequence_ratios = np.zeros(count, dtype=np.float32)
+        self.sequence_indices = np.zeros(count, dtype=np.int32)
+        self.next_sequence_indices = np.zeros(count, dtype=np.int32)
+        self.sequence_uvs = np.zeros((count, 2), dtype=np.float32)
+        self.next_sequence_uvs = np.zeros((count, 2), dtype=np.float32)
+
+    def get_cpu_particle_arrays(self):
+        return (self.positions, self.rotations, self.scales, self.velocity_positions, self.velocity_rotations,
+                self.velocity_scales, self.forces, self.parent_matrices, self.local_matrices, self.delays,
+                self.life_times, self.elapsed_times, self.opacities, self.sequence_ratios, self.sequence_indices,
+                self.next_sequence_indices, self.sequence_uvs, self.next_sequence_uvs)
+
     def delete_gpu_buffer(self):
         if self.index_range_buffer is not None:
             self.index_range_buffer.delete()
@@ -539,7 +563,7 @@ class Emitter:
             # self.gpu_particle_spawn_count = self.particle_info.spawn_count
         else:
             # CPU Particle
-            self.particles = [Particle(self.parent_effect, self, self.particle_info) for i in range(self.particle_info.max_particle_count)]
+            self.create_cpu_particle_arrays(self.particle_info.max_particle_count)
             # spawn at first time
             # self.spawn_particle(self.particle_info.spawn_count)
 
@@ -547,10 +571,80 @@ class Emitter:
         spawn_count = min(spawn_count, self.particle_info.max_particle_count - self.alive_particle_count)
         if 0 < spawn_count:
             begin_index = self.alive_particle_count
-            for i in range(spawn_count):
-                self.particles[begin_index + i].spawn()
+            if self.particle_info.enable_gpu_particle:
+                for i in range(spawn_count):
+                    self.particles[begin_index + i].spawn()
+            else:
+                self.spawn_cpu_particles(begin_index, spawn_count)
             self.alive_particle_count += spawn_count
 
+    def spawn_cpu_particles(self, begin_index, spawn_count):
+        """
+        Same as Particle.initialize of cpu particle, for spawn_count particles at once.
+        """
+        particle_info = self.particle_info
+        indices = slice(begin_index, begin_index + spawn_count)
+
+        random_factor = np.random.uniform(size=(spawn_count, 4)).astype(np.float32)
+        spawn_volume_info = particle_info.spawn_volume_info
+        spawn_positions = np.zeros((spawn_count, 3), dtype=np.float32)
+        if SpawnVolume.BOX == particle_info.spawn_volume_type:
+            spawn_positions[...] = spawn_volume_info * (random_factor[:, 0:3] - 0.5)
+        elif SpawnVolume.SPHERE == particle_info.spawn_volume_type:
+            vectors = normalize_vectors(random_factor[:, 0:3] - 0.5)
+            ratio = random_factor[:, 3] * random_factor[:, 3]
+            spawn_positions[...] = vectors * (lerp(spawn_volume_info[1], spawn_volume_info[0], ratio) * 0.5)[:, np.newaxis]
+        elif SpawnVolume.CONE == particle_info.spawn_volume_type:
+            vectors = normalize_vectors(random_factor[:, 0:2] - 0.5)
+            ratio = random_factor[:, 2] * random_factor[:, 2]
+            l = lerp(spawn_volume_info[1], spawn_volume_info[0], ratio) * np.sqrt(random_factor[:, 3]) * 0.5
+            spawn_positions[:, 0] = l * vectors[:, 0]
+            spawn_positions[:, 1] = spawn_volume_info[2] * (ratio - 0.5)
+            spawn_positions[:, 2] = l * vectors[:, 1]
+        elif SpawnVolume.CYLINDER == particle_info.spawn_volume_type:
+            vectors = normalize_vectors(random_factor[:, 0:2] - 0.5)
+            l = lerp(spawn_volume_info[1], spawn_volume_info[0], random_factor[:, 2] * random_factor[:, 2]) * 0.5
+            spawn_positions[:, 0] = l * vectors[:, 0]
+            spawn_positions[:, 1] = spawn_volume_info[2] * (random_factor[:, 2] - 0.5)
+            spawn_positions[:, 2] = l * vectors[:, 1]
+
+        for i, is_abs_axis in enumerate(particle_info.spawn_volume_abs_axis):
+            if is_abs_axis:
+                spawn_positions[:, i] = np.abs(spawn_positions[:, i])
+
+        spawn_volume_matrix = particle_info.spawn_volume_transform.matrix
+        spawn_positions[...] = np.dot(spawn_positions, spawn_volume_matrix[0:3, 0:3]) + spawn_volume_matrix[3, 0:3]
+
+        self.positions[indices] = spawn_positions
+        self.rotations[indices] = particle_info.transform_rotation.get_uniforms(spawn_count)
+        self.scales[indices] = particle_info.transform_scale.get_uniforms(spawn_count)
+
+        # Store metrics at the time of spawn.
+        self.parent_matrices[indices] = self.parent_effect.transform.matrix
+
+        # We will apply inverse_matrix here because we will apply parent_matrix later.
+        self.forces[indices] = np.dot([0.0, -particle_info.force_gravity, 0.0], self.parent_effect.transform.inverse_matrix[0:3, 0:3])
+
+        velocity_positions = particle_info.velocity_position.get_uniforms(spawn_count)
+        if VelocityType.SPAWN_DIRECTION == particle_info.velocity_type:
+            velocity_positions = np.abs(velocity_positions) * normalize_vectors(spawn_positions)
+        elif VelocityType.HURRICANE == particle_info.velocity_type:
+            velocity_positions = np.abs(velocity_positions) * np.cross(WORLD_UP, normalize_vectors(spawn_positions))
+        self.velocity_positions[indices] = velocity_positions
+        self.velocity_rotations[indices] = particle_info.velocity_rotation.get_uniforms(spawn_count)
+        self.velocity_scales[indices] = particle_info.velocity_scale.get_uniforms(spawn_count)
+
+        self.delays[indices] = particle_info.delay.get_uniforms(spawn_count)
+        self.life_times[indices] = particle_info.life_time.get_uniforms(spawn_count)
+        self.elapsed_times[indices] = 0.0
+        self.opacities[indices] = particle_info.opacity
+        self.sequence_ratios[indices] = 0.0
+        self.sequence_indices[indices] = 0
+        self.next_sequence_indices[indices] = 0
+        self.sequence_uvs[indices] = 0.0
+        self.next_sequence_uvs[indices] = 0.0
+        self.update_cpu_particle_local_matrices(indices)
+
     def destroy(self):
         self.alive = False
 
@@ -558,6 +652,7 @@ class Emitter:
             particle.destroy()
 
         self.particles = []
+        self.alive_particle_count = 0
 
     def update(self, dt):
         if not self.alive or not self.particle_info.enable:
@@ -566,22 +661,25 @@ class Emitter:
         self.elapsed_time += dt
 
         # update particles
-        index = 0
-        alive_count = self.alive_particle_count
-        for n in range(alive_count):
-            particle = self.particles[index]
-            particle.update(dt)
-
-            if not particle.alive:
-                self.alive_particle_count -= 1
-                last_particle_index = self.alive_particle_count
-                if 0 < self.alive_particle_count:
-                    # swap the present and the last.
-                    if index != last_particle_index:
-                        self.particles[index] = self.particles[last_particle_index]
-                        self.particles[last_particle_index] = particle
-                        continue
-            index += 1
+        if self.particle_info.enable_gpu_particle:
+            index = 0
+            alive_count = self.alive_particle_count
+            for n in range(alive_count):
+                particle = self.particles[index]
+                particle.update(dt)
+
+                if not particle.alive:
+                    self.alive_particle_count -= 1
+                    last_particle_index = self.alive_particle_count
+                    if 0 < self.alive_particle_count:
+                        # swap the present and the last.
+                        if index != last_particle_index:
+                            self.particles[index] = self.particles[last_particle_index]
+                            self.particles[last_particle_index] = particle
+                            continue
+                index += 1
+        elif 0 < self.alive_particle_count:
+            self.update_cpu_particles(dt)
 
         if self.has_vector_field_rotation:
             self.vector_field_transform.rotation(self.particle_info.vector_field_rotation * dt)
@@ -621,6 +719,152 @@ class Emitter:
 
         return self.gpu_particle_max_count if self.particle_info.enable_gpu_particle else self.alive_particle_count
 
+    def update_cpu_particles(self, dt):
+        """
+        Same as Particle.update of cpu particle, for all alive particles at once.
+        The particles which are waiting for the delay are masked out by the zero delta time.
+        """
+        particle_info = self.particle_info
+        count = self.alive_particle_count
+        delays = self.delays[:count]
+        life_times = self.life_times[:count]
+        elapsed_times = self.elapsed_times[:count]
+
+        delayed = 0.0 < delays
+        delays[delayed] -= dt
+        delay_end = delayed & (delays < 0.0)
+        elapsed_times[delay_end] -= delays[delay_end]
+        delays[delay_end] = 0.0
+
+        updated = (~delayed | delay_end)
+        dead = updated & (life_times < elapsed_times)
+        updated &= ~dead
+
+        if updated.any():
+            delta_times = updated.astype(np.float32) * dt
+
+            life_ratios = np.zeros(count, dtype=np.float32)
+            np.divide(elapsed_times, life_times, out=life_ratios, where=0.0 < life_times)
+            np.minimum(life_ratios, 1.0, out=life_ratios)
+            left_life_times = life_times - elapsed_times
+            elapsed_times += delta_times
+
+            self.update_cpu_particle_sequences(updated, life_ratios)
+
+            # update transform
+            velocity_positions = self.velocity_positions[:count]
+            if particle_info.force_gravity != 0.0:
+                velocity_positions += self.forces[:count] * delta_times[:, np.newaxis]
+
+            if 0.0 != particle_info.velocity_acceleration:
+                velocity_lengths = np.sqrt(np.sum(velocity_positions * velocity_positions, axis=1))
+                moving = updated & np.any(velocity_positions != 0.0, axis=1)
+                new_velocity_lengths = velocity_lengths + particle_info.velocity_acceleration * dt
+                if 0.0 < particle_info.velocity_limit.value[1]:
+                    new_velocity_lengths = np.minimum(new_velocity_lengths, particle_info.velocity_limit.value[1])
+                new_velocity_lengths = np.maximum(new_velocity_lengths, particle_info.velocity_limit.value[0])
+                velocity_positions[moving] *= (new_velocity_lengths[moving] / velocity_lengths[moving])[:, np.newaxis]
+
+            self.positions[:count] += velocity_positions * delta_times[:, np.newaxis]
+            self.rotations[:count] += self.velocity_rotations[:count] * delta_times[:, np.newaxis]
+            self.scales[:count] += self.velocity_scales[:count] * delta_times[:, np.newaxis]
+
+            self.update_cpu_particle_local_matrices(slice(0, count))
+
+            if 0.0 != particle_info.fade_in or 0.0 != particle_info.fade_out:
+                opacities = np.ones(count, dtype=np.float32) * particle_info.opacity
+
+                if 0.0 < particle_info.fade_in:
+                    fade_in = life_times < particle_info.fade_in
+                    opacities[fade_in] *= life_times[fade_in] / particle_info.fade_in
+
+                if 0.0 < particle_info.fade_out:
+                    fade_out = left_life_times < particle_info.fade_out
+                    opacities[fade_out] *= left_life_times[fade_out] / particle_info.fade_out
+                self.opacities[:count] = np.where(updated, opacities, self.opacities[:count])
+
+        # pack alive particles at the front
+        if dead.any():
+            alive = ~dead
+            self.alive_particle_count = int(np.count_nonzero(alive))
+            for data in self.get_cpu_particle_arrays():
+                data[:self.alive_particle_count] = data[:count].compress(alive, axis=0)
+
+    def update_cpu_particle_local_matrices(self, indices):
+        local_matrices = get_rotation_matrices(self.rotations[indices])
+        local_matrices[:, 0:3, :] *= self.scales[indices][:, :, np.newaxis]
+        local_matrices[:, 3, 0:3] = self.positions[indices]
+        self.local_matrices[indices] = local_matrices
+
+    def update_cpu_particle_sequences(self, updated, life_ratios):
+        particle_info = self.particle_info
+        cell_count = particle_info.cell_count
+        total_cell_count = cell_count[0] * cell_count[1]
+        if total_cell_count <= 1 or particle_info.play_speed <= 0:
+            return
+
+        count = len(updated)
+        ratio = life_ratios * particle_info.play_speed
+        ratio = (total_cell_count - 1) * (ratio - np.floor(ratio))
+        index = np.floor(ratio)
+        next_index = np.minimum(index + 1, total_cell_count - 1).astype(np.int32)
+        sequence_ratios = self.sequence_ratios[:count]
+        sequence_ratios[updated] = (ratio - index)[updated]
+
+        changed = np.flatnonzero(updated & (next_index != self.next_sequence_indices[:count]))
+        next_index = next_index[changed]
+        self.sequence_indices[changed] = self.next_sequence_indices[changed]
+        self.sequence_uvs[changed] = self.next_sequence_uvs[changed]
+        self.next_sequence_indices[changed] = next_index
+        self.next_sequence_uvs[changed, 0] = (next_index % cell_count[0]) / cell_count[0]
+        self.next_sequence_uvs[changed, 1] = (cell_count[1] - 1 - np.floor(next_index / cell_count[0])) / cell_count[1]
+
+    def update_instance_data(self, inv_view_origin, camera_position):
+        """
+        fill the instance buffer data of particle_info with the renderable cpu particles.
+        :return: draw count
+        """
+        particle_info = self.particle_info
+        count = self.alive_particle_count
+        indices = np.flatnonzero(self.delays[:count] <= 0.0)
+        draw_count = len(indices)
+        if 0 == draw_count:
+            return 0
+
+        if draw_count == count:
+            indices = slice(0, count)
+
+        world_matrix_data = particle_info.world_matrix_data[:draw_count]
+        local_matrices = self.local_matrices[indices]
+        parent_matrices = self.parent_matrices[indices]
+        world_positions = np.einsum('ni,nij->nj', local_matrices[:, 3], parent_matrices)
+
+        if AlignMode.BILLBOARD == particle_info.align_mode:
+            world_matrix_data[...] = np.dot(local_matrices.reshape(-1, 4), inv_view_origin).reshape(-1, 4, 4)
+            world_matrix_data[:, 3] = world_positions
+        elif AlignMode.VELOCITY_ALIGN == particle_info.align_mode:
+            world_velocities = np.einsum('ni,nij->nj', self.velocity_positions[indices], parent_matrices[:, 0:3, 0:3])
+            velocity_lengths = np.sqrt(np.sum(world_velocities * world_velocities, axis=1))
+            moving = 0.0 < velocity_lengths
+            world_velocities = world_velocities[moving] / velocity_lengths[moving][:, np.newaxis]
+            velocity_lengths = velocity_lengths[moving]
+            directions = normalize_vectors(parent_matrices[moving, 3, 0:3] - camera_position)
+            axis_x = np.cross(world_velocities, directions)
+            world_matrix = world_matrix_data[moving]
+            world_matrix[:, 0, 0:3] = axis_x
+            world_matrix[:, 1, 0:3] = world_velocities * (1.0 + velocity_lengths * particle_info.velocity_stretch * 0.1)[:, np.newaxis]
+            world_matrix[:, 2, 0:3] = np.cross(axis_x, world_velocities)
+            world_matrix[:, 3] = world_positions[moving]
+            world_matrix_data[moving] = world_matrix
+        else:
+            world_matrix_data[...] = np.matmul(local_matrices, parent_matrices)
+
+        particle_info.uvs_data[:draw_count, 0:2] = self.sequence_uvs[indices]
+        particle_info.uvs_data[:draw_count, 2:4] = self.next_sequence_uvs[indices]
+        particle_info.sequence_opacity_data[:draw_count, 0] = self.sequence_ratios[indices]
+        particle_info.sequence_opacity_data[:draw_count, 1] = self.opacities[indices]
+        return draw_count
+
 
 class Particle:
     def __init__(self, parent_effect, parent_emitter, particle_info):
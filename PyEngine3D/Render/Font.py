@@ -1,10 +1,57 @@
+from collections import OrderedDict
+
 import numpy as np
 
 from PyEngine3D.Utilities import *
 from .RenderOptions import RenderOption
 
 
+class TextLayoutCache:
+    """
+    Laid out glyph runs of the text lines, keyed by line and font data.
+    A run is the render queue rows of a line at row 0, so the unchanged lines are copied instead of laid out again.
+    """
+    def __init__(self, max_line_count=4096):
+        self.max_line_count = max_line_count
+        self.runs = OrderedDict()  # { (font data, line) : run }, the most recently used is the last.
+
+    def clear(self):
+        self.runs = OrderedDict()
+
+    @staticmethod
+    def layout_line(line, font_data):
+        """
+        :return: (glyph count, 4) float32 array of [column, row, texcoord_x, texcoord_y]
+        """
+        codepoints = np.frombuffer(line.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        # every character takes a column, the white spaces are not rendered.
+        columns = np.nonzero((codepoints != ord(' ')) & (codepoints != ord('\t')))[0]
+        count_of_side = font_data.count_of_side
+        ratio = 1.0 / count_of_side
+        index = np.maximum(0, codepoints[columns] - font_data.range_min)
+
+        run = np.zeros((len(columns), 4), dtype=np.float32)
+        run[:, 0] = columns
+        run[:, 2] = (index % count_of_side) * ratio
+        run[:, 3] = (count_of_side - 1 - (index * ratio).astype(np.int64)) * ratio
+        return run
+
+    def get_run(self, line, font_data):
+        key = (font_data, line)
+        run = self.runs.get(key)
+        if run is None:
+            run = self.layout_line(line, font_data)
+            self.runs[key] = run
+            if self.max_line_count < len(self.runs):
+                self.runs.popitem(last=False)
+        else:
+            self.runs.move_to_end(key)
+        return run
+
+
 class TextRenderData:
+    layout_cache = TextLayoutCache()
+
     def __init__(self):
         self._text = ""
         self.column = 0
@@ -26,40 +73,25 @@ class TextRenderData:
     def text(self, text):
         self._text = text
 
-        ratio = 1.0 / self.font_data.count_of_side
-        text_count = len(text)
+        lines = text.split('\n')
+        runs = [self.layout_cache.get_run(line, self.font_data) for line in lines]
+        run_counts = [len(run) for run in runs]
+        text_count = sum(run_counts)
 
         if len(self.render_queue) < text_count:
             self.render_queue.resize((text_count, 4), refcheck=False)
 
-        render_index = 0
-        max_column = self.initial_column
-        column = self.initial_column
-        row = self.initial_row
-
-        for c in text:
-            if c == '\n':
-                column = self.initial_column
-                row += 1
-            elif c == '\t':
-                column += 1
-            elif c == ' ':
-                column += 1
-            else:
-                index = max(0, ord(c) - self.font_data.range_min)
-                texcoord_x = (index % self.font_data.count_of_side) * ratio
-                texcoord_y = (self.font_data.count_of_side - 1 - int(index * ratio)) * ratio
-                self.render_queue[render_index][...] = [column, row, texcoord_x, texcoord_y]
-                render_index += 1
-                column += 1
-            max_column = max(max_column, column)
-        row += 1
-
-        self.column = max_column - self.initial_column
-        self.row = row - self.initial_row
+        if 0 < text_count:
+            render_queue = self.render_queue[:text_count]
+            np.concatenate(runs, out=render_queue)
+            render_queue[:, 0] += self.initial_column
+            render_queue[:, 1] = np.repeat(np.arange(self.initial_row, self.initial_row + len(lines)), run_counts)
+
+        self.column = max(len(line) for line in lines)
+        self.row = len(lines)
         self.width = self.column * self.font_size
         self.height = self.row * self.font_size
-        self.render_count = render_index
+        self.render_count = text_count
 
     def set_text(self, text, font_data, initial_column=0, initial_row=0, font_size=10, skip_check=False):
         if not skip_check and text == self.text:
@@ -119,5 +151,6 @@ class FontManager(Singleton):
         if RenderOption.RENDER_FONT and self.show and 0 < len(self.logs):
             text = "\n".join(self.logs)
             self.logs = []
-            self.text_render_data.set_text(text, self.ascii, font_size=12, skip_check=True)
+            # the stable lines are copied from the layout cache, and nothing is laid out if the text is same.
+            self.text_render_data.set_text(text, self.ascii, font_size=12)
             self.core_manager.renderer.render_text(self.text_render_data, 0.0, canvas_height - self.text_render_data.font_size, canvas_width, canvas_height)
@@ -78,6 +78,11 @@ class MaterialInstance:
             self.material_name = material.name
             self.macros = copy.copy(material.macros)
 
+            # every path which assigns the material registers the edge, so the instance is reloaded with the material.
+            resource_manager = CoreManager.instance().resource_manager
+            if resource_manager is not None and resource_manager.material_instance_loader is not None:
+                resource_manager.material_instance_loader.set_material_instance_dependencies(self.name, material.name)
+
             # link_uniform_buffers
             old_uniform_names = list(self.linked_uniform_map.keys())
             self.linked_material_component_map = dict()
@@ -107,6 +112,11 @@ class MaterialInstance:
             for uniform_name in old_uniform_names:
                 self.linked_uniform_map.pop(uniform_name)
 
+            # render infos keep the material, so they have to be recreated.
+            scene_manager = CoreManager.instance().scene_manager
+            if scene_manager is not None:
+                scene_manager.set_render_infos_dirty()
+
     def bind_material_instance(self):
         for uniform_buffer, uniform_data in self.linked_material_component_map.values():
             uniform_buffer.bind_uniform(uniform_data)
@@ -161,6 +161,9 @@ class Mesh:
 
                 self.geometry_datas.append(geometry_data)
 
+                if core_manager.is_headless:
+                    continue
+
                 gl_call_list = glGenLists(1)
                 glNewList(gl_call_list, GL_COMPILE)
                 glBegin(GL_TRIANGLES)
@@ -29,6 +29,7 @@ class Model:
             for i in range(min(len(self.material_instances), len(material_instances))):
                 material_instances[i] = self.material_instances[i]
             self.material_instances = material_instances
+            self.set_render_infos_dirty()
 
     def get_save_data(self):
         save_data = dict(
@@ -54,6 +55,12 @@ class Model:
     def set_material_instance(self, material_instance, attribute_index):
         if attribute_index < len(self.material_instances):
             self.material_instances[attribute_index] = material_instance
+            self.set_render_infos_dirty()
+
+    def set_render_infos_dirty(self):
+        scene_manager = CoreManager.instance().scene_manager
+        if scene_manager is not None:
+            scene_manager.set_render_infos_dirty()
 
     def get_attribute(self):
         self.attributes.set_attribute('name', self.name)
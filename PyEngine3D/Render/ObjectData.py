@@ -0,0 +1,162 @@
+import numpy as np
+
+from PyEngine3D.OpenGLContext import CreateBufferDtype, STD430, DynamicShaderStorageBuffer
+
+
+class ObjectDataPacker:
+    """
+    Pack the per object datas of the actors which are rendered in a frame into one std430 buffer.
+    The buffers are uploaded once per frame and the draws index the object datas by the object_index uniform.
+    The bone matrices of the skeletal actors are packed into the bone palette, BONE_OFFSET is the first bone of the object.
+    referene : default_vs.glsl
+    """
+    object_data_dtype = CreateBufferDtype([('MODEL', 'mat4'),
+                                           ('PREV_MODEL', 'mat4'),
+                                           ('COLOR', 'vec4'),
+                                           ('OBJECT_ID', 'uint'),
+                                           ('BONE_OFFSET', 'int'),
+                                           ('IS_INSTANCING', 'bool')], STD430)
+    object_data_binding = 5
+    bone_matrices_binding = 6
+    prev_bone_matrices_binding = 7
+
+    def __init__(self, capacity=256, bone_capacity=1024):
+        self.object_datas = np.zeros(capacity, dtype=self.object_data_dtype)
+        self.bone_matrices = np.zeros((bone_capacity, 4, 4), dtype=np.float32)
+        self.prev_bone_matrices = np.zeros((bone_capacity, 4, 4), dtype=np.float32)
+        self.object_count = 0
+        self.bone_count = 0
+        self.object_indices = {}  # { key : object index }
+
+        # the datas are gathered as the references, then they are copied at once by pack.
+        self.models = []
+        self.prev_models = []
+        self.colors = []
+        self.object_ids = []
+        self.instancings = []
+        self.bone_offsets = []
+        self.bone_matrices_list = []
+        self.prev_bone_matrices_list = []
+
+        self.object_data_buffer = None
+        self.bone_matrices_buffer = None
+        self.prev_bone_matrices_buffer = None
+
+    def delete(self):
+        for buffer in (self.object_data_buffer, self.bone_matrices_buffer, self.prev_bone_matrices_buffer):
+            if buffer is not None:
+                buffer.delete()
+        self.object_data_buffer = None
+        self.bone_matrices_buffer = None
+        self.prev_bone_matrices_buffer = None
+
+    def clear(self):
+        self.object_indices = {}
+        self.models = []
+        self.prev_models = []
+        self.colors = []
+        self.object_ids = []
+        self.instancings = []
+        self.bone_offsets = []
+        self.bone_matrices_list = []
+        self.prev_bone_matrices_list = []
+        self.bone_count = 0
+
+    def get_object_index(self, key):
+        return self.object_indices[key]
+
+    def add_object(self, key, model, prev_model, object_id=0, color=None, is_instancing=False,
+                   bone_matrices=None, prev_bone_matrices=None):
+        """
+        :return: object index, the object which has the same key is added once.
+        """
+        object_index = self.object_indices.get(key)
+        if object_index is None:
+            object_index = self.object_indices[key] = len(self.models)
+            self.models.append(model)
+            self.prev_models.append(prev_model)
+            self.colors.append(color if color is not None else (0.0, 0.0, 0.0, 0.0))
+            self.object_ids.append(object_id)
+            self.instancings.append(is_instancing)
+            if bone_matrices is not None:
+                self.bone_offsets.append(self.bone_count)
+                self.bone_matrices_list.append(bone_matrices)
+                self.prev_bone_matrices_list.append(prev_bone_matrices if prev_bone_matrices is not None else bone_matrices)
+                self.bone_count += len(bone_matrices)
+            else:
+                self.bone_offsets.append(0)
+        return object_index
+
+    def add_actor(self, actor, skeleton_index=None):
+        key = (actor, skeleton_index)
+        object_index = self.object_indices.get(key)
+        if object_index is None:
+            bone_matrices = None
+            prev_bone_matrices = None
+            if skeleton_index is not None:
+                bone_matrices = actor.get_animation_buffer(skeleton_index)
+                prev_bone_matrices = actor.get_prev_animation_buffer(skeleton_index)
+            object_index = self.add_object(key, actor.transform.matrix, actor.transform.prev_matrix, actor.get_object_id(),
+                                           actor.get_object_color(), actor.is_instancing(), bone_matrices, prev_bone_matrices)
+        return object_index
+
+    def add_render_infos(self, render_infos, is_skeletal=False):
+        for render_info in render_infos:
+            self.add_actor(render_info.actor, render_info.geometry.skeleton.index if is_skeletal else None)
+
+    def reserve(self, object_count, bone_count):
+        if len(self.object_datas) < object_count:
+            self.object_datas = np.zeros(max(object_count, len(self.object_datas) * 2), dtype=self.object_data_dtype)
+
+        if len(self.bone_matrices) < bone_count:
+            bone_capacity = max(bone_count, len(self.bone_matrices) * 2)
+            self.bone_matrices = np.zeros((bone_capacity, 4, 4), dtype=np.float32)
+            self.prev_bone_matrices = np.zeros((bone_capacity, 4, 4), dtype=np.float32)
+
+    def pack(self):
+        """
+        Copy the gathered datas into the buffer datas, a field of all objects is copied at once.
+        :return: object count
+        """
+        self.object_count = len(self.models)
+        self.reserve(self.object_count, self.bone_count)
+
+        if 0 < self.object_count:
+            object_datas = self.object_datas[:self.object_count]
+            object_datas['MODEL'] = self.models
+            object_datas['PREV_MODEL'] = self.prev_models
+            object_datas['COLOR'] = self.colors
+            object_datas['OBJECT_ID'] = self.object_ids
+            object_datas['BONE_OFFSET'] = self.bone_offsets
+            object_datas['IS_INSTANCING'] = self.instancings
+
+        if 0 < self.bone_count:
+            self.bone_matrices[:self.bone_count] = np.concatenate(self.bone_matrices_list)
+            self.prev_bone_matrices[:self.bone_count] = np.concatenate(self.prev_bone_matrices_list)
+        return self.object_count
+
+    def upload(self):
+        # the buffers are recreated when the capacity is grown.
+        if self.object_data_buffer is None or self.object_data_buffer.data_size != self.object_datas.nbytes:
+            if self.object_data_buffer is not None:
+                self.object_data_buffer.delete()
+            self.object_data_buffer = DynamicShaderStorageBuffer("object_datas", self.object_datas.nbytes, self.object_data_dtype)
+
+        if self.bone_matrices_buffer is None or self.bone_matrices_buffer.data_size != self.bone_matrices.nbytes:
+            for buffer in (self.bone_matrices_buffer, self.prev_bone_matrices_buffer):
+                if buffer is not None:
+                    buffer.delete()
+            self.bone_matrices_buffer = DynamicShaderStorageBuffer("bone_matrices", self.bone_matrices.nbytes, np.float32)
+            self.prev_bone_matrices_buffer = DynamicShaderStorageBuffer("prev_bone_matrices", self.prev_bone_matrices.nbytes, np.float32)
+
+        self.object_data_buffer.set_buffer_data(self.object_datas)
+        if 0 < self.bone_count:
+            self.bone_matrices_buffer.set_buffer_data(self.bone_matrices)
+            self.prev_bone_matrices_buffer.set_buffer_data(self.prev_bone_matrices)
+        self.bind_buffers()
+
+    def bind_buffers(self):
+        # the other passes can use the same binding points, so bind them again before rendering the actors.
+        self.object_data_buffer.bind_buffer_base(self.object_data_binding)
+        self.bone_matrices_buffer.bind_buffer_base(self.bone_matrices_binding)
+        self.prev_bone_matrices_buffer.bind_buffer_base(self.prev_bone_matrices_binding)
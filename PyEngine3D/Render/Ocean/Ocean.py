@@ -1,11 +1,15 @@
-from math import log, exp, sqrt, tanh, sin, cos, tan, atan2, ceil, pi
+import hashlib
+import os
+import traceback
+from math import log, sqrt, ceil, pi
+
 import numpy as np
 
 from OpenGL.GL import *
 
 from PyEngine3D.Common import logger
 from PyEngine3D.App import CoreManager
-from PyEngine3D.OpenGLContext import CreateTexture, Texture2D, Texture2DArray, Texture3D, FrameBuffer
+from PyEngine3D.OpenGLContext import OpenGLContext, CreateTexture, Texture2D, Texture2DArray, Texture3D, FrameBuffer
 from PyEngine3D.Render import RenderTarget, ScreenQuad, Plane
 from PyEngine3D.Utilities import *
 from .Constants import *
@@ -16,34 +20,50 @@ def sqr(x):
 
 
 def omega(k):
-    return math.sqrt(9.81 * k * (1.0 + sqr(k / km)))
+    return np.sqrt(9.81 * k * (1.0 + sqr(k / km)))
 
 
 def frandom(seed_data):
     return (seed_data >> (31 - 24)) / float(1 << 24)
 
 
+def lcgRandomSeeds(seed, count):
+    """
+    Same sequence as seed = (seed * 1103515245 + 12345) & 0x7FFFFFFF repeated count times,
+    the n-th seed is computed by jumping ahead with the binary decomposition of n.
+    :return: (seeds [count], the last seed)
+    """
+    steps = np.arange(1, count + 1, dtype=np.uint64)
+    seeds = np.full(count, seed, dtype=np.uint64)
+    # (multiplier, increment) of 2^bit steps
+    multiplier, increment = 1103515245, 12345
+    while 0 < count and 0 < np.max(steps):
+        jump = (steps & np.uint64(1)).astype(bool)
+        seeds[jump] = (seeds[jump] * np.uint64(multiplier) + np.uint64(increment)) & np.uint64(0x7FFFFFFF)
+        multiplier, increment = (multiplier * multiplier) & 0x7FFFFFFF, (multiplier * increment + increment) & 0x7FFFFFFF
+        steps >>= np.uint64(1)
+    return seeds, int(seeds[-1]) if 0 < count else seed
+
+
 def bitReverse(i, N):
-    i = int(i)
-    N = int(N)
-    j = i
-    M = N
-    Sum = 0
+    i = np.asarray(i, dtype=np.int64)
+    Sum = np.zeros_like(i)
+    M = int(N) // 2
     W = 1
-    M = int(M / 2)
     while M != 0:
-        j = (i & M) > (M - 1)
-        Sum += j * W
+        Sum += ((i & M) != 0) * W
         W *= 2
-        M = int(M / 2)
-    return int(Sum)
+        M //= 2
+    return Sum
 
 
 def computeWeight(N, k):
-    return cos(2.0 * pi * k / float(N)), sin(2.0 * pi * k / float(N))
+    return np.cos(2.0 * pi * k / float(N)), np.sin(2.0 * pi * k / float(N))
 
 
 class Ocean:
+    spectrum_cache_version = 1
+
     def __init__(self, **object_data):
         self.name = object_data.get('name', 'ocean')
         self.height = object_data.get('height', 0.0)
@@ -59,7 +79,8 @@ class Ocean:
         self.attributes = Attributes()
 
         self.acc_time = 0.0
-        self.fft_seed = 1234
+        self.initial_fft_seed = 1234
+        self.fft_seed = self.initial_fft_seed
         self.simulation_size = GRID_SIZES * self.simulation_scale
 
         self.renderer = CoreManager.instance().renderer
@@ -158,11 +179,15 @@ class Ocean:
         return kSquare * hSquare * 2.0
 
     def spectrum(self, kx, ky, omnispectrum=False):
+        """
+        :param kx: float or array
+        :param ky: float or array
+        """
         U10 = max(0.001, self.wind)
         Omega = self.omega
         Amp = self.amplitude
 
-        k = sqrt(kx * kx + ky * ky)
+        k = np.sqrt(kx * kx + ky * ky)
         c = omega(k) / k
 
         # spectral peak
@@ -173,12 +198,12 @@ class Ocean:
         z0 = 3.7e-5 * sqr(U10) / 9.81 * pow(U10 / cp, 0.9)
         u_star = 0.41 * U10 / log(10.0 / z0)
 
-        Lpm = exp(- 5.0 / 4.0 * sqr(kp / k))
+        Lpm = np.exp(- 5.0 / 4.0 * sqr(kp / k))
         gamma = 1.7 if Omega < 1.0 else 1.7 + 6.0 * log(Omega)
         sigma = 0.08 * (1.0 + 4.0 / pow(Omega, 3.0))
-        Gamma = exp(-1.0 / (2.0 * sqr(sigma)) * sqr(sqrt(k / kp) - 1.0))
-        Jp = pow(gamma, Gamma)
-        Fp = Lpm * Jp * exp(- Omega / sqrt(10.0) * (sqrt(k / kp) - 1.0))
+        Gamma = np.exp(-1.0 / (2.0 * sqr(sigma)) * sqr(np.sqrt(k / kp) - 1.0))
+        Jp = np.power(gamma, Gamma)
+        Fp = Lpm * Jp * np.exp(- Omega / sqrt(10.0) * (np.sqrt(k / kp) - 1.0))
         alphap = 0.006 * sqrt(Omega)
         Bl = 0.5 * alphap * cp / c * Fp
 
@@ -187,7 +212,7 @@ class Ocean:
             alpham *= (1.0 + log(u_star / cm))
         else:
             alpham *= (1.0 + 3.0 * log(u_star / cm))
-        Fm = exp(-0.25 * sqr(k / km - 1.0))
+        Fm = np.exp(-0.25 * sqr(k / km - 1.0))
         Bh = 0.5 * alpham * cm / c * Fm * Lpm
 
         if omnispectrum:
@@ -196,98 +221,100 @@ class Ocean:
         a0 = log(2.0) / 4.0
         ap = 4.0
         am = 0.13 * u_star / cm
-        Delta = tanh(a0 + ap * pow(c / cp, 2.5) + am * pow(cm / c, 2.5))
-        phi = atan2(ky, kx)
-
-        if kx < 0.0:
-            return 0.0
-        else:
-            Bl *= 2.0
-            Bh *= 2.0
-        return Amp * (Bl + Bh) * (1.0 + Delta * cos(2.0 * phi)) / (2.0 * pi * sqr(sqr(k)))
-
-    def getSpectrumSample(self, i, j, lengthScale, kMin):
-        dk = 2.0 * pi / lengthScale
-        kx = i * dk
-        ky = j * dk
-        if abs(kx) < kMin and abs(ky) < kMin:
-            return 0.0, 0.0
-        else:
-            S = self.spectrum(kx, ky)
-            h = sqrt(S / 2.0) * dk
-            self.fft_seed = (self.fft_seed * 1103515245 + 12345) & 0x7FFFFFFF
-            phi = frandom(self.fft_seed) * 2.0 * pi
-            return h * cos(phi), h * sin(phi)
-
-    def computeButterflyLookupTexture(self, butterfly_data):
+        Delta = np.tanh(a0 + ap * np.power(c / cp, 2.5) + am * np.power(cm / c, 2.5))
+        phi = np.arctan2(ky, kx)
+
+        Bl *= 2.0
+        Bh *= 2.0
+        return np.where(kx < 0.0, 0.0, Amp * (Bl + Bh) * (1.0 + Delta * np.cos(2.0 * phi)) / (2.0 * pi * sqr(sqr(k))))
+
+    def getWaveNumbers(self):
+        # the wave numbers of the texels, the upper half of the texture is the negative frequencies.
+        n = np.arange(FFT_SIZE, dtype=np.float64)
+        n = np.where(n >= FFT_SIZE / 2, n - FFT_SIZE, n)
+        j, i = np.meshgrid(n, n, indexing='ij')
+        return i, j
+
+    def computeButterflyLookupTexture(self):
+        butterfly_data = np.zeros((PASSES, FFT_SIZE, 4), dtype=np.float32)
         for i in range(PASSES):
-            nBlocks = int(pow(2.0, float(PASSES - 1 - i)))
-            nHInputs = int(pow(2.0, float(i)))
-            for j in range(nBlocks):
-                for k in range(nHInputs):
-                    i1, i2, j1, j2 = 0, 0, 0, 0
-                    if i == 0:
-                        i1 = j * nHInputs * 2 + k
-                        i2 = j * nHInputs * 2 + nHInputs + k
-                        j1 = bitReverse(i1, FFT_SIZE)
-                        j2 = bitReverse(i2, FFT_SIZE)
-                    else:
-                        i1 = j * nHInputs * 2 + k
-                        i2 = j * nHInputs * 2 + nHInputs + k
-                        j1 = i1
-                        j2 = i2
-
-                    wr, wi = computeWeight(FFT_SIZE, k * nBlocks)
-
-                    offset1 = 4 * (i1 + i * FFT_SIZE)
-                    butterfly_data[offset1 + 0] = (j1 + 0.5) / FFT_SIZE
-                    butterfly_data[offset1 + 1] = (j2 + 0.5) / FFT_SIZE
-                    butterfly_data[offset1 + 2] = wr
-                    butterfly_data[offset1 + 3] = wi
-
-                    offset2 = 4 * (i2 + i * FFT_SIZE)
-                    butterfly_data[offset2 + 0] = (j1 + 0.5) / FFT_SIZE
-                    butterfly_data[offset2 + 1] = (j2 + 0.5) / FFT_SIZE
-                    butterfly_data[offset2 + 2] = -wr
-                    butterfly_data[offset2 + 3] = -wi
-
-    def generateWavesSpectrum(self, spectrum12_data, spectrum34_data):
-        for y in range(FFT_SIZE):
-            for x in range(FFT_SIZE):
-                offset = 4 * (x + y * FFT_SIZE)
-                i = (x - FFT_SIZE) if (x >= FFT_SIZE / 2) else x
-                j = (y - FFT_SIZE) if (y >= FFT_SIZE / 2) else y
-                s12_0, s12_1 = self.getSpectrumSample(i, j, GRID1_SIZE, pi / GRID1_SIZE)
-                s12_2, s12_3 = self.getSpectrumSample(i, j, GRID2_SIZE, pi * FFT_SIZE / GRID1_SIZE)
-                s34_0, s34_1 = self.getSpectrumSample(i, j, GRID3_SIZE, pi * FFT_SIZE / GRID2_SIZE)
-                s34_2, s34_3 = self.getSpectrumSample(i, j, GRID4_SIZE, pi * FFT_SIZE / GRID3_SIZE)
-                spectrum12_data[offset: offset+4] = s12_0, s12_1, s12_2, s12_3
-                spectrum34_data[offset: offset+4] = s34_0, s34_1, s34_2, s34_3
-
-    def computeSlopeVarianceTex(self, spectrum12_data, spectrum34_data):
-        theoreticSlopeVariance = 0.0
-        k = 5e-3
-        while k < 1e3:
-            nextK = k * 1.001
-            theoreticSlopeVariance += k * k * self.spectrum(k, 0, True) * (nextK - k)
-            k = nextK
-
+            nBlocks = 1 << (PASSES - 1 - i)
+            nHInputs = 1 << i
+            j, k = np.meshgrid(np.arange(nBlocks), np.arange(nHInputs), indexing='ij')
+            i1 = (j * nHInputs * 2 + k).reshape(-1)
+            i2 = i1 + nHInputs
+            if i == 0:
+                j1 = bitReverse(i1, FFT_SIZE)
+                j2 = bitReverse(i2, FFT_SIZE)
+            else:
+                j1 = i1
+                j2 = i2
+
+            wr, wi = computeWeight(FFT_SIZE, k.reshape(-1) * nBlocks)
+            butterfly_data[i, i1] = np.stack([(j1 + 0.5) / FFT_SIZE, (j2 + 0.5) / FFT_SIZE, wr, wi], axis=-1)
+            butterfly_data[i, i2] = np.stack([(j1 + 0.5) / FFT_SIZE, (j2 + 0.5) / FFT_SIZE, -wr, -wi], axis=-1)
+        return butterfly_data.reshape(-1)
+
+    def generateWavesSpectrum(self):
+        """
+        The samples are generated in the order of the previous per texel loop, y, x then the grids,
+        so the random phases are the same.
+        :return: spectrum12_data, spectrum34_data
+        """
+        i, j = self.getWaveNumbers()
+        grid_sizes = (GRID1_SIZE, GRID2_SIZE, GRID3_SIZE, GRID4_SIZE)
+        k_mins = (pi / GRID1_SIZE, pi * FFT_SIZE / GRID1_SIZE, pi * FFT_SIZE / GRID2_SIZE, pi * FFT_SIZE / GRID3_SIZE)
+        amplitudes = np.zeros((FFT_SIZE, FFT_SIZE, 4), dtype=np.float64)
+        has_samples = np.zeros((FFT_SIZE, FFT_SIZE, 4), dtype=bool)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for grid_index, (grid_size, k_min) in enumerate(zip(grid_sizes, k_mins)):
+                dk = 2.0 * pi / grid_size
+                kx = i * dk
+                ky = j * dk
+                has_sample = np.logical_not(np.logical_and(np.abs(kx) < k_min, np.abs(ky) < k_min))
+                S = np.where(has_sample, self.spectrum(kx, ky), 0.0)
+                amplitudes[..., grid_index] = np.sqrt(S / 2.0) * dk
+                has_samples[..., grid_index] = has_sample
+
+        # the seed is not advanced by the skipped samples.
+        has_samples = has_samples.reshape(-1)
+        seeds, self.fft_seed = lcgRandomSeeds(self.fft_seed, int(np.count_nonzero(has_samples)))
+        phi = np.zeros(len(has_samples), dtype=np.float64)
+        phi[has_samples] = frandom(seeds) * 2.0 * pi
+        phi = phi.reshape(FFT_SIZE, FFT_SIZE, 4)
+        amplitudes = np.where(has_samples.reshape(FFT_SIZE, FFT_SIZE, 4), amplitudes, 0.0)
+
+        # [real, imaginary] of the grids, GRID1, GRID2 / GRID3, GRID4
+        spectrum = np.stack([amplitudes * np.cos(phi), amplitudes * np.sin(phi)], axis=-1).astype(np.float32)
+        spectrum12_data = spectrum[:, :, 0:2].reshape(-1)
+        spectrum34_data = spectrum[:, :, 2:4].reshape(-1)
+        return spectrum12_data, spectrum34_data
+
+    def computeSlopeVarianceDelta(self, spectrum12_data, spectrum34_data):
+        # same steps as k = k * 1.001 from 5e-3 to 1e3
+        step_count = int(ceil(log(1e3 / 5e-3) / log(1.001))) + 2
+        k = np.cumprod(np.concatenate([[5e-3], np.full(step_count, 1.001)]))
+        k = k[:np.searchsorted(k, 1e3, side='left') + 1]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            theoreticSlopeVariance = np.sum(k[:-1] * k[:-1] * self.spectrum(k[:-1], 0.0, True) * (k[1:] - k[:-1]))
+
+        i, j = self.getWaveNumbers()
+        i *= 2.0 * pi
+        j *= 2.0 * pi
+        spectrum12_data = spectrum12_data.reshape(FFT_SIZE, FFT_SIZE, 4).astype(np.float64)
+        spectrum34_data = spectrum34_data.reshape(FFT_SIZE, FFT_SIZE, 4).astype(np.float64)
         totalSlopeVariance = 0.0
-        for y in range(FFT_SIZE):
-            for x in range(FFT_SIZE):
-                offset = 4 * (x + y * FFT_SIZE)
-                i = 2.0 * pi * ((x - FFT_SIZE) if (x >= FFT_SIZE / 2) else x)
-                j = 2.0 * pi * ((y - FFT_SIZE) if (y >= FFT_SIZE / 2) else y)
-                s12_0, s12_1, s12_2, s12_3 = spectrum12_data[offset: offset + 4]
-                s34_0, s34_1, s34_2, s34_3 = spectrum34_data[offset: offset + 4]
-                totalSlopeVariance += self.getSlopeVariance(i/GRID1_SIZE, j/GRID1_SIZE, s12_0, s12_1)
-                totalSlopeVariance += self.getSlopeVariance(i/GRID2_SIZE, j/GRID2_SIZE, s12_2, s12_3)
-                totalSlopeVariance += self.getSlopeVariance(i/GRID3_SIZE, j/GRID3_SIZE, s34_0, s34_1)
-                totalSlopeVariance += self.getSlopeVariance(i/GRID4_SIZE, j/GRID4_SIZE, s34_2, s34_3)
+        totalSlopeVariance += np.sum(self.getSlopeVariance(i / GRID1_SIZE, j / GRID1_SIZE, spectrum12_data[..., 0], spectrum12_data[..., 1]))
+        totalSlopeVariance += np.sum(self.getSlopeVariance(i / GRID2_SIZE, j / GRID2_SIZE, spectrum12_data[..., 2], spectrum12_data[..., 3]))
+        totalSlopeVariance += np.sum(self.getSlopeVariance(i / GRID3_SIZE, j / GRID3_SIZE, spectrum34_data[..., 0], spectrum34_data[..., 1]))
+        totalSlopeVariance += np.sum(self.getSlopeVariance(i / GRID4_SIZE, j / GRID4_SIZE, spectrum34_data[..., 2], spectrum34_data[..., 3]))
+        return float(theoreticSlopeVariance - totalSlopeVariance) * 0.5
 
+    def computeSlopeVarianceTex(self, slope_variance_delta):
         self.fft_variance.use_program()
         self.fft_variance.bind_uniform_data("GRID_SIZES", GRID_SIZES)
-        self.fft_variance.bind_uniform_data("slopeVarianceDelta", (theoreticSlopeVariance - totalSlopeVariance) * 0.5)
+        self.fft_variance.bind_uniform_data("slopeVarianceDelta", slope_variance_delta)
         self.fft_variance.bind_uniform_data("N_SLOPE_VARIANCE", N_SLOPE_VARIANCE)
         self.fft_variance.bind_uniform_data("spectrum_1_2_Sampler", self.texture_spectrum_1_2)
         self.fft_variance.bind_uniform_data("spectrum_3_4_Sampler", self.texture_spectrum_3_4)
@@ -298,6 +325,52 @@ class Ocean:
             self.fft_variance.bind_uniform_data("c", layer)
             self.quad.draw_elements()
 
+    def get_spectrum_cache_filepath(self):
+        # the spectrum depends on the ocean parameters and the texture layout only.
+        key = repr((self.spectrum_cache_version, float(self.wind), float(self.omega), float(self.amplitude), self.initial_fft_seed,
+                    FFT_SIZE, PASSES, GRID_SIZES.tolist(), cm, km))
+        cache_directory = os.path.join(self.resource_manager.engine_path, self.resource_manager.ocean_spectrum_cache_dirname)
+        return os.path.join(cache_directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npz')
+
+    def load_spectrum_cache(self):
+        """
+        :return: (spectrum12_data, spectrum34_data, butterfly_data, slope_variance_delta) or None
+        """
+        cache_filepath = self.get_spectrum_cache_filepath()
+        if os.path.exists(cache_filepath):
+            try:
+                with np.load(cache_filepath) as cache_data:
+                    return (cache_data['spectrum12_data'], cache_data['spectrum34_data'], cache_data['butterfly_data'],
+                            float(cache_data['slope_variance_delta']))
+            except:
+                logger.error(traceback.format_exc())
+        return None
+
+    def save_spectrum_cache(self, spectrum12_data, spectrum34_data, butterfly_data, slope_variance_delta):
+        cache_filepath = self.get_spectrum_cache_filepath()
+        try:
+            check_directory_and_mkdir(os.path.dirname(cache_filepath))
+            with open(cache_filepath, 'wb') as f:
+                np.savez(f, spectrum12_data=spectrum12_data, spectrum34_data=spectrum34_data, butterfly_data=butterfly_data,
+                         slope_variance_delta=slope_variance_delta)
+        except:
+            logger.error(traceback.format_exc())
+
+    def generate_spectrum_datas(self):
+        """
+        The same parameters generate the same spectrum, so the datas are cached on disk.
+        :return: spectrum12_data, spectrum34_data, butterfly_data, slope_variance_delta
+        """
+        spectrum_datas = self.load_spectrum_cache()
+        if spectrum_datas is None:
+            self.fft_seed = self.initial_fft_seed
+            spectrum12_data, spectrum34_data = self.generateWavesSpectrum()
+            butterfly_data = self.computeButterflyLookupTexture()
+            slope_variance_delta = self.computeSlopeVarianceDelta(spectrum12_data, spectrum34_data)
+            spectrum_datas = (spectrum12_data, spectrum34_data, butterfly_data, slope_variance_delta)
+            self.save_spectrum_cache(*spectrum_datas)
+        return spectrum_datas
+
     def save_texture(self, texture):
         resource = self.resource_manager.texture_loader.get_resource(texture.name)
         if resource is None:
@@ -310,21 +383,16 @@ class Ocean:
 
     def generate_texture(self):
         glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
-        glDepthFunc(GL_LEQUAL)
-        glEnable(GL_CULL_FACE)
-        glFrontFace(GL_CCW)
-        glEnable(GL_DEPTH_TEST)
-        glDepthMask(True)
-        glDisable(GL_BLEND)
+        OpenGLContext.depth_func(GL_LEQUAL)
+        OpenGLContext.enable(GL_CULL_FACE)
+        OpenGLContext.front_face(GL_CCW)
+        OpenGLContext.enable(GL_DEPTH_TEST)
+        OpenGLContext.depth_mask(True)
+        OpenGLContext.disable(GL_BLEND)
         glClearColor(0.0, 0.0, 0.0, 1.0)
         glClearDepth(1.0)
 
-        spectrum12_data = np.zeros(FFT_SIZE * FFT_SIZE * 4, dtype=np.float32)
-        spectrum34_data = np.zeros(FFT_SIZE * FFT_SIZE * 4, dtype=np.float32)
-        butterfly_data = np.zeros(FFT_SIZE * PASSES * 4, dtype=np.float32)
-
-        self.generateWavesSpectrum(spectrum12_data, spectrum34_data)
-        self.computeButterflyLookupTexture(butterfly_data)
+        spectrum12_data, spectrum34_data, butterfly_data, slope_variance_delta = self.generate_spectrum_datas()
 
         # create render targets
         self.texture_spectrum_1_2 = CreateTexture(
@@ -387,7 +455,7 @@ class Ocean:
             data=butterfly_data,
         )
 
-        self.computeSlopeVarianceTex(spectrum12_data, spectrum34_data)
+        self.computeSlopeVarianceTex(slope_variance_delta)
 
         self.save_texture(self.texture_spectrum_1_2)
         self.save_texture(self.texture_spectrum_3_4)
@@ -1,6 +1,7 @@
 import math
 
 from PyEngine3D.Utilities import *
+from .BoundingVolumeHierarchy import BoundingVolumeHierarchy, ray_intersect_bound_boxes
 
 
 def always_pass(*args):
@@ -43,6 +44,41 @@ def shadow_culling(camera, light, actor, geometry_bound_box):
     return False
 
 
+def view_frustum_culling_geometries(camera, bound_center, radius):
+    """
+    :return: boolean array, True for culled geometry.
+    """
+    to_geometry = bound_center - camera.transform.pos
+    distances = np.dot(to_geometry, camera.frustum_vectors.T)
+    return np.any(radius[:, np.newaxis] < distances, axis=1)
+
+
+def shadow_culling_geometries(light, bound_min, bound_max):
+    """
+    :return: boolean array, True for culled geometry.
+    """
+    shadow_view_projection = light.shadow_view_projection
+    bound_min = np.dot(bound_min, shadow_view_projection[:3, :3]) + shadow_view_projection[3, :3]
+    bound_max = np.dot(bound_max, shadow_view_projection[:3, :3]) + shadow_view_projection[3, :3]
+    minimum = np.minimum(bound_min, bound_max)
+    maximum = np.maximum(bound_min, bound_max)
+    return np.any(maximum < -1.0, axis=1) | np.any(1.0 < minimum, axis=1)
+
+
+def create_render_info(actor, geometry_index):
+    render_info = RenderInfo()
+    render_info.set_render_info(actor, geometry_index)
+    return render_info
+
+
+def append_render_info(render_info, solid_render_infos, translucent_render_infos):
+    if render_info.is_translucent():
+        if translucent_render_infos is not None:
+            translucent_render_infos.append(render_info)
+    elif solid_render_infos is not None:
+        solid_render_infos.append(render_info)
+
+
 def gather_render_infos(culling_func, camera, light, actor_list, solid_render_infos, translucent_render_infos):
     for actor in actor_list:
         for i in range(actor.get_geometry_count()):
@@ -52,19 +88,7 @@ def gather_render_infos(culling_func, camera, light, actor_list, solid_render_in
             if culling_func(camera, light, actor, actor.get_geometry_bound_box(i)):
                 continue
 
-            material_instance = actor.get_material_instance(i)
-            render_info = RenderInfo()
-            render_info.actor = actor
-            render_info.geometry = actor.get_geometry(i)
-            render_info.geometry_data = actor.get_geometry_data(i)
-            render_info.gl_call_list = actor.get_gl_call_list(i)
-            render_info.material = material_instance.material if material_instance else None
-            render_info.material_instance = material_instance
-            if render_info.material_instance is not None and render_info.material_instance.is_translucent():
-                if translucent_render_infos is not None:
-                    translucent_render_infos.append(render_info)
-            elif solid_render_infos is not None:
-                solid_render_infos.append(render_info)
+            append_render_info(create_render_info(actor, i), solid_render_infos, translucent_render_infos)
 
 
 class RenderInfo:
@@ -75,3 +99,233 @@ class RenderInfo:
         self.gl_call_list = None
         self.material = None
         self.material_instance = None
+
+    def set_render_info(self, actor, geometry_index):
+        material_instance = actor.get_material_instance(geometry_index)
+        self.actor = actor
+        self.geometry = actor.get_geometry(geometry_index)
+        self.geometry_data = actor.get_geometry_data(geometry_index)
+        self.gl_call_list = actor.get_gl_call_list(geometry_index)
+        self.material = material_instance.material if material_instance else None
+        self.material_instance = material_instance
+
+    def is_translucent(self):
+        return self.material_instance is not None and self.material_instance.is_translucent()
+
+
+def sort_render_infos(render_infos):
+    # the render infos of same geometry and material instance are consecutive, so they can be batched.
+    render_infos.sort(key=lambda x: (id(x.geometry), id(x.material), id(x.material_instance)))
+
+
+def batch_render_infos(render_infos, batchable_flags):
+    """
+    Group the consecutive render infos which have the same geometry and material instance.
+    :param batchable_flags: [render info count] bool, the render info which is not batchable is a batch of itself.
+    :return: start indices, end indices of the batches
+    """
+    render_info_count = len(render_infos)
+    geometry_ids = np.fromiter((id(x.geometry) for x in render_infos), dtype=np.uint64, count=render_info_count)
+    material_instance_ids = np.fromiter((id(x.material_instance) for x in render_infos), dtype=np.uint64, count=render_info_count)
+    batchable_flags = np.asarray(batchable_flags, dtype=bool)
+
+    is_same_batch = np.zeros(render_info_count, dtype=bool)
+    is_same_batch[1:] = (geometry_ids[1:] == geometry_ids[:-1]) & \
+                        (material_instance_ids[1:] == material_instance_ids[:-1]) & \
+                        batchable_flags[1:] & batchable_flags[:-1]
+    start_indices = np.flatnonzero(~is_same_batch)
+    end_indices = np.append(start_indices[1:], render_info_count)
+    return start_indices, end_indices
+
+
+class CullingTable:
+    """
+    Bound spheres and AABBs of every geometry of an actor list, stored in contiguous arrays
+    so the whole list can be culled at once.
+    Render infos are created once per geometry and reused until the table is rebuilt.
+    If use_bvh is True, culling and ray queries descend a bounding volume hierarchy which is refitted
+    only when bound boxes are changed.
+    """
+    # traversing the hierarchy is slower than the flat test for small tables.
+    bvh_min_row_count = 4096
+
+    def __init__(self, use_bvh=False):
+        self.actors = []
+        self.geometry_counts = []
+        self.row_offsets = []
+        self.row_actor_indices = np.zeros(0, dtype=np.int32)
+        self.row_geometry_indices = np.zeros(0, dtype=np.int32)
+        self.bound_min = np.zeros((0, 3), dtype=np.float32)
+        self.bound_max = np.zeros((0, 3), dtype=np.float32)
+        self.bound_center = np.zeros((0, 3), dtype=np.float32)
+        self.radius = np.zeros(0, dtype=np.float32)
+        self.visible = np.zeros(0, dtype=np.bool_)
+        self.render_infos = []
+        self.actor_render_infos = {}
+        self.view_row_indices = None
+        self.shadow_row_indices = None
+        self.rebuilt_render_info_count = 0
+        self.bvh = BoundingVolumeHierarchy(leaf_size=32) if use_bvh else None
+        self.bvh_refit = False
+        self.dirty = True
+
+    def set_dirty(self):
+        self.dirty = True
+
+    def set_render_infos_dirty(self):
+        # model or material was changed, so every render info have to be recreated.
+        self.actor_render_infos = {}
+        self.dirty = True
+
+    def get_row_count(self):
+        return len(self.radius)
+
+    def build(self, actor_list):
+        self.actors = list(actor_list)
+        self.geometry_counts = [len(actor.get_geometry_bound_boxes()) for actor in self.actors]
+        self.row_offsets = []
+        row_count = 0
+        for geometry_count in self.geometry_counts:
+            self.row_offsets.append(row_count)
+            row_count += geometry_count
+
+        self.row_actor_indices = np.repeat(np.arange(len(self.actors), dtype=np.int32), self.geometry_counts)
+        self.row_geometry_indices = np.zeros(row_count, dtype=np.int32)
+        for row_offset, geometry_count in zip(self.row_offsets, self.geometry_counts):
+            self.row_geometry_indices[row_offset:row_offset + geometry_count] = np.arange(geometry_count)
+
+        self.bound_min = np.zeros((row_count, 3), dtype=np.float32)
+        self.bound_max = np.zeros((row_count, 3), dtype=np.float32)
+        self.bound_center = np.zeros((row_count, 3), dtype=np.float32)
+        self.radius = np.zeros(row_count, dtype=np.float32)
+        self.visible = np.zeros(row_count, dtype=np.bool_)
+
+        # reuse the render infos of the actors which were already in the table.
+        old_actor_render_infos = self.actor_render_infos
+        self.actor_render_infos = {}
+        self.render_infos = []
+        for actor_index, actor in enumerate(self.actors):
+            self.update_actor_rows(actor_index, actor)
+            geometry_count = self.geometry_counts[actor_index]
+            render_infos = old_actor_render_infos.get(id(actor))
+            if render_infos is None or len(render_infos) != geometry_count or any(x.actor is not actor for x in render_infos):
+                render_infos = [create_render_info(actor, geometry_index) for geometry_index in range(geometry_count)]
+                self.rebuilt_render_info_count += geometry_count
+            self.actor_render_infos[id(actor)] = render_infos
+            self.render_infos.extend(render_infos)
+
+        if self.bvh is not None:
+            self.bvh.build(self.bound_min, self.bound_max, self.bound_center, self.radius)
+            self.bvh_refit = False
+
+        # force to re-filter render infos
+        self.view_row_indices = None
+        self.shadow_row_indices = None
+        self.dirty = False
+
+    def update_actor_rows(self, actor_index, actor):
+        row = self.row_offsets[actor_index]
+        for geometry_bound_box in actor.get_geometry_bound_boxes():
+            self.bound_min[row] = geometry_bound_box.bound_min
+            self.bound_max[row] = geometry_bound_box.bound_max
+            self.bound_center[row] = geometry_bound_box.bound_center
+            self.radius[row] = geometry_bound_box.radius
+            row += 1
+        actor.bound_box_changed = False
+        self.bvh_refit = True
+
+    def use_bvh(self):
+        if self.bvh is not None and self.bvh_min_row_count <= self.get_row_count():
+            if self.bvh_refit:
+                self.bvh.refit(self.bound_min, self.bound_max, self.bound_center, self.radius)
+                self.bvh_refit = False
+            return True
+        return False
+
+    def update(self, actor_list):
+        self.rebuilt_render_info_count = 0
+
+        if self.dirty or len(self.actors) != len(actor_list):
+            self.build(actor_list)
+        else:
+            actors = self.actors
+            for actor_index in [i for i, actor in enumerate(actors) if actor.bound_box_changed]:
+                actor = actors[actor_index]
+                if self.geometry_counts[actor_index] != len(actor.get_geometry_bound_boxes()):
+                    # geometry count was changed, so the row layout is invalid.
+                    self.build(actor_list)
+                    break
+                self.update_actor_rows(actor_index, actor)
+
+        actor_visible = np.fromiter([actor.visible for actor in self.actors], dtype=np.bool_, count=len(self.actors))
+        self.visible[...] = np.repeat(actor_visible, self.geometry_counts)
+
+    def view_frustum_culling(self, camera):
+        """
+        :return: row indices which are passed the view frustum culling.
+        """
+        if self.use_bvh():
+            inside_rows, candidate_rows = self.bvh.view_frustum_culling(camera.transform.pos, camera.frustum_vectors)
+            culled = view_frustum_culling_geometries(camera, self.bound_center[candidate_rows], self.radius[candidate_rows])
+            rows = np.sort(np.concatenate([inside_rows, candidate_rows[~culled]]))
+            return rows[self.visible[rows]]
+
+        culled = view_frustum_culling_geometries(camera, self.bound_center, self.radius)
+        return np.flatnonzero(self.visible & ~culled)
+
+    def shadow_culling(self, light):
+        """
+        :return: row indices which are passed the shadow culling.
+        """
+        if self.use_bvh():
+            inside_rows, candidate_rows = self.bvh.shadow_culling(light.shadow_view_projection)
+            culled = shadow_culling_geometries(light, self.bound_min[candidate_rows], self.bound_max[candidate_rows])
+            rows = np.sort(np.concatenate([inside_rows, candidate_rows[~culled]]))
+            return rows[self.visible[rows]]
+
+        culled = shadow_culling_geometries(light, self.bound_min, self.bound_max)
+        return np.flatnonzero(self.visible & ~culled)
+
+    def ray_intersect(self, origin, direction, max_distance=np.inf):
+        """
+        :return: (actor, distance) of the nearest visible geometry bound box which is intersected with the ray.
+        """
+        if self.use_bvh():
+            rows = self.bvh.ray_intersect(origin, direction, max_distance)
+        else:
+            rows = np.arange(self.get_row_count())
+        rows = rows[self.visible[rows]]
+
+        if 0 < len(rows):
+            with np.errstate(divide='ignore'):
+                inv_direction = 1.0 / np.asarray(direction, dtype=np.float32)
+            distances = ray_intersect_bound_boxes(origin, inv_direction, self.bound_min[rows], self.bound_max[rows], max_distance)
+            nearest = np.argmin(distances)
+            if distances[nearest] != np.inf:
+                return self.actors[self.row_actor_indices[rows[nearest]]], distances[nearest]
+        return None, np.inf
+
+    def update_view_frustum_culling(self, camera):
+        """
+        :return: True if the visible rows are changed since the last call.
+        """
+        row_indices = self.view_frustum_culling(camera)
+        if self.view_row_indices is not None and np.array_equal(row_indices, self.view_row_indices):
+            return False
+        self.view_row_indices = row_indices
+        return True
+
+    def update_shadow_culling(self, light):
+        """
+        :return: True if the shadow casting rows are changed since the last call.
+        """
+        row_indices = self.shadow_culling(light)
+        if self.shadow_row_indices is not None and np.array_equal(row_indices, self.shadow_row_indices):
+            return False
+        self.shadow_row_indices = row_indices
+        return True
+
+    def gather_render_infos(self, row_indices, solid_render_infos, translucent_render_infos):
+        render_infos = self.render_infos
+        for row in row_indices.tolist():
+            append_render_info(render_infos[row], solid_render_infos, translucent_render_infos)
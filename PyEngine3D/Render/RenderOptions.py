@@ -24,6 +24,8 @@ class RenderOption:
     RENDER_DEBUG_LINE = True
     RENDER_GIZMO = True
     RENDER_OBJECT_ID = True
+    BATCHED_CULLING = True
+    INSTANCE_BATCHING = True
 
 
 class RenderingType(AutoEnum):
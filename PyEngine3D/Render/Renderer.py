@@ -9,11 +9,11 @@ from OpenGL.GLU import *
 from PyEngine3D.Common import logger, COMMAND
 from PyEngine3D.Common.Constants import *
 from PyEngine3D.Utilities import *
-from PyEngine3D.OpenGLContext import InstanceBuffer, FrameBufferManager, RenderBuffer, UniformBlock, CreateTexture
+from PyEngine3D.OpenGLContext import OpenGLContext, InstanceBuffer, FrameBufferManager, RenderBuffer, UniformBlock, CreateTexture
 from .PostProcess import AntiAliasing, PostProcess
 from . import RenderTargets, RenderOption, RenderingType, RenderGroup, RenderMode
 from . import SkeletonActor, StaticActor, ScreenQuad, Line
-from . import Spline3D
+from . import Spline3D, ObjectDataPacker, batch_render_infos
 
 
 class Renderer(Singleton):
@@ -81,6 +81,13 @@ class Renderer(Singleton):
         self.font_shader = None
 
         self.actor_instance_buffer = None
+        self.object_data_packer = None
+        self.instance_batch_object_index = 0
+
+        # render statistics of the actors
+        self.actor_draw_call_count = 0
+        self.instance_batch_count = 0
+        self.batched_render_info_count = 0
 
         self.render_custom_translucent_callbacks = []
 
@@ -127,6 +134,9 @@ class Renderer(Singleton):
         # instance buffer
         self.actor_instance_buffer = InstanceBuffer(name="actor_instance_buffer", location_offset=7, element_datas=[MATRIX4_IDENTITY, ])
 
+        # per object datas of the actors
+        self.object_data_packer = ObjectDataPacker()
+
         # scene constants uniform buffer
         program = self.scene_constants_material.get_program()
 
@@ -235,7 +245,8 @@ class Renderer(Singleton):
         self.core_manager.send_rendering_type_list(rendering_type_list)
 
     def close(self):
-        pass
+        if self.object_data_packer is not None:
+            self.object_data_packer.delete()
 
     def render_custom_translucent(self, render_custom_translucent_callback):
         self.render_custom_translucent_callbacks.append(render_custom_translucent_callback)
@@ -251,11 +262,11 @@ class Renderer(Singleton):
             self.blend_equation = equation
             self.blend_func_src = func_src
             self.blend_func_dst = func_dst
-            glEnable(GL_BLEND)
-            glBlendEquation(equation)
-            glBlendFunc(func_src, func_dst)
+            OpenGLContext.enable(GL_BLEND)
+            OpenGLContext.blend_equation(equation)
+            OpenGLContext.blend_func(func_src, func_dst)
         else:
-            glDisable(GL_BLEND)
+            OpenGLContext.disable(GL_BLEND)
 
     def restore_blend_state_prev(self):
         self.set_blend_state(self.blend_enable_prev,
@@ -540,7 +551,7 @@ class Renderer(Singleton):
         # static shadow
         self.framebuffer_manager.bind_framebuffer(depth_texture=RenderTargets.STATIC_SHADOWMAP)
         glClear(GL_DEPTH_BUFFER_BIT)
-        glFrontFace(GL_CCW)
+        OpenGLContext.front_face(GL_CCW)
 
         if self.scene_manager.terrain.is_render_terrain:
             self.scene_manager.terrain.render_terrain(RenderMode.SHADOW)
@@ -551,7 +562,7 @@ class Renderer(Singleton):
         # dyanmic shadow
         self.framebuffer_manager.bind_framebuffer(depth_texture=RenderTargets.DYNAMIC_SHADOWMAP)
         glClear(GL_DEPTH_BUFFER_BIT)
-        glFrontFace(GL_CCW)
+        OpenGLContext.front_face(GL_CCW)
 
         if RenderOption.RENDER_SKELETON_ACTOR:
             self.render_actors(RenderGroup.SKELETON_ACTOR, RenderMode.SHADOW, self.scene_manager.skeleton_shadow_render_infos, self.shadowmap_skeletal_material)
@@ -560,7 +571,7 @@ class Renderer(Singleton):
         self.framebuffer_manager.bind_framebuffer(RenderTargets.COMPOSITE_SHADOWMAP)
         glClearColor(1.0, 1.0, 1.0, 1.0)
         glClear(GL_COLOR_BUFFER_BIT)
-        glDisable(GL_CULL_FACE)
+        OpenGLContext.disable(GL_CULL_FACE)
 
         self.postprocess.render_composite_shadowmap(RenderTargets.STATIC_SHADOWMAP, RenderTargets.DYNAMIC_SHADOWMAP)
 
@@ -632,20 +643,76 @@ class Renderer(Singleton):
     def render_effect(self):
         self.scene_manager.effect_manager.render()
 
+    def update_object_datas(self):
+        """
+        Pack the object datas of the actors which can be rendered in this frame, then upload them at once.
+        """
+        scene_manager = self.scene_manager
+        object_data_packer = self.object_data_packer
+        object_data_packer.clear()
+        for render_infos in (scene_manager.static_solid_render_infos,
+                             scene_manager.static_translucent_render_infos,
+                             scene_manager.static_shadow_render_infos,
+                             scene_manager.spline_gizmo_render_infos):
+            object_data_packer.add_render_infos(render_infos)
+
+        for render_infos in (scene_manager.skeleton_solid_render_infos,
+                             scene_manager.skeleton_translucent_render_infos,
+                             scene_manager.skeleton_shadow_render_infos):
+            object_data_packer.add_render_infos(render_infos, is_skeletal=True)
+
+        selected_object = scene_manager.get_selected_object()
+        if selected_object is not None:
+            is_skeletal = SkeletonActor == type(selected_object)
+            object_data_packer.add_render_infos(scene_manager.selected_object_render_info, is_skeletal=is_skeletal)
+
+            axis_gizmo_actor = scene_manager.get_axis_gizmo()
+            transform = axis_gizmo_actor.transform
+            for i in range(axis_gizmo_actor.get_geometry_count()):
+                object_data_packer.add_object((axis_gizmo_actor, i), transform.matrix, transform.prev_matrix,
+                                              axis_gizmo_actor.get_object_id(i), axis_gizmo_actor.get_object_color(i))
+
+        # the instance matrices of the batches are the world matrices.
+        self.instance_batch_object_index = object_data_packer.add_object('instance_batch', MATRIX4_IDENTITY, MATRIX4_IDENTITY, is_instancing=True)
+
+        object_data_packer.pack()
+        object_data_packer.upload()
+
     def render_actors(self, render_group, render_mode, render_infos, scene_material_instance=None):
         if len(render_infos) < 1:
             return
 
-        last_actor = None
         last_actor_material = None
         last_actor_material_instance = None
+        is_skeletal = render_group == RenderGroup.SKELETON_ACTOR
+        object_data_packer = self.object_data_packer
+        object_data_packer.bind_buffers()
 
         if scene_material_instance is not None:
             scene_material_instance.use_program()
             scene_material_instance.bind_material_instance()
 
+        # the object datas are packed by update_object_datas.
+        if is_skeletal:
+            object_indices = [object_data_packer.get_object_index((x.actor, x.geometry.skeleton.index)) for x in render_infos]
+        else:
+            object_indices = [object_data_packer.get_object_index((x.actor, None)) for x in render_infos]
+
+        # the static geometries which have same material instance are drawn by an instanced draw.
+        if not is_skeletal and RenderOption.INSTANCE_BATCHING and render_mode in (RenderMode.GBUFFER, RenderMode.SHADOW):
+            batchable_flags = np.array([not x.actor.is_instancing() for x in render_infos], dtype=bool)
+            if RenderMode.GBUFFER == render_mode:
+                # the batch has no previous matrices, so the moved actors are drawn alone to write their velocity.
+                object_datas = object_data_packer.object_datas[object_indices]
+                batchable_flags &= np.all(object_datas['MODEL'] == object_datas['PREV_MODEL'], axis=(1, 2))
+            start_indices, end_indices = batch_render_infos(render_infos, batchable_flags)
+            batches = zip(start_indices.tolist(), end_indices.tolist())
+        else:
+            batches = ((i, i + 1) for i in range(len(render_infos)))
+
         # render
-        for render_info in render_infos:
+        for start_index, end_index in batches:
+            render_info = render_infos[start_index]
             actor = render_info.actor
             geometry = render_info.geometry
             actor_material = render_info.material
@@ -675,26 +742,26 @@ class Renderer(Singleton):
                     data_diffuse = actor_material_instance.get_uniform_data('texture_diffuse')
                     scene_material_instance.bind_uniform_data('texture_diffuse', data_diffuse)
 
-            if last_actor != actor:
-                material_instance = scene_material_instance or actor_material_instance
-                if RenderMode.OBJECT_ID == render_mode:
-                    material_instance.bind_uniform_data('object_id', actor.get_object_id())
-                elif RenderMode.GIZMO == render_mode:
-                    material_instance.bind_uniform_data('color', actor.get_object_color())
-                material_instance.bind_uniform_data('is_instancing', is_instancing)
-                material_instance.bind_uniform_data('model', actor.transform.matrix)
-                if render_group == RenderGroup.SKELETON_ACTOR:
-                    animation_buffer = actor.get_animation_buffer(geometry.skeleton.index)
-                    prev_animation_buffer = actor.get_prev_animation_buffer(geometry.skeleton.index)
-                    material_instance.bind_uniform_data('bone_matrices', animation_buffer, num=len(animation_buffer))
-                    material_instance.bind_uniform_data('prev_bone_matrices', prev_animation_buffer, num=len(prev_animation_buffer))
+            # the redundant object index is skipped by the state cache.
+            material_instance = scene_material_instance or actor_material_instance
+            batch_count = end_index - start_index
+
             # draw
-            if is_instancing:
+            if 1 < batch_count:
+                # the world matrices are the instance matrices of the identity object.
+                instance_matrices = object_data_packer.object_datas['MODEL'][object_indices[start_index:end_index]]
+                material_instance.bind_uniform_data('object_index', self.instance_batch_object_index)
+                geometry.draw_elements_instanced(batch_count, self.actor_instance_buffer, [instance_matrices, ])
+                self.instance_batch_count += 1
+                self.batched_render_info_count += batch_count
+            elif is_instancing:
+                material_instance.bind_uniform_data('object_index', object_indices[start_index])
                 geometry.draw_elements_instanced(actor.get_instance_render_count(), self.actor_instance_buffer, [actor.instance_matrix, ])
             else:
+                material_instance.bind_uniform_data('object_index', object_indices[start_index])
                 geometry.draw_elements()
+            self.actor_draw_call_count += 1
 
-            last_actor = actor
             last_actor_material = actor_material
             last_actor_material_instance = actor_material_instance
 
@@ -702,8 +769,8 @@ class Renderer(Singleton):
         selected_object = self.scene_manager.get_selected_object()
         if selected_object is not None:
             self.framebuffer_manager.bind_framebuffer(RenderTargets.TEMP_RGBA8)
-            glDisable(GL_DEPTH_TEST)
-            glDepthMask(False)
+            OpenGLContext.disable(GL_DEPTH_TEST)
+            OpenGLContext.depth_mask(False)
             glClearColor(0.0, 0.0, 0.0, 0.0)
             glClear(GL_COLOR_BUFFER_BIT)
             self.set_blend_state(False)
@@ -741,21 +808,17 @@ class Renderer(Singleton):
             elif RenderMode.OBJECT_ID == render_mode:
                 material_instance = self.static_object_id_material
             material_instance.use_program()
-            material_instance.bind_uniform_data('is_instancing', False)
-            material_instance.bind_uniform_data('model', axis_gizmo_actor.transform.matrix)
+            self.object_data_packer.bind_buffers()
             geometries = axis_gizmo_actor.get_geometries()
             for i, geometry in enumerate(geometries):
-                if RenderMode.GIZMO == render_mode:
-                    material_instance.bind_uniform_data('color', axis_gizmo_actor.get_object_color(i))
-                elif RenderMode.OBJECT_ID == render_mode:
-                    material_instance.bind_uniform_data('object_id', axis_gizmo_actor.get_object_id(i))
+                material_instance.bind_uniform_data('object_index', self.object_data_packer.get_object_index((axis_gizmo_actor, i)))
                 geometry.draw_elements()
 
     def render_object_id(self):
         self.framebuffer_manager.bind_framebuffer(RenderTargets.OBJECT_ID, depth_texture=RenderTargets.OBJECT_ID_DEPTH)
-        glDisable(GL_CULL_FACE)
-        glEnable(GL_DEPTH_TEST)
-        glDepthMask(True)
+        OpenGLContext.disable(GL_CULL_FACE)
+        OpenGLContext.enable(GL_DEPTH_TEST)
+        OpenGLContext.depth_mask(True)
         glClearColor(0.0, 0.0, 0.0, 0.0)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         self.set_blend_state(False)
@@ -802,8 +865,8 @@ class Renderer(Singleton):
         self.framebuffer_manager.bind_framebuffer(RenderTargets.TEMP_HEIGHT_MAP)
         self.set_blend_state(blend_enable=True, equation=GL_MAX, func_src=GL_ONE, func_dst=GL_ONE)
         glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
-        glDisable(GL_CULL_FACE)
-        glDisable(GL_DEPTH_TEST)
+        OpenGLContext.disable(GL_CULL_FACE)
+        OpenGLContext.disable(GL_DEPTH_TEST)
         glClearColor(0.0, 0.0, 0.0, 1.0)
 
         self.render_heightmap_material.use_program()
@@ -817,8 +880,8 @@ class Renderer(Singleton):
             self.postprocess.render_generate_max_z(RenderTargets.TEMP_HEIGHT_MAP)
 
     def render_bones(self):
-        glDisable(GL_DEPTH_TEST)
-        glDisable(GL_CULL_FACE)
+        OpenGLContext.disable(GL_DEPTH_TEST)
+        OpenGLContext.disable(GL_CULL_FACE)
         mesh = self.resource_manager.get_mesh("Cube")
         static_actors = self.scene_manager.static_actors[:]
 
@@ -967,18 +1030,24 @@ class Renderer(Singleton):
         # bind scene constants uniform blocks
         self.bind_uniform_blocks()
 
+        # upload the object datas of the actors
+        self.update_object_datas()
+        self.actor_draw_call_count = 0
+        self.instance_batch_count = 0
+        self.batched_render_info_count = 0
+
         self.set_blend_state(False)
 
         glHint(GL_PERSPECTIVE_CORRECTION_HINT, GL_NICEST)
         glPolygonMode(GL_FRONT_AND_BACK, self.view_mode)
-        # glEnable(GL_FRAMEBUFFER_SRGB)
-        glEnable(GL_MULTISAMPLE)
-        glEnable(GL_TEXTURE_CUBE_MAP_SEAMLESS)
-        glDepthFunc(GL_LEQUAL)
-        glEnable(GL_CULL_FACE)
-        glFrontFace(GL_CCW)
-        glEnable(GL_DEPTH_TEST)
-        glDepthMask(True)
+        # OpenGLContext.enable(GL_FRAMEBUFFER_SRGB)
+        OpenGLContext.enable(GL_MULTISAMPLE)
+        OpenGLContext.enable(GL_TEXTURE_CUBE_MAP_SEAMLESS)
+        OpenGLContext.depth_func(GL_LEQUAL)
+        OpenGLContext.enable(GL_CULL_FACE)
+        OpenGLContext.front_face(GL_CCW)
+        OpenGLContext.enable(GL_DEPTH_TEST)
+        OpenGLContext.depth_mask(True)
         glClearColor(0.0, 0.0, 0.0, 1.0)
         glClearDepth(1.0)
 
@@ -1038,9 +1107,9 @@ class Renderer(Singleton):
             self.uniform_view_projection_data['PREV_VIEW_PROJECTION'][...] = camera.prev_view_projection_jitter
             self.uniform_view_projection_buffer.bind_uniform_block(data=self.uniform_view_projection_data)
 
-            glFrontFace(GL_CCW)
+            OpenGLContext.front_face(GL_CCW)
 
-            glDepthMask(False)  # cause depth prepass and gbuffer
+            OpenGLContext.depth_mask(False)  # cause depth prepass and gbuffer
 
             self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR, depth_texture=RenderTargets.DEPTH)
             glClear(GL_COLOR_BUFFER_BIT)
@@ -1063,9 +1132,9 @@ class Renderer(Singleton):
             # render ocean
             if self.scene_manager.ocean.is_render_ocean:
                 self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR, depth_texture=RenderTargets.DEPTH)
-                glDisable(GL_CULL_FACE)
-                glEnable(GL_DEPTH_TEST)
-                glDepthMask(True)
+                OpenGLContext.disable(GL_CULL_FACE)
+                OpenGLContext.enable(GL_DEPTH_TEST)
+                OpenGLContext.depth_mask(True)
 
                 self.scene_manager.ocean.render_ocean(atmosphere=self.scene_manager.atmosphere,
                                                       texture_scene=RenderTargets.HDR_TEMP,
@@ -1085,9 +1154,9 @@ class Renderer(Singleton):
                                                                             RenderTargets.COMPOSITE_SHADOWMAP,
                                                                             RenderOption.RENDER_LIGHT_PROBE)
 
-            glEnable(GL_CULL_FACE)
-            glEnable(GL_DEPTH_TEST)
-            glDepthMask(False)
+            OpenGLContext.enable(GL_CULL_FACE)
+            OpenGLContext.enable(GL_DEPTH_TEST)
+            OpenGLContext.depth_mask(False)
 
             # Composite Atmosphere
             if self.scene_manager.atmosphere.is_render_atmosphere:
@@ -1108,20 +1177,20 @@ class Renderer(Singleton):
             # prepare translucent
             self.set_blend_state(True, GL_FUNC_ADD, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
             self.framebuffer_manager.bind_framebuffer(RenderTargets.HDR, depth_texture=RenderTargets.DEPTH)
-            glEnable(GL_DEPTH_TEST)
+            OpenGLContext.enable(GL_DEPTH_TEST)
 
             # Translucent
             self.render_translucent()
 
             # render particle
             if RenderOption.RENDER_EFFECT:
-                glDisable(GL_CULL_FACE)
-                glEnable(GL_BLEND)
+                OpenGLContext.disable(GL_CULL_FACE)
+                OpenGLContext.enable(GL_BLEND)
 
                 self.render_effect()
 
-                glDisable(GL_BLEND)
-                glEnable(GL_CULL_FACE)
+                OpenGLContext.disable(GL_BLEND)
+                OpenGLContext.enable(GL_CULL_FACE)
 
             # render probe done
             if RenderOption.RENDER_LIGHT_PROBE:
@@ -1163,8 +1232,8 @@ class Renderer(Singleton):
 
         if RenderOption.RENDER_GIZMO and self.debug_texture is None:
             self.framebuffer_manager.bind_framebuffer(RenderTargets.BACKBUFFER, depth_texture=RenderTargets.DEPTH)
-            glEnable(GL_DEPTH_TEST)
-            glDepthMask(True)
+            OpenGLContext.enable(GL_DEPTH_TEST)
+            OpenGLContext.depth_mask(True)
             self.set_blend_state(True, GL_FUNC_ADD, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
             # render spline gizmo
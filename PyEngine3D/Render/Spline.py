@@ -37,6 +37,9 @@ class SplineData:
         self.spline_points = data.get('spline_points', copy.deepcopy(self.default_spline_points))
         self.resample_count = data.get('resample_count', 128)
         self.resampling_positions = np.zeros(0, dtype=(np.float32, 3))
+        self.resampling_tangents = np.zeros(0, dtype=(np.float32, 3))
+        self.arc_lengths = np.zeros(1, dtype=np.float64)  # cumulative length of the resampling positions
+        self.resampling_version = 0  # increased by resampling, so the cached line buffers know the positions are changed.
         self.resampling(self.resample_count)
         self.attributes = Attributes()
 
@@ -116,46 +119,24 @@ class SplineData:
         if resample_count is not None:
             self.resample_count = max(1, resample_count)
 
-        self.resampling_positions = np.zeros(self.resample_count, dtype=(np.float32, 3))
+        self.resampling_positions, self.resampling_tangents = getCubicBezierSplinePoints(
+            [spline_point.position for spline_point in self.spline_points],
+            [spline_point.control_point for spline_point in self.spline_points],
+            [spline_point.point_time for spline_point in self.spline_points],
+            self.resample_count
+        )
+        self.arc_lengths = getArcLengths(self.resampling_positions)
+        self.resampling_version += 1
 
-        point_count = len(self.spline_points)
-        if point_count == 0:
-            return
-        elif point_count == 1:
-            spline_point = self.spline_points[0]
-            for i in range(self.resample_count):
-                self.resampling_positions[i][...] = spline_point.position
-        # 가장 첫번째 point의 시간은 제외
-        total_time = sum([self.spline_points[i].point_time for i in range(1, len(self.spline_points), 1)])
-        key_frames = [spline_point.point_time for spline_point in self.spline_points]
-        key_frames[0] = 0.0
-        key_frames = [sum(key_frames[:i+1]) for i in range(len(key_frames))]
-
-        point_index = 0
-        resample_pos = 0.0
-        resample_step = total_time / (self.resample_count - 1)
-        for i in range(self.resample_count):
-            while True:
-                if key_frames[point_index] <= resample_pos <= key_frames[point_index + 1]:
-                    break
-                if (point_count - 2) <= point_index:
-                    break
-                point_index += 1
-
-            spline_point = self.spline_points[point_index]
-            next_spline_point = self.spline_points[point_index + 1]
-            time_range = key_frames[point_index + 1] - key_frames[point_index]
-            t = min(1.0, max(0.0, (resample_pos - key_frames[point_index]) / time_range))
-
-            self.resampling_positions[i][...] = getCubicBezierCurvePoint(
-                spline_point.position,
-                spline_point.position + spline_point.control_point,
-                next_spline_point.position - next_spline_point.control_point,
-                next_spline_point.position,
-                t
-            )
-
-            resample_pos = min(total_time, resample_pos + resample_step)
+    def get_length(self):
+        return self.arc_lengths[-1]
+
+    def get_positions_by_distance(self, distances):
+        """
+        :param distances: float or [follower count], distance along the spline from the first point.
+        :return: positions [..., 3], normalized tangents [..., 3]
+        """
+        return getPolylinePointsByDistance(self.resampling_positions, self.resampling_tangents, self.arc_lengths, distances)
 
 
 class Spline3D:
@@ -227,6 +208,19 @@ class Spline3D:
         pos = self.spline_data.get_resampling_position(ratio)
         return np.dot(Float4(*pos, 1.0), self.transform.matrix)[:3]
 
+    def get_positions_by_distance(self, distances):
+        """
+        :param distances: float or [follower count], the distance is measured in the space of the spline data.
+        :return: world positions [..., 3], normalized world tangents [..., 3]
+        """
+        positions, tangents = self.spline_data.get_positions_by_distance(distances)
+        matrix = self.transform.matrix
+        positions = np.dot(positions, matrix[:3, :3]) + matrix[3, :3]
+        tangents = np.dot(tangents, matrix[:3, :3])
+        tangent_lengths = np.linalg.norm(tangents, axis=-1, keepdims=True)
+        tangents = np.divide(tangents, tangent_lengths, out=np.zeros_like(tangents), where=0.0 < tangent_lengths)
+        return positions, tangents
+
     def update(self, dt):
         self.transform.update_transform(update_inverse_matrix=True)
 
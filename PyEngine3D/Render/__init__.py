@@ -1,5 +1,7 @@
-from .RenderInfo import RenderInfo, gather_render_infos
+from .BoundingVolumeHierarchy import BoundingVolumeHierarchy
+from .RenderInfo import RenderInfo, CullingTable, gather_render_infos, sort_render_infos, batch_render_infos
 from .RenderInfo import view_frustum_culling_geometry, cone_sphere_culling_actor, always_pass, shadow_culling
+from .RenderInfo import view_frustum_culling_geometries, shadow_culling_geometries
 from .RenderOptions import BlendMode, RenderOption, RenderingType, RenderGroup, RenderMode, RenderOptionManager
 
 from .MaterialInstance import MaterialInstance
@@ -10,7 +12,7 @@ from .Mesh import BoundBox, Geometry, Mesh, Triangle, Quad, Cube, Plane, ScreenQ
 from .Model import Model
 
 from .ProceduralTexture import CreateProceduralTexture, NoiseTexture3D, CloudTexture3D, VectorFieldTexture3D
-from .Actor import CollisionActor, StaticActor, SkeletonActor
+from .Actor import CollisionActor, StaticActor, SkeletonActor, update_skeleton_actors
 from .Gizmo import AxisGizmo
 from .Effect import EffectManager, Effect, Particle, EffectInfo, ParticleInfo
 from .Camera import Camera
@@ -24,7 +26,8 @@ from .Spline import SplinePoint, SplineData, Spline3D
 from .Font import TextRenderData, FontData, FontManager
 from .RenderTarget import RenderTargets, RenderTargetManager
 
+from .ObjectData import ObjectDataPacker
 from .PostProcess import PostProcess
 from .Renderer import Renderer
 from .Renderer_Basic import Renderer_Basic
-from .DebugLine import DebugLineManager, DebugLine
+from .DebugLine import DebugLineManager, DebugLineBuffer
@@ -4,7 +4,6 @@ import os
 import io
 import re
 import traceback
-import copy
 from collections import OrderedDict
 
 import numpy as np
@@ -41,9 +40,23 @@ def convert_list(data, data_type=float, stride=1):
         return [data_list[i * stride:i * stride + stride] for i in range(int(len(data_list) / stride))]
 
 
-def parsing_source_data(xml_element):
+def convert_array(data, dtype=np.float64, stride=1):
+    """
+    Parse the whitespace separated numbers at once.
+    :return: (count / stride, stride) array, or (count,) array if stride < 2
+    """
+    if not data:
+        return np.zeros(0, dtype=dtype)
+    data_array = np.fromstring(data, dtype=dtype, sep=' ')
+    if stride < 2:
+        return data_array
+    return data_array[:len(data_array) // stride * stride].reshape(-1, stride)
+
+
+def parsing_source_data(xml_element, as_array=True):
     """
     :param xml_element:
+    :param as_array: if True, float_array is numpy array, otherwise list like as convert_list.
     :return: {'source_id':source_data}
     """
     sources = {}
@@ -52,13 +65,18 @@ def parsing_source_data(xml_element):
         stride = get_xml_attrib(xml_source.find('technique_common/accessor'), 'stride')
         stride = convert_int(stride, 0)
         source_data = None
-        for tag, data_type in [('float_array', float), ('Name_array', str)]:
-            xml_array = xml_source.find(tag)
-            if xml_array is not None:
-                source_text = get_xml_text(xml_array)
-                if source_text:
-                    source_data = convert_list(source_text, data_type, stride)
-                break
+        xml_float_array = xml_source.find('float_array')
+        xml_name_array = xml_source.find('Name_array')
+        if xml_float_array is not None:
+            source_text = get_xml_text(xml_float_array)
+            if source_text:
+                source_data = convert_array(source_text, np.float64, stride)
+                if not as_array:
+                    source_data = source_data.tolist()
+        elif xml_name_array is not None:
+            source_text = get_xml_text(xml_name_array)
+            if source_text:
+                source_data = convert_list(source_text, str, stride)
         sources[source_id] = source_data
     return sources
 
@@ -113,22 +131,21 @@ class ColladaNode:
         xml_matrix = xml_node.find('matrix')
         if xml_matrix is not None:
             # transform matrix
-            matrix = get_xml_text(xml_matrix)
-            matrix = [eval(x) for x in matrix.split()]
+            matrix = convert_array(get_xml_text(xml_matrix))
             if len(matrix) == 16:
                 self.matrix = np.array(matrix, dtype=np.float32).reshape(4, 4)
         else:
             # location, rotation, scale
             xml_translate = xml_node.find('translate')
             if xml_translate is not None:
-                translation = [eval(x) for x in get_xml_text(xml_translate).split()]
+                translation = convert_array(get_xml_text(xml_translate))
                 if len(translation) == 3:
                     matrix_translate(self.matrix, *translation)
                 else:
                     logger.error('%s node has a invalid translate.' % self.name)
             xml_rotates = xml_node.findall('rotate')
             for xml_rotate in xml_rotates:
-                rotation = [eval(x) for x in get_xml_text(xml_rotate).split()]
+                rotation = convert_array(get_xml_text(xml_rotate))
                 if len(rotation) == 4:
                     axis = get_xml_attrib(xml_rotate, 'sid')
                     if axis == 'rotationX':
@@ -141,7 +158,7 @@ class ColladaNode:
                         logger.error('%s node has a invalid rotate.' % self.name)
             xml_scale = xml_node.find('scale')
             if xml_scale is not None:
-                scale = [eval(x) for x in get_xml_text(xml_scale).split()]
+                scale = convert_array(get_xml_text(xml_scale))
                 if len(scale) == 3:
                     matrix_scale(self.matrix, *scale)
                 else:
@@ -157,8 +174,8 @@ class ColladaContoller:
         self.bind_shape_matrix = Matrix4()
 
         self.bone_names = []
-        self.bone_indicies = []
-        self.bone_weights = []
+        self.bone_indicies = np.zeros((0, 4), dtype=np.float32)
+        self.bone_weights = np.zeros((0, 4), dtype=np.float32)
         self.inv_bind_matrices = []
 
         self.parsing(xml_controller)
@@ -173,7 +190,7 @@ class ColladaContoller:
             # parsing bind_shape_matrix
             bind_shape_matrix = get_xml_text(xml_skin.find('bind_shape_matrix'), None)
             if bind_shape_matrix:
-                self.bind_shape_matrix = np.array(convert_list(bind_shape_matrix), dtype=np.float32).reshape(4, 4)
+                self.bind_shape_matrix = convert_array(bind_shape_matrix, np.float32).reshape(4, 4)
             else:
                 self.bind_shape_matrix = Matrix4()
 
@@ -195,40 +212,36 @@ class ColladaContoller:
                 # parse vertex weights
                 vcount_text = get_xml_text(xml_vertex_weights.find('vcount'))
                 v_text = get_xml_text(xml_vertex_weights.find('v'))
-                vcount_list = convert_list(vcount_text, int)
-                v_list = convert_list(v_text, int)
+                vcount_list = convert_array(vcount_text, np.int32)
+                v_list = convert_array(v_text, np.int32)
 
                 # make geomtry data
                 self.build(sources, joins_semantics, weights_semantics, vcount_list, v_list)
                 return  # done
 
     def build(self, sources, joins_semantics, weights_semantics, vcount_list, v_list):
-        semantic_stride = len(weights_semantics)
+        semantic_stride = max([semantic['offset'] for semantic in weights_semantics.values()]) + 1
         # build weights and indicies
         max_bone = 4  # max influence bone count per vertex
-        weight_source_id = weights_semantics['WEIGHT']['source']
-        weight_sources = sources[weight_source_id]
-        index = 0
-        for vcount in vcount_list:
-            bone_indicies = []
-            bone_weights = []
-            indicies = v_list[index: index + vcount * semantic_stride]
-            index += vcount * semantic_stride
-            for v in range(max_bone):
-                if 'JOINT' in weights_semantics:
-                    offset = weights_semantics['JOINT']['offset']
-                    if v < vcount:
-                        bone_indicies.append(indicies[offset + v * semantic_stride])
-                    else:
-                        bone_indicies.append(0)
-                if 'WEIGHT' in weights_semantics:
-                    offset = weights_semantics['WEIGHT']['offset']
-                    if v < vcount:
-                        bone_weights.append(weight_sources[indicies[offset + v * semantic_stride]])
-                    else:
-                        bone_weights.append(0.0)
-            self.bone_indicies.append(bone_indicies)
-            self.bone_weights.append(bone_weights)
+        vertex_count = len(vcount_list)
+        influences = v_list[:np.sum(vcount_list) * semantic_stride].reshape(-1, semantic_stride)
+
+        # the first max_bone influences of each vertex like as the order in the file.
+        influence_vertices = np.repeat(np.arange(vertex_count), vcount_list)
+        influence_order = np.arange(len(influences)) - np.repeat(np.cumsum(vcount_list) - vcount_list, vcount_list)
+        valid = influence_order < max_bone
+        influence_vertices = influence_vertices[valid]
+        influence_order = influence_order[valid]
+
+        self.bone_indicies = np.zeros((vertex_count, max_bone), dtype=np.float32)
+        self.bone_weights = np.zeros((vertex_count, max_bone), dtype=np.float32)
+        if 'JOINT' in weights_semantics:
+            offset = weights_semantics['JOINT']['offset']
+            self.bone_indicies[influence_vertices, influence_order] = influences[valid, offset]
+        if 'WEIGHT' in weights_semantics:
+            offset = weights_semantics['WEIGHT']['offset']
+            weight_sources = sources[weights_semantics['WEIGHT']['source']]
+            self.bone_weights[influence_vertices, influence_order] = weight_sources[influences[valid, offset]]
         # joints
         if 'JOINT' in joins_semantics:
             joints_source = joins_semantics['JOINT'].get('source', '')
@@ -257,7 +270,7 @@ class ColladaAnimation:
         self.parsing(xml_animation, node_name_map)
 
     def parsing(self, xml_animation, node_name_map):
-        sources = parsing_source_data(xml_animation)
+        sources = parsing_source_data(xml_animation, as_array=False)
 
         joins_semantics = {}
         xml_sampler = xml_animation.find('sampler')
@@ -307,13 +320,13 @@ class ColladaGeometry:
         self.name = get_xml_attrib(xml_geometry, 'name').replace('.', '_')
         self.id = get_xml_attrib(xml_geometry, 'id').replace('.', '_')
 
-        self.positions = []
-        self.bone_indicies = []
-        self.bone_weights = []
-        self.normals = []
-        self.colors = []
-        self.texcoords = []
-        self.indices = []
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.bone_indicies = np.zeros((0, 4), dtype=np.float32)
+        self.bone_weights = np.zeros((0, 4), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+        self.colors = np.zeros((0, 4), dtype=np.float32)
+        self.texcoords = np.zeros((0, 2), dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.uint32)
 
         # find matched controller
         self.controller = None
@@ -356,37 +369,24 @@ class ColladaGeometry:
                 if xml_polygons is not None:
                     # parse semantic
                     semantics = parsing_sematic(xml_polygons)
-                    semantic_stride = len(semantics)
+                    semantic_stride = max([semantic['offset'] for semantic in semantics.values()]) + 1
 
                     # parse polygon indices
-                    vertex_index_list = []  # flatten vertex list as triangle
                     if tag == 'triangles':
-                        vertex_index_list = get_xml_text(xml_polygons.find('p'))
-                        vertex_index_list = convert_list(vertex_index_list, int)
-                    elif tag == 'polylist' or tag == 'polygons':
-                        vcount_list = []
-                        polygon_index_list = []
+                        vertex_index_list = convert_array(get_xml_text(xml_polygons.find('p')), np.int32)
+                        vertex_index_list = vertex_index_list[:len(vertex_index_list) // (semantic_stride * 3) * semantic_stride * 3]
+                        vertex_index_list = vertex_index_list.reshape(-1, semantic_stride)
+                    else:
                         if tag == 'polylist':
-                            vcount_list = convert_list(get_xml_text(xml_polygons.find('vcount')), int)
-                            # flatten list
-                            polygon_index_list = convert_list(get_xml_text(xml_polygons.find('p')), int)
-                        elif tag == 'polygons':
-                            for xml_p in xml_polygons.findall('p'):
-                                polygon_indices = convert_list(get_xml_text(xml_p), int)
-                                # flatten list
-                                polygon_index_list += polygon_indices
-                                vcount_list.append(int(len(polygon_indices) / semantic_stride))
+                            vcount_list = convert_array(get_xml_text(xml_polygons.find('vcount')), np.int64)
+                            polygon_index_list = convert_array(get_xml_text(xml_polygons.find('p')), np.int32)
+                        else:
+                            polygon_index_lists = [convert_array(get_xml_text(xml_p), np.int32) for xml_p in xml_polygons.findall('p')]
+                            vcount_list = np.array([len(polygon_indices) // semantic_stride for polygon_indices in polygon_index_lists], dtype=np.int64)
+                            polygon_index_list = np.concatenate([polygon_indices[:vcount * semantic_stride] for polygon_indices, vcount in zip(polygon_index_lists, vcount_list)] or [np.zeros(0, dtype=np.int32)])
+                        polygon_index_list = polygon_index_list[:np.sum(vcount_list) * semantic_stride].reshape(-1, semantic_stride)
                         # triangulate
-                        elapsed_vindex = 0
-                        for vcount in vcount_list:
-                            if vcount == 3:
-                                vertex_index_list += polygon_index_list[
-                                                     elapsed_vindex: elapsed_vindex + vcount * semantic_stride]
-                            else:
-                                polygon_indices = polygon_index_list[
-                                                  elapsed_vindex: elapsed_vindex + vcount * semantic_stride]
-                                vertex_index_list += convert_triangulate(polygon_indices, vcount, semantic_stride)
-                            elapsed_vindex += vcount * semantic_stride
+                        vertex_index_list = polygon_index_list[triangulate_polygons(vcount_list).reshape(-1)]
                     # make geomtry data
                     self.build(sources, position_source_id, semantics, semantic_stride, vertex_index_list)
                     return  # done
@@ -401,39 +401,20 @@ class ColladaGeometry:
                     "Different count. vertex_count : %d, bone_weight_count : %d" % (vertex_count, bone_weight_count))
                 return
 
-        indexMap = {}
-        for i in range(int(len(vertex_index_list) / semantic_stride)):
-            vertIndices = tuple(vertex_index_list[i * semantic_stride: i * semantic_stride + semantic_stride])
-            if vertIndices in indexMap:
-                self.indices.append(indexMap[vertIndices])
-            else:
-                self.indices.append(len(indexMap))
-                indexMap[vertIndices] = len(indexMap)
-
-                if 'VERTEX' in semantics:
-                    source_id = position_source_id
-                    offset = semantics['VERTEX']['offset']
-                    posisiton = sources[source_id][vertIndices[offset]]
-                    self.positions.append(posisiton)
-                    if self.controller:
-                        self.bone_indicies.append(self.controller.bone_indicies[vertIndices[offset]])
-                        self.bone_weights.append(self.controller.bone_weights[vertIndices[offset]])
-
-                if 'NORMAL' in semantics:
-                    source_id = semantics['NORMAL']['source']
-                    offset = semantics['NORMAL']['offset']
-                    normal = sources[source_id][vertIndices[offset]]
-                    self.normals.append(normal)
-
-                if 'COLOR' in semantics:
-                    source_id = semantics['COLOR']['source']
-                    offset = semantics['COLOR']['offset']
-                    self.colors.append(sources[source_id][vertIndices[offset]])
-
-                if 'TEXCOORD' in semantics:
-                    source_id = semantics['TEXCOORD']['source']
-                    offset = semantics['TEXCOORD']['offset']
-                    self.texcoords.append(sources[source_id][vertIndices[offset]])
+        # weld the vertices which have the same indices of every semantic.
+        vertex_index_list, self.indices = weld_vertex_indices(vertex_index_list)
+
+        if 'VERTEX' in semantics:
+            vertex_indices = vertex_index_list[:, semantics['VERTEX']['offset']]
+            self.positions = sources[position_source_id][vertex_indices]
+            if self.controller:
+                self.bone_indicies = self.controller.bone_indicies[vertex_indices]
+                self.bone_weights = self.controller.bone_weights[vertex_indices]
+
+        for semantic, attribute_name in (('NORMAL', 'normals'), ('COLOR', 'colors'), ('TEXCOORD', 'texcoords')):
+            if semantic in semantics:
+                source = sources[semantics[semantic]['source']]
+                setattr(self, attribute_name, source[vertex_index_list[:, semantics[semantic]['offset']]])
         self.valid = True
 
 
@@ -634,40 +615,33 @@ class Collada:
 
             if geometry.controller:
                 skeleton_name = geometry.controller.name
-                bone_indicies = copy.deepcopy(geometry.bone_indicies)
-                bone_weights = copy.deepcopy(geometry.bone_weights)
-
-            # swap y and z
-            geometry.bind_shape_matrix = swap_up_axis_matrix(geometry.bind_shape_matrix, True, False, self.up_axis)
-
-            # precompute bind_shape_matrix
-            bound_min = Float3(FLOAT32_MAX, FLOAT32_MAX, FLOAT32_MAX)
-            bound_max = Float3(FLOAT32_MIN, FLOAT32_MIN, FLOAT32_MIN)
-            for i, position in enumerate(geometry.positions):
-                geometry.positions[i] = np.dot([position[0], position[1], position[2], 1.0], geometry.bind_shape_matrix)[:3]
-                position = geometry.positions[i]
-                for j in range(3):
-                    if bound_min[j] > position[j]:
-                        bound_min[j] = position[j]
-                    if bound_max[j] < position[j]:
-                        bound_max[j] = position[j]
-
-            for i, normal in enumerate(geometry.normals):
-                geometry.normals[i] = np.dot([normal[0], normal[1], normal[2], 0.0], geometry.bind_shape_matrix)[:3]
-                geometry.normals[i] = normalize(geometry.normals[i])
+                bone_indicies = geometry.bone_indicies
+                bone_weights = geometry.bone_weights
+
+            # swap y and z, then precompute bind_shape_matrix
+            bind_shape_matrix = swap_up_axis_matrix(geometry.bind_shape_matrix, True, False, self.up_axis)
+            positions = np.dot(geometry.positions, bind_shape_matrix[:3, :3]) + bind_shape_matrix[3, :3]
+            normals = normalize_vectors(np.dot(geometry.normals, bind_shape_matrix[:3, :3]))
+
+            if 0 < len(positions):
+                bound_min = Float3(*np.min(positions, axis=0))
+                bound_max = Float3(*np.max(positions, axis=0))
+            else:
+                bound_min = Float3(FLOAT32_MAX, FLOAT32_MAX, FLOAT32_MAX)
+                bound_max = Float3(FLOAT32_MIN, FLOAT32_MIN, FLOAT32_MIN)
 
             geometry_data = dict(
                 name=geometry.name,
-                positions=copy.deepcopy(geometry.positions),
-                normals=copy.deepcopy(geometry.normals),
-                colors=copy.deepcopy(geometry.colors),
-                texcoords=copy.deepcopy(geometry.texcoords),
-                indices=copy.deepcopy(geometry.indices),
+                positions=positions.astype(np.float32),
+                normals=normals.astype(np.float32),
+                colors=geometry.colors.astype(np.float32),
+                texcoords=geometry.texcoords.astype(np.float32),
+                indices=geometry.indices,
                 skeleton_name=skeleton_name,
-                bone_indicies=copy.deepcopy(bone_indicies),
-                bone_weights=copy.deepcopy(bone_weights),
-                bound_min=copy.deepcopy(bound_min),
-                bound_max=copy.deepcopy(bound_max),
+                bone_indicies=bone_indicies,
+                bone_weights=bone_weights,
+                bound_min=bound_min,
+                bound_max=bound_max,
                 radius=length(bound_max - bound_min)
             )
 
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+
+class DependencyGraph:
+    """
+    Reverse dependency graph of the resources.
+    ex) shader file or include file -> (Material, name) -> (MaterialInstance, name)
+    So the resources which are affected by a changed file are found without scanning every resource.
+    """
+    def __init__(self):
+        self.dependencies = {}  # { node : [dependency node] }
+        self.dependents = {}  # { node : OrderedDict(dependent node : None) }
+
+    def clear(self):
+        self.dependencies = {}
+        self.dependents = {}
+
+    def set_dependencies(self, node, dependencies):
+        self.remove_dependencies(node)
+        dependencies = list(OrderedDict.fromkeys(dependencies))
+        self.dependencies[node] = dependencies
+        for dependency in dependencies:
+            if dependency not in self.dependents:
+                self.dependents[dependency] = OrderedDict()
+            self.dependents[dependency][node] = None
+
+    def remove_dependencies(self, node):
+        for dependency in self.dependencies.pop(node, []):
+            dependents = self.dependents.get(dependency)
+            if dependents is not None:
+                dependents.pop(node, None)
+                if not dependents:
+                    self.dependents.pop(dependency)
+
+    def get_dependencies(self, node):
+        return self.dependencies.get(node, [])
+
+    def get_dependents(self, node, recursive=False):
+        """
+        :return: [dependent node], the direct dependents come first if recursive.
+        """
+        if not recursive:
+            return list(self.dependents.get(node, {}).keys())
+
+        result = OrderedDict()
+        nodes = [node, ]
+        while nodes:
+            next_nodes = []
+            for dependent in (dependent for node in nodes for dependent in self.dependents.get(node, {})):
+                if dependent not in result:
+                    result[dependent] = None
+                    next_nodes.append(dependent)
+            nodes = next_nodes
+        return list(result.keys())
@@ -0,0 +1,274 @@
+import os
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from OpenGL.GL import GL_TRIANGLES
+
+from PyEngine3D.Common import logger, COMMAND
+from PyEngine3D.Utilities import compute_tangent
+from .ColladaLoader import Collada
+from .ObjLoader import StreamingOBJ
+from .FontLoader import generate_font_data
+
+
+# ------------------------------ #
+# import functions, they run in the import processes, so they must be cpu only works.
+# ------------------------------ #
+def compute_geometry_tangents(geometry_data):
+    tangents = geometry_data.get('tangents', [])
+    positions = geometry_data.get('positions', [])
+    indices = geometry_data.get('indices', [])
+    vertex_count = len(positions)
+    if 0 < len(tangents) or 0 == vertex_count or 0 == len(indices):
+        return
+
+    # same defaults as CreateVertexArrayBuffer
+    texcoords = geometry_data.get('texcoords', [[0.0, 0.0], ] * vertex_count)
+    normals = geometry_data.get('normals', [[1.0, 1.0, 1.0], ] * vertex_count)
+    if len(texcoords) != vertex_count or len(normals) != vertex_count:
+        return
+
+    is_triangle_mode = GL_TRIANGLES == geometry_data.get('mode', GL_TRIANGLES)
+    geometry_data['tangents'] = compute_tangent(is_triangle_mode,
+                                                np.array(positions, dtype=np.float32),
+                                                np.array(texcoords, dtype=np.float32),
+                                                np.array(normals, dtype=np.float32),
+                                                np.array(indices, dtype=np.uint32))
+
+
+def import_mesh_data(source_filepath):
+    file_ext = os.path.splitext(source_filepath)[1].lower()
+    if file_ext == '.obj':
+        mesh_data = StreamingOBJ(source_filepath, 1, True).get_mesh_data()
+    elif file_ext == '.dae':
+        mesh_data = Collada(source_filepath).get_mesh_data()
+    else:
+        return None
+
+    if mesh_data:
+        for geometry_data in mesh_data.get('geometry_datas', []):
+            compute_geometry_tangents(geometry_data)
+    return mesh_data
+
+
+def import_texture_data(source_filepath):
+    """
+    :return: texture_datas for CreateTexture, except the texture_type.
+    """
+    if not os.path.exists(source_filepath):
+        return None
+
+    image = Image.open(source_filepath)
+    width, height = image.size
+
+    if image.mode == 'L' or image.mode == 'LA' or image.mode == 'P' or image.mode == 'R':
+        rgbimg = Image.new("RGBA", image.size)
+        rgbimg.paste(image)
+        image = rgbimg
+        logger.info('Convert Grayscale image to RGB : %s' % source_filepath)
+
+    data = image.tobytes("raw", image.mode, 0, -1)
+
+    return dict(
+        image_mode=image.mode,
+        width=width,
+        height=height,
+        data=data
+    )
+
+
+def import_font_data(resource_name, unicode_block_name, range_min, range_max, source_filepath, preview_path,
+                     distance_field_font=False):
+    """
+    A unicode block is an import job, so the blocks of a font are generated in parallel.
+    :return: { unicode block name : font data }
+    """
+    font_data = generate_font_data(
+        resource_name=resource_name,
+        distance_field_font=distance_field_font,
+        anti_aliasing=True,
+        font_size=20,
+        padding=1,
+        unicode_block_name=unicode_block_name,
+        range_min=range_min,
+        range_max=range_max,
+        source_filepath=source_filepath,
+        preview_path=preview_path
+    )
+    return {unicode_block_name: font_data}
+
+
+class ImportRequest:
+    def __init__(self, resource_loader, resource, source_filepath, futures):
+        self.resource_loader = resource_loader
+        self.resource = resource
+        self.source_filepath = source_filepath
+        self.futures = futures  # a future per import job
+        self.request_time = time.perf_counter()
+
+    def get_key(self):
+        return self.resource.type_name, self.resource.name
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def result(self):
+        """
+        :return: merged import data of the import jobs.
+        """
+        return self.resource_loader.merge_import_datas([future.result() for future in self.futures])
+
+
+class ImportScheduler:
+    """
+    Convert the external source files with ResourceLoader.import_function in the import processes.
+    The main thread creates the gl objects by ResourceLoader.create_imported_resource,
+    then the resource files are written in the writing threads, and main thread sets the meta datas of the written files.
+    """
+    def __init__(self, resource_manager, process_count=None, write_thread_count=2):
+        self.resource_manager = resource_manager
+        self.process_count = process_count
+        self.write_thread_count = write_thread_count
+        self.process_pool = None
+        self.write_pool = None
+        self.requests = OrderedDict()  # { (resource type name, resource name) : ImportRequest }
+        self.loader_import_counts = {}  # { resource loader name : import count }
+        self.write_futures = []  # [(future, resource loader, resource, source filepath)]
+        self.total_count = 0
+        self.completed_count = 0
+
+    def start(self):
+        # the processes are created at the first import.
+        if self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(max_workers=self.process_count)
+            self.write_pool = ThreadPoolExecutor(max_workers=self.write_thread_count)
+
+    def stop(self):
+        # complete all imports, so the converted resources are not lost.
+        while self.requests:
+            self.complete_request(self.requests.popitem(last=False)[1])
+
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True)
+            self.write_pool.shutdown(wait=True)
+            self.process_pool = None
+            self.write_pool = None
+        self.complete_writes()
+
+    def get_import_count(self):
+        return len(self.requests)
+
+    def is_importing(self, resource):
+        return resource is not None and (resource.type_name, resource.name) in self.requests
+
+    def push_import(self, resource_loader, resource, source_filepath):
+        key = (resource.type_name, resource.name)
+        if key in self.requests:
+            return self.requests[key]
+
+        self.start()
+        futures = [self.process_pool.submit(resource_loader.import_function, **import_arguments)
+                   for import_arguments in resource_loader.get_import_arguments_list(resource, source_filepath)]
+        request = ImportRequest(resource_loader, resource, source_filepath, futures)
+        self.requests[key] = request
+        self.loader_import_counts[resource_loader.name] = self.loader_import_counts.get(resource_loader.name, 0) + 1
+        self.total_count += 1
+
+        resource.is_loading = True
+        if resource.data is None:
+            resource.set_placeholder(resource_loader.get_placeholder_data())
+        return request
+
+    def complete_import(self, resource):
+        """
+        The resource is needed right now, so wait for the import.
+        :return: True if the resource was importing.
+        """
+        request = self.requests.pop((resource.type_name, resource.name), None) if resource is not None else None
+        if request is not None:
+            self.complete_request(request)
+            return True
+        return False
+
+    def update(self, time_budget):
+        """
+        Create the imported resources in main thread until the time budget runs out.
+        :return: completed import count
+        """
+        start_time = time.perf_counter()
+        complete_count = 0
+        for key in list(self.requests.keys()):
+            request = self.requests[key]
+            if request.done():
+                self.requests.pop(key)
+                self.complete_request(request)
+                complete_count += 1
+                if time_budget < (time.perf_counter() - start_time):
+                    break
+
+        self.complete_writes()
+        return complete_count
+
+    def complete_writes(self):
+        """
+        The resource index and the meta datas are shared, so they are set in main thread after the files are written.
+        """
+        write_futures = []
+        for write_future in self.write_futures:
+            future, resource_loader, resource, source_filepath = write_future
+            if not future.done():
+                write_futures.append(write_future)
+                continue
+
+            save_filepath = None
+            try:
+                save_filepath = future.result()
+            except:
+                logger.error(traceback.format_exc())
+
+            if save_filepath is not None:
+                resource_loader.set_saved_meta_data(resource, save_filepath, source_filepath)
+        self.write_futures = write_futures
+
+    def complete_request(self, request):
+        resource = request.resource
+        resource_loader = request.resource_loader
+        import_data = None
+        try:
+            import_data = request.result()
+        except:
+            logger.error(traceback.format_exc())
+
+        resource.is_loading = False
+        save_data = None
+        if import_data is not None:
+            try:
+                save_data = resource_loader.create_imported_resource(resource, request.source_filepath, import_data)
+            except:
+                logger.error(traceback.format_exc())
+
+        if save_data is not None:
+            future = self.write_pool.submit(resource_loader.write_resource_data, resource, save_data)
+            self.write_futures.append((future, resource_loader, resource, request.source_filepath))
+        else:
+            logger.error("Failed to import %s." % request.source_filepath)
+            if resource.is_placeholder:
+                resource.clear_data()
+
+        self.completed_count += 1
+        self.resource_manager.core_manager.send(COMMAND.TRANS_IMPORT_PROGRESS,
+                                                (self.completed_count, self.total_count, resource.name))
+
+        # all imports of the loader are done.
+        self.loader_import_counts[resource_loader.name] -= 1
+        if 0 == self.loader_import_counts[resource_loader.name]:
+            self.loader_import_counts.pop(resource_loader.name)
+            resource_loader.complete_imports()
+
+        if not self.requests:
+            self.total_count = 0
+            self.completed_count = 0
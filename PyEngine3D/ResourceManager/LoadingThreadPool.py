@@ -0,0 +1,233 @@
+import queue
+import time
+import traceback
+from threading import Thread, Lock
+
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import AutoEnum
+
+
+class LoadingState(AutoEnum):
+    WAITING = ()
+    LOADING = ()
+    PREPARED = ()
+    COMPLETED = ()
+    CANCELED = ()
+
+
+class LoadingRequest:
+    def __init__(self, resource_loader, resource, priority, sequence):
+        self.resource_loader = resource_loader
+        self.resource = resource
+        self.priority = priority  # lower value is loaded first.
+        self.sequence = sequence
+        self.state = LoadingState.WAITING
+        self.data = None
+        self.dependencies = []
+        self.request_time = time.perf_counter()
+        self.prepare_time = 0.0
+
+    def get_key(self):
+        return self.resource.type_name, self.resource.name
+
+    def is_done(self):
+        return self.state in (LoadingState.COMPLETED, LoadingState.CANCELED)
+
+    def is_ready_to_upload(self):
+        return LoadingState.PREPARED == self.state and all([dependency.is_done() for dependency in self.dependencies])
+
+
+class LoadingMetric:
+    def __init__(self):
+        self.count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_prepare_time = 0.0
+        self.total_upload_time = 0.0
+
+    def add(self, latency, prepare_time, upload_time):
+        self.count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_prepare_time += prepare_time
+        self.total_upload_time += upload_time
+
+    def get_average_latency(self):
+        return self.total_latency / self.count if 0 < self.count else 0.0
+
+    def get_average_prepare_time(self):
+        return self.total_prepare_time / self.count if 0 < self.count else 0.0
+
+    def get_average_upload_time(self):
+        return self.total_upload_time / self.count if 0 < self.count else 0.0
+
+
+class LoadingThreadPool:
+    """
+    Worker threads run ResourceLoader.prepare_resource_data, which must be cpu only works. ex) file read, decompress, unpickle
+    Main thread runs ResourceLoader.create_resource_from_data in upload, which creates the gl objects within time budget.
+    """
+    def __init__(self, resource_manager, thread_count=2):
+        self.resource_manager = resource_manager
+        self.thread_count = thread_count
+        self.threads = []
+        self.running = False
+        self.lock = Lock()
+        self.loading_queue = queue.PriorityQueue()
+        self.requests = {}  # { (resource type name, resource name) : LoadingRequest }
+        self.prepared_requests = []
+        self.sequence = 0
+        self.metrics = {}  # { resource type name : LoadingMetric }
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.threads = [Thread(target=self.run, daemon=True) for i in range(self.thread_count)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        for thread in self.threads:
+            self.loading_queue.put((0, 0, None))
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def get_loading_count(self):
+        return len(self.requests)
+
+    def get_request(self, resource):
+        return self.requests.get((resource.type_name, resource.name))
+
+    def get_metrics(self):
+        return self.metrics
+
+    def push_loading(self, resource_loader, resource, priority=0):
+        with self.lock:
+            key = (resource.type_name, resource.name)
+            request = self.requests.get(key)
+            if request is not None:
+                if priority < request.priority:
+                    request.priority = priority
+                    if LoadingState.WAITING == request.state:
+                        self.loading_queue.put((priority, request.sequence, request))
+                return request
+
+            self.sequence += 1
+            request = LoadingRequest(resource_loader, resource, priority, self.sequence)
+            resource.is_loading = True
+            self.requests[key] = request
+            self.loading_queue.put((priority, request.sequence, request))
+            return request
+
+    def cancel_loading(self, resource):
+        with self.lock:
+            request = self.requests.pop((resource.type_name, resource.name), None)
+            if request is not None:
+                if request in self.prepared_requests:
+                    self.prepared_requests.remove(request)
+                request.state = LoadingState.CANCELED
+                request.data = None
+                resource.is_loading = False
+            return request
+
+    def take_prepared_data(self, resource):
+        """
+        The resource is needed right now. Return the prepared data if exists, otherwise cancel the request.
+        """
+        with self.lock:
+            request = self.requests.get((resource.type_name, resource.name))
+            if request is not None and LoadingState.PREPARED == request.state:
+                self.requests.pop(request.get_key())
+                self.prepared_requests.remove(request)
+                request.state = LoadingState.COMPLETED
+                resource.is_loading = False
+                data, request.data = request.data, None
+                return data
+        self.cancel_loading(resource)
+        return None
+
+    def run(self):
+        while self.running:
+            priority, sequence, request = self.loading_queue.get()
+            if request is None:
+                break
+
+            with self.lock:
+                # skip the canceled or already requeued request.
+                if LoadingState.WAITING != request.state or priority != request.priority:
+                    continue
+                request.state = LoadingState.LOADING
+
+            start_time = time.perf_counter()
+            data = None
+            dependencies = []
+            try:
+                resource_loader = request.resource_loader
+                if resource_loader.async_loading:
+                    data = resource_loader.prepare_resource_data(request.resource)
+                    if data is not None:
+                        dependencies = resource_loader.get_dependencies(data)
+            except:
+                logger.error(traceback.format_exc())
+            request.prepare_time = time.perf_counter() - start_time
+
+            for resource_name, resource_type_name in dependencies:
+                dependency_loader = self.resource_manager.find_resource_loader(resource_type_name)
+                dependency = dependency_loader.get_resource(resource_name, noWarn=True) if dependency_loader else None
+                if dependency is not None and dependency.is_need_to_load():
+                    request.dependencies.append(self.push_loading(dependency_loader, dependency, request.priority))
+
+            with self.lock:
+                if LoadingState.LOADING == request.state:
+                    request.data = data
+                    request.state = LoadingState.PREPARED
+                    self.prepared_requests.append(request)
+
+    def upload(self, time_budget):
+        """
+        Create the prepared resources in main thread, at least one resource and then until the time budget runs out.
+        :return: uploaded resource count
+        """
+        start_time = time.perf_counter()
+        upload_count = 0
+        while True:
+            with self.lock:
+                ready_requests = [request for request in self.prepared_requests if request.is_ready_to_upload()]
+                if not ready_requests:
+                    break
+                request = min(ready_requests, key=lambda x: (x.priority, x.sequence))
+                self.prepared_requests.remove(request)
+                self.requests.pop(request.get_key(), None)
+
+            self.complete_request(request)
+            upload_count += 1
+
+            if time_budget < (time.perf_counter() - start_time):
+                break
+        return upload_count
+
+    def complete_request(self, request):
+        resource = request.resource
+        resource_loader = request.resource_loader
+        start_time = time.perf_counter()
+        resource.is_loading = False
+        try:
+            if resource_loader.async_loading:
+                if not resource_loader.create_resource_from_data(resource, request.data):
+                    logger.error('%s failed to load %s' % (resource_loader.name, resource.name))
+            else:
+                resource_loader.load_resource(resource.name)
+        except:
+            logger.error(traceback.format_exc())
+        end_time = time.perf_counter()
+        request.data = None
+        request.state = LoadingState.COMPLETED
+
+        if resource.type_name not in self.metrics:
+            self.metrics[resource.type_name] = LoadingMetric()
+        self.metrics[resource.type_name].add(end_time - request.request_time, request.prepare_time, end_time - start_time)
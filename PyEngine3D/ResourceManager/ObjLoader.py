@@ -1,10 +1,12 @@
 import copy
 import os, traceback
+import warnings
 from collections import OrderedDict
 
 import numpy as np
 
 from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import OpenGLContext
 from PyEngine3D.Utilities import *
 
 
@@ -211,3 +213,366 @@ class OBJ:
     def draw(self):
         if self.glList:
             glCallList(self.glList)
+            # the display list enables, binds the textures and sets the front face without the state cache.
+            OpenGLContext.invalidate_state_cache()
+
+
+OBJ_CHUNK_SIZE = 1 << 24
+
+# ascii codes of the tokenizer
+CHAR_NEWLINE = ord('\n')
+CHAR_RETURN = ord('\r')
+CHAR_SPACE = ord(' ')
+CHAR_TAB = ord('\t')
+CHAR_SLASH = ord('/')
+CHAR_SHARP = ord('#')
+CHAR_V = ord('v')
+CHAR_T = ord('t')
+CHAR_N = ord('n')
+CHAR_F = ord('f')
+
+
+def is_whitespace(buffer):
+    return (buffer == CHAR_SPACE) | (buffer == CHAR_TAB) | (buffer == CHAR_NEWLINE) | (buffer == CHAR_RETURN)
+
+
+def count_in_lines(mask, line_offsets):
+    """
+    :param line_offsets: start offsets of the lines in mask.
+    :return: true count of each line.
+    """
+    bounds = np.searchsorted(np.flatnonzero(mask), np.append(line_offsets, len(mask)))
+    return np.diff(bounds)
+
+
+def count_tokens(buffer, line_offsets, separator_mask=None):
+    """
+    :return: token count of each line.
+    """
+    separators = is_whitespace(buffer)
+    if separator_mask is not None:
+        separators |= separator_mask
+    token_starts = np.logical_not(separators)
+    token_starts[1:] &= separators[:-1]
+    return count_in_lines(token_starts, line_offsets)
+
+
+def parse_numbers(buffer, dtype):
+    """
+    Parse the whitespace separated numbers at once.
+    :return: None if there is a token which is not a number.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(buffer.tobytes(), dtype=dtype, sep=' ')
+        except (DeprecationWarning, ValueError):
+            return None
+
+
+def gather_line_values(values, token_counts, component_count):
+    """
+    :return: the first component_count values of the lines which have enough values.
+    """
+    line_offsets = np.cumsum(token_counts) - token_counts
+    line_offsets = line_offsets[component_count <= token_counts]
+    return values[line_offsets[:, np.newaxis] + np.arange(component_count)]
+
+
+class StreamingOBJ:
+    """
+    Loads a wavefront OBJ file with the numpy tokenizer.
+    The file is read by chunks, and the vertices and the faces of each chunk are parsed at once.
+    The faces are triangulated and grouped by the object and the material,
+    then the unique position, texcoord, normal index triples of the groups are welded into the vertices.
+    The interface is same as OBJ.
+    """
+    def __init__(self, filename, scale, swapyz, chunk_size=OBJ_CHUNK_SIZE):
+        self.filename = filename
+        self.scale = scale
+        self.default_name = os.path.splitext(os.path.split(filename)[-1])[0]
+        self.object_name = ''
+        self.group_name = ''
+        self.material_name = ''
+        self.group_keys = OrderedDict()  # { (object name, material name) : group index }
+        self.group_faces = []  # [[ triangle corner indices (triangle count, 3, [position, texcoord, normal]) ]]
+        self.position_chunks = []
+        self.texcoord_chunks = []
+        self.normal_chunks = []
+        self.position_count = 0
+        self.texcoord_count = 0
+        self.normal_count = 0
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.texcoords = np.zeros((0, 2), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+
+        if os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                remain = b''
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    data = remain + data
+                    last_line_end = data.rfind(b'\n') + 1
+                    remain = data[last_line_end:]
+                    if 0 < last_line_end:
+                        self.parse_chunk(data[:last_line_end])
+                if remain:
+                    self.parse_chunk(remain + b'\n')
+
+            self.positions = self.concatenate_chunks(self.position_chunks, 3)
+            self.texcoords = self.concatenate_chunks(self.texcoord_chunks, 2)
+            self.normals = self.concatenate_chunks(self.normal_chunks, 3)
+            self.position_chunks = self.texcoord_chunks = self.normal_chunks = []
+
+            # If texcoord or normal is empty, add the default texcoord or normal like as OBJ.
+            if 0 == len(self.texcoords):
+                self.texcoords = np.array([defaultTexCoord, ], dtype=np.float32)
+            if 0 == len(self.normals):
+                self.normals = np.array([defaultNormal, ], dtype=np.float32)
+
+    @staticmethod
+    def concatenate_chunks(chunks, component_count):
+        if chunks:
+            return np.concatenate(chunks).astype(np.float32)
+        return np.zeros((0, component_count), dtype=np.float32)
+
+    def get_group_index(self):
+        key = (self.object_name or self.group_name or self.default_name, self.material_name)
+        if key not in self.group_keys:
+            self.group_keys[key] = len(self.group_keys)
+            self.group_faces.append([])
+        return self.group_keys[key]
+
+    def parse_state_line(self, line):
+        values = line.decode('utf-8', 'ignore').split()
+        if len(values) < 2:
+            return
+        preFix = values[0]
+        # the object name is prior to the group name.
+        if preFix == 'o':
+            self.object_name = ' '.join(values[1:])
+        elif preFix == 'g':
+            self.group_name = ' '.join(values[1:])
+        elif preFix in ('usemtl', 'usemat'):
+            self.material_name = ' '.join(values[1:])
+
+    def parse_chunk(self, chunk):
+        buffer = np.frombuffer(chunk, dtype=np.uint8)
+        line_ends = np.flatnonzero(buffer == CHAR_NEWLINE)
+        line_starts = np.empty_like(line_ends)
+        line_starts[0] = 0
+        line_starts[1:] = line_ends[:-1] + 1
+
+        # the lines which start with the whitespaces are rare, so they are stripped by python.
+        first_chars = buffer[line_starts]
+        if np.any((first_chars == CHAR_SPACE) | (first_chars == CHAR_TAB)):
+            return self.parse_chunk(b'\n'.join([line.lstrip() for line in chunk.split(b'\n')[:-1]]) + b'\n')
+
+        buffer = buffer.copy()
+        line_lengths = line_ends - line_starts + 1
+        second_chars = buffer[np.minimum(line_starts + 1, len(buffer) - 1)]
+        third_chars = buffer[np.minimum(line_starts + 2, len(buffer) - 1)]
+        second_whitespace = is_whitespace(second_chars)
+        third_whitespace = is_whitespace(third_chars)
+        is_position = (first_chars == CHAR_V) & second_whitespace
+        is_texcoord = (first_chars == CHAR_V) & (second_chars == CHAR_T) & third_whitespace
+        is_normal = (first_chars == CHAR_V) & (second_chars == CHAR_N) & third_whitespace
+        is_face = (first_chars == CHAR_F) & second_whitespace
+        is_skip = (first_chars == CHAR_SHARP) | (first_chars == CHAR_NEWLINE) | (first_chars == CHAR_RETURN)
+        is_state = np.logical_not(is_position | is_texcoord | is_normal | is_face | is_skip)
+
+        # erase the prefixes, then only the numbers are left.
+        buffer[line_starts[is_position | is_face]] = CHAR_SPACE
+        buffer[line_starts[is_texcoord | is_normal]] = CHAR_SPACE
+        buffer[line_starts[is_texcoord | is_normal] + 1] = CHAR_SPACE
+
+        position_count = self.position_count
+        texcoord_count = self.texcoord_count
+        normal_count = self.normal_count
+        for line_mask, chunks, component_count, scale in ((is_position, self.position_chunks, 3, self.scale),
+                                                          (is_texcoord, self.texcoord_chunks, 2, 1.0),
+                                                          (is_normal, self.normal_chunks, 3, 1.0)):
+            if np.any(line_mask):
+                lines = buffer[np.repeat(line_mask, line_lengths)]
+                line_offsets = np.cumsum(line_lengths[line_mask]) - line_lengths[line_mask]
+                token_counts = count_tokens(lines, line_offsets)
+                values = parse_numbers(lines, np.float64)
+                if values is None or len(values) != np.sum(token_counts):
+                    values = self.parse_lines(lines, line_offsets, float)
+                    token_counts = np.array([len(line_values) for line_values in values], dtype=np.int32)
+                    values = np.array([value for line_values in values for value in line_values], dtype=np.float64)
+                values = gather_line_values(values, token_counts, component_count)
+                if scale != 1.0:
+                    values *= scale
+                chunks.append(values.astype(np.float32))
+
+        self.position_count += int(np.sum(is_position))
+        self.texcoord_count += int(np.sum(is_texcoord))
+        self.normal_count += int(np.sum(is_normal))
+
+        # the group of faces are changed by the state lines.
+        state_line_indices = np.flatnonzero(is_state)
+        group_indices = [self.get_group_index(), ]
+        for line_index in state_line_indices:
+            self.parse_state_line(chunk[line_starts[line_index]:line_ends[line_index]])
+            group_indices.append(self.get_group_index())
+
+        face_line_indices = np.flatnonzero(is_face)
+        if 0 == len(face_line_indices):
+            return
+
+        face_group_indices = np.array(group_indices)[np.searchsorted(state_line_indices, face_line_indices)]
+        # the vertex counts before each face line, for the negative indices.
+        vertex_counts = np.stack([position_count + np.cumsum(is_position)[face_line_indices],
+                                  texcoord_count + np.cumsum(is_texcoord)[face_line_indices],
+                                  normal_count + np.cumsum(is_normal)[face_line_indices]], axis=-1)
+        self.parse_faces(buffer, line_lengths, is_face, face_group_indices, vertex_counts)
+
+    @staticmethod
+    def parse_lines(lines, line_offsets, value_type):
+        line_ends = list(line_offsets[1:]) + [len(lines)]
+        lines = lines.tobytes()
+        result = []
+        for start, end in zip(line_offsets, line_ends):
+            line_values = []
+            for value in lines[start:end].split():
+                try:
+                    line_values.append(value_type(value))
+                except ValueError:
+                    break
+            result.append(line_values)
+        return result
+
+    def parse_faces(self, buffer, line_lengths, is_face, face_group_indices, vertex_counts):
+        lines = buffer[np.repeat(is_face, line_lengths)]
+        face_line_lengths = line_lengths[is_face]
+        line_offsets = np.cumsum(face_line_lengths) - face_line_lengths
+        slashes = lines == CHAR_SLASH
+        double_slashes = np.zeros_like(slashes)
+        double_slashes[:-1] = slashes[:-1] & slashes[1:]
+
+        corner_counts = count_tokens(lines, line_offsets)
+        slash_counts = count_in_lines(slashes, line_offsets)
+        double_slash_counts = count_in_lines(double_slashes, line_offsets)
+        token_counts = count_tokens(lines, line_offsets, separator_mask=slashes)
+
+        lines[slashes] = CHAR_SPACE
+        values = parse_numbers(lines, np.int64)
+        if values is None or len(values) != np.sum(token_counts):
+            values = None
+
+        # face formats : v, v/vt, v//vn, v/vt/vn. [position, texcoord, normal] components of the format, -1 is none.
+        face_formats = (
+            ((0, -1, -1), 1, (0 == slash_counts) & (token_counts == corner_counts)),
+            ((0, 1, -1), 2, (slash_counts == corner_counts) & (token_counts == corner_counts * 2)),
+            ((0, -1, 1), 2, (slash_counts == corner_counts * 2) & (double_slash_counts == corner_counts) & (token_counts == corner_counts * 2)),
+            ((0, 1, 2), 3, (slash_counts == corner_counts * 2) & (0 == double_slash_counts) & (token_counts == corner_counts * 3)),
+        )
+
+        token_offsets = np.cumsum(token_counts) - token_counts
+        parsed_lines = np.zeros(len(line_offsets), dtype=bool)
+        triangles_list = []
+        triangle_groups_list = []
+        if values is not None:
+            for components, stride, format_lines in face_formats:
+                format_lines &= 3 <= corner_counts
+                if not np.any(format_lines):
+                    continue
+                parsed_lines |= format_lines
+                format_corner_counts = corner_counts[format_lines]
+
+                # triangle fan, (0, i + 1, i + 2)
+                triangle_counts = format_corner_counts - 2
+                triangle_lines = np.repeat(np.flatnonzero(format_lines), triangle_counts)
+                triangle_starts = np.cumsum(triangle_counts) - triangle_counts
+                fan_index = np.arange(len(triangle_lines)) - np.repeat(triangle_starts, triangle_counts)
+                corners = np.stack([np.zeros_like(fan_index), fan_index + 1, fan_index + 2], axis=-1)
+
+                triangles = np.zeros((len(triangle_lines), 3, 3), dtype=np.int64)
+                corner_offsets = token_offsets[triangle_lines][:, np.newaxis] + corners * stride
+                for i, component in enumerate(components):
+                    if 0 <= component:
+                        triangles[:, :, i] = values[corner_offsets + component]
+                triangles_list.append(self.convert_indices(triangles, vertex_counts[triangle_lines]))
+                triangle_groups_list.append(face_group_indices[triangle_lines])
+
+        # the faces of the mixed formats are parsed by python.
+        remain_lines = np.flatnonzero(np.logical_not(parsed_lines))
+        if 0 < len(remain_lines):
+            lines[slashes] = CHAR_SLASH
+            line_ends = np.append(line_offsets[1:], len(lines))
+            triangles = []
+            triangle_lines = []
+            for line_index in remain_lines:
+                corners = []
+                for token in lines[line_offsets[line_index]:line_ends[line_index]].tobytes().split():
+                    indices = [int(x) if x else 0 for x in token.split(b'/')[:3]]
+                    corners.append(indices + [0] * (3 - len(indices)))
+                for i in range(1, len(corners) - 1):
+                    triangles.append([corners[0], corners[i], corners[i + 1]])
+                    triangle_lines.append(line_index)
+            if triangles:
+                triangle_lines = np.array(triangle_lines)
+                triangles = np.array(triangles, dtype=np.int64)
+                triangles_list.append(self.convert_indices(triangles, vertex_counts[triangle_lines]))
+                triangle_groups_list.append(face_group_indices[triangle_lines])
+
+        for triangles, triangle_groups in zip(triangles_list, triangle_groups_list):
+            for group_index in np.unique(triangle_groups):
+                self.group_faces[group_index].append(triangles[triangle_groups == group_index])
+
+    @staticmethod
+    def convert_indices(triangles, vertex_counts):
+        """
+        :param triangles: obj indices (triangle count, 3, [position, texcoord, normal]), 1 based, negative is relative and 0 is none.
+        :return: 0 based indices, the none is 0 like as OBJ.
+        """
+        indices = triangles - 1
+        negative = triangles < 0
+        if np.any(negative):
+            relative_indices = vertex_counts[:, np.newaxis, :] + triangles
+            indices[negative] = relative_indices[negative]
+        indices[0 == triangles] = 0
+        return indices.astype(np.int32)
+
+    def get_geometry_data(self):
+        geometry_datas = []
+        material_counts = {}
+        for (object_name, material_name), group_index in self.group_keys.items():
+            # the groups without the faces are not the geometries, so they don't rename the others.
+            if self.group_faces[group_index]:
+                material_counts[object_name] = material_counts.get(object_name, 0) + 1
+
+        for (object_name, material_name), group_index in self.group_keys.items():
+            faces = self.group_faces[group_index]
+            if not faces:
+                continue
+
+            # weld the unique index triples, and keep the order of first appearance.
+            vertices, indices = weld_vertex_indices(np.concatenate(faces).reshape(-1, 3))
+
+            positions = self.positions[vertices[:, 0]]
+            bound_min = Float3(*np.min(positions, axis=0))
+            bound_max = Float3(*np.max(positions, axis=0))
+            name = object_name
+            if 1 < material_counts[object_name] and material_name:
+                name = '%s_%s' % (object_name, material_name)
+
+            geometry_data = dict(name=name,
+                                 positions=positions,
+                                 normals=self.normals[vertices[:, 2]],
+                                 texcoords=self.texcoords[vertices[:, 1]],
+                                 indices=indices,
+                                 bound_min=bound_min,
+                                 bound_max=bound_max,
+                                 radius=length(bound_max - bound_min))
+            geometry_datas.append(geometry_data)
+        return geometry_datas
+
+    def get_mesh_data(self):
+        mesh_data = dict(
+            geometry_datas=self.get_geometry_data()
+        )
+        return mesh_data
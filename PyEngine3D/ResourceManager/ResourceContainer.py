@@ -0,0 +1,250 @@
+"""
+Binary resource container.
+
+layout (little endian)
+    header : magic(8s), version(H), chunk count(H), reserved(I)
+    chunk table : chunk count * CHUNK_ENTRY
+    payloads : every payload starts at CHUNK_ALIGNMENT
+
+The first chunk is the pickled structure of the resource data, in which the large numpy arrays are replaced by ChunkReference.
+The other chunks are raw array payloads, so an uncompressed chunk is returned as a numpy view of the memory mapped file.
+"""
+
+import gzip
+import mmap
+import os
+import pickle
+import struct
+import weakref
+import zlib
+
+import numpy as np
+
+from PyEngine3D.Utilities import AutoEnum
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+RESOURCE_CONTAINER_MAGIC = b'PE3DRES\x00'
+RESOURCE_CONTAINER_VERSION = 1
+CHUNK_ALIGNMENT = 64
+MAX_CHUNK_DIMENSION = 4
+MIN_CHUNK_SIZE = 1024  # the smaller arrays are stored in the structure chunk.
+
+HEADER = struct.Struct('<8sHHI')
+# chunk type, compression, dtype, ndim, shape, offset, stored size, raw size
+CHUNK_ENTRY = struct.Struct('<BB8sB5x%dQQQQ' % MAX_CHUNK_DIMENSION)
+
+# { file path : mmap }, the mapping is released with the last array which uses it.
+mapped_containers = weakref.WeakValueDictionary()
+
+
+class ChunkType(AutoEnum):
+    STRUCTURE = ()
+    ARRAY = ()
+
+
+class ChunkCompression(AutoEnum):
+    NONE = ()
+    ZLIB = ()
+    LZ4 = ()
+    ZSTD = ()
+
+
+class ChunkReference:
+    def __init__(self, index):
+        self.index = index
+
+
+def get_available_compression(compression):
+    """
+    :return: compression itself if its module is installed, otherwise ZLIB.
+    """
+    if ChunkCompression.LZ4 == compression and lz4_frame is None:
+        return ChunkCompression.ZLIB
+    if ChunkCompression.ZSTD == compression and zstandard is None:
+        return ChunkCompression.ZLIB
+    return compression
+
+
+def compress_chunk(compression, data):
+    if ChunkCompression.ZLIB == compression:
+        return zlib.compress(data, 1)
+    elif ChunkCompression.LZ4 == compression:
+        return lz4_frame.compress(data)
+    elif ChunkCompression.ZSTD == compression:
+        return zstandard.ZstdCompressor(level=1).compress(data)
+    return data
+
+
+def decompress_chunk(compression, data, raw_size):
+    if ChunkCompression.ZLIB == compression:
+        return zlib.decompress(data, bufsize=raw_size)
+    elif ChunkCompression.LZ4 == compression:
+        return lz4_frame.decompress(data)
+    elif ChunkCompression.ZSTD == compression:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def is_resource_container_file(filepath):
+    with open(filepath, 'rb') as f:
+        return f.read(len(RESOURCE_CONTAINER_MAGIC)) == RESOURCE_CONTAINER_MAGIC
+
+
+def close_resource_container(filepath):
+    """
+    Close the memory mapping of the container file, Windows can't replace the mapped file.
+    :return: False if the mapped arrays are still in use.
+    """
+    buffer = mapped_containers.pop(os.path.abspath(filepath), None)
+    if buffer is not None:
+        try:
+            buffer.close()
+        except BufferError:
+            return False
+    return True
+
+
+def split_arrays(data, arrays, min_chunk_size=MIN_CHUNK_SIZE):
+    """
+    :return: copy of data whose large numpy arrays are replaced by ChunkReference. The arrays are appended to arrays.
+    """
+    if isinstance(data, np.ndarray):
+        if min_chunk_size <= data.nbytes and data.dtype.kind in 'biuf' and data.ndim <= MAX_CHUNK_DIMENSION:
+            arrays.append(data)
+            return ChunkReference(len(arrays))
+        return data
+    elif type(data) is dict:
+        return {key: split_arrays(value, arrays, min_chunk_size) for key, value in data.items()}
+    elif type(data) is list:
+        return [split_arrays(value, arrays, min_chunk_size) for value in data]
+    elif type(data) is tuple:
+        return tuple(split_arrays(value, arrays, min_chunk_size) for value in data)
+    return data
+
+
+def merge_arrays(data, arrays):
+    if isinstance(data, ChunkReference):
+        return arrays[data.index - 1]
+    elif type(data) is dict:
+        return {key: merge_arrays(value, arrays) for key, value in data.items()}
+    elif type(data) is list:
+        return [merge_arrays(value, arrays) for value in data]
+    elif type(data) is tuple:
+        return tuple(merge_arrays(value, arrays) for value in data)
+    return data
+
+
+def save_resource_container(filepath, data, compression=ChunkCompression.NONE, min_chunk_size=MIN_CHUNK_SIZE):
+    compression = get_available_compression(compression)
+    arrays = []
+    structure = split_arrays(data, arrays, min_chunk_size)
+
+    chunks = [(ChunkType.STRUCTURE, ChunkCompression.NONE, np.dtype(np.uint8), (), pickle.dumps(structure, protocol=pickle.HIGHEST_PROTOCOL))]
+    for array in arrays:
+        # payloads are always little endian
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+        chunks.append((ChunkType.ARRAY, compression, array.dtype, array.shape, array.tobytes()))
+
+    offset = HEADER.size + CHUNK_ENTRY.size * len(chunks)
+    entries = []
+    payloads = []
+    for chunk_type, chunk_compression, dtype, shape, payload in chunks:
+        raw_size = len(payload)
+        if ChunkCompression.NONE != chunk_compression:
+            compressed_payload = compress_chunk(chunk_compression, payload)
+            # keep the raw payload when it is not worth to compress, so it can be mapped.
+            if len(compressed_payload) < raw_size * 0.9:
+                payload = compressed_payload
+            else:
+                chunk_compression = ChunkCompression.NONE
+        padding = (CHUNK_ALIGNMENT - offset % CHUNK_ALIGNMENT) % CHUNK_ALIGNMENT
+        offset += padding
+        dims = list(shape) + [0] * (MAX_CHUNK_DIMENSION - len(shape))
+        entries.append(CHUNK_ENTRY.pack(chunk_type.value, chunk_compression.value, dtype.str.encode(), len(shape),
+                                        *dims, offset, len(payload), raw_size))
+        payloads.append(b'\x00' * padding)
+        payloads.append(payload)
+        offset += len(payload)
+
+    # the arrays of the loaded container are views of the memory mapped file,
+    # so write a new file and replace it instead of truncating the mapped file.
+    temp_filepath = filepath + '.tmp'
+    with open(temp_filepath, 'wb') as f:
+        f.write(HEADER.pack(RESOURCE_CONTAINER_MAGIC, RESOURCE_CONTAINER_VERSION, len(chunks), 0))
+        for entry in entries:
+            f.write(entry)
+        for payload in payloads:
+            f.write(payload)
+
+    close_resource_container(filepath)
+    try:
+        os.replace(temp_filepath, filepath)
+    except OSError:
+        os.remove(temp_filepath)
+        raise
+
+
+def load_resource_container(filepath, use_mmap=True):
+    """
+    :param use_mmap: if True, the uncompressed arrays are read only views of the memory mapped file.
+    """
+    with open(filepath, 'rb') as f:
+        if use_mmap and 0 < os.path.getsize(filepath):
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mapped_containers[os.path.abspath(filepath)] = buffer
+        else:
+            buffer = f.read()
+
+    magic, version, chunk_count, reserved = HEADER.unpack_from(buffer, 0)
+    if RESOURCE_CONTAINER_MAGIC != magic:
+        raise ValueError("%s is not a resource container." % filepath)
+    if RESOURCE_CONTAINER_VERSION < version:
+        raise ValueError("%s is a newer resource container version %d." % (filepath, version))
+
+    structure = None
+    arrays = []
+    for i in range(chunk_count):
+        entry = CHUNK_ENTRY.unpack_from(buffer, HEADER.size + CHUNK_ENTRY.size * i)
+        chunk_type = ChunkType.convert_index_to_enum(entry[0])
+        compression = ChunkCompression.convert_index_to_enum(entry[1])
+        dtype = np.dtype(entry[2].rstrip(b'\x00').decode())
+        shape = tuple(entry[4:4 + entry[3]])
+        offset, stored_size, raw_size = entry[4 + MAX_CHUNK_DIMENSION:]
+
+        payload = memoryview(buffer)[offset:offset + stored_size]
+        if ChunkCompression.NONE != compression:
+            payload = decompress_chunk(compression, payload, raw_size)
+
+        if ChunkType.STRUCTURE == chunk_type:
+            structure = pickle.loads(payload)
+        else:
+            arrays.append(np.frombuffer(payload, dtype=dtype, count=raw_size // dtype.itemsize).reshape(shape))
+    return merge_arrays(structure, arrays)
+
+
+def convert_to_resource_container(filepath, compression=ChunkCompression.NONE, convert_data_func=None):
+    """
+    Convert gzip compressed pickle file to resource container in place.
+    :return: True if converted.
+    """
+    if is_resource_container_file(filepath):
+        return False
+
+    with gzip.open(filepath, 'rb') as f:
+        data = pickle.load(f)
+
+    if convert_data_func is not None:
+        data = convert_data_func(data)
+
+    save_resource_container(filepath, data, compression)
+    return True
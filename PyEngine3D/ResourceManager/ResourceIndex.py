@@ -0,0 +1,189 @@
+import datetime
+import os
+import pickle
+import time
+import traceback
+
+from PyEngine3D.Common import logger
+from PyEngine3D.Utilities import get_modify_time_of_file
+
+
+class ResourceIndex:
+    """
+    Persisted file stats and meta datas of the resource directories.
+    The directories are swept once with os.scandir at startup, then the loaders find their files in the index
+    instead of os.walk, and only the changed meta files are read again.
+    The swept stats are valid until end_sweep, because the resource files can be saved after the sweep.
+    """
+    index_version = 1
+
+    def __init__(self, index_filepath):
+        self.index_filepath = index_filepath
+        self.directories = {}  # { directory path : ([sub directory path], [file path]) }
+        self.file_stats = {}  # { file path : (modify time, size) }
+        self.meta_datas = {}  # { meta file path : (modify time, size, meta data) }
+        self.sweeping = False
+        self.is_warm_start = False
+        self.changed = False
+        self.sweep_time = 0.0
+        self.read_meta_count = 0
+        self.cached_meta_count = 0
+
+    def load_index_file(self):
+        self.meta_datas = {}
+        self.is_warm_start = False
+        if os.path.exists(self.index_filepath):
+            try:
+                with open(self.index_filepath, 'rb') as f:
+                    index_data = pickle.load(f)
+                if self.index_version == index_data.get('index_version'):
+                    self.meta_datas = index_data.get('meta_datas', {})
+                    self.is_warm_start = True
+            except:
+                logger.error(traceback.format_exc())
+
+    def save_index_file(self):
+        if not self.changed:
+            return
+        try:
+            index_data = dict(index_version=self.index_version, meta_datas=self.meta_datas)
+            with open(self.index_filepath, 'wb') as f:
+                pickle.dump(index_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.changed = False
+        except:
+            logger.error(traceback.format_exc())
+
+    def begin_sweep(self, root_paths):
+        start_time = time.perf_counter()
+        self.load_index_file()
+        self.directories = {}
+        self.file_stats = {}
+        self.read_meta_count = 0
+        self.cached_meta_count = 0
+
+        directories = [root_path for root_path in root_paths if os.path.isdir(root_path)]
+        while directories:
+            directory = directories.pop()
+            if directory in self.directories:
+                continue
+            sub_directories, filepaths = [], []
+            self.directories[directory] = (sub_directories, filepaths)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            sub_directories.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            filepaths.append(entry.path)
+                            self.file_stats[entry.path] = (stat.st_mtime, stat.st_size)
+            except OSError:
+                logger.error(traceback.format_exc())
+            directories.extend(sub_directories)
+
+        # remove the meta datas of deleted files.
+        for filepath in list(self.meta_datas.keys()):
+            if filepath not in self.file_stats:
+                self.meta_datas.pop(filepath)
+                self.changed = True
+
+        self.sweeping = True
+        self.sweep_time = time.perf_counter() - start_time
+
+    def end_sweep(self):
+        self.sweeping = False
+        self.directories = {}
+        self.file_stats = {}
+        self.save_index_file()
+
+    def walk(self, root_path):
+        """
+        Same as os.walk, but only the file paths are returned. It uses the swept directories if possible.
+        :return: [file path]
+        """
+        if self.sweeping and root_path in self.directories:
+            filepaths = []
+            directories = [root_path]
+            while directories:
+                sub_directories, directory_filepaths = self.directories[directories.pop()]
+                filepaths.extend(directory_filepaths)
+                directories.extend(sub_directories)
+            return filepaths
+        return [os.path.join(dirname, filename) for dirname, dirnames, filenames in os.walk(root_path) for filename in filenames]
+
+    def add_directory(self, directory):
+        if directory not in self.directories:
+            self.directories[directory] = ([], [])
+            parent_directory = os.path.dirname(directory)
+            if parent_directory and parent_directory != directory:
+                self.add_directory(parent_directory)[0].append(directory)
+        return self.directories[directory]
+
+    def add_file(self, filepath):
+        """
+        Register the file which is saved while sweeping, so the loaders initialized later can find it.
+        """
+        if not self.sweeping or not os.path.exists(filepath):
+            return
+        stat = os.stat(filepath)
+        if filepath not in self.file_stats:
+            self.add_directory(os.path.dirname(filepath))[1].append(filepath)
+        self.file_stats[filepath] = (stat.st_mtime, stat.st_size)
+
+    def exists(self, filepath):
+        if self.sweeping and filepath in self.file_stats:
+            return True
+        return os.path.exists(filepath)
+
+    def get_modify_time(self, filepath):
+        """
+        :return: same as get_modify_time_of_file.
+        """
+        if self.sweeping:
+            stat = self.file_stats.get(filepath)
+            if stat is not None:
+                return str(datetime.datetime.fromtimestamp(stat[0]))
+        return get_modify_time_of_file(filepath)
+
+    def get_stat(self, filepath):
+        if self.sweeping and filepath in self.file_stats:
+            return self.file_stats[filepath]
+        if os.path.exists(filepath):
+            stat = os.stat(filepath)
+            return stat.st_mtime, stat.st_size
+        return None
+
+    def load_meta_data(self, filepath):
+        """
+        :return: the meta data of the meta file, it is read again only if the meta file is changed.
+        """
+        stat = self.get_stat(filepath)
+        if stat is None:
+            return None
+
+        meta_data = self.meta_datas.get(filepath)
+        if meta_data is not None and meta_data[:2] == stat:
+            self.cached_meta_count += 1
+            return dict(meta_data[2])
+
+        with open(filepath, 'r') as f:
+            load_data = eval(f.read())
+        self.read_meta_count += 1
+        self.set_meta_data(filepath, load_data, stat)
+        return dict(load_data)
+
+    def set_meta_data(self, filepath, meta_data, stat=None):
+        if stat is None:
+            self.add_file(filepath)
+            stat = os.stat(filepath)
+            stat = (stat.st_mtime, stat.st_size)
+        self.meta_datas[filepath] = (stat[0], stat[1], dict(meta_data))
+        self.changed = True
+
+    def remove_meta_data(self, filepath):
+        if filepath in self.meta_datas:
+            self.meta_datas.pop(filepath)
+            self.changed = True
+        if self.sweeping and filepath in self.file_stats:
+            self.file_stats.pop(filepath)
+            self.directories[os.path.dirname(filepath)][1].remove(filepath)
@@ -5,11 +5,9 @@ import datetime
 import glob
 import gzip
 import importlib
-import math
 import os
 import pickle
 import pprint
-import queue
 import re
 import shutil
 import sys
@@ -22,9 +20,9 @@ from collections import OrderedDict
 from ctypes import *
 from distutils.dir_util import copy_tree
 from importlib.machinery import SourceFileLoader
-from threading import Thread
+from threading import Lock
 
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import ImageDraw, ImageFont, ImageFilter
 import numpy as np
 from numpy import array, float32, uint8
 from OpenGL.GL import *
@@ -39,50 +37,32 @@ from PyEngine3D.Render.Ocean.Constants import GRID_VERTEX_COUNT
 from PyEngine3D.OpenGLContext import CreateTexture, Material, Texture2D, Texture2DArray, Texture3D, TextureCube
 from PyEngine3D.OpenGLContext import Shader, ShaderCompileOption, ShaderCompileMessage, default_compile_option
 from PyEngine3D.OpenGLContext import parsing_macros, parsing_uniforms, parsing_material_components
+from PyEngine3D.OpenGLContext import ShaderVariantCache
 from PyEngine3D.Utilities import Attributes, Singleton, Config, Logger, Profiler, Float3
 from PyEngine3D.Utilities import GetClassName, is_gz_compressed_file, check_directory_and_mkdir, get_modify_time_of_file
-from . import Collada, OBJ, loadDDS, generate_font_data, TextureGenerator
-
-
-class LoadingThread(Thread):
-    def __init__(self, resource_manager):
-        Thread.__init__(self)
-        self.resource_manager = resource_manager
-        self.running = True
-        self.loading_queue = queue.Queue()
-        self.complete_queue = queue.Queue()
-
-    def push_loading(self, resource_name):
-        self.loading_queue.put(resource_name)
-
-    def run(self):
-        while self.running:
-            time.sleep(0.001)
-
-            if not self.loading_queue.empty():
-                resource_name = self.loading_queue.get()
-                resource = self.resource_manager.mesh_loader.get_resource(resource_name)
-                data = self.resource_manager.mesh_loader.load_resource_data(resource)
-                if data is not None:
-                    self.complete_queue.put((resource_name, data))
-
-    def set_data(self):
-        while not self.complete_queue.empty():
-            resource_name, data = self.complete_queue.get()
-            resource = self.resource_manager.mesh_loader.get_resource(resource_name)
-            resource.set_data(data)
+from . import loadDDS, generate_font_data, TextureGenerator
+from .LoadingThreadPool import LoadingThreadPool
+from .DependencyGraph import DependencyGraph
+from .ImportScheduler import ImportScheduler, import_mesh_data, import_texture_data, import_font_data
+from .ResourceIndex import ResourceIndex
+from .ResourceContainer import ChunkCompression, is_resource_container_file, load_resource_container, save_resource_container
+from .ResourceContainer import convert_to_resource_container
 
 
 # -----------------------#
 # CLASS : MetaData
 # -----------------------#
 class MetaData:
-    def __init__(self, resource_version, resource_filepath, is_engine_resource):
+    def __init__(self, resource_version, resource_filepath, is_engine_resource, resource_index=None):
         self.is_engine_resource = is_engine_resource
         self.filepath = os.path.splitext(resource_filepath)[0] + ".meta"
+        self.resource_index = resource_index
         self.resource_version = resource_version
         self.resource_filepath = resource_filepath
-        self.resource_modify_time = get_modify_time_of_file(resource_filepath)
+        if resource_index is not None:
+            self.resource_modify_time = resource_index.get_modify_time(resource_filepath)
+        else:
+            self.resource_modify_time = get_modify_time_of_file(resource_filepath)
         self.source_filepath = ""
         self.source_modify_time = ""
         self.version_updated = False
@@ -131,27 +111,32 @@ class MetaData:
             self.save_meta_file()
 
     def load_meta_file(self):
-        if os.path.exists(self.filepath):
+        load_data = None
+        if self.resource_index is not None:
+            load_data = self.resource_index.load_meta_data(self.filepath)
+        elif os.path.exists(self.filepath):
             with open(self.filepath, 'r') as f:
                 load_data = eval(f.read())
-                resource_version = load_data.get("resource_version", None)
-                resource_filepath = load_data.get("resource_filepath", None)
-                resource_modify_time = load_data.get("resource_modify_time", None)
-                source_filepath = load_data.get("source_filepath", None)
-                source_modify_time = load_data.get("source_modify_time", None)
-
-                self.changed |= self.resource_version != resource_version
-                self.changed |= self.resource_filepath != resource_filepath
-                self.changed |= self.resource_modify_time != resource_modify_time
-                self.changed |= self.source_filepath != source_filepath
-                self.changed |= self.source_modify_time != source_modify_time
-
-                if resource_version is not None:
-                    self.resource_version = resource_version
-                if source_filepath is not None:
-                    self.source_filepath = source_filepath
-                if source_modify_time is not None:
-                    self.source_modify_time = source_modify_time
+
+        if load_data is not None:
+            resource_version = load_data.get("resource_version", None)
+            resource_filepath = load_data.get("resource_filepath", None)
+            resource_modify_time = load_data.get("resource_modify_time", None)
+            source_filepath = load_data.get("source_filepath", None)
+            source_modify_time = load_data.get("source_modify_time", None)
+
+            self.changed |= self.resource_version != resource_version
+            self.changed |= self.resource_filepath != resource_filepath
+            self.changed |= self.resource_modify_time != resource_modify_time
+            self.changed |= self.source_filepath != source_filepath
+            self.changed |= self.source_modify_time != source_modify_time
+
+            if resource_version is not None:
+                self.resource_version = resource_version
+            if source_filepath is not None:
+                self.source_filepath = source_filepath
+            if source_modify_time is not None:
+                self.source_modify_time = source_modify_time
         else:
             # save meta file
             self.changed = True
@@ -170,11 +155,15 @@ class MetaData:
                     source_modify_time=self.source_modify_time,
                 )
                 pprint.pprint(save_data, f)
+            if self.resource_index is not None:
+                self.resource_index.set_meta_data(self.filepath, save_data)
             self.changed = False
 
     def delete_meta_file(self):
         if os.path.exists(self.filepath):
             os.remove(self.filepath)
+        if self.resource_index is not None:
+            self.resource_index.remove_meta_data(self.filepath)
 
 
 # -----------------------#
@@ -186,20 +175,35 @@ class Resource:
         self.type_name = resource_type_name
         self.data = None
         self.meta_data = None
+        self.is_loading = False
+        self.is_placeholder = False
 
     def get_resource_info(self):
         return self.name, self.type_name, self.data is not None
 
     def is_need_to_load(self):
+        if self.is_loading and self.data is not None:
+            # use the placeholder data until the loading is done.
+            return False
         return self.data is None or self.meta_data.is_resource_file_changed()
 
+    def set_placeholder(self, data):
+        self.data = data
+        self.is_placeholder = data is not None
+
     def set_data(self, data):
+        is_placeholder = self.is_placeholder
+        self.is_placeholder = False
         if self.data is None:
             self.data = data
         else:
             # copy of data
             if type(data) in (dict, types.ModuleType):
                 self.data = data
+            elif is_placeholder and type(self.data) is not type(data):
+                # the placeholder can be a different class, e.g. Texture2D placeholder of TextureCube.
+                # it is replaced by the reference, so the users get the loaded data from the resource.
+                self.data = data
             else:
                 self.data.__dict__ = data.__dict__
 
@@ -207,12 +211,13 @@ class Resource:
         ResourceManager.instance().core_manager.send_resource_info(self.get_resource_info())
 
     def delete_data(self):
-        if self.data is not None and hasattr(self.data, 'delete'):
+        if self.data is not None and not self.is_placeholder and hasattr(self.data, 'delete'):
             self.data.delete()
         self.data = None
 
     def clear_data(self):
         self.data = None
+        self.is_placeholder = False
 
     def get_data(self, checkLoading=True):
         if checkLoading and self.is_need_to_load():
@@ -259,7 +264,11 @@ class ResourceLoader(object):
     fileExt = '.*'
     externalFileExt = {}  # example, { 'WaveFront': '.obj' }
     USE_FILE_COMPRESS_TO_SAVE = True
+    USE_RESOURCE_CONTAINER_TO_SAVE = False  # binary container of raw arrays instead of gzip compressed pickle.
+    resource_container_compression = ChunkCompression.NONE
     enable_basic_mode = True
+    async_loading = False  # if True, prepare_resource_data runs in loading threads.
+    import_function = None  # module level function which converts the external file in the import processes.
 
     def __init__(self, resource_manager):
         self.resource_manager = resource_manager
@@ -287,14 +296,19 @@ class ResourceLoader(object):
 
     @staticmethod
     def get_resource_name(resource_path, filepath, make_lower=True):
-        resource_name = os.path.splitext(os.path.relpath(filepath, resource_path))[0]
+        if filepath.startswith(resource_path + os.sep):
+            # fast path of os.path.relpath
+            resource_name = os.path.splitext(filepath[len(resource_path) + 1:])[0]
+        else:
+            resource_name = os.path.splitext(os.path.relpath(filepath, resource_path))[0]
         resource_name = resource_name.replace(os.sep, ".")
         return resource_name if make_lower else resource_name
 
     def is_new_external_data(self, meta_data, source_filepath):
-        if os.path.exists(source_filepath):
+        resource_index = self.resource_manager.resource_index
+        if resource_index.exists(source_filepath):
             # Refresh the resource from external file.
-            source_modify_time = get_modify_time_of_file(source_filepath)
+            source_modify_time = resource_index.get_modify_time(source_filepath)
             return (meta_data.resource_version != self.resource_version) or (meta_data.source_filepath == source_filepath and meta_data.source_modify_time != source_modify_time)
         else:
             return False
@@ -307,6 +321,7 @@ class ResourceLoader(object):
 
     def initialize(self):
         logger.info("initialize " + GetClassName(self))
+        resource_index = self.resource_manager.resource_index
 
         resource_paths = [self.engine_resource_path, ]
         if self.project_resource_path not in resource_paths:
@@ -315,28 +330,21 @@ class ResourceLoader(object):
         # collect resource files
         for resource_path in resource_paths:
             is_engine_resource = resource_path is self.engine_resource_path
-            for dirname, dirnames, filenames in os.walk(resource_path):
-                for filename in filenames:
-                    fileExt = os.path.splitext(filename)[1]
-                    if ".*" == self.fileExt or fileExt == self.fileExt:
-                        filepath = os.path.join(dirname, filename)
-                        resource_name = self.get_resource_name(resource_path, filepath)
-                        self.create_resource(resource_name=resource_name, resource_data=None, resource_filepath=filepath, is_engine_resource=is_engine_resource)
+            for filepath in resource_index.walk(resource_path):
+                fileExt = os.path.splitext(filepath)[1]
+                if ".*" == self.fileExt or fileExt == self.fileExt:
+                    resource_name = self.get_resource_name(resource_path, filepath)
+                    self.create_resource(resource_name=resource_name, resource_data=None, resource_filepath=filepath, is_engine_resource=is_engine_resource)
 
         # Convert external files to resources.
         if self.externalFileExt:
             # gather external source files
             for external_path in self.external_paths:
                 is_engine_external = self.is_engine_external(external_path)
-                externalFileList = []
-
-                for dirname, dirnames, filenames in os.walk(external_path):
-                    for filename in filenames:
-                        source_filepath = os.path.join(dirname, filename)
-
-                        file_ext = os.path.splitext(source_filepath)[1].lower()
-                        if file_ext in self.externalFileExt.values() and source_filepath not in externalFileList:
-                            externalFileList.append(source_filepath)
+                external_file_exts = set(self.externalFileExt.values())
+                # the walked file paths are unique.
+                externalFileList = [source_filepath for source_filepath in resource_index.walk(external_path)
+                                    if os.path.splitext(source_filepath)[1].lower() in external_file_exts]
 
                 # convert external file to rsource file.
                 for source_filepath in externalFileList:
@@ -347,27 +355,26 @@ class ResourceLoader(object):
                     if resource is None:
                         logger.info("Create the new resource from %s." % source_filepath)
                         resource = self.create_resource(resource_name, is_engine_resource=is_engine_external)
-                        self.convert_resource(resource, source_filepath)
+                        self.request_import(resource, source_filepath)
                     elif meta_data and self.is_new_external_data(meta_data, source_filepath):
-                        self.convert_resource(resource, source_filepath)
+                        self.request_import(resource, source_filepath)
                         logger.info("Refresh the new resource from %s." % source_filepath)
 
         # clear gabage meta file
-        for dirname, dirnames, filenames in os.walk(self.project_resource_path):
-            for filename in filenames:
-                file_ext = os.path.splitext(filename)[1]
-                if file_ext == '.meta':
-                    filepath = os.path.join(dirname, filename)
-                    resource_name = self.get_resource_name(self.project_resource_path, filepath)
-                    resource = self.get_resource(resource_name, noWarn=True)
-                    meta_data = self.get_meta_data(resource_name, noWarn=True)
-                    if resource is None:
-                        if meta_data:
-                            meta_data.delete_meta_file()
-                            self.metaDatas.pop(resource_name)
-                        else:
-                            logger.info("Delete the %s." % filepath)
-                            os.remove(filepath)
+        for filepath in resource_index.walk(self.project_resource_path):
+            file_ext = os.path.splitext(filepath)[1]
+            if file_ext == '.meta':
+                resource_name = self.get_resource_name(self.project_resource_path, filepath)
+                resource = self.get_resource(resource_name, noWarn=True)
+                meta_data = self.get_meta_data(resource_name, noWarn=True)
+                if resource is None:
+                    if meta_data:
+                        meta_data.delete_meta_file()
+                        self.metaDatas.pop(resource_name)
+                    else:
+                        logger.info("Delete the %s." % filepath)
+                        os.remove(filepath)
+                        resource_index.remove_meta_data(filepath)
 
     def get_new_resource_name(self, prefix=""):
         if prefix not in self.resources:
@@ -384,6 +391,59 @@ class ResourceLoader(object):
     def convert_resource(self, resource, source_filepath):
         logger.warn("convert_resource is not implemented in %s." % self.name)
 
+    def request_import(self, resource, source_filepath):
+        import_scheduler = self.resource_manager.import_scheduler
+        if self.import_function is not None and import_scheduler is not None:
+            import_scheduler.push_import(self, resource, source_filepath)
+        else:
+            self.convert_resource(resource, source_filepath)
+
+    def import_resource(self, resource, source_filepath):
+        """
+        Same as the import of ImportScheduler, but in the main thread.
+        """
+        import_datas = [self.import_function(**import_arguments)
+                        for import_arguments in self.get_import_arguments_list(resource, source_filepath)]
+        import_data = self.merge_import_datas(import_datas)
+        if import_data is not None:
+            save_data = self.create_imported_resource(resource, source_filepath, import_data)
+            if save_data is not None:
+                self.save_resource_data(resource, save_data, source_filepath)
+                return True
+        return False
+
+    def get_import_arguments(self, resource, source_filepath):
+        """
+        :return: keyword arguments of import_function, they must be picklable.
+        """
+        return dict(source_filepath=source_filepath)
+
+    def get_import_arguments_list(self, resource, source_filepath):
+        """
+        :return: [keyword arguments of import_function], an import job is submitted per keyword arguments.
+        """
+        return [self.get_import_arguments(resource, source_filepath), ]
+
+    def merge_import_datas(self, import_datas):
+        """
+        :return: import data of create_imported_resource from the results of the import jobs.
+        """
+        return import_datas[0] if import_datas else None
+
+    def create_imported_resource(self, resource, source_filepath, import_data):
+        """
+        It is called in the main thread, create gl objects here.
+        :return: save data of the resource file
+        """
+        logger.warn("create_imported_resource is not implemented in %s." % self.name)
+        return None
+
+    def complete_imports(self):
+        """
+        It is called when all imports of this loader are done.
+        """
+        pass
+
     def hasResource(self, resource_name):
         return resource_name in self.resources
 
@@ -449,7 +509,7 @@ class ResourceLoader(object):
         else:
             resource_filepath = self.engine_resource_path if is_engine_resource else self.project_resource_path
             resource_filepath = os.path.join(resource_filepath, resource_name.replace(".", os.sep)) + self.fileExt
-        meta_data = MetaData(self.resource_version, resource_filepath, is_engine_resource)
+        meta_data = MetaData(self.resource_version, resource_filepath, is_engine_resource, self.resource_manager.resource_index)
         self.regist_resource(resource, meta_data)
         return resource
 
@@ -485,7 +545,43 @@ class ResourceLoader(object):
                 logger.info("rename_resource : %s to %s" % (resource_name, new_name))
 
     def load_resource(self, resource_name):
-        logger.warn("load_resource is not implemented in %s." % self.name)
+        resource = self.get_resource(resource_name)
+        if resource:
+            if self.resource_manager.import_scheduler.complete_import(resource):
+                return resource.data is not None
+            data = self.resource_manager.loading_thread_pool.take_prepared_data(resource)
+            if data is None:
+                data = self.prepare_resource_data(resource)
+            if data is not None and self.create_resource_from_data(resource, data):
+                return True
+        logger.error('%s failed to load %s' % (self.name, resource_name))
+        return False
+
+    def prepare_resource_data(self, resource):
+        """
+        Only cpu works, it is called in the loading threads if async_loading.
+        :return: data for create_resource_from_data
+        """
+        return self.load_resource_data(resource)
+
+    def get_dependencies(self, data):
+        """
+        :return: [(resource_name, resource_type_name), ] which are used by create_resource_from_data
+        """
+        return []
+
+    def create_resource_from_data(self, resource, data):
+        """
+        It is called in the main thread, create gl objects here.
+        """
+        logger.warn("create_resource_from_data is not implemented in %s." % self.name)
+        return False
+
+    def get_placeholder_data(self):
+        """
+        :return: the data which is used until the async loading is done.
+        """
+        return None
 
     def unload_resource(self, resource_name):
         logger.warn("unload_resource is not implemented in %s." % self.name)
@@ -523,7 +619,9 @@ class ResourceLoader(object):
             try:
                 if os.path.exists(filePath):
                     # Load data (deserialize)
-                    if is_gz_compressed_file(filePath):
+                    if is_resource_container_file(filePath):
+                        load_data = load_resource_container(filePath)
+                    elif is_gz_compressed_file(filePath):
                         with gzip.open(filePath, 'rb') as f:
                             load_data = pickle.load(f)
                     else:
@@ -537,6 +635,15 @@ class ResourceLoader(object):
         return None
 
     def save_resource_data(self, resource, save_data, source_filepath=""):
+        save_filepath = self.write_resource_data(resource, save_data)
+        if save_filepath is not None:
+            self.set_saved_meta_data(resource, save_filepath, source_filepath)
+
+    def write_resource_data(self, resource, save_data):
+        """
+        Write only the resource file, so it can run in the worker threads.
+        :return: saved file path or None
+        """
         save_filepath = resource.name.replace('.', os.sep)
 
         if resource.meta_data.is_engine_resource:
@@ -544,22 +651,31 @@ class ResourceLoader(object):
         else:
             save_filepath = os.path.join(self.project_resource_path, save_filepath) + self.fileExt
 
-        save_dir = os.path.dirname(save_filepath)
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
+        os.makedirs(os.path.dirname(save_filepath), exist_ok=True)
 
         if self.save_data_to_file(save_filepath, save_data):
-            # refresh meta data because resource file saved.
-            resource.meta_data.set_resource_meta_data(save_filepath, save=False)
-            resource.meta_data.set_source_meta_data(source_filepath, save=False)
-            resource.meta_data.set_resource_version(self.resource_version, save=False)
-            resource.meta_data.save_meta_file()
+            return save_filepath
+        return None
+
+    def set_saved_meta_data(self, resource, save_filepath, source_filepath=""):
+        """
+        The resource index and the meta datas are shared, so this runs in main thread.
+        """
+        self.resource_manager.resource_index.add_file(save_filepath)
+        # refresh meta data because resource file saved.
+        resource.meta_data.set_resource_meta_data(save_filepath, save=False)
+        resource.meta_data.set_source_meta_data(source_filepath, save=False)
+        resource.meta_data.set_resource_version(self.resource_version, save=False)
+        resource.meta_data.save_meta_file()
 
     def save_data_to_file(self, save_filepath, save_data):
         logger.info("Save : %s" % save_filepath)
         try:
             # store data, serialize
-            if self.USE_FILE_COMPRESS_TO_SAVE:
+            if self.USE_RESOURCE_CONTAINER_TO_SAVE:
+                save_data = self.get_resource_container_data(save_data)
+                save_resource_container(save_filepath, save_data, self.resource_container_compression)
+            elif self.USE_FILE_COMPRESS_TO_SAVE:
                 with gzip.open(save_filepath, 'wb') as f:
                     pickle.dump(save_data, f, protocol=pickle.HIGHEST_PROTOCOL)
             else:
@@ -571,6 +687,33 @@ class ResourceLoader(object):
             logger.error(traceback.format_exc())
         return False
 
+    def get_resource_container_data(self, save_data):
+        """
+        :return: save data whose large streams are numpy arrays, they are stored as the raw chunks.
+        """
+        return save_data
+
+    def convert_to_resource_container(self):
+        """
+        Convert the existing gzip compressed resource files to the resource container.
+        :return: converted file count
+        """
+        convert_count = 0
+        if self.USE_RESOURCE_CONTAINER_TO_SAVE:
+            for meta_data in self.metaDatas.values():
+                resource_filepath = meta_data.resource_filepath
+                if os.path.exists(resource_filepath) and is_gz_compressed_file(resource_filepath):
+                    try:
+                        if convert_to_resource_container(resource_filepath,
+                                                         self.resource_container_compression,
+                                                         self.get_resource_container_data):
+                            logger.info("Convert to resource container : %s" % resource_filepath)
+                            meta_data.set_resource_meta_data(resource_filepath)
+                            convert_count += 1
+                    except:
+                        logger.error(traceback.format_exc())
+        return convert_count
+
     def delete_resource(self, resource_name):
         resource = self.get_resource(resource_name)
         if resource is not None:
@@ -666,28 +809,23 @@ class MaterialLoader(ResourceLoader):
                                                                                     shader_name=material.shader_name,
                                                                                     macros=material.macros)
 
+    def set_material_dependencies(self, material_name, source_filepath, include_files):
+        dependencies = [source_filepath, ] + list(include_files)
+        self.resource_manager.dependency_graph.set_dependencies((self.resource_type_name, material_name), dependencies)
+
     def reload_materials(self, shader_filepath):
-        reload_shader_names = []
-        resource_names = list(self.resources.keys())
-        for resource_name in resource_names:
-            reload = False
-            meta_data = self.resources[resource_name].meta_data
-            if meta_data:
-                if shader_filepath == meta_data.source_filepath:
-                    reload = True
-                elif meta_data and hasattr(meta_data, 'include_files'):
-                    for include_file in meta_data.include_files:
-                        if shader_filepath == include_file:
-                            reload = True
-                            break
-            if reload:
+        # only the materials which depend on the shader file are reloaded, then their material instances.
+        dependency_graph = self.resource_manager.dependency_graph
+        reload_material_instance_names = []
+        for resource_type_name, resource_name in dependency_graph.get_dependents(shader_filepath):
+            if resource_type_name == self.resource_type_name and resource_name in self.resources:
                 self.load_resource(resource_name)
-                material = self.get_resource_data(resource_name)
-                if material and material.shader_name not in reload_shader_names:
-                    reload_shader_names.append(material.shader_name)
+                for dependent in dependency_graph.get_dependents((resource_type_name, resource_name)):
+                    if dependent[1] not in reload_material_instance_names:
+                        reload_material_instance_names.append(dependent[1])
 
-        for shader_name in reload_shader_names:
-            self.resource_manager.material_instance_loader.reload_material_instances(shader_name)
+        if reload_material_instance_names:
+            self.resource_manager.material_instance_loader.reload_material_instances(reload_material_instance_names)
 
     def load_resource(self, resource_name):
         resource = self.get_resource(resource_name)
@@ -711,8 +849,35 @@ class MaterialLoader(ResourceLoader):
                     macros = material_datas.get('macros', {})
                     self.generate_new_material(resource.name, shader_name, default_compile_option, macros)
                 else:
-                    material = Material(resource.name, material_datas)
+                    shader_variant_cache = self.resource_manager.shader_variant_cache
+                    shader_codes = material_datas.get('shader_codes')
+                    # the precompiled materials have no program binary, it is stored after the first compile.
+                    store_binary = material_datas.get('binary_data') is None and shader_codes is not None
+                    if store_binary:
+                        material_datas['variant_key'] = shader_variant_cache.get_variant_key(shader_codes)
+                        variant_data = shader_variant_cache.load_variant(material_datas['variant_key'])
+                        if variant_data is not None:
+                            material_datas['binary_format'] = variant_data['binary_format']
+                            material_datas['binary_data'] = variant_data['binary_data']
+
+                    material = Material(resource.name, material_datas, shader_variant_cache)
                     resource.set_data(material)
+                    self.set_material_dependencies(resource.name, meta_data.source_filepath, meta_data.include_files)
+
+                    # the driver can reject the stored binary, then the binary of the recompiled program is stored again.
+                    if material.valid and shader_codes is not None and (store_binary or material.is_compiled_from_source):
+                        if material_datas['binary_data'] is None or material.is_compiled_from_source:
+                            if material_datas.get('variant_key') is None:
+                                material_datas['variant_key'] = shader_variant_cache.get_variant_key(shader_codes)
+                            binary_format, binary_data = material.save_to_binary()
+                            if binary_format is not None and binary_data is not None:
+                                material_datas['binary_format'] = binary_format
+                                material_datas['binary_data'] = binary_data
+                                shader_variant_cache.save_variant(material_datas['variant_key'], binary_format, binary_data,
+                                                                  material_datas.get('uniforms', []),
+                                                                  material_datas.get('material_components', []),
+                                                                  material_datas.get('macros', OrderedDict()))
+                        self.save_resource_data(resource, material.get_save_data(), meta_data.source_filepath)
                 return True
         logger.error('%s failed to load %s' % (self.name, resource_name))
         return False
@@ -738,10 +903,23 @@ class MaterialLoader(ResourceLoader):
 
             shader_codes = shader.generate_shader_codes(is_engine_resource, engine_shader_directory, project_shader_directory, shader_version, compile_option, macros)
             if shader_codes is not None:
-                shader_code_list = shader_codes.values()
-                final_macros = parsing_macros(shader_code_list)
-                uniforms = parsing_uniforms(shader_code_list)
-                material_components = parsing_material_components(shader_code_list)
+                # the same preprocessed codes have the same reflections and program binary.
+                shader_variant_cache = self.resource_manager.shader_variant_cache
+                variant_key = shader_variant_cache.get_variant_key(shader_codes)
+                variant_data = shader_variant_cache.load_variant(variant_key)
+                if variant_data is not None:
+                    final_macros = variant_data['macros']
+                    uniforms = variant_data['uniforms']
+                    material_components = variant_data['material_components']
+                    binary_format = variant_data['binary_format']
+                    binary_data = variant_data['binary_data']
+                else:
+                    shader_code_list = shader_codes.values()
+                    final_macros = parsing_macros(shader_code_list)
+                    uniforms = parsing_uniforms(shader_code_list)
+                    material_components = parsing_material_components(shader_code_list)
+                    binary_format = None
+                    binary_data = None
 
                 final_material_name = material_name
 
@@ -762,9 +940,10 @@ class MaterialLoader(ResourceLoader):
                     include_files=include_files,
                     uniforms=uniforms,
                     material_components=material_components,
-                    binary_data=None,
-                    binary_format=None,
-                    macros=final_macros
+                    binary_data=binary_data,
+                    binary_format=binary_format,
+                    macros=final_macros,
+                    variant_key=variant_key
                 )
 
                 # set default uniform datas
@@ -773,7 +952,7 @@ class MaterialLoader(ResourceLoader):
                     material_datas['uniform_datas'] = copy.deepcopy(root_material.get_save_data()['uniform_datas'])
 
                 # create material
-                material = Material(final_material_name, material_datas)
+                material = Material(final_material_name, material_datas, shader_variant_cache)
 
                 if material:
                     if material.valid:
@@ -791,15 +970,19 @@ class MaterialLoader(ResourceLoader):
                         else:
                             source_filepath = ""
 
-                        # save binary data of shader.
-                        binary_format, binary_data = material.save_to_binary()
-                        if binary_format is not None and binary_data is not None:
-                            material_datas['binary_format'] = binary_format
-                            material_datas['binary_data'] = binary_data
+                        # save binary data of shader, also when the driver rejected the cached binary.
+                        if variant_data is None or material.is_compiled_from_source:
+                            binary_format, binary_data = material.save_to_binary()
+                            if binary_format is not None and binary_data is not None:
+                                material_datas['binary_format'] = binary_format
+                                material_datas['binary_data'] = binary_data
+                                shader_variant_cache.save_variant(variant_key, binary_format, binary_data, uniforms,
+                                                                  material_components, final_macros)
 
                         # Done : save material data
                         self.save_resource_data(resource, material_datas, source_filepath)
                         resource.set_data(material)
+                        self.set_material_dependencies(final_material_name, source_filepath, include_files)
                         return material
                     else:
                         if ShaderCompileMessage.TEXTURE_NO_MATCHING_OVERLOADED_FUNCTION in material.compile_message:
@@ -860,16 +1043,15 @@ class MaterialInstanceLoader(ResourceLoader):
     def action_resource(self, resource_name):
         self.core_manager.request(COMMAND.VIEW_MATERIAL_INSTANCE, resource_name)
 
-    def reload_material_instances(self, shader_name):
-        for resource_name in self.resources:
-            resource = self.resources[resource_name]
-            if resource and resource.data:
-                material_instance = resource.data
-                if material_instance.shader_name == shader_name:
-                    self.load_resource(resource_name)
+    def set_material_instance_dependencies(self, material_instance_name, material_name):
+        self.resource_manager.dependency_graph.set_dependencies(
+            (self.resource_type_name, material_instance_name), [(MaterialLoader.resource_type_name, material_name), ])
 
-        for resource_name in self.resources:
-            resource = self.resources[resource_name]
+    def reload_material_instances(self, resource_names):
+        for resource_name in resource_names:
+            resource = self.resources.get(resource_name)
+            if resource and resource.data:
+                self.load_resource(resource_name)
 
     def create_material_instance(self, resource_name, shader_name, macros={}):
         if shader_name == '':
@@ -889,6 +1071,10 @@ class MaterialInstanceLoader(ResourceLoader):
         return False
 
     def get_material_instance(self, name, shader_name='', macros={}):
+        # the materials are not loaded in the basic mode and the headless mode, so don't create the invalid instances.
+        if self.core_manager.is_basic_mode:
+            return None
+
         material_instance = self.get_resource_data(name)
         if material_instance is None:
             if self.create_material_instance(resource_name=name,
@@ -915,10 +1101,15 @@ class TextureLoader(ResourceLoader):
     resource_type_name = 'Texture'
     resource_version = 2
     USE_FILE_COMPRESS_TO_SAVE = True
+    USE_RESOURCE_CONTAINER_TO_SAVE = True
     enable_basic_mode = False
     fileExt = '.texture'
     externalFileExt = dict(GIF=".gif", JPG=".jpg", JPEG=".jpeg", PNG=".png", BMP=".bmp", TGA=".tga", TIF=".tif",
                            TIFF=".tiff", DXT=".dds", KTX=".ktx", PGM=".pgm")
+    async_loading = True
+    import_function = staticmethod(import_texture_data)
+    cube_texture_keys = ('texture_positive_x', 'texture_negative_x', 'texture_positive_y',
+                         'texture_negative_y', 'texture_positive_z', 'texture_negative_z')
 
     def __init__(self, resource_manager):
         ResourceLoader.__init__(self, resource_manager)
@@ -935,37 +1126,63 @@ class TextureLoader(ResourceLoader):
     def action_resource(self, resource_name):
         self.core_manager.request(COMMAND.VIEW_TEXTURE, resource_name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            meta_data = resource.meta_data
-            if self.is_new_external_data(meta_data, meta_data.source_filepath):
-                self.convert_resource(resource, meta_data.source_filepath)
-
-            texture_datas = self.load_resource_data(resource)
-            if texture_datas:
-                texture_type = texture_datas.get('texture_type')
-                if TextureCube == texture_type or TextureCube.__name__ == texture_type:
-                    default_texture = self.resource_manager.get_default_texture()
-                    texture_datas['texture_positive_x'] = self.get_resource_data(
-                        texture_datas['texture_positive_x']) or default_texture
-                    texture_datas['texture_negative_x'] = self.get_resource_data(
-                        texture_datas['texture_negative_x']) or default_texture
-                    texture_datas['texture_positive_y'] = self.get_resource_data(
-                        texture_datas['texture_positive_y']) or default_texture
-                    texture_datas['texture_negative_y'] = self.get_resource_data(
-                        texture_datas['texture_negative_y']) or default_texture
-                    texture_datas['texture_positive_z'] = self.get_resource_data(
-                        texture_datas['texture_positive_z']) or default_texture
-                    texture_datas['texture_negative_z'] = self.get_resource_data(
-                        texture_datas['texture_negative_z']) or default_texture
-
-                texture = CreateTexture(name=resource.name, **texture_datas)
-                resource.set_data(texture)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def prepare_resource_data(self, resource):
+        meta_data = resource.meta_data
+        if self.is_new_external_data(meta_data, meta_data.source_filepath):
+            # it will be converted from the source file in create_resource_from_data.
+            return dict()
+        return self.load_resource_data(resource)
+
+    def get_dependencies(self, texture_datas):
+        texture_type = texture_datas.get('texture_type')
+        if TextureCube == texture_type or TextureCube.__name__ == texture_type:
+            return [(texture_datas[key], self.resource_type_name) for key in self.cube_texture_keys]
+        return []
+
+    def create_resource_from_data(self, resource, texture_datas):
+        meta_data = resource.meta_data
+        if self.is_new_external_data(meta_data, meta_data.source_filepath):
+            self.convert_resource(resource, meta_data.source_filepath)
+            return resource.data is not None and not resource.is_placeholder
+
+        if texture_datas:
+            texture_type = texture_datas.get('texture_type')
+            if TextureCube == texture_type or TextureCube.__name__ == texture_type:
+                default_texture = self.resource_manager.get_default_texture()
+                for key in self.cube_texture_keys:
+                    texture_datas[key] = self.get_resource_data(texture_datas[key]) or default_texture
+
+            texture = CreateTexture(name=resource.name, **texture_datas)
+            resource.set_data(texture)
+            return True
         return False
 
+    def get_placeholder_data(self):
+        # shallow copy, so the placeholder becomes the loaded texture by Resource.set_data.
+        return copy.copy(self.resource_manager.get_default_texture())
+
+    def create_imported_resource(self, resource, source_filepath, texture_datas):
+        if resource not in self.new_texture_list:
+            self.new_texture_list.append(resource)
+
+        texture = CreateTexture(name=resource.name, texture_type=Texture2D, **texture_datas)
+        resource.set_data(texture)
+        # the image data is same as glGetTexImage of get_save_data.
+        save_data = texture.get_texture_info()
+        save_data['data'] = texture_datas['data']
+        return save_data
+
+    def complete_imports(self):
+        if not self.core_manager.is_basic_mode:
+            self.generate_cube_textures()
+
+    def get_resource_container_data(self, texture_datas):
+        data = texture_datas.get('data')
+        if isinstance(data, bytes):
+            texture_datas = copy.copy(texture_datas)
+            texture_datas['data'] = np.frombuffer(data, dtype=np.uint8)
+        return texture_datas
+
     def generate_cube_textures(self):
         cube_faces = ('right', 'left', 'top', 'bottom', 'back', 'front')
         cube_texutre_map = dict()  # { cube_name : { face : source_filepath } }
@@ -983,6 +1200,10 @@ class TextureLoader(ResourceLoader):
 
         for cube_texture_name in cube_texutre_map:
             cube_faces = cube_texutre_map[cube_texture_name]
+            # it will be generated when the imports are done.
+            if any([cube_face.is_loading for cube_face in cube_faces.values()]):
+                continue
+
             if len(cube_faces) == 6:
                 isCreateCube = any([cube_face in self.new_texture_list for cube_face in cube_faces])
                 cube_resource = self.get_resource(cube_texture_name, noWarn=True)
@@ -1017,49 +1238,16 @@ class TextureLoader(ResourceLoader):
 
     @staticmethod
     def create_texture_from_file(texture_name, source_filepath):
-        if os.path.exists(source_filepath):
-            image = Image.open(source_filepath)
-            width, height = image.size
-
-            # check size is power of two.
-            use_power_of_2 = False
-            if use_power_of_2:
-                width2 = (2 ** math.ceil(math.log2(width))) if 4 < width else 4
-                height2 = (2 ** math.ceil(math.log2(height))) if 4 < width else 4
-                if width != width2 or height != height2:
-                    logger.info('Image Resized (%s) -> (%s) : %s' % ((width, height), (width2, height2), source_filepath))
-                    image = image.resize((width2, height2), Image.ANTIALIAS)
-                    width, height = width2, height2
-
-            if image.mode == 'L' or image.mode == 'LA' or image.mode == 'P' or image.mode == 'R':
-                rgbimg = Image.new("RGBA", image.size)
-                rgbimg.paste(image)
-                image = rgbimg
-                logger.info('Convert Grayscale image to RGB : %s' % source_filepath)
-
-            data = image.tobytes("raw", image.mode, 0, -1)
-
-            texture_datas = dict(
-                texture_type=Texture2D,
-                image_mode=image.mode,
-                width=width,
-                height=height,
-                data=data
-            )
-            return CreateTexture(name=texture_name, **texture_datas)
+        texture_datas = import_texture_data(source_filepath)
+        if texture_datas is not None:
+            return CreateTexture(name=texture_name, texture_type=Texture2D, **texture_datas)
         return None
 
     def convert_resource(self, resource, source_filepath):
         try:
             logger.info("Convert Resource : %s" % source_filepath)
-            if resource not in self.new_texture_list:
-                self.new_texture_list.append(resource)
-
-            texture = self.create_texture_from_file(resource.name, source_filepath)
-            if texture:
-                resource.set_data(texture)
-                texture_datas = texture.get_save_data()
-                self.save_resource_data(resource, texture_datas, source_filepath)
+            if self.import_resource(resource, source_filepath):
+                return
         except:
             logger.error(traceback.format_exc())
         logger.info("Failed to convert resource : %s" % source_filepath)
@@ -1112,12 +1300,18 @@ class ProceduralTextureLoader(ResourceLoader):
 # -----------------------#
 class MeshLoader(ResourceLoader):
     name = "MeshLoader"
-    resource_version = 0
+    resource_version = 1  # 1 : the tangents are stored at import time.
     resource_dir_name = 'Meshes'
     resource_type_name = 'Mesh'
     fileExt = '.mesh'
     externalFileExt = dict(WaveFront='.obj', Collada='.dae')
     USE_FILE_COMPRESS_TO_SAVE = True
+    USE_RESOURCE_CONTAINER_TO_SAVE = True
+    async_loading = True
+    import_function = staticmethod(import_mesh_data)
+    vertex_stream_types = dict(positions=np.float32, colors=np.float32, normals=np.float32, tangents=np.float32,
+                               texcoords=np.float32, bone_indicies=np.float32, bone_weights=np.float32,
+                               indices=np.uint32)
 
     def initialize(self):
         # load and regist resource
@@ -1129,34 +1323,38 @@ class MeshLoader(ResourceLoader):
         self.create_resource("Cube", Cube("Cube"))
         self.create_resource("Plane", Plane("Plane", width=4, height=4, xz_plane=True))
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            mesh_data = self.load_resource_data(resource)
-            if mesh_data:
-                mesh = Mesh(resource.name, **mesh_data)
-                resource.set_data(mesh)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def create_resource_from_data(self, resource, mesh_data):
+        if mesh_data:
+            mesh = Mesh(resource.name, **mesh_data)
+            resource.set_data(mesh)
+            return True
         return False
 
+    def get_resource_container_data(self, mesh_data):
+        # same types as CreateVertexArrayBuffer, so the mapped streams are uploaded without copy.
+        geometry_datas = []
+        for geometry_data in mesh_data.get('geometry_datas', []):
+            geometry_data = copy.copy(geometry_data)
+            for key, dtype in self.vertex_stream_types.items():
+                stream = geometry_data.get(key)
+                if stream is not None and 0 < len(stream):
+                    geometry_data[key] = np.array(stream, dtype=dtype)
+            geometry_datas.append(geometry_data)
+        mesh_data = copy.copy(mesh_data)
+        mesh_data['geometry_datas'] = geometry_datas
+        return mesh_data
+
     def convert_resource(self, resoure, source_filepath):
         logger.info("Convert Resource : %s" % source_filepath)
-        file_ext = os.path.splitext(source_filepath)[1].lower()
-        if file_ext == self.externalFileExt.get('WaveFront'):
-            mesh = OBJ(source_filepath, 1, True)
-            mesh_data = mesh.get_mesh_data()
-        elif file_ext == self.externalFileExt.get('Collada'):
-            mesh = Collada(source_filepath)
-            mesh_data = mesh.get_mesh_data()
-        else:
-            return
+        self.import_resource(resoure, source_filepath)
 
+    def create_imported_resource(self, resource, source_filepath, mesh_data):
         if mesh_data:
             # create mesh
-            mesh = Mesh(resoure.name, **mesh_data)
-            resoure.set_data(mesh)
-            self.save_resource_data(resoure, mesh_data, source_filepath)
+            mesh = Mesh(resource.name, **mesh_data)
+            resource.set_data(mesh)
+            return mesh_data
+        return None
 
     def action_resource(self, resource_name):
         mesh = self.get_resource_data(resource_name)
@@ -1174,6 +1372,7 @@ class ModelLoader(ResourceLoader):
     fileExt = '.model'
     externalFileExt = dict(Mesh='.mesh')
     USE_FILE_COMPRESS_TO_SAVE = False
+    async_loading = True
 
     def initialize(self):
         # load and regist resource
@@ -1189,18 +1388,20 @@ class ModelLoader(ResourceLoader):
         resource.set_data(model)
         self.save_resource(resource.name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            object_data = self.load_resource_data(resource)
-            if object_data:
-                mesh = self.resource_manager.get_mesh(object_data.get('mesh'))
-                material_instances = [self.resource_manager.get_material_instance(material_instance_name)
-                                      for material_instance_name in object_data.get('material_instances', [])]
-                obj = Model(resource.name, mesh=mesh, material_instances=material_instances)
-                resource.set_data(obj)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def get_dependencies(self, object_data):
+        dependencies = [(object_data.get('mesh'), MeshLoader.resource_type_name), ]
+        for material_instance_name in object_data.get('material_instances', []):
+            dependencies.append((material_instance_name, MaterialInstanceLoader.resource_type_name))
+        return dependencies
+
+    def create_resource_from_data(self, resource, object_data):
+        if object_data:
+            mesh = self.resource_manager.get_mesh(object_data.get('mesh'))
+            material_instances = [self.resource_manager.get_material_instance(material_instance_name)
+                                  for material_instance_name in object_data.get('material_instances', [])]
+            obj = Model(resource.name, mesh=mesh, material_instances=material_instances)
+            resource.set_data(obj)
+            return True
         return False
 
     def action_resource(self, resource_name):
@@ -1261,6 +1462,7 @@ class SceneLoader(ResourceLoader):
     resource_type_name = 'Scene'
     fileExt = '.scene'
     USE_FILE_COMPRESS_TO_SAVE = False
+    async_loading = True
 
     def save_resource(self, resource_name):
         resource = self.get_resource(resource_name)
@@ -1268,27 +1470,36 @@ class SceneLoader(ResourceLoader):
             scene_data = self.scene_manager.get_save_data()
             self.save_resource_data(resource, scene_data)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            meta_data = self.get_meta_data(resource_name)
-            if resource and meta_data:
-                if os.path.exists(meta_data.resource_filepath):
-                    scene_datas = self.load_resource_data(resource)
-                else:
-                    scene_datas = resource.get_data()
-
-                if scene_datas:
-                    for object_data in scene_datas.get('static_actors', []):
-                        object_data['model'] = self.resource_manager.get_model(object_data.get('model'))
-
-                    for object_data in scene_datas.get('skeleton_actors', []):
-                        object_data['model'] = self.resource_manager.get_model(object_data.get('model'))
-
-                    self.scene_manager.open_scene(resource_name, scene_datas)
-                    resource.set_data(scene_datas)
-                    return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def prepare_resource_data(self, resource):
+        if os.path.exists(resource.meta_data.resource_filepath):
+            return self.load_resource_data(resource)
+        return resource.data
+
+    def get_dependencies(self, scene_datas):
+        dependencies = []
+        for object_data in scene_datas.get('static_actors', []) + scene_datas.get('skeleton_actors', []):
+            model_name = object_data.get('model')
+            if type(model_name) is str:
+                dependencies.append((model_name, ModelLoader.resource_type_name))
+        for object_data in scene_datas.get('effects', []):
+            effect_name = object_data.get('effect_info')
+            if type(effect_name) is str:
+                dependencies.append((effect_name, EffectLoader.resource_type_name))
+        return dependencies
+
+    def create_resource_from_data(self, resource, scene_datas):
+        if scene_datas:
+            for object_data in scene_datas.get('static_actors', []):
+                object_data['model'] = self.resource_manager.get_model(object_data.get('model'))
+
+            for object_data in scene_datas.get('skeleton_actors', []):
+                object_data['model'] = self.resource_manager.get_model(object_data.get('model'))
+
+            # the object list of the scene is sent to the ui at once.
+            with self.resource_manager.core_manager.batch_send():
+                self.scene_manager.open_scene(resource.name, scene_datas)
+            resource.set_data(scene_datas)
+            return True
         return False
 
     def action_resource(self, resource_name):
@@ -1309,26 +1520,35 @@ class FontLoader(ResourceLoader):
     fileExt = '.font'
     externalFileExt = dict(TTF='.ttf', OTF='.otf')
     enable_basic_mode = False
+    async_loading = True
+    import_function = staticmethod(import_font_data)
 
     unicode_blocks = dict(
         Basic_Latin=(0x20, 0x7F),  # 32 ~ 127
         Hangul_Syllables=(0xAC00, 0xD7AF),  # 44032 ~ 55215
     )
+    distance_field_font = False
 
-    def check_font_data(self, font_datas, resoure, source_filepath):
-        chaneged = False
+    def __init__(self, resource_manager):
+        ResourceLoader.__init__(self, resource_manager)
+        self.saved_font_lock = Lock()
+        self.saved_font_filepaths = {}  # { resource name : (save filepath, source filepath) }
 
+    def get_preview_path(self, source_filepath):
         if self.is_engine_resource(source_filepath):
-            preview_path = self.engine_resource_path
-        else:
-            preview_path = self.project_resource_path
+            return self.engine_resource_path
+        return self.project_resource_path
+
+    def check_font_data(self, font_datas, resoure, source_filepath):
+        chaneged = False
+        preview_path = self.get_preview_path(source_filepath)
 
         for unicode_block_name in self.unicode_blocks:
             if unicode_block_name not in font_datas:
                 range_min, range_max = self.unicode_blocks[unicode_block_name]
                 font_data = generate_font_data(
                     resource_name=resoure.name,
-                    distance_field_font=False,
+                    distance_field_font=self.distance_field_font,
                     anti_aliasing=True,
                     font_size=20,
                     padding=1,
@@ -1342,42 +1562,72 @@ class FontLoader(ResourceLoader):
                 chaneged = True
 
         if font_datas is not None and chaneged:
-            self.save_resource_data(resoure, font_datas, source_filepath)
+            # it runs in the loading threads, so the meta data is set in create_resource_from_data.
+            save_filepath = self.write_resource_data(resoure, font_datas)
+            if save_filepath is not None:
+                with self.saved_font_lock:
+                    self.saved_font_filepaths[resoure.name] = (save_filepath, source_filepath)
         return font_datas
 
     def convert_resource(self, resoure, source_filepath):
         logger.info("Convert Resource : %s" % source_filepath)
+        self.import_resource(resoure, source_filepath)
+
+    def get_import_arguments_list(self, resource, source_filepath):
+        return [dict(resource_name=resource.name,
+                     unicode_block_name=unicode_block_name,
+                     range_min=range_min,
+                     range_max=range_max,
+                     source_filepath=source_filepath,
+                     preview_path=self.get_preview_path(source_filepath),
+                     distance_field_font=self.distance_field_font)
+                for unicode_block_name, (range_min, range_max) in self.unicode_blocks.items()]
+
+    def merge_import_datas(self, import_datas):
         font_datas = {}
-        self.check_font_data(font_datas, resoure, source_filepath)
+        for import_data in import_datas:
+            font_datas.update(import_data)
+        return font_datas
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            meta_data = resource.meta_data
-            font_datas = self.load_resource_data(resource)
-            if font_datas is not None:
-                font_datas = self.check_font_data(font_datas, resource, meta_data.source_filepath)
-
-                for unicode_block_name in font_datas:
-                    font_data = font_datas[unicode_block_name]
-
-                    if font_data is not None:
-                        texture_datas = dict(
-                            texture_type=Texture2D,
-                            image_mode=font_data.get('image_mode'),
-                            width=font_data.get('image_width'),
-                            height=font_data.get('image_height'),
-                            data=font_data.get('image_data'),
-                            min_filter=GL_LINEAR,
-                            mag_filter=GL_LINEAR,
-                        )
-                        texture_name = "_".join([resource_name, font_data.get('unicode_block_name')])
-                        font_data['texture'] = CreateTexture(name=texture_name, **texture_datas)
-                        font_datas[unicode_block_name] = FontData(unicode_block_name, font_data)
-
-                resource.set_data(font_datas)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def create_imported_resource(self, resource, source_filepath, font_datas):
+        # create_resource_from_data replaces the font datas, so the copies are used to keep the save data.
+        if self.create_resource_from_data(resource, {key: dict(font_data) for key, font_data in font_datas.items()}):
+            return font_datas
+        return None
+
+    def prepare_resource_data(self, resource):
+        font_datas = self.load_resource_data(resource)
+        if font_datas is not None:
+            # generate the missing font datas, it is also cpu only work.
+            font_datas = self.check_font_data(font_datas, resource, resource.meta_data.source_filepath)
+        return font_datas
+
+    def create_resource_from_data(self, resource, font_datas):
+        if font_datas is not None:
+            for unicode_block_name in font_datas:
+                font_data = font_datas[unicode_block_name]
+
+                if font_data is not None:
+                    texture_datas = dict(
+                        texture_type=Texture2D,
+                        image_mode=font_data.get('image_mode'),
+                        width=font_data.get('image_width'),
+                        height=font_data.get('image_height'),
+                        data=font_data.get('image_data'),
+                        min_filter=GL_LINEAR,
+                        mag_filter=GL_LINEAR,
+                    )
+                    texture_name = "_".join([resource.name, font_data.get('unicode_block_name')])
+                    font_data['texture'] = CreateTexture(name=texture_name, **texture_datas)
+                    font_datas[unicode_block_name] = FontData(unicode_block_name, font_data)
+
+            resource.set_data(font_datas)
+
+            with self.saved_font_lock:
+                saved_filepaths = self.saved_font_filepaths.pop(resource.name, None)
+            if saved_filepaths is not None:
+                self.set_saved_meta_data(resource, *saved_filepaths)
+            return True
         return False
 
 
@@ -1391,6 +1641,7 @@ class EffectLoader(ResourceLoader):
     fileExt = '.effect'
     USE_FILE_COMPRESS_TO_SAVE = False
     enable_basic_mode = False
+    async_loading = True
 
     def create_effect(self, particle_info=None):
         resource = self.create_resource('effect')
@@ -1402,20 +1653,19 @@ class EffectLoader(ResourceLoader):
         resource.set_data(effect)
         self.save_resource(resource.name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            effect_info = self.load_resource_data(resource)
-            if effect_info is not None:
-                particle_infos = []
-                for particle_name in effect_info.get('particle_infos', []):
-                    particle_info = self.resource_manager.get_particle(particle_name)
-                    particle_infos.append(particle_info)
-                effect_info['particle_infos'] = particle_infos
-                effect_info = EffectInfo(resource_name, **effect_info)
-                resource.set_data(effect_info)
-                return True
-        logger.error('%s failed to load %s' % (self.name, resource_name))
+    def get_dependencies(self, effect_info):
+        return [(particle_name, ParticleLoader.resource_type_name) for particle_name in effect_info.get('particle_infos', [])]
+
+    def create_resource_from_data(self, resource, effect_info):
+        if effect_info is not None:
+            particle_infos = []
+            for particle_name in effect_info.get('particle_infos', []):
+                particle_info = self.resource_manager.get_particle(particle_name)
+                particle_infos.append(particle_info)
+            effect_info['particle_infos'] = particle_infos
+            effect_info = EffectInfo(resource.name, **effect_info)
+            resource.set_data(effect_info)
+            return True
         return False
 
     def action_resource(self, resource_name):
@@ -1432,6 +1682,7 @@ class ParticleLoader(ResourceLoader):
     fileExt = '.particle'
     USE_FILE_COMPRESS_TO_SAVE = False
     enable_basic_mode = False
+    async_loading = True
 
     def create_particle(self):
         resource = self.create_resource('particle')
@@ -1439,18 +1690,19 @@ class ParticleLoader(ResourceLoader):
         resource.set_data(effect)
         self.save_resource(resource.name)
 
-    def load_resource(self, resource_name):
-        resource = self.get_resource(resource_name)
-        if resource:
-            particle_info = self.load_resource_data(resource)
+    def get_dependencies(self, particle_info):
+        return [(particle_info.get('mesh'), MeshLoader.resource_type_name),
+                (particle_info.get('material_instance'), MaterialInstanceLoader.resource_type_name),
+                (particle_info.get('texture_diffuse'), TextureLoader.resource_type_name)]
+
+    def create_resource_from_data(self, resource, particle_info):
+        if particle_info is not None:
             particle_info['mesh'] = self.resource_manager.get_mesh(particle_info.get('mesh'))
             particle_info['material_instance'] = self.resource_manager.get_material_instance(particle_info.get('material_instance'))
             particle_info['texture_diffuse'] = self.resource_manager.get_texture(particle_info.get('texture_diffuse'))
-            particle_info = ParticleInfo(resource_name, **particle_info)
+            particle_info = ParticleInfo(resource.name, **particle_info)
             resource.set_data(particle_info)
             return True
-
-        logger.error('%s failed to load %s' % (self.name, resource_name))
         return False
 
     def action_resource(self, resource_name):
@@ -1483,7 +1735,8 @@ class SoundLoader(ResourceLoader):
 
     def load_resource(self, resource_name):
         resource = self.get_resource(resource_name)
-        if resource:
+        # there is no sound manager in the headless mode.
+        if resource and self.sound_manager is not None:
             try:
                 sound = self.sound_manager.create_sound(resource.meta_data.resource_filepath)
                 resource.set_data(sound)
@@ -1494,7 +1747,8 @@ class SoundLoader(ResourceLoader):
         return False
 
     def action_resource(self, resource_name):
-        self.sound_manager.play_sound(resource_name)
+        if self.sound_manager is not None:
+            self.sound_manager.play_sound(resource_name)
 
 
 # -----------------------#
@@ -1560,6 +1814,14 @@ class ResourceManager(Singleton):
     name = "ResourceManager"
     engine_path = "Resource"
     DefaultProjectFile = os.path.join(engine_path, "default.project")
+    loading_thread_count = 2
+    upload_time_budget = 0.004  # second per frame, for creating the loaded resources.
+    resource_index_filename = 'resource_index.cache'
+    import_process_count = None  # None is os.cpu_count()
+    shader_variant_cache_dirname = 'ShaderVariantCache'
+    max_shader_variant_cache_size = 256 * 1024 * 1024  # bytes
+    ocean_spectrum_cache_dirname = 'OceanSpectrumCache'
+    convert_to_resource_container_on_start = True  # the old gzip files are converted once, before they are loaded.
 
     def __init__(self):
         self.project_path = ""
@@ -1580,7 +1842,12 @@ class ResourceManager(Singleton):
         self.script_loader = None
         self.model_loader = None
         self.procedural_texture_loader = None
-        # self.loading_thread = LoadingThread(self)
+        self.loading_thread_pool = LoadingThreadPool(self, thread_count=self.loading_thread_count)
+        self.resource_index = ResourceIndex(os.path.join(self.engine_path, self.resource_index_filename))
+        self.import_scheduler = ImportScheduler(self, process_count=self.import_process_count)
+        self.dependency_graph = DependencyGraph()
+        self.shader_variant_cache = ShaderVariantCache(os.path.join(self.engine_path, self.shader_variant_cache_dirname),
+                                                       max_cache_size=self.max_shader_variant_cache_size)
 
     def regist_loader(self, resource_loader_class):
         resource_loader = resource_loader_class(self)
@@ -1598,6 +1865,9 @@ class ResourceManager(Singleton):
         self.project_path = project_path or self.engine_path
         check_directory_and_mkdir(self.project_path)
 
+        if not self.core_manager.is_basic_mode:
+            self.shader_variant_cache.initialize()
+
         # NOTE : Script only load from project path.
         sys.path.append(os.path.join(self.project_path, ScriptLoader.resource_dir_name))
 
@@ -1617,21 +1887,42 @@ class ResourceManager(Singleton):
         self.model_loader = self.regist_loader(ModelLoader)
         self.procedural_texture_loader = self.regist_loader(ProceduralTextureLoader)
 
-        # start loading thread
-        # self.loading_thread.start()
+        # start loading threads
+        self.loading_thread_pool.start()
 
-        # initialize
-        for resource_loader in self.resource_loaders:
-            if not self.core_manager.is_basic_mode or resource_loader.enable_basic_mode:
-                resource_loader.initialize()
+        # sweep the resource directories once, then the loaders use the swept files.
+        start_time = time.perf_counter()
+        self.resource_index.index_filepath = os.path.join(self.project_path, self.resource_index_filename)
+        self.resource_index.begin_sweep([self.engine_path, self.project_path])
 
-        logger.info("Resource register done.")
+        # initialize, the resource infos are sent to the ui at once.
+        with self.core_manager.batch_send():
+            for resource_loader in self.resource_loaders:
+                if not self.core_manager.is_basic_mode or resource_loader.enable_basic_mode:
+                    resource_loader.initialize()
+
+        if self.convert_to_resource_container_on_start:
+            self.convert_to_resource_container()
+
+        resource_index = self.resource_index
+        resource_index.end_sweep()
+        logger.info("Resource register done. %s start : %.2fms ( sweep %.2fms, meta files read %d, cached %d )" %
+                    ('warm' if resource_index.is_warm_start else 'cold',
+                     (time.perf_counter() - start_time) * 1000.0,
+                     resource_index.sweep_time * 1000.0,
+                     resource_index.read_meta_count,
+                     resource_index.cached_meta_count))
 
     def update(self):
-        pass
-        # self.loading_thread.set_data()
+        self.import_scheduler.update(self.upload_time_budget)
+        self.loading_thread_pool.upload(self.upload_time_budget)
 
     def close(self):
+        self.import_scheduler.stop()
+        self.loading_thread_pool.stop()
+        self.resource_index.save_index_file()
+        if not self.core_manager.is_basic_mode:
+            self.shader_variant_cache.close()
         for resource_loader in self.resource_loaders:
             if not self.core_manager.is_basic_mode or resource_loader.enable_basic_mode:
                 resource_loader.close()
@@ -1696,6 +1987,56 @@ class ResourceManager(Singleton):
         if resource_loader:
             resource_loader.load_resource(resource_name)
 
+    def request_loading(self, resource_name, resource_type_name, priority=0, force=False):
+        """
+        Load the resource in the loading threads. The placeholder data is used until the loading is done.
+        :param force: reload the resource which is already loaded, e.g. reopen the scene from the editor.
+        :return: LoadingRequest or None if the resource was loaded synchronously.
+        """
+        resource_loader = self.find_resource_loader(resource_type_name)
+        if resource_loader:
+            resource = resource_loader.get_resource(resource_name)
+            if self.import_scheduler.is_importing(resource):
+                # the placeholder is used until the import is done.
+                return None
+
+            # the forced request is queued like the others, and the loaded data is used until the loading is done.
+            if resource is not None and (force or resource.is_loading or resource.is_need_to_load()):
+                if not resource_loader.async_loading or not self.loading_thread_pool.running:
+                    resource_loader.load_resource(resource_name)
+                    return None
+
+                request = self.loading_thread_pool.push_loading(resource_loader, resource, priority)
+                if resource.data is None:
+                    resource.set_placeholder(resource_loader.get_placeholder_data())
+                return request
+        return None
+
+    def cancel_loading(self, resource_name, resource_type_name):
+        resource_loader = self.find_resource_loader(resource_type_name)
+        if resource_loader:
+            resource = resource_loader.get_resource(resource_name)
+            if resource is not None and self.loading_thread_pool.cancel_loading(resource) is not None:
+                if resource.is_placeholder:
+                    resource.clear_data()
+
+    def get_loading_count(self):
+        return self.loading_thread_pool.get_loading_count()
+
+    def get_import_count(self):
+        return self.import_scheduler.get_import_count()
+
+    def get_loading_metrics(self):
+        return self.loading_thread_pool.get_metrics()
+
+    def convert_to_resource_container(self):
+        convert_count = 0
+        for resource_loader in self.resource_loaders:
+            convert_count += resource_loader.convert_to_resource_container()
+        if 0 < convert_count:
+            logger.info("Converted %d resource files to resource container." % convert_count)
+        return convert_count
+
     def action_resource(self, resource_name, resource_type_name):
         resource_loader = self.find_resource_loader(resource_type_name)
         if resource_loader:
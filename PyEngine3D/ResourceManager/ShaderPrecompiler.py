@@ -0,0 +1,276 @@
+import codecs
+import os
+import pprint
+import re
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from OpenGL.GL import GL_COMPUTE_SHADER
+
+from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import Shader, default_compile_option
+from PyEngine3D.OpenGLContext import parsing_macros, parsing_uniforms, parsing_material_components
+from PyEngine3D.OpenGLContext.Shader import reMacro, reVoidMain
+from PyEngine3D.Utilities import check_directory_and_mkdir, get_modify_time_of_file
+from .ResourceManager import ResourceManager, ResourceLoader, ShaderLoader, MaterialLoader, MaterialInstanceLoader, MetaData
+
+
+# ------------------------------ #
+# precompile functions, they run in the precompile processes, so they must not use the GL context.
+# ------------------------------ #
+def validate_shader_codes(shader_codes):
+    """
+    :return: [error message]
+    """
+    errors = []
+    if GL_COMPUTE_SHADER in shader_codes and 1 < len(shader_codes):
+        errors.append("The compute shader can not be linked with the other shader stages.")
+
+    for shader_type, shader_code in shader_codes.items():
+        if not shader_code.startswith("#version"):
+            errors.append("%s : The first line is not the #version." % shader_type.name)
+
+        if re.search(reVoidMain, shader_code) is None:
+            errors.append("%s : There is no void main." % shader_type.name)
+
+        depth = 0
+        for code_line in shader_code.splitlines():
+            m = re.search(reMacro, code_line)
+            if m is None:
+                continue
+            macro_type = m.groups()[0]
+            if macro_type in ('ifdef', 'ifndef', 'if'):
+                depth += 1
+            elif macro_type == 'endif':
+                depth -= 1
+                if depth < 0:
+                    break
+        if 0 != depth:
+            errors.append("%s : #if and #endif are not matched." % shader_type.name)
+    return errors
+
+
+def precompile_material(material_name, shader_name, shader_filepath, is_engine_resource,
+                        engine_shader_directory, project_shader_directory, shader_version, macros):
+    """
+    Preprocess a shader permutation and parse its reflections.
+    :return: dict(material_name, shader_name, material_datas, errors, warnings, elapsed_time)
+    """
+    start_time = time.perf_counter()
+    material_datas = None
+    errors = []
+    warnings = []
+    try:
+        with codecs.open(shader_filepath, mode='r', encoding='utf-8') as f:
+            shader = Shader(shader_name, f.read())
+
+        shader_codes = shader.generate_shader_codes(is_engine_resource, engine_shader_directory, project_shader_directory,
+                                                    shader_version, default_compile_option, macros)
+        if not shader_codes:
+            # the include only shader like scene_constants, there is nothing to precompile.
+            warnings.append("There is no shader stage which has void main, skipped.")
+        else:
+            errors = validate_shader_codes(shader_codes)
+        if shader_codes and not errors:
+            shader_code_list = shader_codes.values()
+            material_datas = dict(
+                shader_name=shader_name,
+                shader_codes=shader_codes,
+                include_files={include_file: get_modify_time_of_file(include_file) for include_file in shader.include_files},
+                uniforms=parsing_uniforms(shader_code_list),
+                material_components=parsing_material_components(shader_code_list),
+                binary_data=None,
+                binary_format=None,
+                macros=parsing_macros(shader_code_list)
+            )
+    except:
+        errors.append(traceback.format_exc())
+
+    return dict(
+        material_name=material_name,
+        shader_name=shader_name,
+        material_datas=material_datas,
+        errors=errors,
+        warnings=warnings,
+        elapsed_time=time.perf_counter() - start_time
+    )
+
+
+class ShaderPrecompiler:
+    """
+    Generate the material resources of every shader permutation which is referenced by the resources,
+    so the shaders are not preprocessed at runtime. It does not need a GL context,
+    the program binaries are stored by MaterialLoader after the first compile.
+
+    The permutations are gathered from the .mat and .matinst files. The material instances which are
+    referenced by the scenes, models, effects and particles must exist.
+    The materials which are created by the code at runtime are precompiled after they are saved once.
+    """
+    reference_file_exts = ('.scene', '.model', '.effect', '.particle')
+
+    def __init__(self, engine_path=ResourceManager.engine_path, project_path="", process_count=None):
+        self.engine_path = engine_path
+        self.project_path = project_path or engine_path
+        self.process_count = process_count
+        self.results = []
+        self.missing_material_instances = []
+        self.elapsed_time = 0.0
+
+    def get_resource_paths(self, resource_loader_class):
+        resource_paths = [os.path.join(self.engine_path, resource_loader_class.resource_dir_name), ]
+        project_resource_path = os.path.join(self.project_path, resource_loader_class.resource_dir_name)
+        if project_resource_path not in resource_paths:
+            resource_paths.append(project_resource_path)
+        return resource_paths
+
+    def get_resource_files(self, resource_loader_class, file_exts=None):
+        """
+        :return: OrderedDict { resource name : (file path, is engine resource) }, the project resources override the engine resources.
+        """
+        file_exts = file_exts or (resource_loader_class.fileExt, )
+        resource_files = OrderedDict()
+        for i, resource_path in enumerate(self.get_resource_paths(resource_loader_class)):
+            for dirname, dirnames, filenames in os.walk(resource_path):
+                for filename in filenames:
+                    if os.path.splitext(filename)[1] in file_exts:
+                        filepath = os.path.join(dirname, filename)
+                        resource_name = ResourceLoader.get_resource_name(resource_path, filepath)
+                        resource_files[resource_name] = (filepath, 0 == i)
+        return resource_files
+
+    @staticmethod
+    def load_resource_file(filepath):
+        # the resource files are human readable, so they are evaluated in the namespace of ResourceManager.
+        try:
+            with open(filepath, 'r') as f:
+                return eval(f.read(), vars(sys.modules[ResourceLoader.__module__]))
+        except:
+            logger.error("Failed to read %s.\n%s" % (filepath, traceback.format_exc()))
+        return None
+
+    def collect_referenced_material_instances(self, data, material_instance_names):
+        if type(data) in (dict, OrderedDict):
+            for key, value in data.items():
+                if key == 'material_instance' and type(value) is str:
+                    material_instance_names.append(value)
+                elif key == 'material_instances' and type(value) in (list, tuple):
+                    material_instance_names.extend([x for x in value if type(x) is str])
+                else:
+                    self.collect_referenced_material_instances(value, material_instance_names)
+        elif type(data) in (list, tuple):
+            for value in data:
+                self.collect_referenced_material_instances(value, material_instance_names)
+
+    def collect_permutations(self):
+        """
+        :return: OrderedDict { material name : (shader name, macros) }
+        """
+        permutations = OrderedDict()
+        resource_files = list(self.get_resource_files(MaterialLoader).values()) + \
+            list(self.get_resource_files(MaterialInstanceLoader).values())
+        for filepath, is_engine_resource in resource_files:
+            load_data = self.load_resource_file(filepath)
+            if load_data:
+                shader_name = load_data.get('shader_name')
+                macros = load_data.get('macros', OrderedDict())
+                if shader_name:
+                    material_name = MaterialLoader.generate_material_name(shader_name, macros)
+                    permutations[material_name] = (shader_name, macros)
+
+        # check the material instances which are referenced by the scenes.
+        material_instance_files = self.get_resource_files(MaterialInstanceLoader)
+        material_instance_names = []
+        for resource_path in OrderedDict.fromkeys([self.engine_path, self.project_path]):
+            for dirname, dirnames, filenames in os.walk(resource_path):
+                for filename in filenames:
+                    if os.path.splitext(filename)[1] in self.reference_file_exts:
+                        load_data = self.load_resource_file(os.path.join(dirname, filename))
+                        self.collect_referenced_material_instances(load_data, material_instance_names)
+        self.missing_material_instances = sorted(set(x for x in material_instance_names if x not in material_instance_files))
+        return permutations
+
+    def save_material(self, result, is_engine_resource, shader_filepath):
+        material_name = result['material_name']
+        material_path = self.get_resource_paths(MaterialLoader)[0 if is_engine_resource else -1]
+        material_filepath = os.path.join(material_path, material_name.replace('.', os.sep)) + MaterialLoader.fileExt
+        check_directory_and_mkdir(os.path.dirname(material_filepath))
+
+        material_datas = result['material_datas']
+        # keep the uniform datas which are edited by the user.
+        if os.path.exists(material_filepath):
+            old_material_datas = self.load_resource_file(material_filepath)
+            if old_material_datas and 'uniform_datas' in old_material_datas:
+                material_datas['uniform_datas'] = old_material_datas['uniform_datas']
+
+        with open(material_filepath, 'w') as f:
+            pprint.pprint(material_datas, f, width=128)
+
+        meta_data = MetaData(MaterialLoader.resource_version, material_filepath, is_engine_resource)
+        meta_data.set_resource_meta_data(material_filepath, save=False)
+        meta_data.set_source_meta_data(shader_filepath, save=False)
+        meta_data.set_resource_version(MaterialLoader.resource_version, save=False)
+        meta_data.save_meta_file()
+
+    def precompile(self):
+        """
+        :return: True if all permutations are precompiled.
+        """
+        start_time = time.perf_counter()
+        self.results = []
+        shader_files = self.get_resource_files(ShaderLoader)
+        engine_shader_directory = os.path.join(self.engine_path, ShaderLoader.resource_dir_name)
+        project_shader_directory = os.path.join(self.project_path, ShaderLoader.resource_dir_name)
+        permutations = self.collect_permutations()
+
+        with ProcessPoolExecutor(max_workers=self.process_count) as process_pool:
+            futures = []
+            for material_name, (shader_name, macros) in permutations.items():
+                if shader_name not in shader_files:
+                    self.results.append(dict(material_name=material_name, shader_name=shader_name, material_datas=None,
+                                             errors=["There is no %s shader." % shader_name], warnings=[], elapsed_time=0.0))
+                    continue
+                shader_filepath, is_engine_resource = shader_files[shader_name]
+                future = process_pool.submit(precompile_material, material_name, shader_name, shader_filepath,
+                                             is_engine_resource, engine_shader_directory, project_shader_directory,
+                                             ShaderLoader.shader_version, macros)
+                futures.append((future, shader_filepath, is_engine_resource))
+
+            for future, shader_filepath, is_engine_resource in futures:
+                result = future.result()
+                if result['material_datas'] is not None:
+                    self.save_material(result, is_engine_resource, shader_filepath)
+                self.results.append(result)
+
+        self.elapsed_time = time.perf_counter() - start_time
+        return all(not result['errors'] for result in self.results) and not self.missing_material_instances
+
+    def get_report(self):
+        """
+        :return: report lines, the timing of the shaders and the errors.
+        """
+        shader_timings = OrderedDict()  # { shader name : [variant count, total time, max time] }
+        for result in self.results:
+            timing = shader_timings.setdefault(result['shader_name'], [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += result['elapsed_time']
+            timing[2] = max(timing[2], result['elapsed_time'])
+
+        lines = ["%-48s %8s %12s %12s" % ('shader', 'variants', 'total(ms)', 'max(ms)')]
+        for shader_name, (count, total_time, max_time) in sorted(shader_timings.items(), key=lambda x: -x[1][1]):
+            lines.append("%-48s %8d %12.2f %12.2f" % (shader_name, count, total_time * 1000.0, max_time * 1000.0))
+
+        failed_results = [result for result in self.results if result['errors']]
+        skipped_results = [result for result in self.results if not result['errors'] and result['material_datas'] is None]
+        lines.append("Precompiled %d/%d materials, skipped %d : %.2fms" % (len(self.results) - len(failed_results) - len(skipped_results),
+                                                                          len(self.results), len(skipped_results),
+                                                                          self.elapsed_time * 1000.0))
+        for result in skipped_results:
+            lines.append("Skipped %s ( %s ) :\n\t%s" % (result['material_name'], result['shader_name'], "\n\t".join(result['warnings'])))
+        for result in failed_results:
+            lines.append("Failed %s ( %s ) :\n\t%s" % (result['material_name'], result['shader_name'], "\n\t".join(result['errors'])))
+        for material_instance_name in self.missing_material_instances:
+            lines.append("Missing material instance : %s" % material_instance_name)
+        return lines
@@ -1,5 +1,10 @@
 from .ColladaLoader import Collada
 from .DDSLoader import loadDDS
-from .ObjLoader import OBJ
+from .DependencyGraph import DependencyGraph
+from .ObjLoader import OBJ, StreamingOBJ
 from .FontLoader import generate_font_data
+from .ImportScheduler import ImportScheduler, ImportRequest
+from .LoadingThreadPool import LoadingThreadPool, LoadingRequest, LoadingState
+from .ResourceContainer import ChunkCompression, is_resource_container_file, load_resource_container, save_resource_container
+from .ResourceIndex import ResourceIndex
 from .ResourceManager import ResourceManager
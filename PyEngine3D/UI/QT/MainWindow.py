@@ -86,8 +86,8 @@ class MessageThread(QtCore.QThread):
             # print(1.0/(time.time() - self.lastTime))
             self.lastTime = time.time()
 
-            # Process recieved queues
-            if not self.cmdQueue.empty():
+            # Process all recieved queues, the batched commands are arrived at once.
+            while self.running and not self.cmdQueue.empty():
                 # receive value must be tuple type
                 cmd, value = self.cmdQueue.get()
                 cmdName = get_command_name(cmd)
@@ -173,6 +173,8 @@ class MainWindow(QtGui.QMainWindow, Singleton):
                      self.fill_resource_attribute)
         self.connect(self.message_thread, QtCore.SIGNAL(get_command_name(COMMAND.DELETE_RESOURCE_INFO)),
                      self.delete_resource_info)
+        self.connect(self.message_thread, QtCore.SIGNAL(get_command_name(COMMAND.TRANS_IMPORT_PROGRESS)),
+                     self.set_import_progress)
 
         btn = self.findChild(QtGui.QPushButton, "btnOpenResource")
         btn.clicked.connect(self.openResource)
@@ -312,6 +314,13 @@ class MainWindow(QtGui.QMainWindow, Singleton):
     def set_view_mode(self, mode):
         self.appCmdQueue.put(mode)
 
+    def set_import_progress(self, import_progress):
+        completed_count, total_count, resource_name = import_progress
+        if completed_count < total_count:
+            self.statusBar().showMessage("Import %d / %d : %s" % (completed_count, total_count, resource_name))
+        else:
+            self.statusBar().clearMessage()
+
     def set_screen_info(self, screen_info):
         width, height, full_screen = screen_info
         self.spinWidth.setValue(width)
@@ -103,8 +103,8 @@ class MessageThread(Thread):
             # print(1.0/(time.time() - self.lastTime))
             self.lastTime = time.time()
 
-            # Process recieved queues
-            if not self.cmdQueue.empty():
+            # Process all recieved queues, the batched commands are arrived at once.
+            while self.running and not self.cmdQueue.empty():
                 # receive value must be tuple type
                 cmd, value = self.cmdQueue.get()
                 cmdName = get_command_name(cmd)
@@ -132,6 +132,7 @@ class MainWindow:
         self.selected_item = None
         self.selected_item_categoty = ''
         self.isFillAttributeTree = False
+        self.window_title = ""
 
         # MessageThread
         self.message_thread = MessageThread(self.cmdQueue)
@@ -153,6 +154,7 @@ class MainWindow:
         self.message_thread.connect(get_command_name(COMMAND.TRANS_RESOURCE_INFO), self.set_resource_info)
         self.message_thread.connect(get_command_name(COMMAND.TRANS_RESOURCE_ATTRIBUTE), self.fill_resource_attribute)
         self.message_thread.connect(get_command_name(COMMAND.DELETE_RESOURCE_INFO), self.delete_resource_info)
+        self.message_thread.connect(get_command_name(COMMAND.TRANS_IMPORT_PROGRESS), self.set_import_progress)
 
         self.message_thread.connect(get_command_name(COMMAND.DELETE_OBJECT_INFO), self.delete_object_info)
         self.message_thread.connect(get_command_name(COMMAND.TRANS_OBJECT_INFO), self.add_object_info)
@@ -438,8 +440,16 @@ class MainWindow:
         self.root.withdraw()
 
     def set_window_title(self, title):
+        self.window_title = title
         self.root.title(title)
 
+    def set_import_progress(self, import_progress):
+        completed_count, total_count, resource_name = import_progress
+        if completed_count < total_count:
+            self.root.title("%s - Import %d / %d : %s" % (self.window_title, completed_count, total_count, resource_name))
+        else:
+            self.root.title(self.window_title)
+
     # ------------------------- #
     # Menu
     # ------------------------- #
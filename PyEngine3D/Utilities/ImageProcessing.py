@@ -3,8 +3,11 @@ from subprocess import call
 from time import time
 from math import sqrt
 
+import numpy as np
 from PIL import Image
 
+DISTANCE_INFINITY = 1e20
+
 
 def check(limit, ox, oy, px, py, current):
     lp = getpixel(px, py)
@@ -91,3 +94,79 @@ def generate():
     ct = time() - ct
     print('Took: {0}'.format(str(round(ct, 1))))
 
+
+
+def distance_transform_1d(f):
+    """
+    Felzenszwalb's linear time squared distance transform for the batch of lines.
+    :param f: (line count, n) array of the squared distances at the samples, DISTANCE_INFINITY is the background.
+    :return: (line count, n) squared distances of the lower envelope of the parabolas.
+    """
+    line_count, n = f.shape
+    # the samples are stored as (n, line count), so a step of q reads the contiguous memory.
+    # the per line lookups are 1d takes with the flat index, sample index * line count + line index.
+    f = np.ascontiguousarray(np.asarray(f, dtype=np.float64).T)
+    lines = np.arange(line_count)
+    flat_f = f.reshape(-1)
+    f_plus_q2 = (f + (np.arange(n) ** 2)[:, np.newaxis]).reshape(-1)
+    k = np.zeros(line_count, dtype=np.int64)  # index of the rightmost parabola of the lower envelope
+    v = np.zeros(n * line_count, dtype=np.int64)  # locations of the parabolas
+    z = np.full((n + 1) * line_count, np.inf)  # boundaries between the parabolas
+    z[:line_count] = -np.inf
+
+    for q in range(1, n):
+        f_q = f_plus_q2[q * line_count:(q + 1) * line_count]
+        vk = v[k * line_count + lines]
+        s = (f_q - f_plus_q2[vk * line_count + lines]) / (2.0 * (q - vk))
+        # pop the parabolas which are hidden by the new one.
+        hidden = np.nonzero(s <= z[k * line_count + lines])[0]
+        while 0 < len(hidden):
+            k[hidden] -= 1
+            vk = v[k[hidden] * line_count + hidden]
+            s[hidden] = (f_q[hidden] - f_plus_q2[vk * line_count + hidden]) / (2.0 * (q - vk))
+            hidden = hidden[s[hidden] <= z[k[hidden] * line_count + hidden]]
+        k += 1
+        v[k * line_count + lines] = q
+        z[k * line_count + lines] = s
+        z[(k + 1) * line_count + lines] = np.inf
+
+    d = np.empty((n, line_count), dtype=np.float64)
+    k[:] = 0
+    for q in range(n):
+        behind = np.nonzero(z[(k + 1) * line_count + lines] < q)[0]
+        while 0 < len(behind):
+            k[behind] += 1
+            behind = behind[z[(k[behind] + 1) * line_count + behind] < q]
+        vk = v[k * line_count + lines]
+        d[q] = (q - vk) * (q - vk) + flat_f[vk * line_count + lines]
+    return d.T
+
+
+def euclidean_distance_transform(features):
+    """
+    Exact squared euclidean distance to the nearest feature pixel in linear time.
+    :param features: (..., height, width) bool array, the leading dimensions are the independent images.
+    :return: (..., height, width) squared distances, DISTANCE_INFINITY or more if the image has no feature.
+    """
+    features = np.asarray(features, dtype=bool)
+    shape = features.shape
+    height, width = shape[-2:]
+    f = np.where(features, 0.0, DISTANCE_INFINITY).reshape(-1, height, width)
+    # columns, then rows
+    f = distance_transform_1d(f.transpose(0, 2, 1).reshape(-1, height)).reshape(-1, width, height).transpose(0, 2, 1)
+    f = distance_transform_1d(f.reshape(-1, width))
+    return f.reshape(shape)
+
+
+def signed_distance_field(inside, spread):
+    """
+    :param inside: (..., height, width) bool array
+    :param spread: distance in pixels which is mapped to 0.5
+    :return: (..., height, width) float32 in [0, 1], 0.5 is the edge and the inside is greater.
+    """
+    inside = np.asarray(inside, dtype=bool)
+    outside_distance = np.sqrt(euclidean_distance_transform(inside))
+    inside_distance = np.sqrt(euclidean_distance_transform(~inside))
+    # the edge lies between the inside pixel and the outside pixel.
+    signed_distance = np.where(inside, inside_distance - 0.5, 0.5 - outside_distance)
+    return np.clip(0.5 + signed_distance / (2.0 * spread), 0.0, 1.0).astype(np.float32)
@@ -94,3 +94,76 @@ def getCubicBezierCurvePoint(p0, c0, c1, p1, t):
     t2 = t * t
     inv_t = 1.0 - t
     return (inv_t * inv_t * inv_t * p0) + (3.0 * t * inv_t * inv_t * c0) + (3.0 * inv_t * t2 * c1) + t2 * t * p1
+
+
+def getCubicBezierCurveTangent(p0, c0, c1, p1, t):
+    # derivative of getCubicBezierCurvePoint
+    inv_t = 1.0 - t
+    return (3.0 * inv_t * inv_t * (c0 - p0)) + (6.0 * inv_t * t * (c1 - c0)) + (3.0 * t * t * (p1 - c1))
+
+
+def getCubicBezierSplinePoints(positions, control_points, point_times, resample_count):
+    """
+    Evaluate the samples of all segments at once. The samples are evenly spaced in time,
+    the time of the first point is ignored.
+    :param positions: [point count, 3]
+    :param control_points: [point count, 3], the control points of a segment are position + control_point and next position - next control_point.
+    :param point_times: [point count], duration of the segment which ends at the point.
+    :return: sample positions [resample_count, 3], sample tangents [resample_count, 3]
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    control_points = np.asarray(control_points, dtype=np.float32).reshape(-1, 3)
+    point_count = len(positions)
+    if point_count < 2:
+        sample_positions = np.zeros((resample_count, 3), dtype=np.float32)
+        sample_positions[...] = positions[0] if 0 < point_count else 0.0
+        return sample_positions, np.zeros((resample_count, 3), dtype=np.float32)
+
+    key_frames = np.cumsum(point_times, dtype=np.float64)
+    key_frames -= key_frames[0]
+    total_time = key_frames[-1]
+    sample_times = np.minimum(total_time, np.arange(resample_count) * (total_time / max(1, resample_count - 1)))
+
+    # a sample on a key frame belongs to the previous segment.
+    segment_indices = np.clip(np.searchsorted(key_frames, sample_times, side='left') - 1, 0, point_count - 2)
+    time_ranges = key_frames[segment_indices + 1] - key_frames[segment_indices]
+    t = np.divide(sample_times - key_frames[segment_indices], time_ranges, out=np.zeros_like(sample_times), where=0.0 < time_ranges)
+    t = np.clip(t, 0.0, 1.0).astype(np.float32)[:, np.newaxis]
+
+    p0 = positions[segment_indices]
+    c0 = p0 + control_points[segment_indices]
+    p1 = positions[segment_indices + 1]
+    c1 = p1 - control_points[segment_indices + 1]
+    return getCubicBezierCurvePoint(p0, c0, c1, p1, t), getCubicBezierCurveTangent(p0, c0, c1, p1, t)
+
+
+def getArcLengths(points):
+    """
+    :return: cumulative arc length of the polyline [point count], the first is 0.0
+    """
+    arc_lengths = np.zeros(len(points), dtype=np.float64)
+    if 1 < len(points):
+        np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=-1), out=arc_lengths[1:])
+    return arc_lengths
+
+
+def getPolylinePointsByDistance(points, tangents, arc_lengths, distances):
+    """
+    Binary search the arc length table, so the followers move at the constant speed.
+    :param distances: float or [follower count], they are clamped to the length of the polyline.
+    :return: positions [..., 3], normalized tangents [..., 3]
+    """
+    distances = np.clip(distances, 0.0, arc_lengths[-1])
+    if len(points) < 2:
+        positions = np.broadcast_to(points[0], np.shape(distances) + (3, )).copy()
+        return positions, np.zeros_like(positions)
+
+    indices = np.clip(np.searchsorted(arc_lengths, distances, side='right') - 1, 0, len(points) - 2)
+    segment_lengths = arc_lengths[indices + 1] - arc_lengths[indices]
+    t = np.divide(distances - arc_lengths[indices], segment_lengths,
+                  out=np.zeros_like(segment_lengths), where=0.0 < segment_lengths)[..., np.newaxis]
+    positions = points[indices] * (1.0 - t) + points[indices + 1] * t
+    sample_tangents = tangents[indices] * (1.0 - t) + tangents[indices + 1] * t
+    tangent_lengths = np.linalg.norm(sample_tangents, axis=-1, keepdims=True)
+    sample_tangents = np.divide(sample_tangents, tangent_lengths, out=np.zeros_like(sample_tangents), where=0.0 < tangent_lengths)
+    return positions.astype(np.float32), sample_tangents.astype(np.float32)
@@ -77,6 +77,14 @@ def normalize(v):
     return v / m
 
 
+def normalize_vectors(vectors):
+    """
+    :param vectors: (N, D) array. zero length vectors are returned as they are.
+    """
+    lengths = np.sqrt(np.sum(vectors * vectors, axis=-1))[..., np.newaxis]
+    return vectors / np.where(lengths == 0.0, 1.0, lengths)
+
+
 def dot_arrays(*array_list):
     return reduce(np.dot, array_list)
 
@@ -131,6 +139,32 @@ def matrix_rotation(rotation_matrix, rx, ry, rz):
     rotation_matrix[:, 2] = [-sh*ca, sh*sa*cb + ch*sb, -sh*sa*sb + ch*cb, 0.0]
 
 
+def get_rotation_matrices(rotations):
+    """
+    :param rotations: (N, 3) array of euler angles.
+    :return: (N, 4, 4) array. same as matrix_rotation of each euler angles.
+    """
+    ch = np.cos(rotations[:, 1])
+    sh = np.sin(rotations[:, 1])
+    ca = np.cos(rotations[:, 2])
+    sa = np.sin(rotations[:, 2])
+    cb = np.cos(rotations[:, 0])
+    sb = np.sin(rotations[:, 0])
+
+    rotation_matrices = np.zeros((len(rotations), 4, 4), dtype=np.float32)
+    rotation_matrices[:, 0, 0] = ch*ca
+    rotation_matrices[:, 1, 0] = sh*sb - ch*sa*cb
+    rotation_matrices[:, 2, 0] = ch*sa*sb + sh*cb
+    rotation_matrices[:, 0, 1] = sa
+    rotation_matrices[:, 1, 1] = ca*cb
+    rotation_matrices[:, 2, 1] = -ca*sb
+    rotation_matrices[:, 0, 2] = -sh*ca
+    rotation_matrices[:, 1, 2] = sh*sa*cb + ch*sb
+    rotation_matrices[:, 2, 2] = -sh*sa*sb + ch*cb
+    rotation_matrices[:, 3, 3] = 1.0
+    return rotation_matrices
+
+
 def matrix_to_vectors(rotation_matrix, axis_x, axis_y, axis_z, do_normalize=False):
     if do_normalize:
         rotation_matrix[0, 0:3] = normalize(rotation_matrix[0, 0:3])
@@ -273,6 +307,35 @@ def quaternion_to_matrix(quat, rotation_matrix):
     '''
 
 
+def quaternions_to_matrices(quaternions):
+    """
+    :param quaternions: (..., 4) array of quaternions. (w, x, y, z)
+    :return: (..., 4, 4) array of rotation matrices. same as quaternion_to_matrix.
+    """
+    qw, qx, qy, qz = [quaternions[..., i] for i in range(4)]
+    qxqx = qx * qx * 2.0
+    qxqy = qx * qy * 2.0
+    qxqz = qx * qz * 2.0
+    qxqw = qx * qw * 2.0
+    qyqy = qy * qy * 2.0
+    qyqz = qy * qz * 2.0
+    qyqw = qy * qw * 2.0
+    qzqw = qz * qw * 2.0
+    qzqz = qz * qz * 2.0
+    rotation_matrices = np.zeros(quaternions.shape[:-1] + (4, 4), dtype=np.float32)
+    rotation_matrices[..., 0, 0] = 1.0 - qyqy - qzqz
+    rotation_matrices[..., 0, 1] = qxqy + qzqw
+    rotation_matrices[..., 0, 2] = qxqz - qyqw
+    rotation_matrices[..., 1, 0] = qxqy - qzqw
+    rotation_matrices[..., 1, 1] = 1.0 - qxqx - qzqz
+    rotation_matrices[..., 1, 2] = qyqz + qxqw
+    rotation_matrices[..., 2, 0] = qxqz + qyqw
+    rotation_matrices[..., 2, 1] = qyqz - qxqw
+    rotation_matrices[..., 2, 2] = 1.0 - qxqx - qyqy
+    rotation_matrices[..., 3, 3] = 1.0
+    return rotation_matrices
+
+
 def quaternion_to_euler(q):
     sqw = w * w
     sqx = x * x
@@ -320,6 +383,26 @@ def slerp(quaternion1, quaternion2, amount):
     return (num3 * quaternion1) + (num2 * quaternion2)
 
 
+def slerp_arrays(quaternions1, quaternions2, amounts):
+    """
+    :param quaternions1: (..., 4) array of quaternions.
+    :param quaternions2: (..., 4) array of quaternions.
+    :param amounts: array broadcastable to quaternions1.shape[:-1]
+    :return: (..., 4) array. same as slerp of each quaternion pairs.
+    """
+    amounts = np.broadcast_to(amounts, quaternions1.shape[:-1])
+    num4 = np.sum(quaternions1 * quaternions2, axis=-1)
+    flag = num4 < 0.0
+    num4 = np.abs(num4)
+    linear = num4 > 0.999999
+    num5 = np.arccos(np.minimum(num4, 1.0))
+    num6 = 1.0 / np.where(linear, 1.0, np.sin(num5))
+    num3 = np.where(linear, 1.0 - amounts, np.sin((1.0 - amounts) * num5) * num6)
+    num2 = np.where(linear, amounts, np.sin(amounts * num5) * num6)
+    num2 = np.where(flag, -num2, num2)
+    return (num3[..., np.newaxis] * quaternions1) + (num2[..., np.newaxis] * quaternions2)
+
+
 def set_identity_matrix(M):
     M[...] = [[1.0, 0.0, 0.0, 0.0],
             [0.0, 1.0, 0.0, 0.0],
@@ -585,10 +668,50 @@ def convert_triangulate(polygon, vcount, stride=1):
         triangulated_list += t1
         triangulated_list += indices_list[i]
         t2 = indices_list[i]
+    return triangulated_list
+
+
+def triangulate_polygons(vcounts):
+    """
+    Triangle fans (0, i + 1, i + 2) of the polygons at once.
+    :param vcounts: corner count of each polygon, the corners of the polygons are flatten in order.
+    :return: (triangle count, 3) indices of the flatten corners.
+    """
+    vcounts = np.asarray(vcounts, dtype=np.int64)
+    polygon_starts = np.cumsum(vcounts) - vcounts
+    triangle_counts = np.maximum(vcounts - 2, 0)
+    triangle_starts = np.cumsum(triangle_counts) - triangle_counts
+    fan_index = np.arange(np.sum(triangle_counts)) - np.repeat(triangle_starts, triangle_counts)
+    first_corners = np.repeat(polygon_starts, triangle_counts)
+    return np.stack([first_corners, first_corners + fan_index + 1, first_corners + fan_index + 2], axis=-1)
+
+
+def weld_vertex_indices(index_rows):
+    """
+    Weld the vertices which have the same source indices.
+    :param index_rows: (corner count, stream count) source indices of every stream of the corners.
+    :return: unique index rows ordered by first appearance, uint32 indices of the corners into the unique rows.
+    """
+    index_rows = np.asarray(index_rows)
+    if 0 == len(index_rows):
+        return index_rows, np.zeros(0, dtype=np.uint32)
+
+    # the keys are compacted after every column, so they do not overflow.
+    keys = np.zeros(len(index_rows), dtype=np.int64)
+    for i, column in enumerate(index_rows.T):
+        if 0 < i:
+            keys = np.unique(keys, return_inverse=True)[1].reshape(-1)
+        keys = keys * (int(np.max(column)) + 1) + column
+
+    unique_keys, first_indices, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first_indices)
+    remap = np.empty(len(order), dtype=np.uint32)
+    remap[order] = np.arange(len(order), dtype=np.uint32)
+    return index_rows[first_indices[order]], remap[inverse.reshape(-1)]
 
 
 # http://jerome.jouvie.free.fr/opengl-tutorials/Lesson8.php
-def compute_tangent(is_triangle_mode, positions, texcoords, normals, indices):
+def compute_tangent(is_triangle_mode, positions, texcoords, normals, indices, return_bitangent_signs=False):
     """
     Note: This point can also be considered as the vector starting from the origin to pi.
     Writting this equation for the points p1, p2 and p3 give :
@@ -617,59 +740,58 @@ def compute_tangent(is_triangle_mode, positions, texcoords, normals, indices):
 
     Equation of N:
         N = cross(T, B)
-    """
 
-    tangents = np.array([[1.0, 0.0, 0.0], ] * len(normals), dtype=np.float32)
-    # binormals = np.array([[0.0, 0.0, 1.0], ] * len(normals), dtype=np.float32)
-
-    if is_triangle_mode:
-        for i in range(0, len(indices), 3):
-            i0, i1, i2 = indices[i:i + 3]
-            deltaPos_0_1 = positions[i1] - positions[i0]
-            deltaPos_0_2 = positions[i2] - positions[i0]
-            deltaUV_0_1 = texcoords[i1] - texcoords[i0]
-            deltaUV_0_2 = texcoords[i2] - texcoords[i0]
-            r = deltaUV_0_1[0] * deltaUV_0_2[1] - deltaUV_0_1[1] * deltaUV_0_2[0]
-            r = (1.0 / r) if r != 0.0 else 0.0
-
-            tangent = (deltaPos_0_1 * deltaUV_0_2[1] - deltaPos_0_2 * deltaUV_0_1[1]) * r
-            tangent = normalize(tangent)
-            # binormal = (deltaPos_0_2 * deltaUV_0_1[0]   - deltaPos_0_1 * deltaUV_0_2[0]) * r
-            # binormal = normalize(binormal)
-
-            # invalid tangent
-            if 0.0 == np.dot(tangent, tangent):
-                avg_normal = normalize(normals[i0] + normals[i1] + normals[i2])
-                tangent = np.cross(avg_normal, WORLD_UP)
-
-            tangents[indices[i]] = tangent
-            tangents[indices[i + 1]] = tangent
-            tangents[indices[i + 2]] = tangent
-
-            # binormals[indices[i]] = binormal
-            # binormals[indices[i+1]] = binormal
-            # binormals[indices[i+2]] = binormal
-    else:
-        for i in range(0, len(indices), 4):
-            i0, i1, i2, i3 = indices[i:i + 4]
-            deltaPos_0_1 = positions[i1] - positions[i0]
-            deltaPos_0_2 = positions[i2] - positions[i0]
-            deltaUV_0_1 = texcoords[i1] - texcoords[i0]
-            deltaUV_0_2 = texcoords[i2] - texcoords[i0]
-            r = deltaUV_0_1[0] * deltaUV_0_2[1] - deltaUV_0_1[1] * deltaUV_0_2[0]
-            r = (1.0 / r) if r != 0.0 else 0.0
-
-            tangent = (deltaPos_0_1 * deltaUV_0_2[1] - deltaPos_0_2 * deltaUV_0_1[1]) * r
-            tangent = normalize(tangent)
-
-            # invalid tangent
-            if 0.0 == np.dot(tangent, tangent):
-                avg_normal = normalize(normals[i0] + normals[i1] + normals[i2])
-                tangent = np.cross(avg_normal, WORLD_UP)
-
-            tangents[indices[i]] = tangent
-            tangents[indices[i + 1]] = tangent
-            tangents[indices[i + 2]] = tangent
-            tangents[indices[i + 3]] = tangent
-    # return tangents, binormals
+    The face tangents and binormals are computed at once, accumulated to the vertices,
+    and then the tangents are orthonormalized against the normals.
+    :param is_triangle_mode: the faces are triangles if True, otherwise quads. A quad uses the tangent of its first triangle.
+    :param return_bitangent_signs: if True, the handedness of the uv of each vertex is also returned.
+    :return: tangents (, bitangent_signs)
+    """
+    positions = np.asarray(positions, dtype=np.float32)
+    texcoords = np.asarray(texcoords, dtype=np.float32)
+    normals = np.asarray(normals, dtype=np.float32)
+    indices = np.asarray(indices, dtype=np.int64)
+    vertex_count = len(normals)
+
+    face_vertex_count = 3 if is_triangle_mode else 4
+    faces = indices[:len(indices) // face_vertex_count * face_vertex_count].reshape(-1, face_vertex_count)
+    i0, i1, i2 = faces[:, 0], faces[:, 1], faces[:, 2]
+    deltaPos_0_1 = positions[i1] - positions[i0]
+    deltaPos_0_2 = positions[i2] - positions[i0]
+    deltaUV_0_1 = texcoords[i1] - texcoords[i0]
+    deltaUV_0_2 = texcoords[i2] - texcoords[i0]
+    r = deltaUV_0_1[:, 0] * deltaUV_0_2[:, 1] - deltaUV_0_1[:, 1] * deltaUV_0_2[:, 0]
+    # degenerated uv
+    r = np.divide(1.0, r, out=np.zeros_like(r), where=(r != 0.0))[:, np.newaxis]
+
+    face_tangents = normalize_vectors((deltaPos_0_1 * deltaUV_0_2[:, 1:2] - deltaPos_0_2 * deltaUV_0_1[:, 1:2]) * r)
+    face_binormals = normalize_vectors((deltaPos_0_2 * deltaUV_0_1[:, 0:1] - deltaPos_0_1 * deltaUV_0_2[:, 0:1]) * r)
+
+    # invalid tangent
+    invalid = np.sum(face_tangents * face_tangents, axis=-1) == 0.0
+    if np.any(invalid):
+        avg_normals = normalize_vectors(normals[i0[invalid]] + normals[i1[invalid]] + normals[i2[invalid]])
+        face_tangents[invalid] = np.cross(avg_normals, WORLD_UP)
+
+    # accumulate the face vectors to the vertices, bincount is faster than np.add.at.
+    corner_vertices = faces.reshape(-1)
+    tangents = np.empty((vertex_count, 3), dtype=np.float32)
+    binormals = np.empty((vertex_count, 3), dtype=np.float32)
+    for i in range(3):
+        tangents[:, i] = np.bincount(corner_vertices, np.repeat(face_tangents[:, i], face_vertex_count), minlength=vertex_count)[:vertex_count]
+        binormals[:, i] = np.bincount(corner_vertices, np.repeat(face_binormals[:, i], face_vertex_count), minlength=vertex_count)[:vertex_count]
+
+    # gram-schmidt orthonormalize
+    unit_normals = normalize_vectors(normals)
+    tangents -= unit_normals * np.sum(unit_normals * tangents, axis=-1)[:, np.newaxis]
+    invalid = np.sum(tangents * tangents, axis=-1) < 1e-12
+    if np.any(invalid):
+        tangents[invalid] = np.cross(unit_normals[invalid], WORLD_UP)
+        invalid[invalid] = np.sum(tangents[invalid] * tangents[invalid], axis=-1) < 1e-12
+        tangents[invalid] = [1.0, 0.0, 0.0]
+    tangents = normalize_vectors(tangents)
+
+    if return_bitangent_signs:
+        bitangent_signs = np.where(np.sum(np.cross(unit_normals, tangents) * binormals, axis=-1) < 0.0, -1.0, 1.0)
+        return tangents, bitangent_signs.astype(np.float32)
     return tangents
@@ -10,11 +10,19 @@ ignore_xmlns = re.compile(' xmlns=".+?"')
 
 def load_xml(filepath, encoding="utf-8"):
     if os.path.exists(filepath):
-        f = io.open(filepath, mode="r", encoding=encoding)
-        xmlData = "".join(list(f))
-        xmlData = re.sub(ignore_xmlns, "", xmlData, count=1)
-        f.close()
-        xml_root = ElementTree.fromstring(xmlData)
+        # parse the file by chunks instead of the copies of whole text, then ignore the default xmlns of the tags.
+        default_namespace = None
+        with io.open(filepath, mode="r", encoding=encoding) as f:
+            xml_parser = ElementTree.iterparse(f, events=('start-ns',))
+            for event, (prefix, uri) in xml_parser:
+                if prefix == '' and default_namespace is None:
+                    default_namespace = '{%s}' % uri
+            xml_root = xml_parser.root
+
+        if default_namespace:
+            for xml_element in xml_root.iter():
+                if xml_element.tag.startswith(default_namespace):
+                    xml_element.tag = xml_element.tag[len(default_namespace):]
         return xml_root
 
 
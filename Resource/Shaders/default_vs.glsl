@@ -3,14 +3,36 @@
 #include "scene_constants.glsl"
 #include "default_material.glsl"
 
-uniform bool is_instancing;
-uniform mat4 model;
+// referene : ObjectData.py
+struct OBJECT_DATA
+{
+    mat4 MODEL;
+    mat4 PREV_MODEL;
+    vec4 COLOR;
+    uint OBJECT_ID;
+    int BONE_OFFSET;
+    bool IS_INSTANCING;
+};
+
+layout(std430, binding=5) readonly buffer object_datas
+{
+    OBJECT_DATA OBJECT_DATAS[];
+};
 
 #if 1 == SKELETAL
-uniform mat4 bone_matrices[MAX_BONES];
-uniform mat4 prev_bone_matrices[MAX_BONES];
+layout(std430, binding=6) readonly buffer bone_matrices
+{
+    mat4 BONE_MATRICES[];
+};
+
+layout(std430, binding=7) readonly buffer prev_bone_matrices
+{
+    mat4 PREV_BONE_MATRICES[];
+};
 #endif
 
+uniform int object_index;
+
 struct VERTEX_OUTPUT
 {
     vec3 world_position;
@@ -43,14 +65,16 @@ void main() {
     vec4 prev_position = vec4(0.0, 0.0, 0.0, 0.0);
     vec3 vertex_normal = vec3(0.0, 0.0, 0.0);
     vec3 vertex_tangent = vec3(0.0, 0.0, 0.0);
+    OBJECT_DATA object_data = OBJECT_DATAS[object_index];
 
 #if 1 == SKELETAL
     for(int i=0; i<MAX_BONES_PER_VERTEX; ++i)
     {
-        prev_position += (prev_bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
-        position += (bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
-        vertex_normal += (bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_normal, 0.0)).xyz * vs_in_bone_weights[i];
-        vertex_tangent += (bone_matrices[int(vs_in_bone_indicies[i])] * vec4(vs_in_tangent, 0.0)).xyz * vs_in_bone_weights[i];
+        int bone_index = object_data.BONE_OFFSET + int(vs_in_bone_indicies[i]);
+        prev_position += (PREV_BONE_MATRICES[bone_index] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
+        position += (BONE_MATRICES[bone_index] * vec4(vs_in_position, 1.0)) * vs_in_bone_weights[i];
+        vertex_normal += (BONE_MATRICES[bone_index] * vec4(vs_in_normal, 0.0)).xyz * vs_in_bone_weights[i];
+        vertex_tangent += (BONE_MATRICES[bone_index] * vec4(vs_in_tangent, 0.0)).xyz * vs_in_bone_weights[i];
     }
     position /= position.w;
     prev_position /= prev_position.w;
@@ -64,7 +88,8 @@ void main() {
     vertex_normal = normalize(vertex_normal);
     vertex_tangent = normalize(vertex_tangent);
 
-    mat4 local_matrix = is_instancing ? model * vs_in_isntance_matrix : model;
+    mat4 local_matrix = object_data.IS_INSTANCING ? object_data.MODEL * vs_in_isntance_matrix : object_data.MODEL;
+    mat4 prev_local_matrix = object_data.IS_INSTANCING ? object_data.PREV_MODEL * vs_in_isntance_matrix : object_data.PREV_MODEL;
 
     vs_output.world_position = (local_matrix * position).xyz;
     vs_output.vertex_normal = vertex_normal;
@@ -78,7 +103,7 @@ void main() {
         mat4(vec4(vertex_tangent, 0.0), vec4(vertex_normal, 0.0), vec4(bitangent, 0.0), vec4(0.0, 0.0, 0.0, 1.0));
 
     position = VIEW_PROJECTION * local_matrix * position;
-    prev_position = PREV_VIEW_PROJECTION * local_matrix * prev_position;
+    prev_position = PREV_VIEW_PROJECTION * prev_local_matrix * prev_position;
 
     vs_output.projection_pos = position;
     vs_output.prev_projection_pos = prev_position;
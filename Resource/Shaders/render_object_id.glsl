@@ -5,13 +5,11 @@
 
 
 #ifdef FRAGMENT_SHADER
-uniform uint object_id;
-
 layout (location = 0) in VERTEX_OUTPUT vs_output;
 layout (location = 0) out float fs_ouptut;
 
 void main()
 {
-    fs_ouptut = float(object_id);
+    fs_ouptut = float(OBJECT_DATAS[object_index].OBJECT_ID);
 }
 #endif
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+Compare the import time and the peak memory of the legacy Collada loader with Collada on the generated skinned grid meshes.
+Every file is loaded in a new process, and the mesh datas of both loaders are checked to be same.
+
+usage : python benchmark/benchmark_collada_loader.py [vertex_count ...]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.ResourceManager import Collada
+
+from benchmark_resource_container import get_peak_rss, reset_peak_rss
+from legacy_collada_loader import Collada as LegacyCollada
+
+
+def format_array(array, fmt='%.4f'):
+    return ' '.join([fmt % x for x in np.asarray(array).reshape(-1)])
+
+
+def write_skinned_grid_dae(filepath, vertex_count, bone_count=32, influence_count=4):
+    grid_size = max(2, int(np.sqrt(vertex_count)))
+    x, y = np.meshgrid(np.arange(grid_size, dtype=np.float32), np.arange(grid_size, dtype=np.float32))
+    positions = np.stack([x.reshape(-1), y.reshape(-1), np.sin(x.reshape(-1) * 0.1)], axis=-1)
+    normals = np.tile([0.0, 0.0, 1.0], (len(positions), 1))
+    texcoords = positions[:, :2] / grid_size
+    vertex_index = np.arange(grid_size * grid_size).reshape(grid_size, grid_size)
+    quads = np.stack([vertex_index[:-1, :-1], vertex_index[:-1, 1:], vertex_index[1:, 1:], vertex_index[1:, :-1]], axis=-1).reshape(-1, 4)
+    triangles = np.concatenate([quads[:, :3], quads[:, [2, 3, 0]]])
+    # VERTEX, NORMAL, TEXCOORD offsets are 0, 1, 2
+    triangle_indices = np.repeat(triangles, 3, axis=1)
+
+    np.random.seed(0)
+    joints = np.random.randint(0, bone_count, (len(positions), influence_count))
+    weights = np.random.uniform(0.0, 1.0, (len(positions), influence_count))
+    weights /= np.sum(weights, axis=-1, keepdims=True)
+    weight_indices = np.arange(weights.size).reshape(weights.shape)
+    vertex_weights = np.stack([joints, weight_indices], axis=-1)
+
+    bone_names = ['bone_%d' % i for i in range(bone_count)]
+    identity = format_array(np.eye(4), '%g')
+    bone_nodes = ''.join(['<node id="%s" name="%s" sid="%s" type="JOINT"><matrix sid="transform">%s</matrix>' % (name, name, name, identity) for name in bone_names])
+    bone_nodes += '</node>' * bone_count
+
+    with open(filepath, 'w') as f:
+        f.write("""<?xml version="1.0" encoding="utf-8"?>
+<COLLADA xmlns="http://www.collada.org/2005/11/COLLADASchema" version="1.4.1">
+<asset><unit name="meter" meter="1"/><up_axis>Z_UP</up_axis></asset>
+<library_geometries><geometry id="grid-mesh" name="grid"><mesh>
+<source id="grid-positions"><float_array id="grid-positions-array" count="%d">%s</float_array>
+<technique_common><accessor source="#grid-positions-array" count="%d" stride="3"/></technique_common></source>
+<source id="grid-normals"><float_array id="grid-normals-array" count="%d">%s</float_array>
+<technique_common><accessor source="#grid-normals-array" count="%d" stride="3"/></technique_common></source>
+<source id="grid-texcoords"><float_array id="grid-texcoords-array" count="%d">%s</float_array>
+<technique_common><accessor source="#grid-texcoords-array" count="%d" stride="2"/></technique_common></source>
+<vertices id="grid-vertices"><input semantic="POSITION" source="#grid-positions"/></vertices>
+<triangles count="%d">
+<input semantic="VERTEX" source="#grid-vertices" offset="0"/>
+<input semantic="NORMAL" source="#grid-normals" offset="1"/>
+<input semantic="TEXCOORD" source="#grid-texcoords" offset="2" set="0"/>
+<p>%s</p>
+</triangles></mesh></geometry></library_geometries>
+""" % (positions.size, format_array(positions), len(positions),
+       normals.size, format_array(normals), len(normals),
+       texcoords.size, format_array(texcoords), len(texcoords),
+       len(triangles), format_array(triangle_indices, '%d')))
+        f.write("""<library_controllers><controller id="Armature_grid-skin" name="Armature"><skin source="#grid-mesh">
+<bind_shape_matrix>%s</bind_shape_matrix>
+<source id="skin-joints"><Name_array id="skin-joints-array" count="%d">%s</Name_array>
+<technique_common><accessor source="#skin-joints-array" count="%d" stride="1"/></technique_common></source>
+<source id="skin-bind_poses"><float_array id="skin-bind_poses-array" count="%d">%s</float_array>
+<technique_common><accessor source="#skin-bind_poses-array" count="%d" stride="16"/></technique_common></source>
+<source id="skin-weights"><float_array id="skin-weights-array" count="%d">%s</float_array>
+<technique_common><accessor source="#skin-weights-array" count="%d" stride="1"/></technique_common></source>
+<joints><input semantic="JOINT" source="#skin-joints"/><input semantic="INV_BIND_MATRIX" source="#skin-bind_poses"/></joints>
+<vertex_weights count="%d">
+<input semantic="JOINT" source="#skin-joints" offset="0"/>
+<input semantic="WEIGHT" source="#skin-weights" offset="1"/>
+<vcount>%s</vcount>
+<v>%s</v>
+</vertex_weights></skin></controller></library_controllers>
+""" % (identity, bone_count, ' '.join(bone_names), bone_count, bone_count * 16, ' '.join([identity] * bone_count), bone_count,
+       weights.size, format_array(weights), weights.size, len(positions),
+       ' '.join([str(influence_count)] * len(positions)), format_array(vertex_weights, '%d')))
+        f.write("""<library_visual_scenes><visual_scene id="Scene" name="Scene">
+<node id="Armature" name="Armature" type="NODE"><matrix sid="transform">%s</matrix>%s</node>
+<node id="grid" name="grid" type="NODE"><matrix sid="transform">%s</matrix><instance_controller url="#Armature_grid-skin"/></node>
+</visual_scene></library_visual_scenes>
+</COLLADA>
+""" % (identity, bone_nodes, identity))
+    return len(positions)
+
+
+def get_loader_class(loader_name):
+    return LegacyCollada if 'LegacyCollada' == loader_name else Collada
+
+
+def compare_data(data, other, path='mesh_data'):
+    """
+    :return: path of the first different value, None if same.
+    """
+    if isinstance(data, dict) or isinstance(other, dict):
+        if not isinstance(data, dict) or not isinstance(other, dict) or set(data.keys()) != set(other.keys()):
+            return path
+        for key in data:
+            different_path = compare_data(data[key], other[key], '%s.%s' % (path, key))
+            if different_path is not None:
+                return different_path
+        return None
+
+    if isinstance(data, str) or isinstance(other, str) or data is None or other is None:
+        return None if data == other else path
+
+    try:
+        data_array = np.asarray(data, dtype=np.float64)
+        other_array = np.asarray(other, dtype=np.float64)
+    except (TypeError, ValueError):
+        # the list of the structures, e.g. geometry_datas
+        if type(data) not in (list, tuple) or type(other) not in (list, tuple) or len(data) != len(other):
+            return path
+        for i in range(len(data)):
+            different_path = compare_data(data[i], other[i], '%s[%d]' % (path, i))
+            if different_path is not None:
+                return different_path
+        return None
+
+    data, other = data_array, other_array
+    if 0 == data.size and 0 == other.size:
+        return None
+    if data.shape != other.shape or not np.allclose(data, other, atol=1e-5):
+        return path
+    return None
+
+
+def check_same_output(filepath):
+    legacy_mesh_data = LegacyCollada(filepath).get_mesh_data()
+    mesh_data = Collada(filepath).get_mesh_data()
+    different_path = compare_data(legacy_mesh_data, mesh_data)
+    assert different_path is None, "%s of %s is different from the legacy loader." % (different_path, filepath)
+
+
+def run_load(loader_name, filepath):
+    reset_peak_rss()
+    base_rss = get_peak_rss()
+    start_time = time.perf_counter()
+    mesh_data = get_loader_class(loader_name)(filepath).get_mesh_data()
+    load_time = (time.perf_counter() - start_time) * 1000.0
+    vertex_count = sum([len(geometry_data['positions']) for geometry_data in mesh_data['geometry_datas']])
+    print("%f %d %d" % (load_time, get_peak_rss() - base_rss, vertex_count))
+
+
+def measure(loader_name, filepath):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--load', loader_name, filepath],
+                                     stderr=subprocess.DEVNULL)
+    load_time, peak_rss, vertex_count = output.split()[-3:]
+    return float(load_time), int(peak_rss), int(vertex_count)
+
+
+if __name__ == '__main__':
+    if ['--load'] == sys.argv[1:2]:
+        run_load(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    vertex_counts = [int(x) for x in sys.argv[1:]] or [100000, 400000]
+    print("%12s %14s %12s %12s %14s %12s" % ('vertices', 'loader', 'size(MB)', 'load(ms)', 'peak rss(KB)', 'welded'))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for vertex_count in vertex_counts:
+            filepath = os.path.join(temp_dir, 'skinned_grid_%d.dae' % vertex_count)
+            write_skinned_grid_dae(filepath, vertex_count)
+            check_same_output(filepath)
+            for loader_name in ('LegacyCollada', 'Collada'):
+                load_time, peak_rss, welded_count = measure(loader_name, filepath)
+                print("%12d %14s %12.2f %12.2f %14d %12d" % (vertex_count, loader_name, os.path.getsize(filepath) / 1048576.0,
+                                                              load_time, peak_rss, welded_count))
@@ -0,0 +1,79 @@
+"""
+Push the commands from this process to a receiver process through CustomQueue,
+and compare the command per message with the batched messages and the pickled blobs with the shared memory.
+The receiver sends back the statistics of the queue when it gets the last command.
+
+usage : python benchmark/benchmark_command_queue.py [command_count] [batch_size]
+"""
+
+import logging
+import os
+import sys
+import time
+from multiprocessing import Process, Queue
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Common import logger, COMMAND, CustomQueue
+
+
+def receive_commands(cmd_queue, result_queue, command_count):
+    logger.setLevel(logging.WARNING)
+    checksum = 0
+    for i in range(command_count):
+        cmd, value = cmd_queue.get()
+        checksum += value[0] if isinstance(value, tuple) else int(value[-1])
+    statistics = cmd_queue.statistics
+    result_queue.put((checksum, statistics.message_count, statistics.get_average_latency(), statistics.max_latency))
+
+
+def run(command_count, batch_size=0, blob_size=0, shared_memory_threshold=None):
+    """
+    :return: elapsed time, checksum, message count, average latency, max latency
+    """
+    cmd_queue = CustomQueue(shared_memory_threshold=shared_memory_threshold)
+    result_queue = Queue()
+    process = Process(target=receive_commands, args=(cmd_queue, result_queue, command_count))
+    process.start()
+
+    blob = np.arange(blob_size, dtype=np.uint8) if 0 < blob_size else None
+    start_time = time.perf_counter()
+    if 0 < batch_size:
+        for start_index in range(0, command_count, batch_size):
+            with cmd_queue.batch():
+                for i in range(start_index, min(command_count, start_index + batch_size)):
+                    cmd_queue.put(COMMAND.TRANS_OBJECT_INFO, (i, 'StaticActor'))
+    else:
+        for i in range(command_count):
+            cmd_queue.put(COMMAND.TRANS_OBJECT_INFO, (i, 'StaticActor') if blob is None else blob)
+    result = result_queue.get()
+    elapsed_time = time.perf_counter() - start_time
+
+    process.join()
+    cmd_queue.close()
+    return (elapsed_time, ) + result
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    command_count = int(sys.argv[1]) if 1 < len(sys.argv) else 100000
+    batch_size = int(sys.argv[2]) if 2 < len(sys.argv) else 1000
+    blob_count = 50
+    blob_size = 4 * 1024 * 1024
+
+    print("%-26s %10s %10s %14s %12s %16s %16s" %
+          ('mode', 'commands', 'messages', 'commands/sec', 'time(ms)', 'avg latency(ms)', 'max latency(ms)'))
+    cases = [('command per message', command_count, dict()),
+             ('batch of %d' % batch_size, command_count, dict(batch_size=batch_size)),
+             ('pickled 4MB blob', blob_count, dict(blob_size=blob_size)),
+             ('shared memory 4MB blob', blob_count, dict(blob_size=blob_size, shared_memory_threshold=1024 * 1024))]
+    for mode, count, options in cases:
+        elapsed_time, checksum, message_count, average_latency, max_latency = run(count, **options)
+        if 'blob_size' not in options:
+            assert checksum == count * (count - 1) // 2
+        print("%-26s %10d %10d %14.0f %12.2f %16.3f %16.3f" %
+              (mode, count, message_count, count / elapsed_time, elapsed_time * 1000.0,
+               average_latency * 1000.0, max_latency * 1000.0))
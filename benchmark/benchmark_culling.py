@@ -0,0 +1,129 @@
+"""
+Compare the per-object culling path(gather_render_infos) with the batched CullingTable path,
+with and without the bounding volume hierarchy.
+
+usage : python benchmark/benchmark_culling.py [geometry_count ...]
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Render import BoundBox, CullingTable, gather_render_infos, view_frustum_culling_geometry, shadow_culling
+from PyEngine3D.Utilities import *
+
+
+class BenchmarkCamera:
+    def __init__(self):
+        self.transform = TransformObject()
+        # camera looks at -z with 90 degree fov.
+        self.frustum_vectors = np.array([[-1.0, 0.0, 1.0],
+                                         [1.0, 0.0, 1.0],
+                                         [0.0, 1.0, 1.0],
+                                         [0.0, -1.0, 1.0]], dtype=np.float32) / math.sqrt(2.0)
+
+
+class BenchmarkLight:
+    def __init__(self, shadow_distance=50.0):
+        self.shadow_view_projection = Matrix4()
+        ortho(self.shadow_view_projection,
+              -shadow_distance, shadow_distance,
+              -shadow_distance, shadow_distance,
+              -shadow_distance, shadow_distance)
+
+
+class BenchmarkActor:
+    def __init__(self, pos, size):
+        self.visible = True
+        self.bound_box_changed = True
+        bound_box = BoundBox(bound_min=Float3(*(pos - size)), bound_max=Float3(*(pos + size)))
+        self.geometry_bound_boxes = [bound_box, ]
+
+    def get_geometry_count(self):
+        return len(self.geometry_bound_boxes)
+
+    def get_geometry_bound_box(self, index):
+        return self.geometry_bound_boxes[index]
+
+    def get_geometry_bound_boxes(self):
+        return self.geometry_bound_boxes
+
+    def get_geometry(self, index):
+        return None
+
+    def get_geometry_data(self, index):
+        return None
+
+    def get_gl_call_list(self, index):
+        return None
+
+    def get_material_instance(self, index):
+        return None
+
+
+def create_actors(count, seed=0):
+    random = np.random.RandomState(seed)
+    positions = random.uniform(-200.0, 200.0, (count, 3)).astype(np.float32)
+    sizes = random.uniform(0.5, 2.0, (count, 1)).astype(np.float32)
+    return [BenchmarkActor(positions[i], sizes[i]) for i in range(count)]
+
+
+def measure(func, repeat):
+    func()  # warm up
+    start_time = time.perf_counter()
+    for i in range(repeat):
+        func()
+    return (time.perf_counter() - start_time) * 1000.0 / repeat
+
+
+def run_benchmark(geometry_count, repeat=5):
+    camera = BenchmarkCamera()
+    light = BenchmarkLight()
+    actors = create_actors(geometry_count)
+    culling_table = CullingTable()
+    bvh_culling_table = CullingTable(use_bvh=True)
+
+    result = dict()
+
+    def per_object():
+        solid_render_infos = []
+        shadow_render_infos = []
+        gather_render_infos(view_frustum_culling_geometry, camera, light, actors, solid_render_infos, None)
+        gather_render_infos(shadow_culling, camera, light, actors, shadow_render_infos, None)
+        result['per_object'] = (len(solid_render_infos), len(shadow_render_infos))
+
+    def batched():
+        solid_render_infos = []
+        shadow_render_infos = []
+        culling_table.update(actors)
+        culling_table.gather_render_infos(culling_table.view_frustum_culling(camera), solid_render_infos, None)
+        culling_table.gather_render_infos(culling_table.shadow_culling(light), shadow_render_infos, None)
+        result['batched'] = (len(solid_render_infos), len(shadow_render_infos))
+
+    def bvh():
+        solid_render_infos = []
+        shadow_render_infos = []
+        bvh_culling_table.update(actors)
+        bvh_culling_table.gather_render_infos(bvh_culling_table.view_frustum_culling(camera), solid_render_infos, None)
+        bvh_culling_table.gather_render_infos(bvh_culling_table.shadow_culling(light), shadow_render_infos, None)
+        result['bvh'] = (len(solid_render_infos), len(shadow_render_infos))
+
+    per_object_time = measure(per_object, repeat)
+    batched_time = measure(batched, repeat)
+    bvh_time = measure(bvh, repeat)
+    assert result['per_object'] == result['batched'] == result['bvh'], "culling results are different. %s" % result
+    return per_object_time, batched_time, bvh_time, result['batched']
+
+
+if __name__ == '__main__':
+    geometry_counts = [int(x) for x in sys.argv[1:]] or [1000, 10000, 50000]
+    print("%10s %16s %16s %16s %16s" % ('geometry', 'per object(ms)', 'batched(ms)', 'bvh(ms)', 'visible/shadow'))
+    for geometry_count in geometry_counts:
+        per_object_time, batched_time, bvh_time, counts = run_benchmark(geometry_count)
+        print("%10d %16.2f %16.2f %16.2f %16s" % (geometry_count, per_object_time, batched_time, bvh_time, "%d/%d" % counts))
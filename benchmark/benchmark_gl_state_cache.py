@@ -0,0 +1,124 @@
+"""
+Render the scene of a project with the actors through CoreManager and Renderer.render_actors,
+and compare the GL calls which are requested with the calls which are issued by GLStateCache.
+A window and a GL 4.3 context are required, so pygame or pyglet must be installed.
+
+usage : python benchmark/benchmark_gl_state_cache.py [actor_count ...]
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyEngine3D.App import CoreManager
+from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import OpenGLContext
+
+
+def get_call_counts(counters):
+    issued_count = sum(counter[0] for counter in counters.values())
+    skipped_count = sum(counter[1] for counter in counters.values())
+    return issued_count, skipped_count
+
+
+class RenderActorsCounter:
+    """
+    Wrap Renderer.render_actors and accumulate the counters of GLStateCache which are changed in the calls.
+    """
+    def __init__(self, renderer):
+        self.render_actors = renderer.render_actors
+        self.counters = {}  # { function name : [issued count, skipped count] }
+        renderer.render_actors = self
+
+    def clear(self):
+        self.counters = {}
+
+    def __call__(self, *args, **kwargs):
+        state_cache = OpenGLContext.state_cache
+        last_counters = {function_name: list(counter) for function_name, counter in state_cache.counters.items()}
+        result = self.render_actors(*args, **kwargs)
+        for function_name, counter in state_cache.counters.items():
+            last_counter = last_counters.get(function_name, [0, 0])
+            render_counter = self.counters.get(function_name)
+            if render_counter is None:
+                render_counter = self.counters[function_name] = [0, 0]
+            render_counter[0] += counter[0] - last_counter[0]
+            render_counter[1] += counter[1] - last_counter[1]
+        return result
+
+
+def print_counters(title, counters, frame_count):
+    issued_count, skipped_count = get_call_counts(counters)
+    requested_count = issued_count + skipped_count
+    print("%10s %14d %14d %14d %11.1f%%" % (title, requested_count // frame_count, issued_count // frame_count,
+                                              skipped_count // frame_count, skipped_count * 100.0 / max(1, requested_count)))
+    for function_name, (issued, skipped) in sorted(counters.items()):
+        print("%10s %-24s issued %8d skipped %8d" % ('', function_name, issued // frame_count, skipped // frame_count))
+
+
+def add_actors(core_manager, model_name, actor_count):
+    np.random.seed(actor_count)
+    scene_manager = core_manager.scene_manager
+    model = core_manager.resource_manager.get_model(model_name)
+    actors = []
+    for i in range(actor_count):
+        pos = (np.random.rand(3) - 0.5) * np.array([100.0, 10.0, 100.0])
+        actors.append(scene_manager.add_object(model=model, pos=pos))
+    return actors
+
+
+def run_frames(core_manager, frame_count):
+    game_backend = core_manager.game_backend
+    for frame in range(frame_count):
+        game_backend.update_event()
+        core_manager.update()
+
+
+if __name__ == '__main__':
+    frame_count = 10
+    warm_up_frame_count = 10
+    model_name = 'suzan'
+    actor_counts = [int(x) for x in sys.argv[1:]] or [100, 1000, 10000]
+
+    core_manager = CoreManager.instance()
+    if not core_manager.initialize(None, None, None, ""):
+        sys.exit(1)
+    logger.setLevel(logging.WARNING)
+    # every update renders a frame.
+    core_manager.vsync = False
+    render_actors_counter = RenderActorsCounter(core_manager.renderer)
+
+    for actor_count in actor_counts:
+        actors = add_actors(core_manager, model_name, actor_count)
+
+        # the first frames load the resources and compile the shaders.
+        run_frames(core_manager, warm_up_frame_count)
+
+        frame_counters = {}
+        render_actors_counter.clear()
+        start_time = time.perf_counter()
+        for frame in range(frame_count):
+            run_frames(core_manager, 1)
+            # the counters of the frame are moved to frame_counters by OpenGLContext.present.
+            for function_name, counter in OpenGLContext.state_cache.frame_counters.items():
+                frame_counter = frame_counters.get(function_name)
+                if frame_counter is None:
+                    frame_counter = frame_counters[function_name] = [0, 0]
+                frame_counter[0] += counter[0]
+                frame_counter[1] += counter[1]
+        elapsed_time = (time.perf_counter() - start_time) * 1000.0 / frame_count
+
+        print("actors %d, %s, frame time %.2f ms" % (actor_count, model_name, elapsed_time))
+        print("%10s %14s %14s %14s %12s" % ('', 'requested/frame', 'issued/frame', 'skipped/frame', 'reduction'))
+        print_counters('actors', render_actors_counter.counters, frame_count)
+        print_counters('frame', frame_counters, frame_count)
+
+        for actor in actors:
+            core_manager.scene_manager.delete_object(actor.name)
+
+    core_manager.exit()
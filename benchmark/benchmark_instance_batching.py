@@ -0,0 +1,68 @@
+"""
+Count the actor draw calls of the generated forest scenes with and without the instance batching of Renderer.render_actors.
+Each actor is a random model of the shared models, and a model has a geometry per material instance.
+
+usage : python benchmark/benchmark_instance_batching.py [actor_count ...]
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Common import logger
+from PyEngine3D.Render import RenderInfo, sort_render_infos, batch_render_infos
+
+
+class BenchmarkActor:
+    def __init__(self, instance_count=1):
+        self.instance_count = instance_count
+
+    def is_instancing(self):
+        return 1 < self.instance_count
+
+
+def create_render_infos(actor_count, model_count=12, geometry_count=2):
+    np.random.seed(actor_count)
+    geometries = [[object() for j in range(geometry_count)] for i in range(model_count)]
+    material_instances = [[object() for j in range(geometry_count)] for i in range(model_count)]
+    render_infos = []
+    for i in range(actor_count):
+        # a few actors have their own instances.
+        actor = BenchmarkActor(instance_count=4 if 0 == i % 100 else 1)
+        model_index = np.random.randint(0, model_count)
+        for j in range(geometry_count):
+            render_info = RenderInfo()
+            render_info.actor = actor
+            render_info.geometry = geometries[model_index][j]
+            render_info.material_instance = material_instances[model_index][j]
+            render_info.material = material_instances[model_index][j]
+            render_infos.append(render_info)
+    return render_infos
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    actor_counts = [int(x) for x in sys.argv[1:]] or [100, 1000, 10000]
+    print("%10s %14s %14s %14s %14s" % ('actors', 'render infos', 'draw calls', 'batched calls', 'batch(ms)'))
+    for actor_count in actor_counts:
+        render_infos = create_render_infos(actor_count)
+        sort_render_infos(render_infos)
+
+        start_time = time.perf_counter()
+        batchable_flags = [not x.actor.is_instancing() for x in render_infos]
+        start_indices, end_indices = batch_render_infos(render_infos, batchable_flags)
+        elapsed_time = (time.perf_counter() - start_time) * 1000.0
+
+        # every render info is drawn once and a batch has same geometry and material instance.
+        assert np.sum(end_indices - start_indices) == len(render_infos)
+        for start_index, end_index in zip(start_indices, end_indices):
+            batch = render_infos[start_index:end_index]
+            assert all(x.geometry is batch[0].geometry and x.material_instance is batch[0].material_instance for x in batch)
+
+        print("%10d %14d %14d %14d %14.2f" % (actor_count, len(render_infos), len(render_infos), len(start_indices), elapsed_time))
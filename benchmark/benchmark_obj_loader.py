@@ -0,0 +1,81 @@
+"""
+Compare the load time and the peak memory of OBJ with StreamingOBJ on the generated grid meshes.
+Every file is loaded in a new process.
+
+usage : python benchmark/benchmark_obj_loader.py [triangle_count ...]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.ResourceManager import OBJ, StreamingOBJ
+
+from benchmark_resource_container import get_peak_rss, reset_peak_rss
+
+
+def write_grid_obj(filepath, triangle_count):
+    """
+    :return: vertex count of the grid, the faces are v/vt/vn format.
+    """
+    grid_size = max(2, int(np.sqrt(triangle_count / 2.0)) + 1)
+    x, z = np.meshgrid(np.arange(grid_size, dtype=np.float32), np.arange(grid_size, dtype=np.float32))
+    x = x.reshape(-1)
+    z = z.reshape(-1)
+    y = np.sin(x * 0.1) * np.cos(z * 0.1)
+    vertex_index = np.arange(grid_size * grid_size).reshape(grid_size, grid_size) + 1
+    quads = np.stack([vertex_index[:-1, :-1], vertex_index[1:, :-1], vertex_index[1:, 1:], vertex_index[:-1, 1:]], axis=-1).reshape(-1, 4)
+
+    with open(filepath, 'w') as f:
+        f.write('o grid\n')
+        np.savetxt(f, np.stack([x, y, z], axis=-1), fmt='v %.4f %.4f %.4f')
+        np.savetxt(f, np.stack([x, z], axis=-1) / grid_size, fmt='vt %.4f %.4f')
+        f.write('vn 0.0 1.0 0.0\n')
+        f.write('usemtl grid\n')
+        triangles = np.concatenate([quads[:, :3], quads[:, [2, 3, 0]]])[:triangle_count]
+        corners = np.repeat(triangles, 2, axis=1).reshape(-1, 3, 2)
+        faces = np.concatenate([corners, np.ones((len(triangles), 3, 1), dtype=corners.dtype)], axis=-1).reshape(-1, 9)
+        np.savetxt(f, faces, fmt='f %d/%d/%d %d/%d/%d %d/%d/%d')
+    return grid_size * grid_size
+
+
+def run_load(loader_name, filepath):
+    reset_peak_rss()
+    base_rss = get_peak_rss()
+    start_time = time.perf_counter()
+    loader_class = OBJ if 'OBJ' == loader_name else StreamingOBJ
+    geometry_datas = loader_class(filepath, 1, True).get_geometry_data()
+    load_time = (time.perf_counter() - start_time) * 1000.0
+    vertex_count = sum([len(geometry_data['positions']) for geometry_data in geometry_datas])
+    print("%f %d %d" % (load_time, get_peak_rss() - base_rss, vertex_count))
+
+
+def measure(loader_name, filepath):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--load', loader_name, filepath],
+                                     stderr=subprocess.DEVNULL)
+    load_time, peak_rss, vertex_count = output.split()[-3:]
+    return float(load_time), int(peak_rss), int(vertex_count)
+
+
+if __name__ == '__main__':
+    if ['--load'] == sys.argv[1:2]:
+        run_load(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    triangle_counts = [int(x) for x in sys.argv[1:]] or [1000000, 5000000]
+    print("%12s %12s %12s %12s %14s %12s" % ('triangles', 'loader', 'size(MB)', 'load(ms)', 'peak rss(KB)', 'vertices'))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for triangle_count in triangle_counts:
+            filepath = os.path.join(temp_dir, 'grid_%d.obj' % triangle_count)
+            write_grid_obj(filepath, triangle_count)
+            for loader_name in ('OBJ', 'StreamingOBJ'):
+                load_time, peak_rss, vertex_count = measure(loader_name, filepath)
+                print("%12d %12s %12.2f %12.2f %14d %12d" % (triangle_count, loader_name, os.path.getsize(filepath) / 1048576.0,
+                                                              load_time, peak_rss, vertex_count))
@@ -0,0 +1,111 @@
+"""
+Compare the per actor uniform uploads of the old Renderer.render_actors with the frame level ObjectDataPacker.
+The calls are replayed against RecordingGL, so the time is the python overhead without the cost of the driver,
+the packed calls are one uniform per draw and three buffer uploads per frame.
+
+usage : python benchmark/benchmark_object_data.py [actor_count ...]
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from OpenGL.GL import GL_FALSE
+from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import RecordingGL
+from PyEngine3D.Render import ObjectDataPacker
+from PyEngine3D.Utilities import TransformObject
+
+BONE_COUNT = 64
+
+
+class BenchmarkActor:
+    def __init__(self, object_id, is_skeletal):
+        self.transform = TransformObject()
+        self.transform.set_pos(np.random.rand(3))
+        self.transform.update_transform()
+        self.object_id = object_id
+        self.object_color = np.random.rand(4).astype(np.float32)
+        self.animation_buffers = [np.random.rand(BONE_COUNT, 4, 4).astype(np.float32), ] if is_skeletal else []
+        self.prev_animation_buffers = [x.copy() for x in self.animation_buffers]
+
+    def get_object_id(self):
+        return self.object_id
+
+    def get_object_color(self):
+        return self.object_color
+
+    def is_instancing(self):
+        return False
+
+    def get_animation_buffer(self, index):
+        return self.animation_buffers[index]
+
+    def get_prev_animation_buffer(self, index):
+        return self.prev_animation_buffers[index]
+
+
+def legacy_bind_actors(gl, actors):
+    # the uniforms of Renderer.render_actors before the object datas.
+    for actor in actors:
+        gl.glUniform1i(0, actor.is_instancing())
+        gl.glUniformMatrix4fv(1, 1, GL_FALSE, actor.transform.matrix)
+        if actor.animation_buffers:
+            animation_buffer = actor.get_animation_buffer(0)
+            prev_animation_buffer = actor.get_prev_animation_buffer(0)
+            gl.glUniformMatrix4fv(2, len(animation_buffer), GL_FALSE, animation_buffer)
+            gl.glUniformMatrix4fv(3, len(prev_animation_buffer), GL_FALSE, prev_animation_buffer)
+
+
+def packed_bind_actors(gl, object_data_packer, actors):
+    object_data_packer.clear()
+    for actor in actors:
+        object_data_packer.add_actor(actor, 0 if actor.animation_buffers else None)
+    object_data_packer.pack()
+    gl.glBufferData(object_data_packer.object_datas)
+    gl.glBufferData(object_data_packer.bone_matrices)
+    gl.glBufferData(object_data_packer.prev_bone_matrices)
+    for actor in actors:
+        gl.glUniform1i(0, object_data_packer.get_object_index((actor, 0 if actor.animation_buffers else None)))
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    frame_count = 10
+    actor_counts = [int(x) for x in sys.argv[1:]] or [100, 1000, 10000]
+    print("%10s %16s %16s %14s %14s" % ('actors', 'legacy calls', 'packed calls', 'legacy(ms)', 'packed(ms)'))
+    for actor_count in actor_counts:
+        np.random.seed(actor_count)
+        actors = [BenchmarkActor(i, 0 == i % 4) for i in range(actor_count)]
+
+        legacy_gl = RecordingGL()
+        start_time = time.perf_counter()
+        for frame in range(frame_count):
+            legacy_gl.clear()
+            legacy_bind_actors(legacy_gl, actors)
+        legacy_time = (time.perf_counter() - start_time) * 1000.0 / frame_count
+
+        packed_gl = RecordingGL()
+        object_data_packer = ObjectDataPacker()
+        start_time = time.perf_counter()
+        for frame in range(frame_count):
+            packed_gl.clear()
+            packed_bind_actors(packed_gl, object_data_packer, actors)
+        packed_time = (time.perf_counter() - start_time) * 1000.0 / frame_count
+
+        # the packed datas must be same as the uniforms.
+        object_datas = object_data_packer.object_datas[:object_data_packer.object_count]
+        assert np.array_equal(object_datas['MODEL'], np.array([actor.transform.matrix for actor in actors]))
+        for actor in actors[::97]:
+            if actor.animation_buffers:
+                object_data = object_datas[object_data_packer.get_object_index((actor, 0))]
+                bone_offset = object_data['BONE_OFFSET']
+                assert np.array_equal(object_data_packer.bone_matrices[bone_offset:bone_offset + BONE_COUNT], actor.animation_buffers[0])
+
+        print("%10d %16d %16d %14.2f %14.2f" % (actor_count, len(legacy_gl.calls), len(packed_gl.calls), legacy_time, packed_time))
@@ -0,0 +1,135 @@
+"""
+Simulate cpu particle emitters without a GL context.
+Compare the per-particle objects(Particle) with the struct of arrays of Emitter.
+
+usage : python benchmark/benchmark_particle.py [particle_count ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Render.Effect import Emitter, Particle, SpawnVolume, VelocityType, AlignMode
+from PyEngine3D.Utilities import *
+
+
+class BenchmarkEffect:
+    def __init__(self):
+        self.transform = TransformObject()
+        self.transform.set_pos(Float3(1.0, 2.0, 3.0))
+        self.transform.update_transform(update_inverse_matrix=True)
+
+
+class BenchmarkParticleInfo:
+    def __init__(self, max_particle_count, align_mode=AlignMode.BILLBOARD):
+        self.name = 'benchmark_particle'
+        self.enable = True
+        self.enable_gpu_particle = False
+        # spawn max_particle_count particles during a life time
+        self.life_time = RangeVariable(min_value=1.0, max_value=2.0)
+        self.delay = RangeVariable(min_value=0.0, max_value=0.1)
+        self.spawn_term = 0.0
+        self.spawn_count = max(1, int(max_particle_count / 90))
+        self.spawn_end_time = -1.0
+        self.max_particle_count = max_particle_count
+        self.align_mode = align_mode
+        self.play_speed = 1.0
+        self.opacity = 1.0
+        self.fade_in = 0.2
+        self.fade_out = 0.2
+        self.cell_count = np.array([4, 4], dtype=np.int32)
+        self.spawn_volume_type = SpawnVolume.SPHERE
+        self.spawn_volume_info = Float3(1.0, 2.0, 1.0)
+        self.spawn_volume_abs_axis = [False, True, False]
+        self.spawn_volume_transform = TransformObject()
+        self.transform_rotation = RangeVariable(min_value=FLOAT3_ZERO, max_value=Float3(0.0, 0.0, 3.14))
+        self.transform_scale = RangeVariable(min_value=Float3(1.0, 1.0, 1.0), max_value=Float3(2.0, 2.0, 2.0))
+        self.velocity_type = VelocityType.SPAWN_DIRECTION
+        self.velocity_acceleration = -0.5
+        self.velocity_limit = RangeVariable(min_value=0.1, max_value=10.0)
+        self.velocity_position = RangeVariable(min_value=Float3(1.0, 1.0, 1.0), max_value=Float3(5.0, 5.0, 5.0))
+        self.velocity_rotation = RangeVariable(min_value=FLOAT3_ZERO, max_value=Float3(0.0, 0.0, 1.0))
+        self.velocity_scale = RangeVariable(min_value=FLOAT3_ZERO, max_value=Float3(0.1, 0.1, 0.1))
+        self.velocity_stretch = 1.0
+        self.force_gravity = 9.8
+        self.vector_field_position = Float3(0.0, 0.0, 0.0)
+        self.vector_field_rotation = Float3(0.0, 0.0, 0.0)
+        self.vector_field_scale = Float3(1.0, 1.0, 1.0)
+        self.world_matrix_data = np.zeros(max_particle_count, dtype=(np.float32, (4, 4)))
+        self.uvs_data = np.zeros(max_particle_count, dtype=(np.float32, 4))
+        self.sequence_opacity_data = np.zeros(max_particle_count, dtype=(np.float32, 4))
+
+
+def create_emitter(particle_count):
+    np.random.seed(0)
+    emitter = Emitter(BenchmarkEffect(), BenchmarkParticleInfo(particle_count))
+    emitter.play()
+    return emitter
+
+
+def run_soa(emitter, inv_view_origin, camera_position, dt):
+    emitter.update(dt)
+    return emitter.update_instance_data(inv_view_origin, camera_position)
+
+
+def run_per_particle(particles, particle_info, inv_view_origin, dt):
+    # the previous cpu particle path : update every Particle, then fill instance data one by one.
+    spawn_count = particle_info.spawn_count
+    draw_count = 0
+    for particle in particles:
+        if not particle.alive and 0 < spawn_count:
+            particle.spawn()
+            spawn_count -= 1
+        particle.update(dt)
+        if particle.is_renderable():
+            particle_info.world_matrix_data[draw_count][...] = np.dot(particle.transform.matrix, inv_view_origin)
+            particle_info.world_matrix_data[draw_count][3][...] = np.dot(particle.transform.matrix, particle.parent_matrix)[3]
+            particle_info.uvs_data[draw_count][0:2] = particle.sequence_uv
+            particle_info.uvs_data[draw_count][2:4] = particle.next_sequence_uv
+            particle_info.sequence_opacity_data[draw_count][0] = particle.sequence_ratio
+            particle_info.sequence_opacity_data[draw_count][1] = particle.final_opacity
+            draw_count += 1
+    return draw_count
+
+
+def measure(func, frame_count):
+    start_time = time.perf_counter()
+    draw_count = 0
+    for i in range(frame_count):
+        draw_count = func()
+    return (time.perf_counter() - start_time) * 1000.0 / frame_count, draw_count
+
+
+def run_benchmark(particle_count, warm_up_frames=120, frame_count=30, per_particle_limit=10000):
+    dt = 1.0 / 60.0
+    inv_view_origin = Matrix4()
+    camera_position = Float3(0.0, 0.0, 10.0)
+
+    emitter = create_emitter(particle_count)
+    for i in range(warm_up_frames):
+        run_soa(emitter, inv_view_origin, camera_position, dt)
+    soa_time, soa_draw_count = measure(lambda: run_soa(emitter, inv_view_origin, camera_position, dt), frame_count)
+
+    per_particle_time = None
+    if particle_count <= per_particle_limit:
+        effect = BenchmarkEffect()
+        particle_info = BenchmarkParticleInfo(particle_count)
+        particles = [Particle(effect, None, particle_info) for i in range(particle_count)]
+        for i in range(warm_up_frames):
+            run_per_particle(particles, particle_info, inv_view_origin, dt)
+        per_particle_time, draw_count = measure(lambda: run_per_particle(particles, particle_info, inv_view_origin, dt), frame_count)
+    return per_particle_time, soa_time, soa_draw_count
+
+
+if __name__ == '__main__':
+    particle_counts = [int(x) for x in sys.argv[1:]] or [1000, 10000, 50000, 100000]
+    print("%10s %20s %20s %12s" % ('particle', 'per particle(ms)', 'struct of arrays(ms)', 'draw count'))
+    for particle_count in particle_counts:
+        per_particle_time, soa_time, draw_count = run_benchmark(particle_count)
+        per_particle_time = "%.2f" % per_particle_time if per_particle_time is not None else 'skip'
+        print("%10d %20s %20.2f %12d" % (particle_count, per_particle_time, soa_time, draw_count))
@@ -0,0 +1,160 @@
+"""
+Compare the load time and the peak memory of the gzip compressed pickle files with the resource container.
+Every file is loaded in a new process, and then the loaded arrays are read once like the gl uploads.
+
+usage : python benchmark/benchmark_resource_container.py [texture_size ...]
+"""
+
+import gzip
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.ResourceManager import ChunkCompression, load_resource_container, save_resource_container
+
+
+def create_texture_data(size):
+    np.random.seed(0)
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    data = np.empty((size, size, 4), dtype=np.uint8)
+    data[..., 0] = gradient[np.newaxis, :]
+    data[..., 1] = gradient[:, np.newaxis]
+    data[..., 2] = np.random.randint(0, 32, (size, size), dtype=np.uint8)
+    data[..., 3] = 255
+    return dict(texture_type='Texture2D', width=size, height=size, depth=1, image_mode='RGBA', data=data.reshape(-1))
+
+
+def create_mesh_data(vertex_count):
+    # the geometry data of the mesh importers are the lists of vertices.
+    np.random.seed(0)
+    positions = np.random.uniform(-10.0, 10.0, (vertex_count, 3))
+    normals = np.random.uniform(-1.0, 1.0, (vertex_count, 3))
+    texcoords = np.random.uniform(0.0, 1.0, (vertex_count, 2))
+    geometry_data = dict(name='benchmark_mesh',
+                         positions=[position for position in positions],
+                         normals=[normal for normal in normals],
+                         texcoords=texcoords.tolist(),
+                         indices=np.random.randint(0, vertex_count, vertex_count * 3).tolist())
+    return dict(geometry_datas=[geometry_data, ], skeleton_datas=[], animation_datas=[])
+
+
+def get_array_data(mesh_data):
+    geometry_datas = []
+    for geometry_data in mesh_data['geometry_datas']:
+        geometry_data = dict(geometry_data)
+        for key in ('positions', 'normals', 'texcoords'):
+            geometry_data[key] = np.array(geometry_data[key], dtype=np.float32)
+        geometry_data['indices'] = np.array(geometry_data['indices'], dtype=np.uint32)
+        geometry_datas.append(geometry_data)
+    return dict(mesh_data, geometry_datas=geometry_datas)
+
+
+def save_gzip_pickle(filepath, data):
+    with gzip.open(filepath, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_gzip_pickle(filepath):
+    with gzip.open(filepath, 'rb') as f:
+        return pickle.load(f)
+
+
+def upload(data):
+    # same conversions as CreateTexture and CreateVertexArrayBuffer, then the driver reads every byte.
+    arrays = []
+    if 'geometry_datas' in data:
+        for geometry_data in data['geometry_datas']:
+            for key in ('positions', 'normals', 'texcoords'):
+                arrays.append(np.asarray(geometry_data[key], dtype=np.float32))
+            arrays.append(np.asarray(geometry_data['indices'], dtype=np.uint32))
+    else:
+        arrays.append(np.asarray(data['data'], dtype=np.uint8))
+
+    for array in arrays:
+        np.ascontiguousarray(array).view(np.uint8).max()
+
+
+def reset_peak_rss():
+    # linux only, the peak of the imports is cleared and then the peak is same as the current rss.
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def get_peak_rss():
+    """
+    :return: kilobytes
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_load(file_format, filepath):
+    reset_peak_rss()
+    base_rss = get_peak_rss()
+    start_time = time.perf_counter()
+    if 'gzip' == file_format:
+        data = load_gzip_pickle(filepath)
+    else:
+        data = load_resource_container(filepath)
+    upload(data)
+    load_time = (time.perf_counter() - start_time) * 1000.0
+    print("%f %d" % (load_time, get_peak_rss() - base_rss))
+
+
+def measure(file_format, filepath, repeat=3):
+    results = []
+    for i in range(repeat):
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--load', file_format, filepath],
+                                         stderr=subprocess.DEVNULL)
+        load_time, peak_rss = output.split()[-2:]
+        results.append((float(load_time), int(peak_rss)))
+    return min([result[0] for result in results]), max([result[1] for result in results])
+
+
+def run_benchmark(name, data, array_data, temp_dir):
+    gzip_filepath = os.path.join(temp_dir, name + '.gz')
+    save_gzip_pickle(gzip_filepath, data)
+    formats = [('gzip', gzip_filepath)]
+    for compression in (ChunkCompression.NONE, ChunkCompression.ZLIB):
+        filepath = os.path.join(temp_dir, '%s.%s' % (name, compression.name))
+        save_resource_container(filepath, array_data, compression)
+        formats.append((compression.name, filepath))
+
+    for file_format, filepath in formats:
+        load_time, peak_rss = measure(file_format, filepath)
+        print("%14s %10s %12.2f %12.2f %14d" % (name, file_format, os.path.getsize(filepath) / 1048576.0, load_time, peak_rss))
+
+
+if __name__ == '__main__':
+    if ['--load'] == sys.argv[1:2]:
+        run_load(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    texture_sizes = [int(x) for x in sys.argv[1:]] or [1024, 2048, 4096]
+    print("%14s %10s %12s %12s %14s" % ('resource', 'format', 'size(MB)', 'load(ms)', 'peak rss(KB)'))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for texture_size in texture_sizes:
+            texture_data = create_texture_data(texture_size)
+            run_benchmark('texture_%d' % texture_size, texture_data, texture_data, temp_dir)
+
+        for vertex_count in (10000, 100000):
+            mesh_data = create_mesh_data(vertex_count)
+            run_benchmark('mesh_%d' % vertex_count, mesh_data, get_array_data(mesh_data), temp_dir)
@@ -0,0 +1,135 @@
+"""
+Startup time of ResourceLoader.initialize on a generated resource tree without a GL context.
+Compare os.walk and reading every meta file with the cold and warm start of ResourceIndex.
+
+usage : python benchmark/benchmark_resource_index.py [resource_count ...]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Common import logger
+from PyEngine3D.ResourceManager import ResourceIndex
+from PyEngine3D.ResourceManager.ResourceManager import ResourceLoader
+from PyEngine3D.Utilities import get_modify_time_of_file
+
+
+class LegacyIndex:
+    # the previous startup : os.walk for every loader, then read every meta file.
+    sweeping = False
+
+    def walk(self, root_path):
+        return [os.path.join(dirname, filename) for dirname, dirnames, filenames in os.walk(root_path) for filename in filenames]
+
+    def exists(self, filepath):
+        return os.path.exists(filepath)
+
+    def get_modify_time(self, filepath):
+        return get_modify_time_of_file(filepath)
+
+    def load_meta_data(self, filepath):
+        if os.path.exists(filepath):
+            with open(filepath, 'r') as f:
+                return eval(f.read())
+        return None
+
+    def add_file(self, filepath):
+        pass
+
+    def set_meta_data(self, filepath, meta_data, stat=None):
+        pass
+
+    def remove_meta_data(self, filepath):
+        pass
+
+
+class BenchmarkCoreManager:
+    scene_manager = None
+    sound_manager = None
+
+    def send_resource_info(self, resource_info):
+        pass
+
+
+class BenchmarkResourceManager:
+    def __init__(self, engine_path, resource_index):
+        self.engine_path = engine_path
+        self.project_path = engine_path
+        self.core_manager = BenchmarkCoreManager()
+        self.resource_index = resource_index
+
+
+class BenchmarkMeshLoader(ResourceLoader):
+    resource_dir_name = 'Meshes'
+    resource_type_name = 'Mesh'
+    fileExt = '.mesh'
+    externalFileExt = dict(WaveFront='.obj')
+
+
+class BenchmarkTextureLoader(ResourceLoader):
+    resource_dir_name = 'Textures'
+    resource_type_name = 'Texture'
+    fileExt = '.texture'
+    externalFileExt = dict(PNG='.png')
+
+
+loader_classes = (BenchmarkMeshLoader, BenchmarkTextureLoader)
+
+
+def create_resource_tree(engine_path, resource_count, directory_count=32):
+    for loader_class in loader_classes:
+        for i in range(resource_count // len(loader_classes)):
+            sub_directory = 'dir_%d' % (i % directory_count)
+            resource_dir = os.path.join(engine_path, loader_class.resource_dir_name, sub_directory)
+            external_dir = os.path.join(engine_path, 'Externals', loader_class.resource_dir_name, sub_directory)
+            os.makedirs(resource_dir, exist_ok=True)
+            os.makedirs(external_dir, exist_ok=True)
+            filename = 'resource_%d' % i
+            with open(os.path.join(resource_dir, filename + loader_class.fileExt), 'wb') as f:
+                f.write(b'\x00' * 16)
+            with open(os.path.join(external_dir, filename + list(loader_class.externalFileExt.values())[0]), 'wb') as f:
+                f.write(b'\x00' * 16)
+
+
+def run_initialize(engine_path, resource_index):
+    resource_manager = BenchmarkResourceManager(engine_path, resource_index)
+    start_time = time.perf_counter()
+    if hasattr(resource_index, 'begin_sweep'):
+        resource_index.begin_sweep([engine_path])
+    for loader_class in loader_classes:
+        loader_class(resource_manager).initialize()
+    if hasattr(resource_index, 'end_sweep'):
+        resource_index.end_sweep()
+    return (time.perf_counter() - start_time) * 1000.0
+
+
+def run_benchmark(resource_count):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine_path = os.path.join(temp_dir, 'Resource')
+        index_filepath = os.path.join(engine_path, 'resource_index.cache')
+        create_resource_tree(engine_path, resource_count)
+
+        # the first startup writes the meta files.
+        run_initialize(engine_path, LegacyIndex())
+
+        legacy_time = run_initialize(engine_path, LegacyIndex())
+        cold_time = run_initialize(engine_path, ResourceIndex(index_filepath))
+        resource_index = ResourceIndex(index_filepath)
+        warm_time = run_initialize(engine_path, resource_index)
+        return legacy_time, cold_time, warm_time, resource_index
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    resource_counts = [int(x) for x in sys.argv[1:]] or [1000, 10000]
+    print("%10s %12s %12s %12s %12s %12s" % ('resource', 'os.walk(ms)', 'cold(ms)', 'warm(ms)', 'sweep(ms)', 'meta read'))
+    for resource_count in resource_counts:
+        legacy_time, cold_time, warm_time, resource_index = run_benchmark(resource_count)
+        print("%10d %12.2f %12.2f %12.2f %12.2f %12d" % (resource_count, legacy_time, cold_time, warm_time,
+                                                          resource_index.sweep_time * 1000.0, resource_index.read_meta_count))
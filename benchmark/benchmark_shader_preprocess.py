@@ -0,0 +1,265 @@
+"""
+Preprocessing time of every shader in Resource/Shaders with Shader.generate_shader_codes.
+Compare the previous preprocessor, which reads every include file again for each shader stage,
+with the tokenized include cache on the cold and warm start.
+
+usage : python benchmark/benchmark_shader_preprocess.py [round ...]
+"""
+
+import codecs
+import logging
+import os
+import re
+import sys
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Common import logger
+from PyEngine3D.OpenGLContext import Shader, ShaderCompileOption, default_compile_option
+from PyEngine3D.OpenGLContext.Shader import reComment, reMacroStart, reVariable, reVersion, reInclude, texture_targets
+
+
+shader_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Resource', 'Shaders')
+shader_version = "#version 430 core"
+
+
+class LegacyShader(Shader):
+    def __parsing_final_code__(self, is_engine_resource, engine_shader_directory, project_shader_directory, shader_type_name, shader_version, compile_option, external_macros={}):
+        if self.shader_code == "" or self.shader_code is None:
+            return ""
+
+        # remove comment block
+        shader_code = re.sub(reComment, "", self.shader_code)
+        code_lines = shader_code.splitlines()
+
+        # combine macro
+        combined_macros = OrderedDict()
+        # default macro
+        for macro in self.default_macros:
+            combined_macros[macro] = self.default_macros[macro]
+        # shader type macro
+        combined_macros[shader_type_name] = "1"
+
+        # external macro
+        if external_macros is None:
+            external_macros = {}
+
+        for macro in external_macros:
+            if external_macros[macro] is None or external_macros[macro] == '':
+                combined_macros[macro] = 0
+            else:
+                combined_macros[macro] = external_macros[macro]
+
+        # insert shader version - ex) #version 430 core
+        final_code_lines = [shader_version, "# extension GL_EXT_texture_array : enable"]
+
+        # insert defines to final code
+        for macro in combined_macros:
+            final_code_lines.append("#define %s %s" % (macro, str(combined_macros[macro])))
+
+        # global texture function
+        if ShaderCompileOption.USE_GLOBAL_TEXTURE_FUNCTION in compile_option:
+            final_code_lines.append("#if __VERSION__ >= 130")
+            # ex) replace texture2D -> texutre, textureCubeLod -> textureLod
+            for texture_target in texture_targets:
+                if "Lod" in texture_target:
+                    final_code_lines.append("#define %s textureLod" % texture_target)
+                elif "Grad" in texture_target:
+                    final_code_lines.append("#define %s textureGrad" % texture_target)
+                else:
+                    final_code_lines.append("#define %s texture" % texture_target)
+            final_code_lines.append("#endif")
+
+        # insert version as comment
+        include_files = dict()  # { 'filename': uuid }
+
+        # do parsing
+        line_num = 0
+        macro_depth = 0
+        macro_result = [True, ]
+        macro_code_remove = True
+        while line_num < len(code_lines):
+            code = code_lines[line_num]
+            line_num += 1
+
+            # remove comment
+            if "//" in code:
+                code = code.split("//")[0]
+
+            # macro parsing
+            m = re.search(reMacroStart, code)
+            if m is not None:
+                macro, expression = m.groups()
+                expression = expression.strip()
+                if macro == 'define' or macro == 'undef':
+                    define_expression = expression.split('(')[0].strip()
+                    if ' ' in define_expression:
+                        define_name, define_value = define_expression.split(' ', 1)
+                    else:
+                        define_name, define_value = define_expression, None
+
+                    # check external macro
+                    if macro == 'define' and define_name in external_macros:
+                        continue  # ignore legacy macro
+
+                    if macro == 'define' and define_name not in combined_macros:
+                        combined_macros[define_name] = define_value
+                    elif macro == 'undef' and define_name in combined_macros:
+                        combined_macros.pop(define_name)
+                elif macro == 'ifdef':
+                    macro_depth += 1
+                    if expression in combined_macros:
+                        macro_result.append(True)
+                    else:
+                        macro_result.append(False)
+                elif macro == 'ifndef':
+                    macro_depth += 1
+                    if expression not in combined_macros:
+                        macro_result.append(True)
+                    else:
+                        macro_result.append(False)
+                elif macro == 'if' or macro == 'elif' and not macro_result[macro_depth]:
+                    variables = re.findall(reVariable, expression)
+                    variables.sort(key=lambda x: len(x), reverse=True)
+                    for variable in variables:
+                        if variable in combined_macros:
+                            while True:
+                                final_value = combined_macros[variable]
+                                if final_value not in combined_macros:
+                                    break
+                                variable = final_value
+                            expression = re.sub(reVariable, str(final_value), expression, 1)
+                    expression = expression.replace('&&', ' and ')
+                    expression = expression.replace('||', ' or ')
+                    # expression = re.sub('\!?!\=', 'not ', expression)
+                    # Important : To avoid errors, convert the undecalred variables to zero.
+                    expression = re.sub(reVariable, '0', expression)
+                    result = True if eval(expression) else False
+                    if macro == 'if':
+                        macro_depth += 1
+                        macro_result.append(result)
+                    elif macro == 'elif':
+                        macro_result[macro_depth] = result
+                elif macro == 'else':
+                    macro_result[macro_depth] = not macro_result[macro_depth]
+                elif macro == 'endif':
+                    macro_depth -= 1
+                    macro_result.pop()
+            # be in failed macro block. continue
+            elif not macro_result[macro_depth]:
+                if not macro_code_remove:
+                    # make comment
+                    final_code_lines.append("// " + code)
+                continue
+
+            # is version code?
+            m = re.search(reVersion, code)
+            if m is not None:
+                version_code = m.groups()[0].strip()
+                if final_code_lines[0] == "" or version_code > final_code_lines[0]:
+                    final_code_lines[0] = version_code
+                continue
+
+            # find include block
+            m = re.search(reInclude, code)
+            if m is not None:
+                is_include_file_exists = False
+                include_file_in_engine = os.path.join(engine_shader_directory, m.groups()[0])
+                include_file_in_project = os.path.join(project_shader_directory, m.groups()[0])
+                if is_engine_resource:
+                    if os.path.exists(include_file_in_engine):
+                        include_file = include_file_in_engine
+                        is_include_file_exists = True
+                    else:
+                        include_file = include_file_in_project
+                else:
+                    if os.path.exists(include_file_in_project):
+                        include_file = include_file_in_project
+                        is_include_file_exists = True
+                    else:
+                        include_file = include_file_in_engine
+
+                # insert include code
+                valid = False
+                if is_include_file_exists or os.path.exists(include_file):
+                    try:
+                        f = codecs.open(include_file, mode='r', encoding='utf-8')
+                        include_source = f.read()
+                        # remove comment block
+                        include_source = re.sub(reComment, "", include_source)
+                        include_code_lines = include_source.splitlines()
+                        f.close()
+                        valid = True
+                    except BaseException:
+                        logger.error(traceback.format_exc())
+
+                    if valid:
+                        if include_file in include_files:
+                            unique_id = include_files[include_file]
+                        else:
+                            unique_id = "UUID_" + str(uuid.uuid3(uuid.NAMESPACE_DNS, include_file)).replace("-", "_")
+                            include_files[include_file] = unique_id
+
+                            if include_file not in self.include_files:
+                                self.include_files.append(include_file)
+                        # insert included code
+                        final_code_lines.append("//------------ INCLUDE -------------//")
+                        final_code_lines.append("// " + code)  # include comment
+                        include_code_lines.insert(0, "#ifndef %s" % unique_id)
+                        include_code_lines.insert(1, "#define %s" % unique_id)
+                        include_code_lines.append("#endif /* %s */" % unique_id)
+                        code_lines = include_code_lines + code_lines[line_num:]
+                        line_num = 0
+
+                if not valid:
+                    logger.error("Shader parsing error.\n\t--> Cannot open %s file." % include_file)
+                continue
+            # append code block
+            final_code_lines.append(code)
+        return '\n'.join(final_code_lines)
+
+
+def load_shaders(shader_class):
+    shaders = []
+    for dirname, dirnames, filenames in os.walk(shader_directory):
+        for filename in filenames:
+            if filename.endswith('.glsl'):
+                with codecs.open(os.path.join(dirname, filename), mode='r', encoding='utf-8') as f:
+                    shaders.append(shader_class(filename, f.read()))
+    return shaders
+
+
+def preprocess_shaders(shaders, macros_list):
+    start_time = time.perf_counter()
+    results = []
+    for shader in shaders:
+        for macros in macros_list:
+            results.append(shader.generate_shader_codes(True, shader_directory, shader_directory, shader_version,
+                                                        default_compile_option, macros))
+    return (time.perf_counter() - start_time) * 1000.0, results
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    rounds = [int(x) for x in sys.argv[1:]] or [1, 4]
+    print("%8s %8s %12s %12s %12s %12s %10s" % ('shaders', 'macros', 'legacy(ms)', 'cold(ms)', 'warm(ms)', 'include read', 'same code'))
+    for round_count in rounds:
+        # the same shaders with the different macro sets, like the materials of a project.
+        macros_list = [dict(), ] + [dict(SKELETAL=1, TRANSPARENT_MATERIAL=i % 2, BENCHMARK_MACRO=i) for i in range(round_count - 1)]
+
+        legacy_time, legacy_results = preprocess_shaders(load_shaders(LegacyShader), macros_list)
+
+        Shader.include_cache.clear()
+        Shader.include_cache.read_count = 0
+        cold_time, results = preprocess_shaders(load_shaders(Shader), macros_list)
+        read_count = Shader.include_cache.read_count
+        warm_time, warm_results = preprocess_shaders(load_shaders(Shader), macros_list)
+
+        print("%8d %8d %12.2f %12.2f %12.2f %12d %10s" % (len(results) // len(macros_list), len(macros_list),
+                                                          legacy_time, cold_time, warm_time, read_count,
+                                                          legacy_results == results == warm_results))
@@ -0,0 +1,97 @@
+"""
+Compare SplineData.resampling with the previous loop over the samples on the generated splines,
+and measure the arc length lookups of the followers.
+
+usage : python benchmark/benchmark_spline.py [control_point_count ...]
+"""
+
+import copy
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Common import logger
+from PyEngine3D.Render.Spline import SplineData, SplinePoint
+from PyEngine3D.Utilities import Float3, getCubicBezierCurvePoint
+
+
+def legacy_resampling(spline_points, resample_count):
+    # the previous implementation
+    resampling_positions = np.zeros(resample_count, dtype=(np.float32, 3))
+    point_count = len(spline_points)
+    total_time = sum([spline_points[i].point_time for i in range(1, len(spline_points), 1)])
+    key_frames = [spline_point.point_time for spline_point in spline_points]
+    key_frames[0] = 0.0
+    key_frames = [sum(key_frames[:i+1]) for i in range(len(key_frames))]
+
+    point_index = 0
+    resample_pos = 0.0
+    resample_step = total_time / (resample_count - 1)
+    for i in range(resample_count):
+        while True:
+            if key_frames[point_index] <= resample_pos <= key_frames[point_index + 1]:
+                break
+            if (point_count - 2) <= point_index:
+                break
+            point_index += 1
+
+        spline_point = spline_points[point_index]
+        next_spline_point = spline_points[point_index + 1]
+        time_range = key_frames[point_index + 1] - key_frames[point_index]
+        t = min(1.0, max(0.0, (resample_pos - key_frames[point_index]) / time_range))
+
+        resampling_positions[i][...] = getCubicBezierCurvePoint(
+            spline_point.position,
+            spline_point.position + spline_point.control_point,
+            next_spline_point.position - next_spline_point.control_point,
+            next_spline_point.position,
+            t
+        )
+
+        resample_pos = min(total_time, resample_pos + resample_step)
+    return resampling_positions
+
+
+def create_spline_points(point_count):
+    np.random.seed(point_count)
+    positions = np.cumsum(np.random.uniform(-1.0, 1.0, (point_count, 3)), axis=0).astype(np.float32)
+    control_points = np.random.uniform(-0.5, 0.5, (point_count, 3)).astype(np.float32)
+    point_times = np.random.uniform(0.5, 2.0, point_count)
+    return [SplinePoint(Float3(*positions[i]), Float3(*control_points[i]), float(point_times[i])) for i in range(point_count)]
+
+
+def measure(func, *args, repeat=3):
+    elapsed_times = []
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        result = func(*args)
+        elapsed_times.append(time.perf_counter() - start_time)
+    return min(elapsed_times) * 1000.0, result
+
+
+if __name__ == '__main__':
+    logger.setLevel(logging.WARNING)
+    follower_count = 100000
+    point_counts = [int(x) for x in sys.argv[1:]] or [100, 1000, 10000]
+    print("%10s %10s %12s %14s %10s %12s %16s" % ('points', 'samples', 'legacy(ms)', 'vectorized(ms)', 'speedup', 'max diff',
+                                                  '%dk lookups(ms)' % (follower_count // 1000)))
+    for point_count in point_counts:
+        spline_points = create_spline_points(point_count)
+        resample_count = point_count * 16
+        spline_data = SplineData('benchmark', spline_points=copy.deepcopy(spline_points), resample_count=2)
+
+        legacy_time, legacy_positions = measure(legacy_resampling, spline_points, resample_count, repeat=1)
+        vectorized_time, result = measure(spline_data.resampling, resample_count)
+
+        distances = np.random.uniform(0.0, spline_data.get_length(), follower_count)
+        lookup_time, result = measure(spline_data.get_positions_by_distance, distances)
+        print("%10d %10d %12.2f %14.2f %9.1fx %12.6f %16.2f" % (point_count, resample_count, legacy_time, vectorized_time,
+                                                             legacy_time / vectorized_time,
+                                                             np.max(np.abs(legacy_positions - spline_data.resampling_positions)),
+                                                             lookup_time))
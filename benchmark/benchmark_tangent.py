@@ -0,0 +1,79 @@
+"""
+Compare compute_tangent with the previous loop over the faces on the generated grid meshes.
+
+usage : python benchmark/benchmark_tangent.py [vertex_count ...]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyEngine3D.App
+from PyEngine3D.Utilities import compute_tangent, normalize, WORLD_UP
+
+
+def legacy_compute_tangent(is_triangle_mode, positions, texcoords, normals, indices):
+    # the previous implementation, the tangent of the last face is written to the vertices.
+    tangents = np.array([[1.0, 0.0, 0.0], ] * len(normals), dtype=np.float32)
+    face_vertex_count = 3 if is_triangle_mode else 4
+    for i in range(0, len(indices), face_vertex_count):
+        i0, i1, i2 = indices[i:i + 3]
+        deltaPos_0_1 = positions[i1] - positions[i0]
+        deltaPos_0_2 = positions[i2] - positions[i0]
+        deltaUV_0_1 = texcoords[i1] - texcoords[i0]
+        deltaUV_0_2 = texcoords[i2] - texcoords[i0]
+        r = deltaUV_0_1[0] * deltaUV_0_2[1] - deltaUV_0_1[1] * deltaUV_0_2[0]
+        r = (1.0 / r) if r != 0.0 else 0.0
+
+        tangent = (deltaPos_0_1 * deltaUV_0_2[1] - deltaPos_0_2 * deltaUV_0_1[1]) * r
+        tangent = normalize(tangent)
+
+        # invalid tangent
+        if 0.0 == np.dot(tangent, tangent):
+            avg_normal = normalize(normals[i0] + normals[i1] + normals[i2])
+            tangent = np.cross(avg_normal, WORLD_UP)
+
+        for j in range(face_vertex_count):
+            tangents[indices[i + j]] = tangent
+    return tangents
+
+
+def create_grid_mesh(vertex_count, is_triangle_mode=True):
+    grid_size = max(2, int(np.sqrt(vertex_count)))
+    x, z = np.meshgrid(np.linspace(-1.0, 1.0, grid_size), np.linspace(-1.0, 1.0, grid_size))
+    positions = np.stack([x, np.zeros_like(x), z], axis=-1).reshape(-1, 3).astype(np.float32)
+    normals = np.tile(np.array([0.0, 1.0, 0.0], dtype=np.float32), (len(positions), 1))
+    texcoords = (positions[:, [0, 2]] * 0.5 + 0.5).astype(np.float32)
+    vertex_index = np.arange(grid_size * grid_size).reshape(grid_size, grid_size)
+    quads = np.stack([vertex_index[:-1, :-1], vertex_index[1:, :-1], vertex_index[1:, 1:], vertex_index[:-1, 1:]], axis=-1).reshape(-1, 4)
+    if is_triangle_mode:
+        indices = np.concatenate([quads[:, :3], quads[:, [2, 3, 0]]], axis=-1)
+    else:
+        indices = quads
+    return positions, texcoords, normals, indices.reshape(-1).astype(np.uint32)
+
+
+def measure(func, *args, repeat=3):
+    elapsed_times = []
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        result = func(*args)
+        elapsed_times.append(time.perf_counter() - start_time)
+    return min(elapsed_times) * 1000.0, result
+
+
+if __name__ == '__main__':
+    vertex_counts = [int(x) for x in sys.argv[1:]] or [10000, 100000, 1000000]
+    print("%12s %8s %14s %14s %10s %12s" % ('vertices', 'mode', 'legacy(ms)', 'vectorized(ms)', 'speedup', 'max diff'))
+    for vertex_count in vertex_counts:
+        for is_triangle_mode in (True, False):
+            mesh = create_grid_mesh(vertex_count, is_triangle_mode)
+            legacy_time, legacy_tangents = measure(legacy_compute_tangent, is_triangle_mode, *mesh, repeat=1)
+            vectorized_time, tangents = measure(compute_tangent, is_triangle_mode, *mesh)
+            print("%12d %8s %14.2f %14.2f %9.1fx %12.6f" % (vertex_count, 'triangle' if is_triangle_mode else 'quad',
+                                                           legacy_time, vectorized_time, legacy_time / vectorized_time,
+                                                           np.max(np.abs(legacy_tangents - tangents))))
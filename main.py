@@ -68,8 +68,9 @@ def run(editor=GUIEditor.QT, project_filename=""):
 
     # other process - GUIEditor
     if editor != GUIEditor.CLIENT_MODE:
-        appCmdQueue = CustomQueue()
-        uiCmdQueue = CustomQueue()
+        # the large datas like the previews are sent by the shared memory.
+        appCmdQueue = CustomQueue(shared_memory_threshold=1024 * 1024)
+        uiCmdQueue = CustomQueue(shared_memory_threshold=1024 * 1024)
         pipe1, pipe2 = CustomPipe()
 
         # Select GUI backend
@@ -0,0 +1,23 @@
+"""
+Precompile the shader permutations of the materials and material instances without a GL context.
+
+usage : python precompile_shaders.py [project_path] [--processes N]
+"""
+
+import argparse
+import sys
+
+import PyEngine3D.App
+from PyEngine3D.ResourceManager.ShaderPrecompiler import ShaderPrecompiler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompile the shader permutations without a GL context.")
+    parser.add_argument('project_path', nargs='?', default="", help="project directory, the engine resources are precompiled if empty.")
+    parser.add_argument('--processes', type=int, default=None, help="precompile process count, default is the cpu count.")
+    args = parser.parse_args()
+
+    shader_precompiler = ShaderPrecompiler(project_path=args.project_path, process_count=args.processes)
+    result = shader_precompiler.precompile()
+    print("\n".join(shader_precompiler.get_report()))
+    sys.exit(0 if result else 1)
@@ -0,0 +1,44 @@
+"""
+Run the simulation of a project without a window and a GL context, and print the frame times.
+The scene logic, scripts, animations and culling run at the fixed delta, so the runs of same inputs are deterministic.
+
+usage : python run_headless.py [project_filename] [--frames N] [--fixed-delta SECONDS | --unlocked] [--seed N] [--input FILE]
+"""
+
+import argparse
+import json
+import sys
+
+from PyEngine3D.App import CoreManager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulation without a window and a GL context.")
+    parser.add_argument('project_filename', nargs='?', default="", help="project file, the default project is used if empty.")
+    parser.add_argument('--frames', type=int, default=600, help="frame count to run, run until the quit event if 0.")
+    parser.add_argument('--fixed-delta', type=float, default=1.0 / 60.0, help="delta time of a frame in seconds.")
+    parser.add_argument('--unlocked', action='store_true', help="use the elapsed time instead of the fixed delta.")
+    parser.add_argument('--seed', type=int, default=0, help="random seed.")
+    parser.add_argument('--input', default="", help='json file of the input events, [{"frame": 0, "event": "KEYDOWN", "value": "W"}, ...]')
+    args = parser.parse_args()
+
+    input_events = []
+    if args.input:
+        with open(args.input, 'r') as f:
+            input_events = json.load(f)
+
+    headless_options = dict(fixed_delta=None if args.unlocked else args.fixed_delta,
+                            max_frame_count=args.frames,
+                            input_events=input_events,
+                            random_seed=args.seed)
+
+    core_manager = CoreManager.instance()
+    if not core_manager.initialize(None, None, None, args.project_filename, headless_options=headless_options):
+        sys.exit(1)
+
+    game_backend = core_manager.game_backend
+    core_manager.run()
+
+    report = game_backend.get_frame_time_report()
+    print("frames %d, total %.2f ms, avg %.3f ms, min %.3f ms, max %.3f ms, p95 %.3f ms" %
+          (report['frame_count'], report['total'], report['average'], report['min'], report['max'], report['p95']))